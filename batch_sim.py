@@ -0,0 +1,567 @@
+"""
+Simulateur vectorisé (NumPy) : fait avancer N parties en parallèle, tick par tick.
+
+Chaque tableau contient une valeur par partie (ou par partie et par fantôme).
+Les règles reproduisent le cœur de step() sans équipement ni mode aventure :
+Pacman.update, Ghost.update, points, pacgommes, collisions, vies et
+progression des niveaux de start_next_level / start_game_with_difficulty, avec les
+fantômes supplémentaires de chaque difficulté (add_difficulty_ghosts).
+Les fantômes rose, violet et orange ont leur personnalité (ghost_target), avec le
+prochain pas lu dans la table des distances. Restent simplifiés : la poursuite des
+rouges et la fuite (les deux directions qui rapprochent ou éloignent de Pacman,
+sans le champ partagé de PursuitField) et les yeux (en ligne droite vers la base,
+sans get_home_route).
+Pacman suit une politique scriptée : "gourmand" (va vers un point voisin s'il
+y en a un) ou "aleatoire" (change de direction au hasard de temps en temps).
+
+Usage: python3 batch_sim.py [nombre_de_parties] [difficulté]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from pacman import (
+    AHEAD_CELLS, AMBUSH_CELLS, BLUE, RED, COMPACT_MAZES, DIRECTION_BITS, GHOST_PERSONALITIES, GHOST_REGISTRY,
+    GRID_WIDTH, GRID_HEIGHT, MAZES, MAX_LIVES, NO_DIRECTION, SCATTER_DISTANCE, VULNERABLE_DURATION, get_distance_table,
+    add_difficulty_ghosts, get_junctions, get_patrol_tour, start_game_with_difficulty, start_next_level,
+)
+
+# Directions : 0 = immobile, puis droite, gauche, bas, haut
+DIRECTIONS = np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int8)
+DIR_DX = DIRECTIONS[:, 0].astype(np.int16)
+DIR_DY = DIRECTIONS[:, 1].astype(np.int16)
+OPPOSITE = np.array([0, 2, 1, 4, 3], dtype=np.int8)
+NONE, RIGHT, LEFT, DOWN, UP = 0, 1, 2, 3, 4
+
+# Comportements des fantômes (selon la couleur)
+GHOST_BLUE = 0  # Suit son chemin prédéfini
+GHOST_RED = 1  # Poursuit Pacman, une case sur deux
+GHOST_OTHER = 2  # Se déplace au hasard
+GHOST_AHEAD = 3  # Rose : vise quelques cases devant Pacman
+GHOST_AMBUSH = 4  # Violet : vise le symétrique de sa base par rapport à un point devant Pacman
+GHOST_CORNER = 5  # Orange : poursuit Pacman de loin, retourne dans son coin de près
+PERSONALITY_KINDS = {'devant': GHOST_AHEAD, 'embuscade': GHOST_AMBUSH, 'coin': GHOST_CORNER}
+ROSE = (255, 192, 203)
+
+MAX_GHOSTS = 5  # 2 fantômes par niveau + les 3 fantômes orange du mode "hardcore"
+LAST_LEVEL = 24  # Le jeu est gagné en arrivant au niveau 24
+TRANSITION_TICKS = 60
+RESPAWN_TICKS = 60
+SPAWN_INVINCIBILITY = 30
+
+# Paramètres de départ de start_game_with_difficulty : (niveau, vies)
+DIFFICULTIES = {
+    "facile": (1, 5),
+    "moyen": (3, 2),
+    "difficile": (1, 1),
+    "hardcore": (5, 1),
+}
+# Seuil de jetons pour gagner une vie (pacgommes) / pour manger un fantôme
+JETON_THRESHOLDS = {"facile": 100, "moyen": 200, "difficile": 1000, "hardcore": 2000}
+GHOST_JETON_THRESHOLDS = {"facile": 100, "moyen": 200, "difficile": 1000, "hardcore": 200}
+
+
+def _sign(values):
+    return np.sign(values).astype(np.int16)
+
+
+def _build_level_table(difficulty):
+    """Composition des fantômes pour une difficulté : au départ (start_game_with_difficulty) et en
+    arrivant à chaque niveau (start_next_level puis add_difficulty_ghosts, comme dans step())"""
+    rng = random.Random(0)  # Seules les positions et les couleurs sont gardées
+
+    def composition(ghosts):
+        GHOST_REGISTRY.release_all(ghosts)
+        return [(ghost.x, ghost.y, ghost.color, ghost.path_index) for ghost in ghosts]
+
+    start = composition(start_game_with_difficulty(difficulty, {}, [], 0, [], rng)[2])
+    table = {}
+    for level in range(1, LAST_LEVEL + 1):
+        maze, _, ghosts = start_next_level(level, rng=rng)
+        add_difficulty_ghosts(ghosts, maze, difficulty, level, rng)
+        table[level] = composition(ghosts)
+    return start, table
+
+
+def _ghost_kind(color):
+    if color == BLUE:
+        return GHOST_BLUE
+    if color == RED:
+        return GHOST_RED
+    if color in GHOST_PERSONALITIES:
+        return PERSONALITY_KINDS[GHOST_PERSONALITIES[color]]
+    return GHOST_OTHER
+
+
+class BatchSimulator:
+    """N parties de Pacman simulées en même temps avec des tableaux NumPy"""
+
+    def __init__(self, n_games, difficulty="facile", seed=None, policy="gourmand", turn_probability=0.1):
+        self.n = n_games
+        self.difficulty = difficulty
+        self.rng = np.random.default_rng(seed)
+        self.policy = policy
+        self.turn_probability = turn_probability
+        self.jeton_threshold = JETON_THRESHOLDS.get(difficulty, 200)
+        self.ghost_jeton_threshold = GHOST_JETON_THRESHOLDS.get(difficulty, 200)
+        self.lives_from_jetons = difficulty not in ("difficile", "hardcore")
+
+        # Labyrinthes de référence : murs et contenu initial (points, pacgommes)
+        self.walls = np.array([[[cell == 1 for cell in row] for row in maze] for maze in MAZES], dtype=bool)
+        self.initial_cells = np.array(MAZES, dtype=np.uint8)
+        # Directions ouvertes depuis chaque case, lues dans la table des labyrinthes compacts
+        masks = np.array([np.frombuffer(bytes(maze.open_dirs), dtype=np.uint8) for maze in COMPACT_MAZES])
+        masks = masks.reshape(len(MAZES), GRID_HEIGHT, GRID_WIDTH)
+        self.open_dirs = np.zeros((len(MAZES), GRID_HEIGHT, GRID_WIDTH, len(DIRECTIONS)), dtype=bool)
+        self.open_dirs[..., NONE] = ~self.walls
+        for d in (RIGHT, LEFT, DOWN, UP):
+            bit = DIRECTION_BITS[(int(DIRECTIONS[d, 0]), int(DIRECTIONS[d, 1]))]
+            self.open_dirs[..., d] = (masks & bit) != 0
+        # Chemins des fantômes bleus (un par labyrinthe), complétés pour former un tableau
+        paths = [get_patrol_tour(maze) for maze in COMPACT_MAZES]
+        self.path_length = np.array([len(path) for path in paths], dtype=np.int32)
+        self.paths = np.zeros((len(MAZES), self.path_length.max(), 2), dtype=np.int16)
+        for m, path in enumerate(paths):
+            self.paths[m, :len(path)] = path
+        # Prochain pas vers chaque case (table des distances) et case ouverte la plus proche, pour les
+        # fantômes à personnalité ; les cases sont repérées par leur indice y * largeur + x
+        tables = [get_distance_table(maze) for maze in COMPACT_MAZES]
+        size = max(len(table.open_cells) for table in tables)
+        self.open_index = np.full((len(MAZES), GRID_HEIGHT * GRID_WIDTH), -1, dtype=np.int32)
+        self.next_hop = np.full((len(MAZES), size, size), NO_DIRECTION, dtype=np.uint8)
+        self.nearest_open = np.zeros((len(MAZES), GRID_HEIGHT * GRID_WIDTH), dtype=np.int32)
+        # Carrefours : les seules cases où ces fantômes choisissent leur route
+        self.junctions = np.array([np.frombuffer(get_junctions(maze), dtype=np.uint8) for maze in COMPACT_MAZES]) != 0
+        for m, (maze, table) in enumerate(zip(COMPACT_MAZES, tables)):
+            count = len(table.open_cells)
+            self.open_index[m, table.open_cells] = np.arange(count)
+            self.next_hop[m, :count, :count] = np.frombuffer(bytes(table.next_hops), dtype=np.uint8).reshape(count, count)
+            for cell in range(GRID_HEIGHT * GRID_WIDTH):
+                x, y = maze.nearest_open_cell(cell % GRID_WIDTH, cell // GRID_WIDTH)
+                self.nearest_open[m, cell] = y * GRID_WIDTH + x
+        self.start_ghosts, self.level_table = _build_level_table(difficulty)
+
+        start_level, start_lives = DIFFICULTIES.get(difficulty, (1, 2))
+        n, g = n_games, MAX_GHOSTS
+        # Partie
+        self.level = np.full(n, start_level, dtype=np.int16)
+        self.lives = np.full(n, start_lives, dtype=np.int16)
+        self.lives_lost = np.zeros(n, dtype=np.int16)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.jeton_count = np.zeros(n, dtype=np.int32)
+        self.crown_count = np.zeros(n, dtype=np.int32)
+        self.jeton_poche = np.zeros(n, dtype=np.int64)
+        self.crown_poche = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        self.ticks = 0
+        # Timers
+        self.level_transition_timer = np.zeros(n, dtype=np.int16)
+        self.respawn_timer = np.zeros(n, dtype=np.int16)
+        self.invincibility_timer = np.full(n, SPAWN_INVINCIBILITY, dtype=np.int16)
+        self.vulnerable_timer = np.zeros(n, dtype=np.int16)
+        self.indigestion_timer = np.zeros(n, dtype=np.int16)
+        # Labyrinthe de chaque partie (0 chemin, 1 mur, 2 point, 3 pacgomme)
+        self.maze_index = np.zeros(n, dtype=np.int16)
+        self.cells = np.zeros((n, GRID_HEIGHT, GRID_WIDTH), dtype=np.uint8)
+        self.points_left = np.zeros(n, dtype=np.int32)
+        # Pacman
+        self.px = np.zeros(n, dtype=np.int16)
+        self.py = np.zeros(n, dtype=np.int16)
+        self.pdir = np.zeros(n, dtype=np.int8)
+        self.pnext = np.zeros(n, dtype=np.int8)
+        # Fantômes (N x MAX_GHOSTS)
+        self.galive = np.zeros((n, g), dtype=bool)
+        self.gkind = np.zeros((n, g), dtype=np.int8)
+        self.grose = np.zeros((n, g), dtype=bool)
+        self.gx = np.zeros((n, g), dtype=np.int16)
+        self.gy = np.zeros((n, g), dtype=np.int16)
+        self.gstart_x = np.zeros((n, g), dtype=np.int16)
+        self.gstart_y = np.zeros((n, g), dtype=np.int16)
+        self.gdir = np.zeros((n, g), dtype=np.int8)
+        self.gsteps = np.zeros((n, g), dtype=np.int32)
+        self.gpath_index = np.zeros((n, g), dtype=np.int32)
+        self.gvulnerable = np.zeros((n, g), dtype=bool)
+        self.geyes = np.zeros((n, g), dtype=bool)
+
+        self._load_level(np.ones(n, dtype=bool), {start_level: self.start_ghosts})
+
+    # --- Initialisation des niveaux ---
+
+    def _place_ghost(self, mask, slot, x, y, color, path_index):
+        self.galive[mask, slot] = True
+        self.gkind[mask, slot] = _ghost_kind(color)
+        self.grose[mask, slot] = color == ROSE
+        self.gx[mask, slot] = x
+        self.gy[mask, slot] = y
+        self.gstart_x[mask, slot] = x
+        self.gstart_y[mask, slot] = y
+        self.gdir[mask, slot] = self.rng.integers(1, 5, size=int(mask.sum()))
+        self.gsteps[mask, slot] = 0
+        self.gvulnerable[mask, slot] = False
+        self.geyes[mask, slot] = False
+        self.gpath_index[mask, slot] = path_index
+
+    def _load_level(self, mask, table=None):
+        """Équivalent de start_next_level pour les parties sélectionnées (table : fantômes par niveau)"""
+        table = table or self.level_table
+        for level in np.unique(self.level[mask]):
+            level_mask = mask & (self.level == level)
+            maze_index = (int(level) - 1) % len(MAZES)
+            self.maze_index[level_mask] = maze_index
+            self.cells[level_mask] = self.initial_cells[maze_index]
+            self.points_left[level_mask] = int(np.isin(self.initial_cells[maze_index], (2, 3)).sum())
+            self.galive[level_mask] = False
+            for slot, (x, y, color, path_index) in enumerate(table[min(int(level), LAST_LEVEL)]):
+                self._place_ghost(level_mask, slot, x, y, color, path_index)
+        self._reset_pacman(mask)
+
+    def _reset_pacman(self, mask):
+        self.px[mask] = 10
+        self.py[mask] = 15
+        self.pdir[mask] = NONE
+        self.pnext[mask] = NONE
+
+    # --- Déplacements ---
+
+    def _can_move(self, maze_index, x, y, direction):
+        """Version vectorisée de Pacman.can_move / Ghost.can_move"""
+        return self.open_dirs[maze_index, y, x, direction]
+
+    def _random_valid(self, valid):
+        """Choisit une direction au hasard parmi les colonnes valides (1 à 4)"""
+        weights = self.rng.random(valid.shape) * valid
+        return (np.argmax(weights, axis=1) + 1).astype(np.int8)
+
+    def _all_valid(self, maze_index, x, y):
+        return self.open_dirs[maze_index, y, x, 1:]
+
+    def _choose_directions(self, active):
+        """Politique de jeu : remplit pnext comme le feraient les flèches du clavier"""
+        turn = active & (self.rng.random(self.n) < self.turn_probability)
+        if self.policy == "gourmand":
+            # Aller vers une case voisine qui contient un point ou une pacgomme
+            idx = np.nonzero(active)[0]
+            x, y = self.px[idx], self.py[idx]
+            open_dirs = self._all_valid(self.maze_index[idx], x, y)
+            near_x = (x[:, None] + DIR_DX[None, 1:]) % GRID_WIDTH
+            near_y = np.clip(y[:, None] + DIR_DY[None, 1:], 0, GRID_HEIGHT - 1)
+            food = open_dirs & (self.cells[idx[:, None], near_y, near_x] >= 2)
+            has_food = food.any(axis=1)
+            self.pnext[idx[has_food]] = self._random_valid(food[has_food])
+            # Sinon, errer : nouvelle direction ouverte quand Pacman est bloqué ou de temps en temps
+            blocked = ~self._can_move(self.maze_index[idx], x, y, self.pdir[idx])
+            wander = ~has_food & (blocked | turn[idx])
+            self.pnext[idx[wander]] = self._random_valid(open_dirs[wander])
+        else:
+            self.pnext[turn] = self.rng.integers(1, 5, size=int(turn.sum()))
+
+    def _step_pacman(self, active):
+        idx = np.nonzero(active)[0]
+        maze_index = self.maze_index[idx]
+        x, y = self.px[idx], self.py[idx]
+        turn = self._can_move(maze_index, x, y, self.pnext[idx])
+        direction = np.where(turn, self.pnext[idx], self.pdir[idx])
+        move = self._can_move(maze_index, x, y, direction)
+        x = np.where(move, x + DIR_DX[direction], x)
+        y = np.where(move, y + DIR_DY[direction], y)
+        # Téléportation aux bords
+        x = np.where(x < 0, GRID_WIDTH - 1, np.where(x >= GRID_WIDTH, 0, x))
+        self.px[idx], self.py[idx], self.pdir[idx] = x, y, direction
+
+    def _step_ghosts(self, active):
+        """Version vectorisée de Ghost.update pour tous les fantômes des parties actives"""
+        game, slot = np.nonzero(active[:, None] & self.galive)
+        if game.size == 0:
+            return
+        maze_index = self.maze_index[game]
+        x, y = self.gx[game, slot], self.gy[game, slot]
+        direction = self.gdir[game, slot].copy()
+        steps = self.gsteps[game, slot] + 1
+        kind = self.gkind[game, slot]
+        eyes = self.geyes[game, slot].copy()
+        vulnerable = self.gvulnerable[game, slot].copy()
+        path_index = self.gpath_index[game, slot].copy()
+        pacman_x, pacman_y = self.px[game], self.py[game]
+        start_x, start_y = self.gstart_x[game, slot], self.gstart_y[game, slot]
+
+        # Yeux : aller droit vers la base (à travers les murs)
+        dx, dy = start_x - x, start_y - y
+        horizontal = np.abs(dx) > np.abs(dy)
+        eyes_dir = np.where(horizontal,
+                            np.where(dx > 0, RIGHT, LEFT),
+                            np.where(dy > 0, DOWN, np.where(dy < 0, UP,
+                                     np.where(dx > 0, RIGHT, np.where(dx < 0, LEFT, direction)))))
+        arrived = eyes & (dx == 0) & (dy == 0)
+        direction = np.where(eyes, eyes_dir, direction).astype(np.int8)
+        direction[arrived] = self.rng.integers(1, 5, size=int(arrived.sum()))
+        vulnerable &= ~arrived
+
+        # Cible de chaque fantôme qui cherche à se rapprocher (chemin bleu ou Pacman)
+        blue_path = ~eyes & ~vulnerable & (kind == GHOST_BLUE)
+        lengths = self.path_length[maze_index]
+        target = self.paths[maze_index, path_index]
+        at_target = blue_path & (x == target[:, 0]) & (y == target[:, 1])
+        path_index = np.where(at_target, (path_index + 1) % lengths, path_index)
+        target = self.paths[maze_index, path_index]
+        target_x = np.where(kind == GHOST_BLUE, target[:, 0], pacman_x)
+        target_y = np.where(kind == GHOST_BLUE, target[:, 1], pacman_y)
+
+        # Deux directions candidates, comme possible_dirs dans Ghost.update
+        flee = ~eyes & vulnerable
+        chase = ~eyes & ~vulnerable & ((kind == GHOST_BLUE) | (kind == GHOST_RED))
+        dx = np.where(flee, x - pacman_x, target_x - x)
+        dy = np.where(flee, y - pacman_y, target_y - y)
+        sx, sy = _sign(dx), _sign(dy)
+        # En fuite, une direction est toujours proposée (gauche/haut si l'écart est nul)
+        sx = np.where(flee & (sx == 0), -1, sx)
+        sy = np.where(flee & (sy == 0), -1, sy)
+        dir_x = np.where(sx > 0, RIGHT, np.where(sx < 0, LEFT, NONE))
+        dir_y = np.where(sy > 0, DOWN, np.where(sy < 0, UP, NONE))
+        horizontal = np.abs(dx) > np.abs(dy)
+        first = np.where(horizontal, dir_x, dir_y).astype(np.int8)
+        second = np.where(horizontal, dir_y, dir_x).astype(np.int8)
+        first_ok = (first != NONE) & self._can_move(maze_index, x, y, first)
+        second_ok = (second != NONE) & self._can_move(maze_index, x, y, second)
+        all_valid = self._all_valid(maze_index, x, y)
+        aiming = flee | chase
+        stuck = aiming & ~first_ok & ~second_ok & (steps % 3 == 0) & all_valid.any(axis=1)
+        choice = np.where(first_ok, first, np.where(second_ok, second, direction))
+        choice = np.where(stuck, self._random_valid(all_valid), choice)
+        direction = np.where(aiming, choice, direction).astype(np.int8)
+
+        # Autres fantômes : changer de direction toutes les 8 cases ou quand ils sont bloqués
+        wander = ~eyes & ~vulnerable & (kind == GHOST_OTHER)
+        blocked = ~self._can_move(maze_index, x, y, direction)
+        rethink = wander & ((steps % 8 == 0) | blocked)
+        forward = all_valid & (np.arange(1, 5)[None, :] != OPPOSITE[direction][:, None])
+        has_forward = forward.any(axis=1)
+        not_back = np.arange(1, 5)[None, :] != OPPOSITE[direction][:, None]
+        random_forward = self._random_valid(forward)
+        random_any = self._random_valid(not_back)
+        new_dir = np.where(has_forward, random_forward, np.where(blocked, random_any, direction))
+        direction = np.where(rethink, new_dir, direction).astype(np.int8)
+
+        # Fantômes à personnalité : vers leur case cible (ghost_target), mais la route n'est choisie
+        # qu'aux carrefours ; ailleurs ils suivent le couloir sans faire demi-tour
+        personal = np.nonzero(~eyes & ~vulnerable & (kind >= GHOST_AHEAD))[0]
+        if personal.size:
+            m = maze_index[personal]
+            px, py = pacman_x[personal], pacman_y[personal]
+            pacman_dir = self.pdir[game[personal]]
+            ghost_kind = kind[personal]
+            ahead = ghost_kind == GHOST_AHEAD
+            target_x = np.where(ahead, px + AHEAD_CELLS * DIR_DX[pacman_dir],
+                                2 * (px + AMBUSH_CELLS * DIR_DX[pacman_dir]) - start_x[personal])
+            target_y = np.where(ahead, py + AHEAD_CELLS * DIR_DY[pacman_dir],
+                                2 * (py + AMBUSH_CELLS * DIR_DY[pacman_dir]) - start_y[personal])
+            corner = ghost_kind == GHOST_CORNER
+            near = (x[personal] - px) ** 2 + (y[personal] - py) ** 2 <= SCATTER_DISTANCE ** 2
+            target_x = np.where(corner, np.where(near, 0, px), target_x)
+            target_y = np.where(corner, np.where(near, GRID_HEIGHT - 1, py), target_y)
+            target = self.nearest_open[m, np.clip(target_y, 0, GRID_HEIGHT - 1) * GRID_WIDTH
+                                       + np.clip(target_x, 0, GRID_WIDTH - 1)]
+            here = self.open_index[m, y[personal] * GRID_WIDTH + x[personal]]
+            hop = np.where(here >= 0, self.next_hop[m, np.maximum(here, 0), self.open_index[m, target]], NO_DIRECTION)
+            ghost_forward = forward[personal]
+            has_route = hop != NO_DIRECTION
+            # Carrefour : prochain pas vers la cible, au hasard sans demi-tour si déjà dessus
+            at_junction = self.junctions[m, y[personal] * GRID_WIDTH + x[personal]]
+            routed = np.where(has_route, hop.astype(np.int16) + 1,
+                              np.where(has_forward[personal], random_forward[personal], direction[personal]))
+            # Virage, cul-de-sac ou arrêt : première direction sans demi-tour, sinon la première possible
+            ghost_valid = all_valid[personal]
+            turned = np.where(has_forward[personal], np.argmax(ghost_forward, axis=1) + 1,
+                              np.where(ghost_valid.any(axis=1), np.argmax(ghost_valid, axis=1) + 1, direction[personal]))
+            stopped = blocked[personal] | (direction[personal] == NONE)
+            direction[personal] = np.where(at_junction, routed, np.where(stopped, turned, direction[personal]))
+
+        # Déplacement (les yeux traversent les murs, les rouges avancent une fois sur deux)
+        eyes &= ~arrived
+        move = (eyes | self._can_move(maze_index, x, y, direction)) & ~((kind == GHOST_RED) & (steps % 2 != 0))
+        x = np.where(move, x + DIR_DX[direction], x)
+        y = np.where(move, y + DIR_DY[direction], y)
+        x = np.where(x < 0, GRID_WIDTH - 1, np.where(x >= GRID_WIDTH, 0, x))
+        y = np.where(eyes, np.clip(y, 0, GRID_HEIGHT - 1), y)
+
+        self.gx[game, slot], self.gy[game, slot], self.gdir[game, slot] = x, y, direction
+        self.gsteps[game, slot] = steps
+        self.geyes[game, slot] = eyes
+        self.gvulnerable[game, slot] = vulnerable
+        self.gpath_index[game, slot] = path_index
+
+    # --- Règles ---
+
+    def _bank_jetons(self, mask):
+        """Met les jetons et couronnes de la partie dans la poche"""
+        self.jeton_poche[mask] += self.jeton_count[mask]
+        self.crown_poche[mask] += self.crown_count[mask]
+        self.jeton_count[mask] = 0
+        self.crown_count[mask] = 0
+
+    def _eat(self, active):
+        idx = np.nonzero(active)[0]
+        cell = self.cells[idx, self.py[idx], self.px[idx]]
+        point = np.zeros(self.n, dtype=bool)
+        pacgomme = np.zeros(self.n, dtype=bool)
+        point[idx] = cell == 2
+        pacgomme[idx] = cell == 3
+        eaten = point | pacgomme
+        self.cells[eaten, self.py[eaten], self.px[eaten]] = 0
+        self.points_left -= eaten
+        self.score += np.where(point, 10, 0) + np.where(pacgomme, 50, 0)
+        self.jeton_count += np.where(point, 1, 0) + np.where(pacgomme, 5, 0)
+
+        # Indigestion (0,5% par point) : perdre 10 jetons
+        indigestion = point & (self.indigestion_timer == 0) & (self.rng.random(self.n) < 0.005)
+        self.jeton_count[indigestion] = np.maximum(0, self.jeton_count[indigestion] - 10)
+        self.indigestion_timer[indigestion] = 600
+
+        # Seuil de jetons atteint : une vie de plus et les jetons vont dans la poche
+        bank = eaten & (self.jeton_count >= self.jeton_threshold)
+        if self.lives_from_jetons:
+            self.lives += (bank & (self.lives < MAX_LIVES)).astype(np.int16)
+        self._bank_jetons(bank)
+
+        # Pacgomme : les fantômes (sauf les roses) deviennent vulnérables
+        self.vulnerable_timer[pacgomme] = VULNERABLE_DURATION
+        self.gvulnerable |= pacgomme[:, None] & self.galive & ~self.grose
+
+        # Niveau terminé
+        done = eaten & (self.points_left == 0)
+        if done.any():
+            self._next_level(done)
+        return done
+
+    def _next_level(self, mask):
+        self.level[mask] += 1
+        level = self.level
+        bonus_17 = mask & (level == 17) & (self.difficulty == "facile")
+        self.crown_poche += bonus_17
+        self.jeton_poche += bonus_17 * 50
+        last = mask & (level == LAST_LEVEL)
+        self.crown_poche += last * 10
+        self.jeton_poche += last * 500
+        self.won |= last | (mask & (level >= 20) & (self.difficulty == "facile"))
+        self.level_transition_timer[mask] = TRANSITION_TICKS
+        self.vulnerable_timer[mask] = 0
+        self._load_level(mask & ~self.won)
+
+    def _collide(self, active):
+        """Collisions Pacman / fantômes, fantôme par fantôme comme dans step()"""
+        hit = np.zeros(self.n, dtype=bool)
+        can_hit = active & (self.invincibility_timer == 0)
+        for slot in range(MAX_GHOSTS):
+            ghost = can_hit & ~hit & self.galive[:, slot] & ~self.geyes[:, slot]
+            dx = self.px - self.gx[:, slot]
+            dy = self.py - self.gy[:, slot]
+            same_cell = (dx == 0) & (dy == 0)
+            # Cases voisines : collision si les deux avancent l'un vers l'autre
+            adjacent = (np.abs(dx) + np.abs(dy)) == 1
+            gdir = self.gdir[:, slot]
+            toward = (DIR_DX[gdir] == dx) & (DIR_DY[gdir] == dy)
+            facing = (DIR_DX[self.pdir] == -dx) & (DIR_DY[self.pdir] == -dy)
+            collision = ghost & (same_cell | (adjacent & toward & facing))
+
+            # Fantôme vulnérable : Pacman le mange
+            eat = collision & self.gvulnerable[:, slot]
+            self.score += eat * 300
+            bank = eat & (self.jeton_count >= self.ghost_jeton_threshold)
+            if self.lives_from_jetons:
+                self.lives += (bank & (self.lives < MAX_LIVES)).astype(np.int16)
+            self._bank_jetons(bank)
+            self.crown_count += eat
+            self.geyes[eat, slot] = True
+            self.gvulnerable[eat, slot] = False
+
+            # Fantôme normal : Pacman perd une vie
+            killed = collision & ~eat
+            self.lives -= killed
+            self.lives_lost += killed
+            self.game_over |= killed & (self.lives <= 0)
+            respawn = killed & (self.lives > 0)
+            self.respawn_timer[respawn] = RESPAWN_TICKS
+            self._reset_pacman(respawn)
+            hit |= killed
+
+    def _respawn(self, mask):
+        """Équivalent de respawn_player_and_ghosts"""
+        self._reset_pacman(mask)
+        self.gx[mask] = self.gstart_x[mask]
+        self.gy[mask] = self.gstart_y[mask]
+        self.gvulnerable[mask] = False
+        self.geyes[mask] = False
+        self.gdir[mask] = self.rng.integers(1, 5, size=(int(mask.sum()), MAX_GHOSTS))
+        self.invincibility_timer[mask] = SPAWN_INVINCIBILITY
+        self.vulnerable_timer[mask] = 0
+
+    def step(self):
+        """Fait avancer toutes les parties d'un tick"""
+        self.ticks += 1
+        playing = ~(self.game_over | self.won)
+
+        # Fin de la transition entre niveaux
+        in_transition = playing & (self.level_transition_timer > 0)
+        self.level_transition_timer[in_transition] -= 1
+        ended = in_transition & (self.level_transition_timer == 0)
+        self.invincibility_timer[ended] = SPAWN_INVINCIBILITY
+
+        # Réapparition après une vie perdue
+        waiting = playing & (self.respawn_timer > 0)
+        self.respawn_timer[waiting] -= 1
+        self._respawn(waiting & (self.respawn_timer == 0))
+
+        for timer in (self.invincibility_timer, self.indigestion_timer):
+            timer[playing & (timer > 0)] -= 1
+
+        active = playing & (self.level_transition_timer == 0) & (self.respawn_timer == 0)
+        self._choose_directions(active)
+
+        self._step_pacman(active)
+        active &= ~self._eat(active)
+
+        # Fin de la vulnérabilité
+        vulnerable = active & (self.vulnerable_timer > 0)
+        self.vulnerable_timer[vulnerable] -= 1
+        expired = vulnerable & (self.vulnerable_timer == 0)
+        self.gvulnerable[expired] = False
+
+        self._step_ghosts(active)
+        self._collide(active)
+
+    def run(self, max_ticks=3000):
+        """Joue jusqu'à ce que toutes les parties soient finies (ou max_ticks)"""
+        for _ in range(max_ticks):
+            if (self.game_over | self.won).all():
+                break
+            self.step()
+        return self.summary()
+
+    def summary(self):
+        """Statistiques agrégées des N parties"""
+        return {
+            "difficulty": self.difficulty,
+            "games": self.n,
+            "ticks": self.ticks,
+            "mean_level": float(self.level.mean()),
+            "max_level": int(self.level.max()),
+            "mean_lives_lost": float(self.lives_lost.mean()),
+            "mean_jetons": float((self.jeton_poche + self.jeton_count).mean()),
+            "mean_crowns": float((self.crown_poche + self.crown_count).mean()),
+            "won_rate": float(self.won.mean()),
+            "game_over_rate": float(self.game_over.mean()),
+        }
+
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    difficulty = sys.argv[2] if len(sys.argv) > 2 else "facile"
+    simulator = BatchSimulator(n_games, difficulty, seed=0)
+    start = time.perf_counter()
+    result = simulator.run()
+    elapsed = time.perf_counter() - start
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    print(f"{n_games * simulator.ticks / elapsed:,.0f} ticks de jeu par seconde")
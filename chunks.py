@@ -0,0 +1,245 @@
+"""Monde d'aventure infini, découpé en morceaux de 21x21 cases.
+
+Chaque morceau est généré à partir de la graine du monde et de ses coordonnées
+(cx, cy). Les portes d'un bord sont tirées avec une graine propre à ce bord :
+deux morceaux voisins placent donc leurs portes aux mêmes endroits et leurs
+couloirs se raccordent sans que l'un ait besoin de l'autre.
+
+Un morceau jamais modifié n'est pas enregistré, on le régénère. Les morceaux où
+Pacman a mangé des points restent dans un cache LRU borné. Quand ils en sortent,
+ils sont écrits dans des fichiers de région : 16x16 morceaux par fichier,
+2 bits par case et un emplacement fixe par morceau. Aucun index n'est gardé en
+mémoire, si bien que celle-ci ne grandit pas avec la distance parcourue.
+
+Comme pathfinding.py et replay.py, ce module ne dépend ni de pygame ni de pacman.py.
+"""
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import Future
+
+CHUNK_SIZE = 21  # Un morceau a la taille d'un labyrinthe de base
+CHUNK_CELLS = CHUNK_SIZE * CHUNK_SIZE
+CHUNK_PACMAN_START = (10, 15)  # Mêmes cases de départ que les labyrinthes de base, dans chaque morceau
+CHUNK_GHOST_START = (10, 9)
+CHUNK_CACHE_SIZE = 64  # Morceaux gardés en mémoire (le labyrinthe chargé en utilise 9)
+REGION_CHUNKS = 16  # Un fichier de région contient 16x16 morceaux
+PACKED_CHUNK_SIZE = (CHUNK_CELLS + 3) // 4  # 4 cases par octet (valeurs 0 à 3)
+SLOT_SIZE = 1 + PACKED_CHUNK_SIZE  # Octet de présence + cases
+REGION_FILES_OPEN = 4  # Fichiers de région gardés ouverts
+
+
+def carve_maze(rows, rng, loop_chance=0.1):
+    """Creuse des couloirs (2 = point) dans rows, une liste de lignes remplies de murs.
+
+    Les couloirs sont creusés par un parcours en profondeur sur les cases impaires.
+    Ensuite, une partie des murs qui séparent deux couloirs est cassée
+    (loop_chance) pour créer des boucles.
+    """
+    height = len(rows)
+    width = len(rows[0])
+    # Parcours en profondeur itératif (pas de récursion : plusieurs milliers de cases)
+    rows[1][1] = 2
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        choices = [(dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and rows[y + dy][x + dx] == 1]
+        if not choices:
+            stack.pop()
+            continue
+        dx, dy = rng.choice(choices)
+        rows[y + dy // 2][x + dx // 2] = 2
+        rows[y + dy][x + dx] = 2
+        stack.append((x + dx, y + dy))
+    # Casser des murs entre deux couloirs pour créer des boucles
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            if rows[y][x] == 1 and rng.random() < loop_chance:
+                if (rows[y][x - 1] != 1 and rows[y][x + 1] != 1) or (rows[y - 1][x] != 1 and rows[y + 1][x] != 1):
+                    rows[y][x] = 2
+
+
+def chunk_random(seed, *parts):
+    """Générateur aléatoire propre à une partie du monde (toujours le même pour une graine donnée)"""
+    return random.Random(":".join(str(part) for part in (seed,) + parts))
+
+
+def edge_doors(seed, kind, cx, cy):
+    """Positions (impaires) des portes d'un bord.
+
+    kind vaut 'v' pour le bord entre (cx, cy) et (cx + 1, cy), 'h' pour le bord
+    entre (cx, cy) et (cx, cy + 1).
+    """
+    rng = chunk_random(seed, kind, cx, cy)
+    return rng.sample(range(1, CHUNK_SIZE - 1, 2), rng.randint(1, 3))
+
+
+def generate_chunk(seed, cx, cy):
+    """Cases (bytearray 21x21, ligne par ligne) du morceau (cx, cy) du monde de graine seed"""
+    rng = chunk_random(seed, 'morceau', cx, cy)
+    rows = [[1] * CHUNK_SIZE for _ in range(CHUNK_SIZE)]
+    carve_maze(rows, rng)
+    last = CHUNK_SIZE - 1
+    for y in edge_doors(seed, 'v', cx - 1, cy):
+        rows[y][0] = 2
+    for y in edge_doors(seed, 'v', cx, cy):
+        rows[y][last] = 2
+    for x in edge_doors(seed, 'h', cx, cy - 1):
+        rows[0][x] = 2
+    for x in edge_doors(seed, 'h', cx, cy):
+        rows[last][x] = 2
+    # Base des fantômes et case de départ de Pacman vides, dans chaque morceau
+    ghost_x, ghost_y = CHUNK_GHOST_START
+    for x in range(ghost_x, ghost_x + 5):
+        rows[ghost_y][x] = 0
+    pacman_x, pacman_y = CHUNK_PACMAN_START
+    rows[pacman_y][pacman_x] = 0
+    # Deux pacgommes par morceau, dans deux des quatre coins
+    for x, y in rng.sample([(1, 1), (last - 1, 1), (1, last - 1), (last - 1, last - 1)], 2):
+        rows[y][x] = 3
+    return bytearray(value for row in rows for value in row)
+
+
+def pack_cells(cells):
+    """Cases d'un morceau sur 2 bits chacune (111 octets au lieu de 441)"""
+    packed = bytearray(PACKED_CHUNK_SIZE)
+    for index, value in enumerate(cells):
+        packed[index >> 2] |= value << ((index & 3) << 1)
+    return bytes(packed)
+
+
+def unpack_cells(packed):
+    return bytearray((packed[index >> 2] >> ((index & 3) << 1)) & 3 for index in range(CHUNK_CELLS))
+
+
+class ChunkStore:
+    """Morceaux modifiés enregistrés sur le disque, un fichier par région de 16x16 morceaux.
+
+    Chaque morceau a un emplacement fixe dans le fichier de sa région. Lire ou
+    écrire un morceau coûte un seul accès, sans index à charger. Les fichiers des
+    dernières régions visitées restent ouverts.
+    """
+    __slots__ = ('directory', 'files')
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = OrderedDict()  # Chemin -> fichier ouvert, ou None si la région n'existe pas encore
+
+    def _locate(self, cx, cy):
+        region_x = cx // REGION_CHUNKS
+        region_y = cy // REGION_CHUNKS
+        path = os.path.join(self.directory, f"r.{region_x}.{region_y}.bin")
+        slot = (cy % REGION_CHUNKS) * REGION_CHUNKS + cx % REGION_CHUNKS
+        return path, slot * SLOT_SIZE
+
+    def _open(self, path, create=False):
+        if path in self.files:
+            self.files.move_to_end(path)
+            f = self.files[path]
+        else:
+            try:
+                f = open(path, 'r+b')
+            except FileNotFoundError:
+                f = None
+            self.files[path] = f
+            if len(self.files) > REGION_FILES_OPEN:
+                old = self.files.popitem(last=False)[1]
+                if old is not None:
+                    old.close()
+        if f is None and create:
+            os.makedirs(self.directory, exist_ok=True)
+            f = self.files[path] = open(path, 'w+b')
+        return f
+
+    def load(self, cx, cy):
+        """Cases enregistrées du morceau (bytearray), ou None s'il n'a jamais été modifié"""
+        path, offset = self._locate(cx, cy)
+        f = self._open(path)
+        if f is None:
+            return None
+        f.seek(offset)
+        data = f.read(SLOT_SIZE)
+        if len(data) < SLOT_SIZE or data[0] != 1:
+            return None
+        return unpack_cells(data[1:])
+
+    def save(self, cx, cy, cells):
+        path, offset = self._locate(cx, cy)
+        f = self._open(path, create=True)
+        f.seek(offset)
+        f.write(b'\x01' + pack_cells(cells))
+
+    def close(self):
+        """Ferme les fichiers de région (les écritures en attente sont envoyées au disque)"""
+        for f in self.files.values():
+            if f is not None:
+                f.close()
+        self.files.clear()
+
+
+class ChunkCache:
+    """Morceaux en mémoire (LRU) : relus du disque s'ils ont été modifiés, sinon générés.
+
+    Avec un executor, les morceaux demandés par prefetch() sont générés en
+    arrière-plan ; get() n'attend que si la génération n'est pas encore finie.
+    Un morceau modifié (put) n'est écrit sur le disque qu'en sortant du cache ou
+    par flush().
+    """
+    __slots__ = ('seed', 'store', 'capacity', 'executor', 'chunks')
+
+    def __init__(self, seed, store, capacity=CHUNK_CACHE_SIZE, executor=None):
+        self.seed = seed
+        self.store = store
+        self.capacity = capacity
+        self.executor = executor
+        self.chunks = OrderedDict()  # (cx, cy) -> [cases ou Future, modifié depuis le chargement]
+
+    def prefetch(self, cx, cy):
+        """Prépare le morceau sans attendre et retourne ses cases (ou la Future de sa génération)"""
+        key = (cx, cy)
+        entry = self.chunks.get(key)
+        if entry is not None:
+            self.chunks.move_to_end(key)
+            return entry[0]
+        cells = self.store.load(cx, cy)
+        if cells is None:
+            if self.executor is not None:
+                cells = self.executor.submit(generate_chunk, self.seed, cx, cy)
+            else:
+                cells = generate_chunk(self.seed, cx, cy)
+        self._add(key, cells, False)
+        return cells
+
+    def get(self, cx, cy):
+        """Cases du morceau (bytearray)"""
+        cells = self.prefetch(cx, cy)
+        if isinstance(cells, Future):
+            cells = self.chunks[(cx, cy)][0] = cells.result()
+        return cells
+
+    def put(self, cx, cy, cells):
+        """Cases d'un morceau qui a pu changer (le labyrinthe chargé le rend en s'éloignant)"""
+        if bytes(cells) != bytes(self.get(cx, cy)):
+            self._add((cx, cy), bytearray(cells), True)
+
+    def flush(self):
+        """Écrit sur le disque tous les morceaux modifiés encore en mémoire"""
+        for (cx, cy), entry in self.chunks.items():
+            if entry[1]:
+                self.store.save(cx, cy, entry[0])
+                entry[1] = False
+        self.store.close()
+
+    def _add(self, key, cells, dirty):
+        entry = self.chunks.get(key)
+        if entry is not None:
+            entry[0] = cells
+            entry[1] = entry[1] or dirty
+            self.chunks.move_to_end(key)
+        else:
+            self.chunks[key] = [cells, dirty]
+        while len(self.chunks) > self.capacity:
+            (cx, cy), (old_cells, old_dirty) = self.chunks.popitem(last=False)
+            if old_dirty:
+                self.store.save(cx, cy, old_cells)
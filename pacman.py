@@ -4,10 +4,21 @@ import sys
 import math
 import json
 import os
-
-# Initialisation de Pygame
-pygame.init()
-pygame.mixer.init()
+import time
+import argparse
+import multiprocessing
+import hashlib
+import heapq
+import itertools
+import copy
+import tempfile
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from chunks import (CHUNK_GHOST_START, CHUNK_PACMAN_START, CHUNK_SIZE, ChunkCache, ChunkStore,
+                    carve_maze)
+from pathfinding import HIERARCHY_MIN_CELLS, find_path_between, get_hierarchy
+from replay import ReplayRecorder, load_replay, save_replay
 
 # Constantes
 CELL_SIZE = 30
@@ -17,6 +28,23 @@ WINDOW_WIDTH = CELL_SIZE * GRID_WIDTH
 WINDOW_HEIGHT = CELL_SIZE * GRID_HEIGHT
 FPS = 10
 BASE_FPS = 10
+MAX_TICK_RATE = 15  # Vitesse logique maximale du jeu (ticks par seconde)
+RENDER_FPS = 60  # Fréquence d'affichage, indépendante de la vitesse du jeu
+MAX_TICKS_PER_FRAME = 5  # Limite de rattrapage après une frame lente
+DEBUG_PELLET_CHECK = False  # Vérifier le compteur de points contre un parcours complet du labyrinthe
+
+# Durées du jeu (en ticks, 10 ticks = 1 seconde au niveau 1)
+MAX_LIVES = 5  # Nombre maximum de vies
+VULNERABLE_DURATION = 50  # Durée de vulnérabilité en frames (5 secondes à 10 FPS)
+ICE_DURATION = 30  # Durée de la glace en frames (3 secondes à 10 FPS)
+FIRE_DURATION = 100  # Durée du feu en frames (10 secondes à 10 FPS)
+PACGOMME_RESPAWN_TIME = 20  # Temps de réapparition des pacgommes en frames (2 secondes à 10 FPS)
+GHOST_RESPAWN_TIME = 50  # Temps de réapparition des fantômes en frames (5 secondes à 10 FPS)
+GADGET_COOLDOWN_DURATION = 250  # Durée du cooldown en frames (25 secondes à 10 FPS)
+MORT_COOLDOWN_DURATION = 600  # Durée du cooldown pour "mort" en frames (1 minute = 60 secondes = 600 frames à 10 FPS)
+BOMBE_COOLDOWN_DURATION = 600  # Durée du cooldown pour "bombe téléguidée" en frames (1 minute = 60 secondes = 600 frames à 10 FPS)
+BOMBE_EXPLOSION_DELAY = 100  # Délai avant explosion en frames (10 secondes à 10 FPS)
+PIEGE_IMMOBILISATION_DURATION = 100  # Durée d'immobilisation en frames (10 secondes à 10 FPS)
 
 # Couleurs
 BLACK = (0, 0, 0)
@@ -289,18 +317,21 @@ MAZE_4 = [
 ]
 
 # Fonction pour générer des variations de labyrinthes
-def generate_maze_variation(base_maze, variation_id):
-    """Génère une variation d'un labyrinthe de base"""
+def generate_maze_variation(base_maze, variation_id, rng=None):
+    """Génère une variation d'un labyrinthe de base (rng : générateur à utiliser, sinon dérivé de l'ID)"""
     maze = [row[:] for row in base_maze]
+    height = len(maze)
+    width = len(maze[0])
     
     # Modifier aléatoirement certains points et pacgommes
-    random.seed(variation_id)  # Utiliser l'ID pour avoir des variations reproductibles
+    if rng is None:
+        rng = random.Random(variation_id)  # Utiliser l'ID pour avoir des variations reproductibles
     
-    for y in range(1, GRID_HEIGHT - 1):
-        for x in range(1, GRID_WIDTH - 1):
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
             # Ne modifier que les chemins (0, 2, 3)
             if maze[y][x] in [0, 2, 3]:
-                rand = random.random()
+                rand = rng.random()
                 # Parfois changer un point en chemin vide ou vice versa
                 if rand < 0.1:  # 10% de chance
                     if maze[y][x] == 2:
@@ -311,15 +342,15 @@ def generate_maze_variation(base_maze, variation_id):
                 elif rand < 0.15:  # 5% de chance supplémentaire
                     if maze[y][x] == 3:
                         maze[y][x] = 2
-                    elif maze[y][x] == 2 and random.random() < 0.05:
+                    elif maze[y][x] == 2 and rng.random() < 0.05:
                         maze[y][x] = 3
     
     # S'assurer qu'il y a au moins 2 pacgommes
     pacgomme_count = sum(row.count(3) for row in maze)
     if pacgomme_count < 2:
         # Ajouter des pacgommes si nécessaire
-        for y in range(1, GRID_HEIGHT - 1):
-            for x in range(1, GRID_WIDTH - 1):
+        for y in range(1, height - 1):
+            for x in range(1, width - 1):
                 if maze[y][x] == 2 and pacgomme_count < 2:
                     maze[y][x] = 3
                     pacgomme_count += 1
@@ -334,32 +365,1097 @@ base_mazes = [MAZE_1, MAZE_2, MAZE_3, MAZE_4]
 for base_maze in base_mazes:
     MAZES.append([row[:] for row in base_maze])
 
-def find_path_between(maze, start, target):
-    """Trouve un chemin accessible entre deux points en utilisant BFS"""
-    if start == target:
-        return [start]
-    
-    queue = [(start, [start])]
-    visited = {start}
-    directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    
-    while queue:
-        (x, y), path = queue.pop(0)
-        
-        for dx, dy in directions:
+# Bits des directions ouvertes depuis une case (masque de 4 bits par case)
+OPEN_RIGHT = 1
+OPEN_LEFT = 2
+OPEN_DOWN = 4
+OPEN_UP = 8
+DIRECTION_BITS = {(1, 0): OPEN_RIGHT, (-1, 0): OPEN_LEFT, (0, 1): OPEN_DOWN, (0, -1): OPEN_UP}
+# Directions légales pour chaque masque, dans l'ordre droite, gauche, bas, haut
+MOVES_BY_MASK = [tuple(d for d, bit in DIRECTION_BITS.items() if mask & bit) for mask in range(16)]
+# Numéros de version des labyrinthes : un nouveau numéro à chaque changement de murs
+_maze_versions = itertools.count(1)
+# Journal des murs : version -> (version précédente, case posée ou cassée, empreinte des murs d'avant ou None).
+# Les caches gardés par version réparent leurs distances au lieu de tout recalculer (voir repair_distances)
+WALL_EDITS_KEPT = 256
+REPAIR_MAX_EDITS = 64  # Au-delà, un calcul complet coûte moins qu'une réparation
+_wall_edits = OrderedDict()
+# Cases de départ de Pacman et des fantômes dans les labyrinthes 21x21 de base
+PACMAN_START = (10, 15)
+GHOST_START = (10, 9)
+
+class Maze:
+    """Labyrinthe compact : une case par octet (0 chemin, 1 mur, 2 point, 3 pacgomme).
+
+    maze[y][x] se lit comme avant (les lignes sont des vues sur le tampon), mais les
+    cases doivent être modifiées avec set_cell() pour garder à jour le masque des
+    directions ouvertes utilisé par can_move et le compteur de points restants.
+
+    Les masques des directions et la table des voisins (la couche des murs) sont
+    partagés entre les copies et les sauvegardes : ils ne sont recopiés que lorsqu'un
+    mur change (copie sur écriture). Seules les cases (points, murs posés ou cassés)
+    sont propres à chaque labyrinthe.
+
+    La taille (width x height) et les cases de départ appartiennent au labyrinthe :
+    rien n'impose 21x21 en dehors des labyrinthes de base.
+
+    Un monde assemblé (voir build_world_maze) n'a pas de tunnels sur ses bords
+    (wrap=False) et compte les points restants de chacune de ses cartes (map_size).
+    """
+    __slots__ = ('width', 'height', 'cells', 'open_dirs', 'rows', 'neighbors', 'version',
+                 'layout_key_cache', 'distance_table', 'pellets', 'layout_shared',
+                 'pacman_start', 'ghost_start', 'wrap', 'map_size', 'map_pellets')
+
+    def __init__(self, rows=None, width=None, height=None, cells=None, open_dirs=None, neighbors=None,
+                 pellets=None, pacman_start=None, ghost_start=None, wrap=True, map_size=None, map_pellets=None):
+        if width is None:
+            width = len(rows[0])
+        if height is None:
+            height = len(rows)
+        self.width = width
+        self.height = height
+        self.wrap = wrap  # Sortir par le bord gauche ramène à droite (et inversement)
+        if cells is None:
+            cells = bytearray(value for row in rows for value in row)
+        self.cells = cells
+        view = memoryview(self.cells)
+        self.rows = [view[y * width:(y + 1) * width] for y in range(height)]
+        if open_dirs is None:
+            # Table des voisins : pour chaque case, les cases atteignables en un pas (tunnels compris)
+            open_dirs = bytearray(width * height)
+            neighbors = [()] * (width * height)
+            self.open_dirs = open_dirs
+            self.neighbors = neighbors
+            for y in range(height):
+                for x in range(width):
+                    self._update_open_dirs(x, y)
+        self.open_dirs = open_dirs
+        self.neighbors = neighbors
+        self.layout_shared = False  # Vrai si open_dirs/neighbors sont aussi utilisés ailleurs
+        # Points + pacgommes restants, tenu à jour par set_cell
+        self.pellets = pellets if pellets is not None else self.cells.count(2) + self.cells.count(3)
+        self.version = next(_maze_versions)  # Clé des caches de chemins (voir pathfinding.py)
+        self.layout_key_cache = None  # Empreinte de la disposition des murs (calculée à la demande)
+        self.distance_table = None  # Table des distances (voir get_distance_table)
+        if (width, height) == (GRID_WIDTH, GRID_HEIGHT):
+            # Labyrinthes de base : mêmes cases que toujours (même si Pacman y démarre sur un mur)
+            self.pacman_start = pacman_start or PACMAN_START
+            self.ghost_start = ghost_start or GHOST_START
+        else:
+            # Mêmes proportions que 21x21, sur la case ouverte la plus proche
+            self.pacman_start = pacman_start or self.nearest_open_cell(width // 2, height * PACMAN_START[1] // GRID_HEIGHT)
+            self.ghost_start = ghost_start or self.nearest_open_cell(width // 2, height * GHOST_START[1] // GRID_HEIGHT)
+        # Monde assemblé : taille d'une carte (en cases) et points restants par carte, tenus à jour par set_cell
+        self.map_size = map_size
+        if map_size is not None and map_pellets is None:
+            map_width, map_height = map_size
+            map_pellets = [0] * ((width // map_width) * (height // map_height))
+            for index, cell in enumerate(self.cells):
+                if cell == 2 or cell == 3:
+                    map_pellets[self.map_index(index % width, index // width)] += 1
+        self.map_pellets = map_pellets
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def copy(self):
+        """Copie indépendante : seules les cases sont recopiées, la couche des murs est partagée"""
+        maze = Maze(width=self.width, height=self.height, cells=bytearray(self.cells),
+                    open_dirs=self.open_dirs, neighbors=self.neighbors, pellets=self.pellets,
+                    pacman_start=self.pacman_start, ghost_start=self.ghost_start, wrap=self.wrap,
+                    map_size=self.map_size, map_pellets=list(self.map_pellets) if self.map_size else None)
+        self.layout_shared = maze.layout_shared = True
+        # Les murs sont identiques : la version, l'empreinte et la table des distances restent valables
+        maze.version = self.version
+        maze.layout_key_cache = self.layout_key_cache
+        maze.distance_table = self.distance_table
+        return maze
+
+    def snapshot(self):
+        """Sauvegarde des cases (quelques centaines d'octets) et référence à la couche des murs"""
+        self.layout_shared = True
+        return (bytes(self.cells), self.pellets, self.open_dirs, self.neighbors, self.version,
+                self.layout_key_cache, self.distance_table,
+                tuple(self.map_pellets) if self.map_size else None)
+
+    def restore(self, saved):
+        """Revient à une sauvegarde faite par snapshot() sur ce même labyrinthe"""
+        (cells, self.pellets, self.open_dirs, self.neighbors, self.version,
+         self.layout_key_cache, self.distance_table, map_pellets) = saved
+        self.cells[:] = cells  # Même taille : les vues des lignes restent valables
+        if map_pellets is not None:
+            self.map_pellets = list(map_pellets)
+        self.layout_shared = True
+
+    def to_rows(self):
+        """Version liste de listes (comme MAZE_1..MAZE_4)"""
+        return [list(row) for row in self.rows]
+
+    def count(self, value):
+        return self.cells.count(value)
+
+    def map_of(self, x, y):
+        """Coordonnées (colonne, ligne) de la carte qui contient la case (x, y) d'un monde assemblé"""
+        return x // self.map_size[0], y // self.map_size[1]
+
+    def map_index(self, x, y):
+        """Indice dans map_pellets de la carte qui contient la case (x, y)"""
+        map_x, map_y = self.map_of(x, y)
+        return map_y * (self.width // self.map_size[0]) + map_x
+
+    def nearest_open_cell(self, x, y):
+        """Case non murée la plus proche de (x, y) en distance de Manhattan, ou (x, y) si tout est muré"""
+        for radius in range(self.width + self.height):
+            for dy in range(-radius, radius + 1):
+                dx = radius - abs(dy)
+                for cell_x in ((x - dx, x + dx) if dx else (x,)):
+                    cell_y = y + dy
+                    if 0 <= cell_x < self.width and 0 <= cell_y < self.height:
+                        if self.cells[cell_y * self.width + cell_x] != 1:
+                            return cell_x, cell_y
+        return x, y
+
+    def _update_open_dirs(self, x, y):
+        # Mêmes règles que can_move : téléportation aux bords gauche/droite, pas en haut/bas
+        mask = 0
+        for (dx, dy), bit in DIRECTION_BITS.items():
             new_x = x + dx
             new_y = y + dy
-            
-            # Vérifier les limites et si c'est accessible
-            if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT:
-                if maze[new_y][new_x] != 1:  # Pas un mur
-                    if (new_x, new_y) == target:
-                        return path + [(new_x, new_y)]
-                    if (new_x, new_y) not in visited:
-                        visited.add((new_x, new_y))
-                        queue.append(((new_x, new_y), path + [(new_x, new_y)]))
-    
-    return None  # Pas de chemin trouvé
+            if new_x < 0 or new_x >= self.width:
+                if self.wrap:
+                    mask |= bit
+            elif 0 <= new_y < self.height and self.cells[new_y * self.width + new_x] != 1:
+                mask |= bit
+        self.open_dirs[y * self.width + x] = mask
+        self.neighbors[y * self.width + x] = tuple(((x + dx) % self.width, y + dy) for dx, dy in MOVES_BY_MASK[mask])
+
+    def set_cell(self, x, y, value):
+        """Change une case (mur posé par "mur", cassé par la bombe...) et met à jour les masques voisins"""
+        index = y * self.width + x
+        old_value = self.cells[index]
+        was_wall = old_value == 1
+        self.cells[index] = value
+        pellet_change = (value == 2 or value == 3) - (old_value == 2 or old_value == 3)
+        if pellet_change:
+            self.pellets += pellet_change
+            if self.map_pellets is not None:
+                self.map_pellets[self.map_index(x, y)] += pellet_change
+        if was_wall != (value == 1):
+            if self.layout_shared:
+                # Copie sur écriture de la couche des murs
+                self.open_dirs = bytearray(self.open_dirs)
+                self.neighbors = list(self.neighbors)
+                self.layout_shared = False
+            old_version = self.version
+            self.version = next(_maze_versions)
+            _wall_edits[self.version] = (old_version, index, self.layout_key_cache)
+            if len(_wall_edits) > WALL_EDITS_KEPT:
+                _wall_edits.popitem(last=False)
+            self.layout_key_cache = None
+            self.distance_table = None
+            # Seules les cases voisines (et la case elle-même) voient leurs directions changer
+            for dx, dy in ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)):
+                neighbor_x = (x + dx) % self.width
+                neighbor_y = y + dy
+                if 0 <= neighbor_y < self.height:
+                    self._update_open_dirs(neighbor_x, neighbor_y)
+
+    def layout_key(self):
+        """Empreinte des murs du labyrinthe (les points et pacgommes n'en font pas partie)"""
+        if self.layout_key_cache is None:
+            walls = bytes(1 if cell == 1 else 0 for cell in self.cells)
+            header = f"{self.width}x{self.height}{'' if self.wrap else ':sans tunnels'}:".encode()
+            self.layout_key_cache = hashlib.sha1(header + walls).hexdigest()[:16]
+        return self.layout_key_cache
+
+    def legal_moves(self, x, y):
+        """Directions légales depuis la case (x, y), dans l'ordre droite, gauche, bas, haut"""
+        return MOVES_BY_MASK[self.open_dirs[y * self.width + x]]
+
+    def cell_neighbors(self, x, y):
+        """Cases atteignables en un pas depuis (x, y), téléportation aux bords comprise"""
+        return self.neighbors[y * self.width + x]
+
+    def can_move(self, x, y, direction):
+        """Vrai si on peut quitter la case (x, y) dans cette direction"""
+        bit = DIRECTION_BITS.get(direction)
+        if bit is None:
+            # Direction nulle : il suffit que la case elle-même ne soit pas un mur
+            return self.cells[y * self.width + x] != 1
+        return self.open_dirs[y * self.width + x] & bit != 0
+
+# Versions compactes des labyrinthes de base, copiées à chaque nouveau niveau
+COMPACT_MAZES = [Maze(maze) for maze in MAZES]
+
+def generate_maze(width, height, rng=None, loop_chance=0.1):
+    """Labyrinthe aléatoire de n'importe quelle taille (tests de charge, labyrinthes 100x100 et plus).
+
+    Couloirs creusés en profondeur sur les cases impaires, puis une partie des murs
+    intérieurs est cassée (loop_chance) pour qu'il y ait des boucles comme dans les
+    labyrinthes de base. Les couloirs sont remplis de points, avec une pacgomme près
+    de chaque coin ; la base des fantômes et la case de départ de Pacman sont vides.
+    """
+    if width < 7 or height < 7:
+        raise ValueError(f"labyrinthe trop petit : {width}x{height} (minimum 7x7)")
+    if rng is None:
+        rng = random.Random(f"{width}x{height}")
+    rows = [[1] * width for _ in range(height)]
+    carve_maze(rows, rng, loop_chance)
+    # Mêmes proportions que les labyrinthes 21x21 ; les cases creusées touchent toujours un couloir
+    ghost_x = min(width // 2, width - 6)
+    ghost_y = height * GHOST_START[1] // GRID_HEIGHT
+    for x in range(ghost_x, ghost_x + 5):
+        rows[ghost_y][x] = 0
+    pacman_x = width // 2
+    pacman_y = max(height * PACMAN_START[1] // GRID_HEIGHT, 1)
+    for x in range(pacman_x - 1, pacman_x + 2):
+        if rows[pacman_y][x] == 1:
+            rows[pacman_y][x] = 2
+    rows[pacman_y][pacman_x] = 0
+    maze = Maze(rows, pacman_start=(pacman_x, pacman_y), ghost_start=(ghost_x, ghost_y))
+    for corner_x, corner_y in ((1, 1), (width - 2, 1), (1, height - 2), (width - 2, height - 2)):
+        x, y = maze.nearest_open_cell(corner_x, corner_y)
+        if maze[y][x] == 2:
+            maze.set_cell(x, y, 3)
+    return maze
+
+# Labyrinthes générés pour les simulations sur grands labyrinthes, par taille
+_generated_mazes = {}
+
+def get_generated_mazes(width, height, count=4):
+    """count labyrinthes width x height (toujours les mêmes pour une taille donnée) à parcourir en rotation"""
+    key = (width, height, count)
+    if key not in _generated_mazes:
+        _generated_mazes[key] = [generate_maze(width, height, random.Random(f"{width}x{height}:{i}"))
+                                 for i in range(count)]
+    return _generated_mazes[key]
+
+WORLD_MAPS = 4  # Le monde du mode multi-cartes fait 4x4 cartes
+# Mondes déjà assemblés, par contenu des labyrinthes utilisés
+_world_mazes = {}
+
+def build_world_maze(mazes):
+    """Monde 4x4 des niveaux multiples de 10 en mode aventure, assemblé en un seul labyrinthe.
+
+    La carte (colonne, ligne) est mazes[(ligne * 4 + colonne) % len(mazes)]. Les passages
+    entre cartes voisines sont dans la table des voisins du monde : changer de carte
+    n'est qu'un pas comme un autre, les points mangés restent mangés quand on revient
+    et les fantômes suivent Pacman d'une carte à l'autre. Le monde n'est assemblé
+    qu'une fois par jeu de labyrinthes ; chaque niveau en reçoit une copie.
+    """
+    key = tuple(bytes(maze.cells) for maze in mazes)
+    world = _world_mazes.get(key)
+    if world is None:
+        map_width = mazes[0].width
+        map_height = mazes[0].height
+        if any((maze.width, maze.height) != (map_width, map_height) for maze in mazes):
+            raise ValueError("toutes les cartes du monde doivent avoir la même taille")
+        rows = [[] for _ in range(map_height * WORLD_MAPS)]
+        for map_y in range(WORLD_MAPS):
+            for map_x in range(WORLD_MAPS):
+                source = mazes[(map_y * WORLD_MAPS + map_x) % len(mazes)]
+                for y in range(map_height):
+                    rows[map_y * map_height + y].extend(source[y])
+
+        def open_passage(candidates):
+            # candidates : (case du bord, case du bord voisin, case avant, case après), du centre vers les coins
+            for (x1, y1), (x2, y2), _, _ in candidates:
+                if rows[y1][x1] != 1 and rows[y2][x2] != 1:
+                    return  # Un couloir traverse déjà la frontière (ancien tunnel)
+            for (x1, y1), (x2, y2), (x0, y0), (x3, y3) in candidates:
+                if rows[y0][x0] != 1 and rows[y3][x3] != 1:
+                    rows[y1][x1] = rows[y2][x2] = 0  # Porte dans les deux murs du bord
+                    return
+
+        for map_y in range(WORLD_MAPS):
+            for map_x in range(WORLD_MAPS):
+                left = map_x * map_width
+                top = map_y * map_height
+                if map_x + 1 < WORLD_MAPS:
+                    edge = left + map_width - 1
+                    open_passage([((edge, top + y), (edge + 1, top + y), (edge - 1, top + y), (edge + 2, top + y))
+                                  for y in sorted(range(1, map_height - 1), key=lambda y: abs(y - map_height // 2))])
+                if map_y + 1 < WORLD_MAPS:
+                    edge = top + map_height - 1
+                    open_passage([((left + x, edge), (left + x, edge + 1), (left + x, edge - 1), (left + x, edge + 2))
+                                  for x in sorted(range(1, map_width - 1), key=lambda x: abs(x - map_width // 2))])
+        # Départ sur la première carte, comme avant ; pas de tunnels sur les bords du monde
+        world = Maze(rows, pacman_start=mazes[0].pacman_start, ghost_start=mazes[0].ghost_start,
+                     wrap=False, map_size=(map_width, map_height))
+        _world_mazes[key] = world
+    return world.copy()
+
+WORLD_DIR = 'pacman_world'  # Morceaux modifiés du monde infini, un sous-dossier par graine
+WORLD_VIEW_CHUNKS = 3  # Le labyrinthe chargé fait 3x3 morceaux, Pacman dans celui du centre
+WORLD_PREFETCH_DISTANCE = 8  # À 8 cases ou moins d'un bord, le labyrinthe d'après est préparé
+
+def build_chunk_window(parts):
+    """Labyrinthe de 3x3 morceaux à partir des cases des 9 morceaux (ligne par ligne, Future acceptées).
+
+    Appelée en arrière-plan par ChunkWorld : ne touche à rien d'autre que ses arguments.
+    """
+    size = CHUNK_SIZE * WORLD_VIEW_CHUNKS
+    cells = bytearray(size * size)
+    for index, part in enumerate(parts):
+        if isinstance(part, Future):
+            part = part.result()
+        left = (index % WORLD_VIEW_CHUNKS) * CHUNK_SIZE
+        top = (index // WORLD_VIEW_CHUNKS) * CHUNK_SIZE
+        for y in range(CHUNK_SIZE):
+            start = (top + y) * size + left
+            cells[start:start + CHUNK_SIZE] = part[y * CHUNK_SIZE:(y + 1) * CHUNK_SIZE]
+    # Départs dans le morceau du centre ; chaque morceau compte ses points comme une carte du monde 4x4
+    return Maze(width=size, height=size, cells=cells, wrap=False, map_size=(CHUNK_SIZE, CHUNK_SIZE),
+                pacman_start=(CHUNK_SIZE + CHUNK_PACMAN_START[0], CHUNK_SIZE + CHUNK_PACMAN_START[1]),
+                ghost_start=(CHUNK_SIZE + CHUNK_GHOST_START[0], CHUNK_SIZE + CHUNK_GHOST_START[1]))
+
+class ChunkWorld:
+    """Monde d'aventure infini (voir chunks.py) : seuls 3x3 morceaux autour de Pacman sont chargés.
+
+    Quand Pacman entre dans un morceau voisin, le labyrinthe est recentré sur lui et
+    GameState.shift_origin décale toutes les positions de la partie. Dès que Pacman
+    approche d'un bord, le labyrinthe suivant est préparé en arrière-plan : changer
+    de morceau ne coûte alors que la recopie des cases modifiées entre-temps.
+    """
+
+    def __init__(self, seed, directory=None):
+        self.seed = seed
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Génération et assemblage hors du tick
+        store = ChunkStore(directory if directory is not None else os.path.join(WORLD_DIR, str(seed)))
+        self.cache = ChunkCache(seed, store, executor=self.executor)
+        self.origin = (-1, -1)  # Morceau du coin haut-gauche : le morceau (0, 0) est au centre
+        self.pending = {}  # Origine -> Future du labyrinthe préparé
+        self.saved = True  # Rien à enregistrer depuis le dernier flush()
+        self.maze = None
+        self.maze = build_chunk_window(self._window_parts(self.origin))
+
+    def window_chunks(self, origin=None):
+        """Coordonnées des 9 morceaux d'un labyrinthe chargé, ligne par ligne"""
+        origin_x, origin_y = origin if origin is not None else self.origin
+        return [(origin_x + i % WORLD_VIEW_CHUNKS, origin_y + i // WORLD_VIEW_CHUNKS)
+                for i in range(WORLD_VIEW_CHUNKS * WORLD_VIEW_CHUNKS)]
+
+    def center_chunk(self):
+        return self.origin[0] + 1, self.origin[1] + 1
+
+    def chunk_cells(self, maze, slot_x, slot_y):
+        """Cases actuelles (bytes) du morceau à la place (slot_x, slot_y) d'un labyrinthe chargé"""
+        left = slot_x * CHUNK_SIZE
+        return b''.join(bytes(maze[slot_y * CHUNK_SIZE + y][left:left + CHUNK_SIZE]) for y in range(CHUNK_SIZE))
+
+    def _window_parts(self, origin):
+        # Les morceaux déjà chargés sont repris du labyrinthe (points mangés compris), les autres du cache
+        parts = []
+        for cx, cy in self.window_chunks(origin):
+            slot_x = cx - self.origin[0]
+            slot_y = cy - self.origin[1]
+            if self.maze is not None and 0 <= slot_x < WORLD_VIEW_CHUNKS and 0 <= slot_y < WORLD_VIEW_CHUNKS:
+                parts.append(self.chunk_cells(self.maze, slot_x, slot_y))
+            else:
+                parts.append(self.cache.prefetch(cx, cy))
+        return parts
+
+    def update(self, state):
+        """À appeler à chaque tick : prépare le labyrinthe suivant, recentre si Pacman a changé de morceau"""
+        self.saved = False
+        local_x = state.pacman.x - CHUNK_SIZE
+        local_y = state.pacman.y - CHUNK_SIZE
+        shift_x = (local_x >= CHUNK_SIZE) - (local_x < 0)
+        shift_y = (local_y >= CHUNK_SIZE) - (local_y < 0)
+        if shift_x or shift_y:
+            self.recenter(state, shift_x, shift_y)
+            return
+        # Bords proches du morceau central (deux près d'un coin)
+        for distance, shift_x, shift_y in ((local_x, -1, 0), (CHUNK_SIZE - 1 - local_x, 1, 0),
+                                           (local_y, 0, -1), (CHUNK_SIZE - 1 - local_y, 0, 1)):
+            origin = (self.origin[0] + shift_x, self.origin[1] + shift_y)
+            if distance <= WORLD_PREFETCH_DISTANCE and origin not in self.pending:
+                self.pending[origin] = self.executor.submit(build_chunk_window, self._window_parts(origin))
+
+    def recenter(self, state, shift_x, shift_y):
+        """Décale le labyrinthe chargé d'un morceau (shift_x, shift_y entre -1 et 1)"""
+        origin = (self.origin[0] + shift_x, self.origin[1] + shift_y)
+        future = self.pending.pop(origin, None)
+        maze = future.result() if future is not None else build_chunk_window(self._window_parts(origin))
+        self.pending.clear()  # Préparés pour l'ancienne position : les résultats seront ignorés
+        old_maze = self.maze
+        dx = shift_x * CHUNK_SIZE
+        dy = shift_y * CHUNK_SIZE
+        state.shift_origin(-dx, -dy, maze)
+        # Cases changées depuis la préparation (points mangés, murs posés) : recopiées dans la partie commune
+        size = old_maze.width
+        for y in range(max(0, dy), min(size, size + dy)):
+            old_row = old_maze[y]
+            new_row = maze[y - dy]
+            start = max(0, dx)
+            end = min(size, size + dx)
+            if old_row[start:end] != new_row[start - dx:end - dx]:
+                for x in range(start, end):
+                    if old_row[x] != new_row[x - dx]:
+                        maze.set_cell(x - dx, y - dy, old_row[x])
+        # Morceaux qui ne sont plus chargés : rendus au cache (et écrits sur le disque s'ils ont changé)
+        new_chunks = set(self.window_chunks(origin))
+        for index, (cx, cy) in enumerate(self.window_chunks()):
+            if (cx, cy) not in new_chunks:
+                self.cache.put(cx, cy, self.chunk_cells(old_maze, index % WORLD_VIEW_CHUNKS, index // WORLD_VIEW_CHUNKS))
+        self.origin = origin
+        self.maze = maze
+
+    def flush(self):
+        """Enregistre sur le disque les morceaux modifiés (fin de partie, retour au menu)"""
+        if self.saved:
+            return
+        self.saved = True
+        for index, (cx, cy) in enumerate(self.window_chunks()):
+            self.cache.put(cx, cy, self.chunk_cells(self.maze, index % WORLD_VIEW_CHUNKS, index // WORLD_VIEW_CHUNKS))
+        self.cache.flush()
+
+    def close(self):
+        """Enregistre le monde et arrête son thread de préparation (quand la partie le remplace ou à la sortie)"""
+        self.flush()
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+DISTANCE_CACHE_FILE = 'pacman_distances.json'
+NO_PATH = 0xFFFF  # Distance enregistrée quand deux cases ne sont pas reliées
+NO_DIRECTION = 0xFF
+DIRECTION_LIST = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+class DistanceTable:
+    """Distances de plus court chemin (BFS) entre toutes les cases ouvertes d'un labyrinthe.
+
+    Pour chaque paire de cases on garde la distance et la première direction à prendre
+    (prochain pas), ce qui répond en O(1) à "à quelle distance est Pacman ?" et
+    "par où aller pour le rejoindre ?".
+    """
+    __slots__ = ('width', 'open_cells', 'cell_index', 'distances', 'next_hops')
+
+    def __init__(self, width, open_cells, distances, next_hops):
+        self.width = width
+        self.open_cells = open_cells  # Indices (y * largeur + x) des cases ouvertes
+        self.cell_index = {cell: i for i, cell in enumerate(open_cells)}
+        self.distances = distances  # array('H') de taille K x K
+        self.next_hops = next_hops  # array('B') de taille K x K (indice dans DIRECTION_LIST)
+
+    @classmethod
+    def build(cls, maze):
+        """Calcule la table avec un BFS depuis chaque case ouverte"""
+        width = maze.width
+        open_cells = [i for i, cell in enumerate(maze.cells) if cell != 1]
+        cell_index = {cell: i for i, cell in enumerate(open_cells)}
+        count = len(open_cells)
+        # Voisins ouverts de chaque case, sous forme d'indices compacts
+        graph = []
+        for cell in open_cells:
+            links = []
+            for neighbor_x, neighbor_y in maze.neighbors[cell]:
+                neighbor = neighbor_y * width + neighbor_x
+                if neighbor in cell_index:
+                    links.append(cell_index[neighbor])
+            graph.append(links)
+        distances = array('H', [NO_PATH]) * (count * count)
+        for source in range(count):
+            row = source * count
+            distances[row + source] = 0
+            frontier = [source]
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for current in frontier:
+                    for neighbor in graph[current]:
+                        if distances[row + neighbor] == NO_PATH:
+                            distances[row + neighbor] = depth
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+        # Prochain pas : le voisin (dans l'ordre droite, gauche, bas, haut) qui rapproche de la cible
+        next_hops = array('B', [NO_DIRECTION]) * (count * count)
+        for start, cell in enumerate(open_cells):
+            x, y = cell % width, cell // width
+            steps = []
+            for direction in maze.legal_moves(x, y):
+                neighbor = y * width + (x + direction[0]) % width + direction[1] * width
+                if neighbor in cell_index:
+                    steps.append((DIRECTION_LIST.index(direction), cell_index[neighbor] * count))
+            row = start * count
+            for target in range(count):
+                remaining = distances[row + target]
+                if remaining == NO_PATH or remaining == 0:
+                    continue
+                for direction_index, neighbor_row in steps:
+                    if distances[neighbor_row + target] == remaining - 1:
+                        next_hops[row + target] = direction_index
+                        break
+        return cls(width, open_cells, distances, next_hops)
+
+    def distance(self, start, target):
+        """Longueur du plus court chemin entre deux cases (x, y), ou None si pas de chemin"""
+        i = self.cell_index.get(start[1] * self.width + start[0])
+        j = self.cell_index.get(target[1] * self.width + target[0])
+        if i is None or j is None:
+            return None
+        distance = self.distances[i * len(self.open_cells) + j]
+        return None if distance == NO_PATH else distance
+
+    def next_direction(self, start, target):
+        """Première direction à prendre pour aller de start à target, ou None"""
+        i = self.cell_index.get(start[1] * self.width + start[0])
+        j = self.cell_index.get(target[1] * self.width + target[0])
+        if i is None or j is None:
+            return None
+        direction_index = self.next_hops[i * len(self.open_cells) + j]
+        return None if direction_index == NO_DIRECTION else DIRECTION_LIST[direction_index]
+
+    def cached_row(self, target, size):
+        """Distances de toutes les cases (size en tout) vers la case d'indice target, comme LazyDistanceTable"""
+        j = self.cell_index.get(target)
+        if j is None:
+            return None
+        row = array('H', [NO_PATH]) * size
+        # Les distances sont symétriques : la colonne de la cible donne les distances vers elle
+        for cell, distance in zip(self.open_cells, self.distances[j::len(self.open_cells)]):
+            row[cell] = distance
+        return row
+
+    def to_json(self):
+        return {'width': self.width, 'open_cells': self.open_cells,
+                'distances': self.distances.tobytes().hex(), 'next_hops': self.next_hops.tobytes().hex()}
+
+    @classmethod
+    def from_json(cls, data):
+        distances = array('H')
+        distances.frombytes(bytes.fromhex(data['distances']))
+        next_hops = array('B')
+        next_hops.frombytes(bytes.fromhex(data['next_hops']))
+        return cls(data['width'], data['open_cells'], distances, next_hops)
+
+DISTANCE_TABLE_MAX_CELLS = 1500  # Au-delà, la table complète (K x K) serait trop grosse : calcul à la demande
+DISTANCE_ROWS_CACHE_SIZE = 256  # Cibles gardées en mémoire par LazyDistanceTable
+
+class LazyDistanceTable:
+    """Mêmes réponses que DistanceTable, pour les grands labyrinthes (100x100 et plus).
+
+    Au lieu de toutes les paires, on calcule à la première demande les distances de
+    toutes les cases vers une cible (un BFS depuis la cible, les déplacements étant
+    réversibles) et on garde les cibles les plus récentes.
+
+    Après un mur posé ou cassé par un gadget, la table de la disposition précédente
+    (parent) sert de point de départ : les distances vers une cible qu'elle connaît
+    sont réparées autour des cases modifiées (changed) au lieu d'être recalculées.
+    """
+    __slots__ = ('width', 'cells', 'open_dirs', 'neighbors', 'rows', 'parent', 'changed')
+
+    def __init__(self, maze, parent=None, changed=None):
+        self.width = maze.width
+        # Couche des murs figée : set_cell la recopiera au lieu de la modifier
+        maze.layout_shared = True
+        self.cells = bytes(maze.cells)
+        self.open_dirs = maze.open_dirs
+        self.neighbors = maze.neighbors
+        self.rows = OrderedDict()  # indice de la cible -> array('H') des distances vers elle
+        self.parent = parent
+        self.changed = changed
+        if isinstance(parent, LazyDistanceTable):
+            # Une seule génération : la table parente ne garde pas la sienne
+            parent.parent = parent.changed = None
+
+    def cached_row(self, target, size=None):
+        """Distances vers la case d'indice target si elles sont déjà calculées, sinon None"""
+        return self.rows.get(target)
+
+    def _row(self, target):
+        row = self.rows.get(target)
+        if row is not None:
+            self.rows.move_to_end(target)
+            return row
+        old_row = self.parent.cached_row(target, len(self.cells)) if self.parent is not None else None
+        if old_row is not None and old_row[target] == 0:
+            row = repair_distances(self, old_row, target, self.changed)[0]
+            self._keep(target, row)
+            return row
+        width = self.width
+        row = array('H', [NO_PATH]) * len(self.cells)
+        row[target] = 0
+        frontier = [target]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for current in frontier:
+                for neighbor_x, neighbor_y in self.neighbors[current]:
+                    neighbor = neighbor_y * width + neighbor_x
+                    if row[neighbor] == NO_PATH and self.cells[neighbor] != 1:
+                        row[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        self._keep(target, row)
+        return row
+
+    def _keep(self, target, row):
+        self.rows[target] = row
+        if len(self.rows) > DISTANCE_ROWS_CACHE_SIZE:
+            self.rows.popitem(last=False)
+
+    def _open_index(self, cell):
+        x, y = cell
+        index = y * self.width + x
+        if 0 <= x < self.width and 0 <= index < len(self.cells) and self.cells[index] != 1:
+            return index
+        return None
+
+    def distance(self, start, target):
+        """Longueur du plus court chemin entre deux cases (x, y), ou None si pas de chemin"""
+        i = self._open_index(start)
+        j = self._open_index(target)
+        if i is None or j is None:
+            return None
+        distance = self._row(j)[i]
+        return None if distance == NO_PATH else distance
+
+    def next_direction(self, start, target):
+        """Première direction à prendre pour aller de start à target, ou None"""
+        i = self._open_index(start)
+        j = self._open_index(target)
+        if i is None or j is None:
+            return None
+        row = self._row(j)
+        remaining = row[i]
+        if remaining == NO_PATH or remaining == 0:
+            return None
+        # Même ordre que DistanceTable : droite, gauche, bas, haut
+        for direction, (neighbor_x, neighbor_y) in zip(MOVES_BY_MASK[self.open_dirs[i]], self.neighbors[i]):
+            if row[neighbor_y * self.width + neighbor_x] == remaining - 1:
+                return direction
+        return None
+
+def find_repair_base(maze, lookup):
+    """Remonte le journal des murs jusqu'à une version pour laquelle lookup(version, modification) a un résultat.
+
+    Retourne (ce résultat, cases posées ou cassées depuis), ou (None, None) si aucune
+    des REPAIR_MAX_EDITS dernières versions du labyrinthe n'est connue.
+    """
+    changed = set()
+    version = maze.version
+    for _ in range(REPAIR_MAX_EDITS):
+        edit = _wall_edits.get(version)
+        if edit is None:
+            break
+        version = edit[0]
+        changed.add(edit[1])
+        base = lookup(version, edit)
+        if base is not None:
+            return base, changed
+    return None, None
+
+def repair_distances(maze, old_distances, target, changed):
+    """Distances vers target (une par case) après des murs posés ou cassés sur les cases changed.
+
+    old_distances était juste avant ces modifications. Comme D* Lite, on ne recalcule
+    que les cases touchées : celles dont tous les plus courts chemins passaient par une
+    case modifiée, puis celles qu'une case rouverte rapproche. maze fournit width, cells
+    et neighbors (Maze ou LazyDistanceTable). Retourne (distances, cases qui ont changé).
+    """
+    width = maze.width
+    cells = maze.cells
+    neighbors = maze.neighbors
+    distances = array('H', old_distances)
+    # 1. Cases qui ont perdu leur plus court chemin, par distance croissante : une case garde le
+    #    sien tant qu'un voisin ouvert, un pas plus près, ne l'a pas perdu
+    lost = set()
+    heap = [(old_distances[cell], cell) for cell in changed if old_distances[cell] != NO_PATH]
+    heapq.heapify(heap)
+    while heap:
+        depth, current = heapq.heappop(heap)
+        if current in lost:
+            continue
+        if current not in changed:
+            supported = False
+            for neighbor_x, neighbor_y in neighbors[current]:
+                neighbor = neighbor_y * width + neighbor_x
+                if distances[neighbor] == depth - 1 and cells[neighbor] != 1 and neighbor not in lost:
+                    supported = True
+                    break
+            if supported:
+                continue
+        lost.add(current)
+        for neighbor_x, neighbor_y in neighbors[current]:
+            neighbor = neighbor_y * width + neighbor_x
+            if distances[neighbor] == depth + 1:
+                heapq.heappush(heap, (depth + 1, neighbor))
+    # 2. Distances effacées, repartant des voisins restés justes ; les cases rouvertes
+    #    propagent aussi les raccourcis qu'elles créent
+    touched = lost | changed
+    for cell in touched:
+        distances[cell] = NO_PATH
+    heap = []
+    for cell in touched:
+        if cells[cell] == 1:
+            continue
+        best = 0 if cell == target else NO_PATH
+        for neighbor_x, neighbor_y in neighbors[cell]:
+            distance = distances[neighbor_y * width + neighbor_x] + 1
+            if distance < best:
+                best = distance
+        if best < NO_PATH:
+            distances[cell] = best
+            heap.append((best, cell))
+    heapq.heapify(heap)
+    while heap:
+        depth, current = heapq.heappop(heap)
+        if depth != distances[current]:
+            continue
+        depth += 1
+        for neighbor_x, neighbor_y in neighbors[current]:
+            neighbor = neighbor_y * width + neighbor_x
+            if depth < distances[neighbor] and cells[neighbor] != 1:
+                distances[neighbor] = depth
+                touched.add(neighbor)
+                heapq.heappush(heap, (depth, neighbor))
+    return distances, {cell for cell in touched if distances[cell] != old_distances[cell]}
+
+def _known_distance_table(version, edit):
+    # Table de la disposition d'avant une modification des murs, si elle est encore en mémoire
+    key = edit[2]
+    if key is None:
+        return None
+    return _distance_tables.get(key) or _lazy_distance_tables.get(key)
+
+# Tables déjà calculées, par empreinte de labyrinthe
+_distance_tables = {}
+LAZY_DISTANCE_TABLES_KEPT = 4  # Le monde infini change de disposition à chaque morceau traversé
+_lazy_distance_tables = OrderedDict()
+_distance_cache_loaded = False
+BASE_LAYOUT_KEYS = set()
+
+def write_json_file(path, data):
+    """Écrit data dans un fichier temporaire du même dossier puis le met à la place de path.
+
+    Les processus de `simulate` peuvent sauvegarder le même cache en même temps : un
+    lecteur voit l'ancien fichier ou le nouveau, jamais un fichier à moitié écrit.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def load_distance_cache():
+    """Charge les tables sauvegardées sur le disque (labyrinthes de base)"""
+    global _distance_cache_loaded
+    _distance_cache_loaded = True
+    if os.path.exists(DISTANCE_CACHE_FILE):
+        try:
+            with open(DISTANCE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                for key, data in json.load(f).items():
+                    _distance_tables.setdefault(key, DistanceTable.from_json(data))
+        except Exception as e:
+            print(f"Erreur lors du chargement des distances: {e}")
+
+def save_distance_cache():
+    """Sauvegarde les tables des labyrinthes de base (pas celles modifiées par les gadgets)"""
+    try:
+        data = {key: table.to_json() for key, table in _distance_tables.items() if key in BASE_LAYOUT_KEYS}
+        write_json_file(DISTANCE_CACHE_FILE, data)
+    except Exception as e:
+        print(f"Erreur lors de la sauvegarde des distances: {e}")
+
+def get_distance_table(maze):
+    """Table des distances du labyrinthe, calculée une seule fois par disposition de murs"""
+    if maze.distance_table is not None:
+        return maze.distance_table
+    if not _distance_cache_loaded:
+        load_distance_cache()
+    key = maze.layout_key()
+    table = _distance_tables.get(key)
+    if table is None:
+        table = _lazy_distance_tables.get(key)
+    if table is None and (key not in BASE_LAYOUT_KEYS or len(maze.cells) - maze.count(1) > DISTANCE_TABLE_MAX_CELLS):
+        # Grandes tables (plusieurs Mo chacune) et dispositions modifiées par les gadgets : remplies
+        # à la demande, en réparant celles de la disposition d'avant (jamais de calcul complet en
+        # pleine partie). Seulement les plus récentes
+        parent, changed = find_repair_base(maze, _known_distance_table)
+        table = _lazy_distance_tables[key] = LazyDistanceTable(maze, parent, changed)
+        if len(_lazy_distance_tables) > LAZY_DISTANCE_TABLES_KEPT:
+            _lazy_distance_tables.popitem(last=False)
+    elif table is None:
+        table = DistanceTable.build(maze)
+        _distance_tables[key] = table
+        save_distance_cache()
+    maze.distance_table = table
+    return table
+
+BASE_LAYOUT_KEYS.update(maze.layout_key() for maze in COMPACT_MAZES)
+
+PURSUIT_FIELD_CELLS = 1 << 19  # Cases gardées en tout par les champs mémorisés (environ 5 Mo)
+
+class PursuitField:
+    """Champs de poursuite et de fuite partagés par tous les fantômes, calculés depuis la case de Pacman.
+
+    Un seul BFS par case de Pacman (et par disposition des murs) sert à tous les
+    fantômes qui le poursuivent, quel que soit leur nombre. Les champs sont gardés
+    par (version du labyrinthe, case de Pacman) : les copies d'un labyrinthe ont la
+    même version, donc Pacman qui repasse par une case ne coûte plus rien, d'un
+    niveau ou d'une partie à l'autre. Le champ de fuite n'est calculé que si un
+    fantôme fuit : les distances à Pacman multipliées par -1,2 puis relâchées, pour
+    qu'un fantôme ne s'enferme pas dans un cul-de-sac. Après un mur posé ou cassé,
+    le champ de la version précédente est réparé (repair_distances).
+    """
+    __slots__ = ('fields',)
+
+    def __init__(self):
+        # (version du labyrinthe, case de Pacman) -> [distances array('H'), cases par distance croissante array('I')
+        # (None pour un champ réparé), coûts de fuite array('i') ou None], ou None si Pacman est dans un mur
+        self.fields = OrderedDict()
+
+    def _field(self, maze, target):
+        key = (maze.version, target)
+        fields = self.fields
+        if key in fields:
+            fields.move_to_end(key)
+            return fields[key]
+        width = maze.width
+        cells = maze.cells
+        target_x, target_y = target
+        start = target_y * width + target_x
+        field = None
+        base = None
+        if 0 <= target_x < width and 0 <= target_y < maze.height and cells[start] != 1:
+            base, changed = find_repair_base(maze, lambda version, edit: fields.get((version, target)))
+        if base is not None:
+            field = [repair_distances(maze, base[0], start, changed)[0], None, None]
+        elif 0 <= target_x < width and 0 <= target_y < maze.height and cells[start] != 1:
+            # Même parcours que LazyDistanceTable (les déplacements sont réversibles)
+            neighbors = maze.neighbors
+            distances = array('H', [NO_PATH]) * len(cells)
+            distances[start] = 0
+            order = [start]
+            for current in order:  # La liste sert de file : chaque case est ajoutée une fois
+                depth = distances[current] + 1
+                for neighbor_x, neighbor_y in neighbors[current]:
+                    neighbor = neighbor_y * width + neighbor_x
+                    if distances[neighbor] == NO_PATH and cells[neighbor] != 1:
+                        distances[neighbor] = depth
+                        order.append(neighbor)
+            field = [distances, array('I', order), None]
+        fields[key] = field
+        while len(fields) > 1 and len(fields) * len(cells) > PURSUIT_FIELD_CELLS:
+            fields.popitem(last=False)
+        return field
+
+    def chase_direction(self, maze, target, x, y):
+        """Premier pas du plus court chemin de (x, y) vers target, ou None (même choix que DistanceTable).
+
+        Sur un grand labyrinthe (monde assemblé, monde infini), le pas vient de la recherche
+        par blocs de pathfinding.py : presque le plus court, sans parcourir tout le monde.
+        """
+        if len(maze.cells) >= HIERARCHY_MIN_CELLS:
+            step = get_hierarchy(maze).next_step((x, y), target)
+            if step is None:
+                return None
+            for direction, cell in zip(maze.legal_moves(x, y), maze.neighbors[y * maze.width + x]):
+                if cell == step:
+                    return direction
+            return None
+        field = self._field(maze, target)
+        if field is None:
+            return None
+        distances = field[0]
+        index = y * maze.width + x
+        remaining = distances[index]
+        if remaining == NO_PATH or remaining == 0:
+            return None
+        for direction, (neighbor_x, neighbor_y) in zip(maze.legal_moves(x, y), maze.neighbors[index]):
+            if distances[neighbor_y * maze.width + neighbor_x] == remaining - 1:
+                return direction
+        return None
+
+    def flee_direction(self, maze, target, x, y):
+        """Direction qui éloigne le mieux (x, y) de target, ou None si aucune case voisine n'est plus sûre"""
+        field = self._field(maze, target)
+        if field is None:
+            return None
+        flee_costs = field[2]
+        if flee_costs is None:
+            order = field[1]
+            if order is None:
+                # Champ réparé : cases atteignables par distance croissante
+                distances = field[0]
+                order = sorted((cell for cell in range(len(distances)) if distances[cell] != NO_PATH),
+                               key=distances.__getitem__)
+            flee_costs = field[2] = self._flee_costs(maze, field[0], order)
+        index = y * maze.width + x
+        best_direction = None
+        best_cost = flee_costs[index]
+        for direction, (neighbor_x, neighbor_y) in zip(maze.legal_moves(x, y), maze.neighbors[index]):
+            cost = flee_costs[neighbor_y * maze.width + neighbor_x]
+            if cost < best_cost:
+                best_direction = direction
+                best_cost = cost
+        return best_direction
+
+    @staticmethod
+    def _flee_costs(maze, distances, order):
+        # Coûts en cinquièmes de pas : -6 par pas de distance à Pacman, +5 par pas de déplacement.
+        # Tous les pas coûtent pareil : au lieu d'un tas, on fusionne les cases de départ (ordre du
+        # BFS à l'envers, coûts croissants) et une file des cases relâchées (coûts croissants aussi,
+        # chaque case y entre au plus une fois, avec son coût définitif).
+        width = maze.width
+        neighbors = maze.neighbors
+        flee_costs = array('i', [5 * NO_PATH]) * len(distances)
+        seeds = order[::-1]
+        for cell in seeds:
+            flee_costs[cell] = -6 * distances[cell]
+        relaxed = deque()
+        next_seed = 0
+        seed_count = len(seeds)
+        while next_seed < seed_count or relaxed:
+            if next_seed < seed_count:
+                current = seeds[next_seed]
+                seed_cost = -6 * distances[current]
+                if relaxed and flee_costs[relaxed[0]] < seed_cost:
+                    current = relaxed.popleft()
+                else:
+                    next_seed += 1
+                    if flee_costs[current] != seed_cost:
+                        continue  # Déjà atteinte pour moins cher
+            else:
+                current = relaxed.popleft()
+            cost = flee_costs[current] + 5
+            for neighbor_x, neighbor_y in neighbors[current]:
+                neighbor = neighbor_y * width + neighbor_x
+                if cost < flee_costs[neighbor]:
+                    flee_costs[neighbor] = cost
+                    relaxed.append(neighbor)
+        return flee_costs
+
+# Champs partagés par les fantômes de toutes les parties (clés : version du labyrinthe et case de Pacman)
+PURSUIT_FIELD = PursuitField()
+
+HOME_ROUTES_KEPT = 64  # Bases de fantômes (par version de labyrinthe) dont le chemin de retour est gardé
+# (version du labyrinthe, base) -> (distances à la base array('H') ou None, indice dans DIRECTION_LIST du pas
+# vers la base pour chaque case array('B'))
+_home_routes = OrderedDict()
+
+def get_home_route(maze, home):
+    """Chemin de retour des yeux vers la base home : pour chaque case, la direction à prendre.
+
+    Un BFS à l'envers depuis la base, fait une fois par labyrinthe (les copies ont la
+    même version). Après un mur posé ou cassé (gadget "mur", bombe), le chemin de la
+    version précédente est réparé autour des cases modifiées.
+    Même choix que DistanceTable.next_direction ; NO_DIRECTION si la case est murée,
+    isolée de la base, ou si c'est la base elle-même.
+    """
+    key = (maze.version, home)
+    entry = _home_routes.get(key)
+    if entry is not None:
+        _home_routes.move_to_end(key)
+        return entry[1]
+    width = maze.width
+    cells = maze.cells
+    neighbors = maze.neighbors
+    home_x, home_y = home
+    start = home_y * width + home_x
+    distances = None
+    route = array('B', [NO_DIRECTION]) * len(cells)
+    if 0 <= home_x < width and 0 <= home_y < maze.height and cells[start] != 1:
+        base, changed = find_repair_base(maze, lambda version, edit: _home_routes.get((version, home)))
+        if base is not None and base[0] is not None:
+            distances, touched = repair_distances(maze, base[0], start, changed)
+            route = array('B', base[1])
+            # Le premier choix change aussi pour les voisins d'une case modifiée ou plus à la même distance
+            update = touched | changed
+            for cell in list(update):
+                update.update(neighbor_y * width + neighbor_x for neighbor_x, neighbor_y in neighbors[cell])
+        else:
+            distances = array('H', [NO_PATH]) * len(cells)
+            distances[start] = 0
+            update = [start]
+            for current in update:
+                depth = distances[current] + 1
+                for neighbor_x, neighbor_y in neighbors[current]:
+                    neighbor = neighbor_y * width + neighbor_x
+                    if distances[neighbor] == NO_PATH and cells[neighbor] != 1:
+                        distances[neighbor] = depth
+                        update.append(neighbor)
+        # Premier voisin (droite, gauche, bas, haut) qui rapproche de la base
+        for current in update:
+            route[current] = NO_DIRECTION
+            remaining = distances[current]
+            if remaining == NO_PATH or remaining == 0:
+                continue
+            for direction, (neighbor_x, neighbor_y) in zip(MOVES_BY_MASK[maze.open_dirs[current]], neighbors[current]):
+                if distances[neighbor_y * width + neighbor_x] == remaining - 1:
+                    route[current] = DIRECTION_LIST.index(direction)
+                    break
+    _home_routes[key] = (distances, route)
+    if len(_home_routes) > HOME_ROUTES_KEPT:
+        _home_routes.popitem(last=False)
+    return route
+
+# Personnalités des fantômes qui ne suivent ni une tournée (bleu) ni Pacman directement (rouge) :
+# couleur -> règle qui donne leur case cible
+GHOST_PERSONALITIES = {
+    (255, 192, 203): 'devant',  # Rose : quelques cases devant Pacman, pour lui couper la route
+    (148, 0, 211): 'embuscade',  # Violet : de l'autre côté de Pacman par rapport à sa base, pour le prendre à revers
+    (255, 165, 0): 'coin',  # Orange : poursuit Pacman de loin, retourne dans son coin quand il est trop près
+}
+AHEAD_CELLS = 4  # Cible du fantôme rose : cases devant Pacman
+AMBUSH_CELLS = 2  # Point de Pacman par lequel passe la cible du fantôme violet (vue depuis sa base)
+SCATTER_DISTANCE = 8  # En deçà (à vol d'oiseau), le fantôme orange retourne dans son coin
+# Masque de directions ouvertes -> 1 pour un carrefour (au moins trois directions)
+JUNCTION_MASKS = bytes(1 if bin(mask).count('1') >= 3 else 0 for mask in range(256))
+JUNCTIONS_KEPT = 16
+_junctions = OrderedDict()  # Version du labyrinthe -> bytes (1 pour chaque case carrefour)
+
+def get_junctions(maze):
+    """Carrefours du labyrinthe, les seules cases où un fantôme à personnalité choisit sa route"""
+    junctions = _junctions.get(maze.version)
+    if junctions is None:
+        junctions = _junctions[maze.version] = bytes(maze.open_dirs.translate(JUNCTION_MASKS))
+        if len(_junctions) > JUNCTIONS_KEPT:
+            _junctions.popitem(last=False)
+    return junctions
+
+def ghost_target(personality, maze, pacman_pos, pacman_direction, ghost_pos, home):
+    """Case visée par un fantôme de cette personnalité, ramenée sur la case ouverte la plus proche"""
+    pacman_x, pacman_y = pacman_pos
+    dx, dy = pacman_direction
+    if personality == 'devant':
+        x = pacman_x + AHEAD_CELLS * dx
+        y = pacman_y + AHEAD_CELLS * dy
+    elif personality == 'embuscade':
+        # Symétrique de la base par rapport à un point devant Pacman
+        x = 2 * (pacman_x + AMBUSH_CELLS * dx) - home[0]
+        y = 2 * (pacman_y + AMBUSH_CELLS * dy) - home[1]
+    elif (ghost_pos[0] - pacman_x) ** 2 + (ghost_pos[1] - pacman_y) ** 2 > SCATTER_DISTANCE ** 2:
+        return pacman_pos
+    elif maze.map_size is not None:
+        # Monde assemblé ou infini : coin en bas à gauche de la carte (ou du morceau) de sa base
+        map_width, map_height = maze.map_size
+        x = home[0] - home[0] % map_width
+        y = home[1] - home[1] % map_height + map_height - 1
+    else:
+        x, y = 0, maze.height - 1  # Coin en bas à gauche
+    x = min(max(x, 0), maze.width - 1)
+    y = min(max(y, 0), maze.height - 1)
+    if maze.cells[y * maze.width + x] == 1:
+        return maze.nearest_open_cell(x, y)
+    return x, y
+
+def target_direction(maze, target, x, y):
+    """Premier pas de (x, y) vers target : table des distances partagée, ou recherche par blocs sur un grand labyrinthe"""
+    if len(maze.cells) >= HIERARCHY_MIN_CELLS:
+        return PURSUIT_FIELD.chase_direction(maze, target, x, y)
+    return get_distance_table(maze).next_direction((x, y), target)
 
 def generate_path_through_all_cells(maze):
     """Génère un chemin qui traverse toutes les cases accessibles du labyrinthe"""
@@ -367,14 +1463,16 @@ def generate_path_through_all_cells(maze):
     visited = set()
     
     # Trouver toutes les cases accessibles (pas de mur)
+    height = len(maze)
+    width = len(maze[0])
     accessible_cells = []
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
+    for y in range(height):
+        for x in range(width):
             if maze[y][x] != 1:  # Pas un mur
                 accessible_cells.append((x, y))
     
     if not accessible_cells:
-        return [(10, 9)]  # Chemin par défaut
+        return [maze.ghost_start]  # Chemin par défaut
     
     # Utiliser un algorithme de parcours pour visiter toutes les cases
     # Commencer par la première case accessible
@@ -396,7 +1494,7 @@ def generate_path_through_all_cells(maze):
             new_y = y + dy
             
             # Vérifier les limites et si c'est accessible
-            if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT:
+            if 0 <= new_x < width and 0 <= new_y < height:
                 if maze[new_y][new_x] != 1 and (new_x, new_y) not in visited:
                     path.append((new_x, new_y))
                     visited.add((new_x, new_y))
@@ -416,7 +1514,8 @@ def generate_path_through_all_cells(maze):
             
             if closest:
                 # Trouver un chemin valide vers la case la plus proche
-                sub_path = find_path_between(maze, current, closest)
+                # (sans tunnels : les fantômes bleus suivent le chemin case par case)
+                sub_path = find_path_between(maze, current, closest, tunnels=False)
                 if sub_path:
                     # Ajouter toutes les cases du chemin (sauf la première qui est déjà dans path)
                     for cell in sub_path[1:]:
@@ -429,7 +1528,117 @@ def generate_path_through_all_cells(maze):
             else:
                 break
     
-    return path if path else [(10, 9)]
+    return path if path else [maze.ghost_start]
+
+PATROL_CACHE_FILE = 'pacman_patrols.json'
+# Tournées des fantômes bleus déjà calculées, par empreinte de labyrinthe (tuples partagés, non modifiables)
+_patrol_tours = {}
+_patrol_cache_loaded = False
+
+def load_patrol_cache():
+    """Charge les tournées sauvegardées sur le disque"""
+    global _patrol_cache_loaded
+    _patrol_cache_loaded = True
+    if os.path.exists(PATROL_CACHE_FILE):
+        try:
+            with open(PATROL_CACHE_FILE, 'r', encoding='utf-8') as f:
+                for key, tour in json.load(f).items():
+                    _patrol_tours.setdefault(key, tuple((x, y) for x, y in tour))
+        except Exception as e:
+            print(f"Erreur lors du chargement des tournées: {e}")
+
+def save_patrol_cache():
+    """Sauvegarde les tournées des labyrinthes de base"""
+    try:
+        data = {key: tour for key, tour in _patrol_tours.items() if key in BASE_LAYOUT_KEYS}
+        write_json_file(PATROL_CACHE_FILE, data)
+    except Exception as e:
+        print(f"Erreur lors de la sauvegarde des tournées: {e}")
+
+def get_patrol_tour(maze):
+    """Tournée des fantômes bleus pour ce labyrinthe, calculée une seule fois par disposition de murs"""
+    if not isinstance(maze, Maze):
+        maze = Maze(maze)
+    if not _patrol_cache_loaded:
+        load_patrol_cache()
+    key = maze.layout_key()
+    tour = _patrol_tours.get(key)
+    if tour is None:
+        tour = tuple(generate_path_through_all_cells(maze))
+        _patrol_tours[key] = tour
+        if key in BASE_LAYOUT_KEYS:
+            save_patrol_cache()
+    return tour
+
+class Camera:
+    """Partie du labyrinthe affichée à l'écran (décalage en pixels du coin haut-gauche).
+
+    Un labyrinthe qui tient dans la fenêtre reste à la position (0, 0), comme avant ;
+    sur un grand labyrinthe, follow() fait défiler la vue pour garder Pacman au centre.
+    """
+    __slots__ = ('x', 'y', 'view_width', 'view_height', 'grid_width', 'grid_height')
+
+    def __init__(self, view_width=WINDOW_WIDTH, view_height=WINDOW_HEIGHT):
+        self.x = 0
+        self.y = 0
+        self.view_width = view_width
+        self.view_height = view_height
+        self.grid_width = GRID_WIDTH  # Taille du labyrinthe suivi (en cases)
+        self.grid_height = GRID_HEIGHT
+
+    def follow(self, maze, center_x, center_y):
+        """Centre la vue sur un point du labyrinthe (en pixels) sans dépasser ses bords"""
+        self.grid_width = maze.width
+        self.grid_height = maze.height
+        self.x = max(0, min(center_x - self.view_width // 2, maze.width * CELL_SIZE - self.view_width))
+        self.y = max(0, min(center_y - self.view_height // 2, maze.height * CELL_SIZE - self.view_height))
+
+    def show_map(self, maze, map_x, map_y):
+        """Vue fixée sur une carte d'un monde assemblé (une carte 21x21 remplit la fenêtre)"""
+        self.grid_width = maze.width
+        self.grid_height = maze.height
+        self.x = map_x * maze.map_size[0] * CELL_SIZE
+        self.y = map_y * maze.map_size[1] * CELL_SIZE
+
+    def visible_cells(self, maze):
+        """Colonnes et lignes (range) des cases du labyrinthe au moins en partie visibles"""
+        columns = range(self.x // CELL_SIZE, min(maze.width, (self.x + self.view_width - 1) // CELL_SIZE + 1))
+        rows = range(self.y // CELL_SIZE, min(maze.height, (self.y + self.view_height - 1) // CELL_SIZE + 1))
+        return columns, rows
+
+    def cell_rect(self, x, y):
+        """Rectangle à l'écran de la case (x, y)"""
+        return pygame.Rect(x * CELL_SIZE - self.x, y * CELL_SIZE - self.y, CELL_SIZE, CELL_SIZE)
+
+    def cell_center(self, x, y):
+        """Centre à l'écran de la case (x, y)"""
+        return x * CELL_SIZE + CELL_SIZE // 2 - self.x, y * CELL_SIZE + CELL_SIZE // 2 - self.y
+
+    def cell_at(self, screen_x, screen_y):
+        """Case du labyrinthe sous un point de l'écran (clic de souris)"""
+        return (screen_x + self.x) // CELL_SIZE, (screen_y + self.y) // CELL_SIZE
+
+# Vue fixe : tout le labyrinthe 21x21 tient dans la fenêtre
+FIXED_CAMERA = Camera()
+
+def interpolate_cell_center(prev_x, prev_y, x, y, alpha, camera=FIXED_CAMERA):
+    """Centre à l'écran d'une entité entre sa case précédente et sa case actuelle.
+
+    alpha (0 à 1) est la fraction du tick écoulée. Les sauts de plus d'une case
+    (tunnel, téléportation, réapparition) ne sont pas interpolés.
+    """
+    if abs(x - prev_x) + abs(y - prev_y) != 1:
+        prev_x, prev_y = x, y
+    center_x = int((prev_x + (x - prev_x) * alpha) * CELL_SIZE) + CELL_SIZE // 2 - camera.x
+    center_y = int((prev_y + (y - prev_y) * alpha) * CELL_SIZE) + CELL_SIZE // 2 - camera.y
+    return center_x, center_y
+
+
+def get_tick_rate(level):
+    """Vitesse logique du jeu (ticks par seconde) pour un niveau donné"""
+    # +1 tick par seconde par niveau, plafonné pour rester jouable
+    return min(BASE_FPS + (level - 1), MAX_TICK_RATE)
+
 
 class Pacman:
     def __init__(self, x, y):
@@ -439,6 +1648,13 @@ class Pacman:
         self.next_direction = (0, 0)
         self.mouth_open = True
         self.mouth_angle = 0
+        self.prev_x = x  # Position au tick précédent (pour l'interpolation de l'affichage)
+        self.prev_y = y
+        
+    def remember_position(self):
+        """Mémorise la position actuelle avant un tick"""
+        self.prev_x = self.x
+        self.prev_y = self.y
         
     def update(self, maze):
         # Essayer de changer de direction
@@ -451,8 +1667,8 @@ class Pacman:
             self.y += self.direction[1]
             # Téléportation aux bords
             if self.x < 0:
-                self.x = GRID_WIDTH - 1
-            elif self.x >= GRID_WIDTH:
+                self.x = maze.width - 1
+            elif self.x >= maze.width:
                 self.x = 0
         
         # Animation de la bouche
@@ -462,24 +1678,14 @@ class Pacman:
         self.mouth_open = (self.mouth_angle // 30) % 2 == 0
     
     def can_move(self, direction, maze):
-        new_x = self.x + direction[0]
-        new_y = self.y + direction[1]
-        
-        # Téléportation aux bords
-        if new_x < 0 or new_x >= GRID_WIDTH:
-            return True
-        
-        if new_y < 0 or new_y >= GRID_HEIGHT:
-            return False
-        
-        return maze[new_y][new_x] != 1
+        # Une seule lecture dans le masque des directions ouvertes (tunnels compris)
+        return maze.can_move(self.x, self.y, direction)
     
     def set_direction(self, direction):
         self.next_direction = direction
     
-    def draw(self, screen, invincible=False, has_crown=False, has_longue_vue=False, has_indigestion=False, is_double_longue_vue=False, is_rainbow_critique=False, has_skin_bleu=False, has_skin_orange=False, has_skin_rose=False, has_skin_rouge=False, super_vie_active=False):
-        center_x = self.x * CELL_SIZE + CELL_SIZE // 2
-        center_y = self.y * CELL_SIZE + CELL_SIZE // 2
+    def draw(self, screen, invincible=False, has_crown=False, has_longue_vue=False, has_indigestion=False, is_double_longue_vue=False, is_rainbow_critique=False, has_skin_bleu=False, has_skin_orange=False, has_skin_rose=False, has_skin_rouge=False, super_vie_active=False, alpha=1.0, camera=FIXED_CAMERA):
+        center_x, center_y = interpolate_cell_center(self.prev_x, self.prev_y, self.x, self.y, alpha, camera)
         radius = CELL_SIZE // 2 - 2
         
         # Si invincible (mais pas super vie), faire clignoter (afficher seulement 50% du temps)
@@ -625,51 +1831,189 @@ class Pacman:
             for block_cell_x, block_cell_y in block_positions:
                 # Gérer la téléportation aux bords
                 if block_cell_x < 0:
-                    block_cell_x = GRID_WIDTH - 1
-                elif block_cell_x >= GRID_WIDTH:
+                    block_cell_x = camera.grid_width - 1
+                elif block_cell_x >= camera.grid_width:
                     block_cell_x = 0
                 
                 # Vérifier que le bloc est dans les limites du labyrinthe
-                if 0 <= block_cell_x < GRID_WIDTH and 0 <= block_cell_y < GRID_HEIGHT:
-                    block_x = block_cell_x * CELL_SIZE
-                    block_y = block_cell_y * CELL_SIZE
-                    
+                if 0 <= block_cell_x < camera.grid_width and 0 <= block_cell_y < camera.grid_height:
                     # Dessiner le bloc (rectangle gris)
-                    block_rect = pygame.Rect(block_x, block_y, CELL_SIZE, CELL_SIZE)
+                    block_rect = camera.cell_rect(block_cell_x, block_cell_y)
                     pygame.draw.rect(screen, block_color, block_rect)
                     pygame.draw.rect(screen, BLACK, block_rect, 2)
 
+# Indicateurs d'état des fantômes (un octet par fantôme dans GhostRegistry.flags)
+GHOST_VULNERABLE = 1
+GHOST_RETURNING = 2
+GHOST_EYES = 4  # État yeux seulement (après avoir été mangé)
+GHOST_HARMLESS = 8  # Ne peut pas tuer Pacman (fantôme de l'indigestion)
+# Directions des fantômes, stockées par leur indice dans cette liste
+GHOST_DIRECTIONS = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]
+GHOST_DIRECTION_INDEX = {direction: i for i, direction in enumerate(GHOST_DIRECTIONS)}
+
+class GhostRegistry:
+    """Données des fantômes rangées en tableaux parallèles (une case par fantôme).
+
+    Les objets Ghost ne sont que des vues (numéro de case) sur ces tableaux : les
+    passes qui touchent tous les fantômes à chaque tick se font en une seule boucle
+    sur les tableaux, et chaque fantôme ne coûte que quelques octets par champ.
+    """
+    FIELDS = ('x', 'y', 'start_x', 'start_y', 'prev_x', 'prev_y', 'steps', 'ice_slowdown',
+              'flee_timer', 'immobilized_timer', 'hits_required', 'hits_taken', 'path_index')
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, array('i'))
+        self.direction = bytearray()  # Indice dans GHOST_DIRECTIONS
+        self.flags = bytearray()  # Combinaison de GHOST_VULNERABLE, GHOST_RETURNING...
+        self.owners = []  # Fantôme qui occupe chaque case, None si elle est libre
+        self.free_slots = []
+
+    def allocate(self, ghost, x, y):
+        """Réserve une case pour un nouveau fantôme en (x, y) et retourne son numéro"""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            for name in self.FIELDS:
+                getattr(self, name)[slot] = 0
+            self.direction[slot] = 0
+            self.flags[slot] = 0
+            self.owners[slot] = ghost
+        else:
+            slot = len(self.flags)
+            for name in self.FIELDS:
+                getattr(self, name).append(0)
+            self.direction.append(0)
+            self.flags.append(0)
+            self.owners.append(ghost)
+        for name in ('x', 'start_x', 'prev_x'):
+            getattr(self, name)[slot] = x
+        for name in ('y', 'start_y', 'prev_y'):
+            getattr(self, name)[slot] = y
+        self.hits_required[slot] = 1
+        return slot
+
+    def release(self, ghost):
+        """Rend la case d'un fantôme qui quitte la partie (rien à faire si elle est déjà rendue)"""
+        if self.owners[ghost.slot] is ghost:
+            self.owners[ghost.slot] = None
+            self.free_slots.append(ghost.slot)
+
+    def release_all(self, ghosts, kept=()):
+        """Rend les cases des fantômes de ghosts qui ne sont pas dans kept"""
+        kept = set(kept)
+        for ghost in ghosts:
+            if ghost not in kept:
+                self.release(ghost)
+
+    def reclaim(self, ghost):
+        """Redonne une case à un fantôme qui revient en jeu (GameState.restore) si la sienne a été rendue"""
+        if self.owners[ghost.slot] is not ghost:
+            ghost.slot = self.allocate(ghost, 0, 0)
+
+    def save(self, slot):
+        """Valeurs de tous les champs d'un fantôme (pour GameState.snapshot)"""
+        return tuple(getattr(self, name)[slot] for name in self.FIELDS) + (self.direction[slot], self.flags[slot])
+
+    def load(self, slot, saved):
+        for name, value in zip(self.FIELDS, saved):
+            getattr(self, name)[slot] = value
+        self.direction[slot] = saved[-2]
+        self.flags[slot] = saved[-1]
+
+    def remember_positions(self, ghosts):
+        """Mémorise la position de chaque fantôme avant un tick (pour l'interpolation)"""
+        xs, ys, prev_xs, prev_ys = self.x, self.y, self.prev_x, self.prev_y
+        for ghost in ghosts:
+            slot = ghost.slot
+            prev_xs[slot] = xs[slot]
+            prev_ys[slot] = ys[slot]
+
+    def tick_timers(self, ghosts, end_vulnerability):
+        """Passe unique du tick : fin de la vulnérabilité puis décompte de la fuite"""
+        flags, flee_timers = self.flags, self.flee_timer
+        for ghost in ghosts:
+            slot = ghost.slot
+            # Les fantômes redeviennent normaux (sauf ceux qui rentrent à la base)
+            if end_vulnerability and not flags[slot] & GHOST_RETURNING:
+                flags[slot] &= ~GHOST_VULNERABLE
+            if flee_timers[slot] > 0:
+                flee_timers[slot] -= 1
+
+# Tableaux partagés par tous les fantômes
+GHOST_REGISTRY = GhostRegistry()
+
+def _ghost_field(name):
+    """Attribut de Ghost lu et écrit dans le tableau du même nom du registre"""
+    values = getattr(GHOST_REGISTRY, name)  # Les tableaux grandissent sur place, la référence reste valable
+
+    def get(self):
+        return values[self.slot]
+
+    def set(self, value):
+        values[self.slot] = value
+    return property(get, set)
+
+def _ghost_flag(bit):
+    """Attribut booléen de Ghost stocké dans un bit de GhostRegistry.flags"""
+    flags = GHOST_REGISTRY.flags
+
+    def get(self):
+        return flags[self.slot] & bit != 0
+
+    def set(self, value):
+        if value:
+            flags[self.slot] |= bit
+        else:
+            flags[self.slot] &= ~bit
+    return property(get, set)
+
 class Ghost:
-    def __init__(self, x, y, color, harmless=False, hits_required=1):
-        self.x = x
-        self.y = y
-        self.start_x = x
-        self.start_y = y
+    __slots__ = ('registry', 'slot', 'color', 'path')
+
+    def __init__(self, x, y, color, harmless=False, hits_required=1, rng=random):
+        self.registry = GHOST_REGISTRY
+        self.slot = self.registry.allocate(self, x, y)
         self.color = color
-        self.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        self.steps = 0
-        self.vulnerable = False
-        self.returning = False
-        self.eyes = False  # État yeux seulement (après avoir été mangé)
-        self.ice_slowdown = 0  # Compteur pour ralentir le fantôme sur la glace
+        self.direction = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
         self.harmless = harmless  # Si True, ce fantôme ne peut pas tuer Pacman (pour l'indigestion)
-        self.flee_timer = 0  # Timer pour faire fuir le fantôme (10 secondes = 100 frames à 10 FPS)
-        self.immobilized_timer = 0  # Timer pour immobiliser le fantôme (10 secondes = 100 frames à 10 FPS)
         self.hits_required = hits_required  # Nombre de "coups" nécessaires pour tuer le fantôme (par défaut 1)
-        self.hits_taken = 0  # Nombre de "coups" déjà reçus
-        # Chemin prédéfini pour les fantômes bleus
-        if color == BLUE:
-            # Le chemin sera généré lors de l'initialisation avec le labyrinthe
-            self.path = None
-            self.path_index = 0
-        else:
-            self.path = None
-            self.path_index = 0
+        # Chemin prédéfini pour les fantômes bleus (généré avec le labyrinthe par set_path)
+        self.path = None
+
+    def release(self):
+        """Rend la case du fantôme au registre : à appeler quand il quitte la partie"""
+        self.registry.release(self)
+
+    x = _ghost_field('x')
+    y = _ghost_field('y')
+    start_x = _ghost_field('start_x')
+    start_y = _ghost_field('start_y')
+    prev_x = _ghost_field('prev_x')  # Position au tick précédent (pour l'interpolation de l'affichage)
+    prev_y = _ghost_field('prev_y')
+    steps = _ghost_field('steps')
+    ice_slowdown = _ghost_field('ice_slowdown')  # Compteur pour ralentir le fantôme sur la glace
+    flee_timer = _ghost_field('flee_timer')  # Timer pour faire fuir le fantôme (10 secondes = 100 frames à 10 FPS)
+    immobilized_timer = _ghost_field('immobilized_timer')  # Timer pour immobiliser le fantôme
+    hits_required = _ghost_field('hits_required')
+    hits_taken = _ghost_field('hits_taken')  # Nombre de "coups" déjà reçus
+    path_index = _ghost_field('path_index')
+    vulnerable = _ghost_flag(GHOST_VULNERABLE)
+    returning = _ghost_flag(GHOST_RETURNING)
+    eyes = _ghost_flag(GHOST_EYES)
+    harmless = _ghost_flag(GHOST_HARMLESS)
+
+    @property
+    def direction(self):
+        return GHOST_DIRECTIONS[GHOST_REGISTRY.direction[self.slot]]
+
+    @direction.setter
+    def direction(self, value):
+        GHOST_REGISTRY.direction[self.slot] = GHOST_DIRECTION_INDEX[value]
     
     def set_path(self, maze):
         """Définit le chemin prédéfini pour les fantômes bleus"""
         if self.color == BLUE:
-            self.path = generate_path_through_all_cells(maze)
+            self.path = get_patrol_tour(maze)
             # Trouver la position la plus proche dans le chemin
             min_dist = float('inf')
             closest_index = 0
@@ -680,18 +2024,37 @@ class Ghost:
                     closest_index = i
             self.path_index = closest_index
         
-    def update(self, maze, pacman_pos=None):
-        self.steps += 1
+    def remember_position(self):
+        """Mémorise la position actuelle avant un tick"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
+    def update(self, maze, pacman_pos=None, rng=random, pacman_direction=(0, 0)):
+        """Avance le fantôme d'une case (rng : flux aléatoire de l'IA des fantômes de la partie)"""
+        # Lecture unique des champs du registre utilisés pour choisir la direction
+        slot = self.slot
+        registry = GHOST_REGISTRY
+        registry.steps[slot] += 1
+        steps = registry.steps[slot]
+        x = registry.x[slot]
+        y = registry.y[slot]
+        start_x = registry.start_x[slot]
+        start_y = registry.start_y[slot]
+        # Directions légales depuis la case actuelle, lues dans la table du labyrinthe
+        legal_moves = maze.legal_moves(x, y)
         
         # Si en mode yeux, retourner à la base (peut traverser les murs)
         if self.eyes:
             # Se diriger vers la position de départ (chemin le plus court)
-            dx = self.start_x - self.x
-            dy = self.start_y - self.y
+            dx = start_x - x
+            dy = start_y - y
             
-            # Choisir la direction qui se rapproche le plus de la base
-            # Les yeux peuvent traverser les murs, donc on choisit directement la meilleure direction
-            if abs(dx) > abs(dy):
+            # Suivre le chemin de retour vers la base quand il existe (calculé une fois par labyrinthe)
+            route_index = get_home_route(maze, (start_x, start_y))[y * maze.width + x]
+            if route_index != NO_DIRECTION:
+                self.direction = DIRECTION_LIST[route_index]
+            # Sinon (case murée, base isolée...) les yeux traversent les murs en ligne droite
+            elif abs(dx) > abs(dy):
                 if dx > 0:
                     self.direction = (1, 0)
                 elif dx < 0:
@@ -711,58 +2074,21 @@ class Ghost:
                     self.direction = (-1, 0)
             
             # Vérifier si on est arrivé à la base
-            if self.x == self.start_x and self.y == self.start_y:
+            if x == start_x and y == start_y:
                 self.eyes = False
                 self.vulnerable = False
                 self.returning = False
-                self.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        # Si le fantôme doit fuir (flee_timer > 0), fuir Pacman (comme vulnérable)
-        elif self.flee_timer > 0 and pacman_pos is not None:
-            pacman_x, pacman_y = pacman_pos
-            # Calculer la direction pour s'éloigner de Pacman
-            dx = self.x - pacman_x
-            dy = self.y - pacman_y
-            
-            # Choisir la direction qui s'éloigne le plus de Pacman
-            possible_dirs = []
-            if abs(dx) > abs(dy):
-                if dx > 0:
-                    possible_dirs.append((1, 0))
-                else:
-                    possible_dirs.append((-1, 0))
-                if dy > 0:
-                    possible_dirs.append((0, 1))
-                else:
-                    possible_dirs.append((0, -1))
-            else:
-                if dy > 0:
-                    possible_dirs.append((0, 1))
-                else:
-                    possible_dirs.append((0, -1))
-                if dx > 0:
-                    possible_dirs.append((1, 0))
-                else:
-                    possible_dirs.append((-1, 0))
-            
-            # Choisir une direction valide qui s'éloigne de Pacman
-            valid_dirs = [d for d in possible_dirs if self.can_move(d, maze)]
-            if valid_dirs:
-                self.direction = valid_dirs[0]
-            elif self.steps % 3 == 0:
-                # Si bloqué, essayer une direction aléatoire
-                all_dirs = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                valid_dirs = [d for d in all_dirs if self.can_move(d, maze)]
-                if valid_dirs:
-                    self.direction = random.choice(valid_dirs)
-        # Si vulnérable, fuir Pacman
-        elif self.vulnerable and pacman_pos is not None:
+                self.direction = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        # Si vulnérable ou si le fantôme doit fuir (flee_timer > 0), fuir Pacman
+        elif (self.flee_timer > 0 or self.vulnerable) and pacman_pos is not None:
             pacman_x, pacman_y = pacman_pos
             # Calculer la direction pour s'éloigner de Pacman
-            dx = self.x - pacman_x
-            dy = self.y - pacman_y
+            dx = x - pacman_x
+            dy = y - pacman_y
             
-            # Choisir la direction qui s'éloigne le plus de Pacman
-            possible_dirs = []
+            # Champ de fuite partagé d'abord, puis la direction qui s'éloigne le plus de Pacman
+            flee_direction = PURSUIT_FIELD.flee_direction(maze, pacman_pos, x, y)
+            possible_dirs = [flee_direction] if flee_direction is not None else []
             if abs(dx) > abs(dy):
                 if dx > 0:
                     possible_dirs.append((1, 0))
@@ -783,15 +2109,14 @@ class Ghost:
                     possible_dirs.append((-1, 0))
             
             # Choisir une direction valide qui s'éloigne de Pacman
-            valid_dirs = [d for d in possible_dirs if self.can_move(d, maze)]
+            valid_dirs = [d for d in possible_dirs if d in legal_moves]
             if valid_dirs:
                 self.direction = valid_dirs[0]
-            elif self.steps % 3 == 0:
+            elif steps % 3 == 0:
                 # Si bloqué, essayer une direction aléatoire
-                all_dirs = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                valid_dirs = [d for d in all_dirs if self.can_move(d, maze)]
+                valid_dirs = list(legal_moves)
                 if valid_dirs:
-                    self.direction = random.choice(valid_dirs)
+                    self.direction = rng.choice(valid_dirs)
         else:
             # Comportement normal : les fantômes bleus suivent un chemin prédéfini
             if self.color == BLUE and self.path is not None:
@@ -799,13 +2124,13 @@ class Ghost:
                 target_x, target_y = self.path[self.path_index]
                 
                 # Si on est arrivé à la position cible, passer à la suivante
-                if self.x == target_x and self.y == target_y:
+                if x == target_x and y == target_y:
                     self.path_index = (self.path_index + 1) % len(self.path)
                     target_x, target_y = self.path[self.path_index]
                 
                 # Calculer la direction vers la prochaine position du chemin
-                dx = target_x - self.x
-                dy = target_y - self.y
+                dx = target_x - x
+                dy = target_y - y
                 
                 # Choisir la direction qui se rapproche le plus de la cible
                 possible_dirs = []
@@ -829,23 +2154,24 @@ class Ghost:
                         possible_dirs.append((-1, 0))
                 
                 # Choisir une direction valide qui se rapproche de la cible
-                valid_dirs = [d for d in possible_dirs if self.can_move(d, maze)]
+                valid_dirs = [d for d in possible_dirs if d in legal_moves]
                 if valid_dirs:
                     self.direction = valid_dirs[0]
-                elif self.steps % 3 == 0:
+                elif steps % 3 == 0:
                     # Si bloqué, essayer une direction aléatoire
-                    all_dirs = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                    valid_dirs = [d for d in all_dirs if self.can_move(d, maze)]
+                    valid_dirs = list(legal_moves)
                     if valid_dirs:
-                        self.direction = random.choice(valid_dirs)
+                        self.direction = rng.choice(valid_dirs)
             elif self.color == RED and pacman_pos is not None:
                 # Les fantômes rouges suivent Pacman
                 pacman_x, pacman_y = pacman_pos
-                dx = pacman_x - self.x
-                dy = pacman_y - self.y
+                dx = pacman_x - x
+                dy = pacman_y - y
                 
+                # Premier pas du plus court chemin vers Pacman (champ partagé, un BFS par case de Pacman)
+                path_direction = PURSUIT_FIELD.chase_direction(maze, pacman_pos, x, y)
                 # Choisir la direction qui se rapproche le plus de Pacman
-                possible_dirs = []
+                possible_dirs = [path_direction] if path_direction is not None else []
                 if abs(dx) > abs(dy):
                     if dx > 0:
                         possible_dirs.append((1, 0))
@@ -866,68 +2192,81 @@ class Ghost:
                         possible_dirs.append((-1, 0))
                 
                 # Choisir une direction valide qui se rapproche de Pacman
-                valid_dirs = [d for d in possible_dirs if self.can_move(d, maze)]
+                valid_dirs = [d for d in possible_dirs if d in legal_moves]
                 if valid_dirs:
                     self.direction = valid_dirs[0]
-                elif self.steps % 3 == 0:
+                elif steps % 3 == 0:
                     # Si bloqué, essayer une direction aléatoire
-                    all_dirs = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                    valid_dirs = [d for d in all_dirs if self.can_move(d, maze)]
+                    valid_dirs = list(legal_moves)
                     if valid_dirs:
-                        self.direction = random.choice(valid_dirs)
+                        self.direction = rng.choice(valid_dirs)
+            elif self.color in GHOST_PERSONALITIES and pacman_pos is not None:
+                # Les autres fantômes visent chacun leur case (voir ghost_target), mais ne choisissent
+                # leur route qu'aux carrefours : ailleurs ils suivent le couloir sans faire demi-tour
+                direction = self.direction
+                opposite = (-direction[0], -direction[1])
+                forward_dirs = [d for d in legal_moves if d != opposite]
+                if get_junctions(maze)[y * maze.width + x]:
+                    target = ghost_target(GHOST_PERSONALITIES[self.color], maze, pacman_pos, pacman_direction,
+                                          (x, y), (start_x, start_y))
+                    path_direction = target_direction(maze, target, x, y)
+                    if path_direction is not None:
+                        self.direction = path_direction
+                    elif forward_dirs:
+                        # Déjà sur la cible (ou cible hors d'atteinte) : au hasard, sans demi-tour
+                        self.direction = rng.choice(forward_dirs)
+                elif direction not in legal_moves:
+                    # Virage, cul-de-sac ou fantôme à l'arrêt hors d'un carrefour : suivre le couloir
+                    valid_dirs = forward_dirs or list(legal_moves)
+                    if valid_dirs:
+                        self.direction = valid_dirs[0]
             else:
                 # Comportement normal pour les autres fantômes : changer de direction moins souvent
-                if self.steps % 8 == 0 or not self.can_move(self.direction, maze):
+                if steps % 8 == 0 or not self.direction in legal_moves:
                     possible_dirs = [(1, 0), (-1, 0), (0, 1), (0, -1)]
                     # Éviter de revenir en arrière
                     opposite = (-self.direction[0], -self.direction[1])
                     possible_dirs = [d for d in possible_dirs if d != opposite]
                     
-                    valid_dirs = [d for d in possible_dirs if self.can_move(d, maze)]
+                    valid_dirs = [d for d in legal_moves if d != opposite]
                     if valid_dirs:
-                        self.direction = random.choice(valid_dirs)
-                    elif self.can_move(self.direction, maze):
+                        self.direction = rng.choice(valid_dirs)
+                    elif self.direction in legal_moves:
                         pass  # Garder la direction actuelle
                     else:
-                        self.direction = random.choice(possible_dirs)
+                        self.direction = rng.choice(possible_dirs)
         
         # Les yeux peuvent traverser les murs, les autres non
         # Les fantômes rouges sont 2 fois moins rapides (ne se déplacent qu'une fois sur deux)
-        if self.eyes or self.can_move(self.direction, maze):
+        eyes = registry.flags[slot] & GHOST_EYES
+        direction = GHOST_DIRECTIONS[registry.direction[slot]]
+        if eyes or direction in legal_moves:
             # Si c'est un fantôme rouge, ne se déplacer qu'une fois sur deux frames
-            if self.color == RED and self.steps % 2 != 0:
+            if self.color == RED and steps % 2 != 0:
                 pass  # Ne pas se déplacer cette frame
             else:
-                self.x += self.direction[0]
-                self.y += self.direction[1]
+                x += direction[0]
+                y += direction[1]
                 # Téléportation aux bords
-                if self.x < 0:
-                    self.x = GRID_WIDTH - 1
-                elif self.x >= GRID_WIDTH:
-                    self.x = 0
+                if x < 0:
+                    x = maze.width - 1
+                elif x >= maze.width:
+                    x = 0
             # Pour les yeux, s'assurer qu'ils restent dans les limites verticales
-            if self.eyes:
-                if self.y < 0:
-                    self.y = 0
-                elif self.y >= GRID_HEIGHT:
-                    self.y = GRID_HEIGHT - 1
+            if eyes:
+                if y < 0:
+                    y = 0
+                elif y >= maze.height:
+                    y = maze.height - 1
+            registry.x[slot] = x
+            registry.y[slot] = y
     
     def can_move(self, direction, maze):
-        new_x = self.x + direction[0]
-        new_y = self.y + direction[1]
-        
-        # Téléportation aux bords
-        if new_x < 0 or new_x >= GRID_WIDTH:
-            return True
-        
-        if new_y < 0 or new_y >= GRID_HEIGHT:
-            return False
-        
-        return maze[new_y][new_x] != 1
+        # Une seule lecture dans le masque des directions ouvertes (tunnels compris)
+        return maze.can_move(self.x, self.y, direction)
     
-    def draw(self, screen):
-        center_x = self.x * CELL_SIZE + CELL_SIZE // 2
-        center_y = self.y * CELL_SIZE + CELL_SIZE // 2
+    def draw(self, screen, alpha=1.0, camera=FIXED_CAMERA):
+        center_x, center_y = interpolate_cell_center(self.prev_x, self.prev_y, self.x, self.y, alpha, camera)
         radius = CELL_SIZE // 2 - 2
         
         # Si en mode yeux, dessiner seulement les yeux
@@ -961,28 +2300,26 @@ class Ghost:
 
 
 
-def draw_maze(screen, maze, ice_tiles=None, fire_tiles=None, is_adventure_mode=False):
+def draw_maze(screen, maze, ice_tiles=None, fire_tiles=None, is_adventure_mode=False, camera=FIXED_CAMERA):
     if ice_tiles is None:
         ice_tiles = {}
     if fire_tiles is None:
         fire_tiles = {}
     
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    # Seulement les cases visibles dans la vue (quelques centaines même sur un très grand labyrinthe)
+    columns, rows = camera.visible_cells(maze)
+    for y in rows:
+        for x in columns:
+            rect = camera.cell_rect(x, y)
             if maze[y][x] == 1:
                 pygame.draw.rect(screen, DARK_BLUE, rect)
             elif maze[y][x] == 2:
                 # Dessiner un point (sauf en mode aventure)
                 if not is_adventure_mode:
-                    center_x = x * CELL_SIZE + CELL_SIZE // 2
-                    center_y = y * CELL_SIZE + CELL_SIZE // 2
-                    pygame.draw.circle(screen, YELLOW, (center_x, center_y), 2)
+                    pygame.draw.circle(screen, YELLOW, rect.center, 2)
             elif maze[y][x] == 3:
                 # Dessiner une pacgomme (toujours visible, même en mode aventure)
-                center_x = x * CELL_SIZE + CELL_SIZE // 2
-                center_y = y * CELL_SIZE + CELL_SIZE // 2
-                pygame.draw.circle(screen, YELLOW, (center_x, center_y), 6)
+                pygame.draw.circle(screen, YELLOW, rect.center, 6)
             
             # Dessiner les cases de feu (avant la glace pour que le feu soit visible)
             if (x, y) in fire_tiles:
@@ -990,8 +2327,7 @@ def draw_maze(screen, maze, ice_tiles=None, fire_tiles=None, is_adventure_mode=F
                 fire_color = (255, 69, 0)  # Rouge-orange
                 pygame.draw.rect(screen, fire_color, rect)
                 # Dessiner des flammes animées
-                center_x = x * CELL_SIZE + CELL_SIZE // 2
-                center_y = y * CELL_SIZE + CELL_SIZE // 2
+                center_x, center_y = rect.center
                 # Flamme principale
                 flame_points = [
                     (center_x, rect.top + 2),
@@ -1029,12 +2365,17 @@ def draw_maze(screen, maze, ice_tiles=None, fire_tiles=None, is_adventure_mode=F
                             crystal_y = rect.top + j * CELL_SIZE // 3 + CELL_SIZE // 6
                             pygame.draw.circle(screen, (255, 255, 255), (crystal_x, crystal_y), 2)
 
-def count_points(maze):
-    count = 0
-    for row in maze:
-        count += row.count(2)  # Points normaux
-        count += row.count(3)  # Pacgommes
-    return count
+def count_points(maze, position=None):
+    """Points normaux + pacgommes restants (compteur tenu à jour par Maze.set_cell).
+
+    Dans un monde 4x4, avec position : seulement ceux de la carte qui contient cette case.
+    """
+    if DEBUG_PELLET_CHECK:
+        scanned = maze.count(2) + maze.count(3)
+        assert maze.pellets == scanned, f"Compteur de points faux : {maze.pellets} au lieu de {scanned}"
+    if maze.map_size is not None and position is not None:
+        return maze.map_pellets[maze.map_index(*position)]
+    return maze.pellets
 
 def get_most_common_ghost_color(ghosts, level):
     """Détermine la couleur de fantôme la plus courante dans le niveau"""
@@ -1062,13 +2403,25 @@ def get_most_common_ghost_color(ghosts, level):
     else:
         return RED
 
-def start_next_level(level, is_adventure_mode=False):
-    """Initialise le niveau suivant avec un labyrinthe différent"""
-    # Choisir un labyrinthe différent selon le niveau (rotation entre les 100 labyrinthes)
-    maze_index = (level - 1) % len(MAZES)
-    selected_maze = MAZES[maze_index]
-    maze = [row[:] for row in selected_maze]
-    pacman = Pacman(10, 15)
+def start_next_level(level, is_adventure_mode=False, rng=random, mazes=COMPACT_MAZES, multi_map=None, world=None):
+    """Initialise le niveau suivant avec un labyrinthe différent (rng : flux aléatoire des fantômes).
+
+    mazes : labyrinthes (Maze) parcourus en rotation, de n'importe quelle taille.
+    multi_map : jouer dans le monde 4x4 (par défaut aux niveaux multiples de 10 du mode aventure).
+    world : monde infini (ChunkWorld) ; le niveau continue dans le morceau où se trouve Pacman.
+    """
+    if multi_map is None:
+        multi_map = is_adventure_mode and level % 10 == 0
+    if world is not None:
+        maze = world.maze
+    elif multi_map:
+        maze = build_world_maze(mazes)
+    else:
+        # Choisir un labyrinthe différent selon le niveau (rotation entre les labyrinthes)
+        maze_index = (level - 1) % len(mazes)
+        maze = mazes[maze_index].copy()
+    pacman = Pacman(*maze.pacman_start)
+    ghost_x, ghost_y = maze.ghost_start
     # Augmenter le nombre de fantômes selon le niveau
     # Niveaux 1-2: 1 fantôme bleu
     # Niveaux 3-4: 2 fantômes bleus
@@ -1087,57 +2440,62 @@ def start_next_level(level, is_adventure_mode=False):
         # Niveaux 1-2: 1 fantôme bleu
         num_ghosts = 1
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, BLUE))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, BLUE, rng=rng))
     elif level <= 4:
         # Niveaux 3-4: 2 fantômes bleus
         num_ghosts = 2
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, BLUE))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, BLUE, rng=rng))
     elif level <= 6:
         # Niveaux 5-6: 1 fantôme bleu, 1 fantôme orange
         # En mode aventure niveau 5: remplacer le fantôme orange par un fantôme violet spécial (nécessite 2 coups)
         num_ghosts = 2
-        ghosts.append(Ghost(10, 9, BLUE))
+        ghosts.append(Ghost(ghost_x, ghost_y, BLUE, rng=rng))
         if is_adventure_mode and level == 5:
             # Fantôme violet spécial au niveau 5 en mode aventure (nécessite 2 coups)
-            ghosts.append(Ghost(11, 9, VIOLET, harmless=False, hits_required=2))
+            ghosts.append(Ghost(ghost_x + 1, ghost_y, VIOLET, harmless=False, hits_required=2, rng=rng))
         else:
-            ghosts.append(Ghost(11, 9, ORANGE))
+            ghosts.append(Ghost(ghost_x + 1, ghost_y, ORANGE, rng=rng))
     elif level <= 8:
         # Niveaux 7-8: 2 fantômes orange
         num_ghosts = 2
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, ORANGE))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, ORANGE, rng=rng))
     elif level <= 10:
         # Niveaux 9-10: 1 fantôme orange, 1 fantôme rose
         num_ghosts = 2
-        ghosts.append(Ghost(10, 9, ORANGE))
-        ghosts.append(Ghost(11, 9, ROSE))
+        ghosts.append(Ghost(ghost_x, ghost_y, ORANGE, rng=rng))
+        ghosts.append(Ghost(ghost_x + 1, ghost_y, ROSE, rng=rng))
     elif level <= 12:
         # Niveaux 11-12: 2 fantômes roses
         num_ghosts = 2
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, ROSE))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, ROSE, rng=rng))
     elif level <= 14:
         # Niveaux 13-14: 1 fantôme rose, 1 fantôme rouge
         num_ghosts = 2
-        ghosts.append(Ghost(10, 9, ROSE))
-        ghosts.append(Ghost(11, 9, RED))
+        ghosts.append(Ghost(ghost_x, ghost_y, ROSE, rng=rng))
+        ghosts.append(Ghost(ghost_x + 1, ghost_y, RED, rng=rng))
     elif level <= 16:
         # Niveaux 15-16: 2 fantômes rouges
         num_ghosts = 2
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, RED))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, RED, rng=rng))
     else:
         # Niveaux 17+: 2 fantômes rouges (par défaut)
         num_ghosts = 2
         for i in range(num_ghosts):
-            ghosts.append(Ghost(10 + i, 9, RED))
+            ghosts.append(Ghost(ghost_x + i, ghost_y, RED, rng=rng))
     
-    # Définir le chemin pour tous les fantômes bleus
+    # Définir le chemin pour tous les fantômes bleus (pas de tournée fixe dans le monde infini : il se décale)
     for ghost in ghosts:
-        if ghost.color == BLUE:
+        if ghost.color == BLUE and world is None:
             ghost.set_path(maze)
+        # Chemin de retour des yeux vers la base, prêt avant le premier fantôme mangé
+        get_home_route(maze, (ghost.start_x, ghost.start_y))
+    # Table des distances d'un labyrinthe de base chargée avant la partie : un gadget ne la calcule jamais
+    if maze.layout_key() in BASE_LAYOUT_KEYS:
+        get_distance_table(maze)
     
     return maze, pacman, ghosts
 
@@ -1180,52 +2538,212 @@ def has_double_gadget_equipped(inventaire_items):
             ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'double gadget') or
             ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'double gadget'))
 
-def respawn_player_and_ghosts(pacman, ghosts, invincibilite_bonus=0):
-    """Réinitialise les positions de Pacman et des fantômes après perte de vie"""
-    pacman = Pacman(10, 15)
-    for ghost in ghosts:
-        ghost.x = ghost.start_x
+EQUIPMENT_FIELDS = (
+    'pouvoir_type', 'gadget_type',
+    # Pouvoir (slot "pouvoir")
+    'has_longue_vue', 'is_double_longue_vue', 'has_bon_repas', 'has_bon_gout', 'has_pas_indigestion', 'has_glace',
+    'has_skin_bleu', 'has_skin_orange', 'has_skin_rose', 'has_skin_rouge',
+    # Objets (slots "objet0" à "objet2")
+    'has_piece_mythique', 'has_givre', 'has_double_gadget', 'has_vision_x_objet', 'has_infra_rouge', 'has_bric',
+    'has_coffre_fort', 'has_coffre_tresor',
+    # Gadget lave / feu
+    'has_feu_gadget', 'gadget_feu_type',
+    # Durées et bonus déjà calculés (en ticks, cases ou probabilité)
+    'fire_duration', 'ice_duration', 'ice_slowdown_threshold', 'piege_duration', 'explosion_radius',
+    'longue_vue_distance', 'vision_x_cooldown_reduction', 'cooldown_reduction', 'vulnerable_duration',
+    'indigestion_chance', 'armor_lives_bonus', 'invincibilite_bonus',
+)
+
+class EquipmentProfile(namedtuple('EquipmentProfile', EQUIPMENT_FIELDS)):
+    """Équipement résolu d'une partie (non modifiable).
+
+    Calculé une fois quand l'inventaire change (début de partie, retour en jeu après
+    l'inventaire ou la boutique) : le code de chaque tick lit ces champs au lieu de
+    fouiller inventaire_items et capacite_items.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_inventory(cls, inventaire_items, capacite_items):
+        def slot_type(slot_name):
+            return inventaire_items[slot_name].get('type') if slot_name in inventaire_items else None
+
+        def capacity_level(name):
+            # Niveau d'une capacité, compté seulement si elle est équipée dans un slot capacité
+            if name not in capacites:
+                return 0
+            return capacite_items.count(name) if capacite_items else 0
+
+        def bought_level(name):
+            # Niveau d'une capacité achetée, qu'elle soit équipée ou non
+            return capacite_items.count(name) if capacite_items else 0
+
+        pouvoir = slot_type('pouvoir')
+        objets = {slot_type('objet0'), slot_type('objet1'), slot_type('objet2')}
+        capacites = {slot_type('capacite1'), slot_type('capacite2')}
+        gadget = get_equipped_gadget(inventaire_items)
+        gadget_type = gadget.get('type') if gadget else None
+        has_longue_vue = pouvoir in ('longue vue', 'double longue vue')
+        has_glace = pouvoir == 'glace'
+        has_givre = 'givre' in objets
+        has_pas_indigestion = pouvoir == 'pas d\'indigestion'
+
+        ice_duration = ICE_DURATION + capacity_level('gel') * 10 if has_glace else ICE_DURATION
+        vision_x_cooldown_reduction = capacity_level('bonne vue') * 25  # 2.5 secondes par niveau
+        if 'infra rouge' in objets:
+            vision_x_cooldown_reduction += 50  # 5 secondes de plus
+        # Chance d'indigestion : 0.5 % (divisée par 2 avec "pas d'indigestion"), -10 % par niveau de "indigestion"
+        base_indigestion_chance = 0.0025 if has_pas_indigestion else 0.005
+        indigestion_chance = base_indigestion_chance * max(0.0, 1.0 - (bought_level('indigestion') * 0.1))
+
+        return cls(
+            pouvoir_type=pouvoir,
+            gadget_type=gadget_type,
+            has_longue_vue=has_longue_vue,
+            is_double_longue_vue=pouvoir == 'double longue vue',
+            has_bon_repas=pouvoir == 'bon repas',
+            has_bon_gout=pouvoir == 'bon goût',
+            has_pas_indigestion=has_pas_indigestion,
+            has_glace=has_glace,
+            has_skin_bleu=pouvoir == 'skin bleu',
+            has_skin_orange=pouvoir == 'skin orange',
+            has_skin_rose=pouvoir == 'skin rose',
+            has_skin_rouge=pouvoir == 'skin rouge',
+            has_piece_mythique='pièce mythique' in objets,
+            has_givre=has_givre,
+            has_double_gadget='double gadget' in objets,
+            has_vision_x_objet='vision x' in objets,
+            has_infra_rouge='infra rouge' in objets,
+            has_bric='bric' in objets,
+            has_coffre_fort='coffre fort' in objets,
+            has_coffre_tresor='coffre au trésor' in objets,
+            has_feu_gadget=gadget_type in ('lave', 'feu'),
+            gadget_feu_type=gadget_type if gadget_type in ('lave', 'feu') else None,
+            fire_duration=calculate_fire_duration(inventaire_items, FIRE_DURATION),
+            ice_duration=ice_duration,
+            ice_slowdown_threshold=5 if (has_glace and has_givre) else 3,
+            piege_duration=PIEGE_IMMOBILISATION_DURATION + capacity_level('piquant') * 10,
+            explosion_radius=1 + capacity_level('bonbe'),
+            longue_vue_distance=1 + capacity_level('lunette') if has_longue_vue else 1,
+            vision_x_cooldown_reduction=vision_x_cooldown_reduction,
+            # 1 tick de base + 1 par niveau de "gadget" acheté
+            cooldown_reduction=1 + bought_level('gadget'),
+            vulnerable_duration=VULNERABLE_DURATION + bought_level('pacgum') * 10,
+            indigestion_chance=indigestion_chance,
+            armor_lives_bonus=calculate_armor_lives_bonus(inventaire_items),
+            invincibilite_bonus=calculate_invincibilite_bonus(capacite_items, inventaire_items),
+        )
+
+def respawn_player_and_ghosts(pacman, ghosts, invincibilite_bonus=0, rng=random, start=PACMAN_START):
+    """Réinitialise les positions de Pacman et des fantômes après perte de vie (start : case de départ du labyrinthe)"""
+    pacman = Pacman(*start)
+    for ghost in ghosts:
+        ghost.x = ghost.start_x
         ghost.y = ghost.start_y
         ghost.vulnerable = False
         ghost.returning = False
         ghost.eyes = False
-        ghost.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        ghost.direction = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
     return pacman, 30 + invincibilite_bonus  # Retourner aussi le timer d'invincibilité (3 secondes + bonus)
 
-def start_game_with_difficulty(difficulty, inventaire_items, capacite_items, invincibilite_bonus, ghosts):
+def remove_harmless_ghosts(ghosts):
+    """Retire de la liste (sur place) les fantômes d'indigestion et rend leurs cases au registre"""
+    kept = [ghost for ghost in ghosts if not ghost.harmless]
+    GHOST_REGISTRY.release_all(ghosts, kept)
+    ghosts[:] = kept
+
+def add_difficulty_ghosts(ghosts, maze, difficulty, level, rng=random):
+    """Ajoute les fantômes supplémentaires de la difficulté en arrivant à un niveau (après start_next_level)"""
+    # Ajouter un fantôme bleu supplémentaire pour le mode moyen (niveau 3+)
+    if difficulty == "moyen" and level >= 3:
+        new_ghost = Ghost(maze.ghost_start[0] + 2, maze.ghost_start[1], BLUE, rng=rng)
+        ghosts.append(new_ghost)
+        new_ghost.set_path(maze)
+    # Ajouter 2 fantômes orange supplémentaires pour le mode difficile (niveau 3+)
+    if difficulty == "difficile" and level >= 3:
+        ORANGE = (255, 165, 0)
+        # Trouver une position libre pour les nouveaux fantômes
+        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
+        new_x = maze.ghost_start[0] + 2
+        new_y = maze.ghost_start[1]
+        # Chercher une position libre
+        while (new_x, new_y) in existing_positions:
+            new_x += 1
+            if new_x >= maze.width:
+                new_x = 0
+                new_y += 1
+        new_ghost1 = Ghost(new_x, new_y, ORANGE, rng=rng)
+        ghosts.append(new_ghost1)
+        new_ghost1.set_path(maze)
+        # Chercher une autre position libre pour le deuxième fantôme
+        existing_positions.append((new_x, new_y))
+        new_x2 = new_x + 1
+        new_y2 = new_y
+        while (new_x2, new_y2) in existing_positions:
+            new_x2 += 1
+            if new_x2 >= maze.width:
+                new_x2 = 0
+                new_y2 += 1
+        new_ghost2 = Ghost(new_x2, new_y2, ORANGE, rng=rng)
+        ghosts.append(new_ghost2)
+        new_ghost2.set_path(maze)
+    # Ajouter 3 fantômes orange supplémentaires pour le mode hardcore (niveau 3+)
+    if difficulty == "hardcore" and level >= 3:
+        ORANGE = (255, 165, 0)
+        # Trouver une position libre pour les nouveaux fantômes
+        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
+        # Ajouter 3 fantômes orange
+        for i in range(3):
+            new_x = maze.ghost_start[0] + 2 + i
+            new_y = maze.ghost_start[1]
+            # Chercher une position libre
+            while (new_x, new_y) in existing_positions:
+                new_x += 1
+                if new_x >= maze.width:
+                    new_x = 0
+                    new_y += 1
+                    if new_y >= maze.height:
+                        new_y = 0
+            # Ajouter le fantôme orange
+            new_ghost = Ghost(new_x, new_y, ORANGE, rng=rng)
+            ghosts.append(new_ghost)
+            new_ghost.set_path(maze)
+            existing_positions.append((new_x, new_y))
+
+def start_game_with_difficulty(difficulty, inventaire_items, capacite_items, invincibilite_bonus, ghosts, rng=random, mazes=COMPACT_MAZES):
     """Démarre la partie selon la difficulté choisie"""
     # Supprimer le fantôme d'indigestion s'il existe
-    ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
+    remove_harmless_ghosts(ghosts)
     has_indigestion = False
     indigestion_timer = 0
     
     if difficulty == "facile":
         # Facile : niveau 1 avec 5 vies
-        maze, pacman, ghosts = start_next_level(1)
+        maze, pacman, ghosts = start_next_level(1, rng=rng, mazes=mazes)
         armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
         lives = 5 + armor_lives_bonus_init
     elif difficulty == "moyen":
         # Moyen : niveau 3 avec un fantôme bleu supplémentaire
-        maze, pacman, ghosts = start_next_level(3)
+        maze, pacman, ghosts = start_next_level(3, rng=rng, mazes=mazes)
         # Ajouter un fantôme bleu supplémentaire pour le mode moyen
-        new_ghost = Ghost(11, 9, BLUE)
+        new_ghost = Ghost(maze.ghost_start[0] + 1, maze.ghost_start[1], BLUE, rng=rng)
         ghosts.append(new_ghost)
         new_ghost.set_path(maze)
         armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
         lives = 2 + armor_lives_bonus_init
     elif difficulty == "difficile":
         # Difficile : niveau 1 avec 1 vie
-        maze, pacman, ghosts = start_next_level(1)
+        maze, pacman, ghosts = start_next_level(1, rng=rng, mazes=mazes)
         armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
         lives = 1 + armor_lives_bonus_init
     elif difficulty == "hardcore":
         # Hardcore : niveau 5 avec 1 vie
-        maze, pacman, ghosts = start_next_level(5)
+        maze, pacman, ghosts = start_next_level(5, rng=rng, mazes=mazes)
         armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
         lives = 1 + armor_lives_bonus_init
     else:
         # Par défaut : facile
-        maze, pacman, ghosts = start_next_level(1)
+        maze, pacman, ghosts = start_next_level(1, rng=rng, mazes=mazes)
         armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
         lives = 2 + armor_lives_bonus_init
     
@@ -1711,7 +3229,15 @@ def draw_aventure_menu(screen):
     info_rect = info_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 + 80))
     screen.blit(info_text, info_rect)
     
-    return retour_button, carte1_button
+    # Bouton pour le monde infini (morceaux générés autour de Pacman)
+    monde_button = pygame.Rect(WINDOW_WIDTH//2 - button_width//2, WINDOW_HEIGHT//2 + 120, button_width, button_height)
+    pygame.draw.rect(screen, (0, 150, 100), monde_button)  # Vert
+    pygame.draw.rect(screen, WHITE, monde_button, 3)
+    monde_text = font_button.render("MONDE INFINI", True, WHITE)
+    monde_text_rect = monde_text.get_rect(center=monde_button.center)
+    screen.blit(monde_text, monde_text_rect)
+    
+    return retour_button, carte1_button, monde_button
 
 def draw_reward_animation(screen, reward_animations):
     """Dessine les animations de récompenses"""
@@ -6926,27 +8452,2384 @@ def load_game_data_for_account(account_index):
         )
     return [], [], [], [], {}, 0, 0, False, 0, [], 0, [], [], [], False
 
-def all_battle_pass_rewards_claimed(battle_pass_claimed_rewards, used_stars, max_level=30):
-    """Vérifie si toutes les récompenses du battle pass ont été récupérées"""
-    for level in range(1, max_level + 1):
-        if level not in battle_pass_claimed_rewards and level not in used_stars:
-            return False
-    return True
+def all_battle_pass_rewards_claimed(battle_pass_claimed_rewards, used_stars, max_level=30):
+    """Vérifie si toutes les récompenses du battle pass ont été récupérées"""
+    for level in range(1, max_level + 1):
+        if level not in battle_pass_claimed_rewards and level not in used_stars:
+            return False
+    return True
+
+def auto_save_account_data(account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards=None, gemme_poche=0, used_stars=None, accounts_list=None, battle_pass_plus_claimed_rewards=None, used_stars_plus=None, pass_plus_purchased=False):
+    """Sauvegarde automatiquement les données du compte actuel"""
+    if account_index is not None:
+        if battle_pass_claimed_rewards is None:
+            battle_pass_claimed_rewards = []
+        if used_stars is None:
+            used_stars = []
+        if battle_pass_plus_claimed_rewards is None:
+            battle_pass_plus_claimed_rewards = []
+        if used_stars_plus is None:
+            used_stars_plus = []
+        save_game_data_for_account(account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, accounts_list, battle_pass_plus_claimed_rewards, used_stars_plus, pass_plus_purchased)
+
+class OccupancyIndex:
+    """Index spatial des fantômes pour un tick : case -> fantômes qui s'y trouvent.
+
+    Les requêtes (cases de feu, de glace) ne coûtent que le nombre de cases demandées
+    ou occupées, pas le nombre de fantômes.
+    """
+    __slots__ = ('cells',)
+
+    def __init__(self, ghosts):
+        self.cells = {}
+        xs, ys = GHOST_REGISTRY.x, GHOST_REGISTRY.y
+        for ghost in ghosts:
+            cell = (xs[ghost.slot], ys[ghost.slot])
+            if cell in self.cells:
+                self.cells[cell].append(ghost)
+            else:
+                self.cells[cell] = [ghost]
+
+    def at(self, cell):
+        """Fantômes sur la case"""
+        return self.cells.get(cell, ())
+
+    def occupied(self, cells):
+        """Cases de la collection qui contiennent au moins un fantôme"""
+        if len(cells) < len(self.cells):
+            return [cell for cell in cells if cell in self.cells]
+        return [cell for cell in self.cells if cell in cells]
+
+    def entities_in(self, cells):
+        """Ensemble des fantômes présents sur l'une des cases"""
+        found = set()
+        for cell in self.occupied(cells):
+            found.update(self.cells[cell])
+        return found
+
+
+LONGUE_VUE_CELL = 'longue vue'  # Case couverte par la longue vue (dans collision_cells)
+
+def collision_cells(pacman, longue_vue_cells, can_collide):
+    """Cases où un fantôme rencontre Pacman pendant le tick : case -> règle pour le fantôme qui y arrive.
+
+    None : collision (case de Pacman) ; une direction : collision si le fantôme va dans cette
+    direction (il croise Pacman qui vient vers lui) ; LONGUE_VUE_CELL : case de la longue vue,
+    qui passe avant les collisions. Un fantôme ne coûte ensuite qu'une recherche dans le dictionnaire.
+    """
+    cells = {}
+    if can_collide:
+        cells[(pacman.x, pacman.y)] = None
+        dx, dy = pacman.direction
+        if dx or dy:
+            cells[(pacman.x + dx, pacman.y + dy)] = (-dx, -dy)
+    for cell in longue_vue_cells:
+        cells[cell] = LONGUE_VUE_CELL
+    return cells
+
+
+class TimerService:
+    """Minuteurs du jeu en ticks absolus, rangés dans un tas par échéance.
+
+    advance() ne traite que les minuteurs arrivés à échéance : le coût d'un tick ne
+    dépend pas du nombre d'effets en cours (cases de glace, de feu, pacgommes...).
+    Reprogrammer une clé remplace son échéance précédente.
+    """
+    __slots__ = ('tick', 'heap', 'deadlines', 'counter')
+
+    def __init__(self):
+        self.tick = 0
+        self.heap = []  # (échéance, ordre d'ajout, clé, callback)
+        self.deadlines = {}  # Clé -> échéance en cours
+        self.counter = itertools.count()
+
+    def schedule(self, key, delay, callback):
+        """Appelle callback(key) dans delay ticks et retourne l'échéance (tick absolu)"""
+        deadline = self.tick + delay
+        self.deadlines[key] = deadline
+        heapq.heappush(self.heap, (deadline, next(self.counter), key, callback))
+        return deadline
+
+    def cancel(self, key):
+        self.deadlines.pop(key, None)
+
+    def snapshot(self):
+        order = next(self.counter)
+        self.counter = itertools.count(order)
+        return (self.tick, list(self.heap), dict(self.deadlines), order)
+
+    def restore(self, saved):
+        tick, heap, deadlines, order = saved
+        self.tick = tick
+        self.heap = list(heap)
+        self.deadlines = dict(deadlines)
+        self.counter = itertools.count(order)
+
+    def rename(self, rename_key):
+        """Change les clés des minuteurs en cours : rename_key(clé) retourne la nouvelle clé, ou None pour l'annuler.
+
+        Les échéances et l'ordre d'ajout ne changent pas, le tas reste donc dans le même ordre.
+        """
+        heap = []
+        deadlines = {}
+        for deadline, order, key, callback in self.heap:
+            if self.deadlines.get(key) != deadline:
+                continue  # Annulé ou reprogrammé depuis
+            new_key = rename_key(key)
+            if new_key is not None:
+                heap.append((deadline, order, new_key, callback))
+                deadlines[new_key] = deadline
+        heapq.heapify(heap)
+        self.heap = heap
+        self.deadlines = deadlines
+
+    def remaining(self, key):
+        """Ticks restants avant l'échéance de la clé, ou None"""
+        deadline = self.deadlines.get(key)
+        return None if deadline is None else deadline - self.tick
+
+    def advance(self):
+        """Passe au tick suivant et déclenche les minuteurs arrivés à échéance"""
+        self.tick += 1
+        heap = self.heap
+        while heap and heap[0][0] <= self.tick:
+            deadline, _, key, callback = heapq.heappop(heap)
+            if self.deadlines.get(key) != deadline:
+                continue  # Annulé ou reprogrammé depuis
+            del self.deadlines[key]
+            callback(key)
+
+
+class SessionRandom:
+    """Générateurs aléatoires d'une partie, tous dérivés d'une seule graine.
+
+    Chaque usage a son propre flux : un coup critique tiré en plus ne décale pas les
+    déplacements des fantômes, et rien ne dépend du module random global (que
+    generate_maze_variation réinitialisait). Même graine = même partie, tick par tick.
+    Les labyrinthes n'en font pas partie : les labyrinthes générés dépendent de leur
+    taille (get_generated_mazes) et les morceaux du monde infini de la graine seule.
+    """
+    __slots__ = ('seed', 'ghosts', 'loot')
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        master = random.Random(seed)
+        master.getrandbits(64)  # Ancien flux des labyrinthes : tiré quand même, une graine garde les mêmes flux
+        self.ghosts = random.Random(master.getrandbits(64))  # IA et apparition des fantômes
+        self.loot = random.Random(master.getrandbits(64))  # Coups critiques, indigestion, skins
+
+    def getstate(self):
+        return (self.ghosts.getstate(), self.loot.getstate())
+
+    def setstate(self, saved):
+        self.ghosts.setstate(saved[0])
+        self.loot.setstate(saved[1])
+
+
+class GameInputs:
+    """Entrées du joueur pour un tick de jeu (flèches, clic sur le gadget, réapparition immédiate)"""
+    def __init__(self, directions=None, use_gadget=False, target_cell=None, skip_respawn=False):
+        self.directions = directions if directions is not None else []  # Flèches appuyées pendant le tick, dans l'ordre
+        self.use_gadget = use_gadget  # Clic gauche pour activer le gadget équipé
+        self.target_cell = target_cell  # Case visée (x, y) par le clic (utilisée par "tp")
+        self.skip_respawn = skip_respawn  # Clic droit après une vie perdue : réapparaître sans attendre
+
+class GameSnapshot:
+    """Sauvegarde instantanée d'une partie (voir GameState.snapshot)"""
+    __slots__ = ('fields', 'maze', 'maze_cells', 'pacman', 'ghosts', 'timers', 'rng', 'world')
+
+def copy_containers(value):
+    """Copie des dictionnaires, listes et ensembles (et de ceux qu'ils contiennent) ; le reste est partagé.
+
+    step() modifie ces conteneurs sur place (mur_pos.append, pieges[...] = ...) : une
+    sauvegarde ne doit jamais partager les siens avec la partie en cours.
+    """
+    kind = type(value)
+    if kind is dict:
+        return {key: copy_containers(item) for key, item in value.items()}
+    if kind is list:
+        return [copy_containers(item) for item in value]
+    if kind is set:
+        return set(value)
+    return value
+
+class GameState:
+    """État complet d'une partie, sans rien qui dépende de l'affichage, des polices ou du son"""
+    # Attributs sauvegardés à part par snapshot() (ou pas du tout : l'équipement n'est pas un état de la partie)
+    SNAPSHOT_SPECIAL = frozenset(('maze', 'pacman', '_ghosts', 'timers', 'rng', 'events', 'world',
+                                  'inventaire_items', 'capacite_items', 'equipment'))
+
+    def __init__(self, inventaire_items=None, capacite_items=None, difficulty=None, is_adventure_mode=False, seed=None,
+                 mazes=None):
+        self.rng = SessionRandom(seed)  # Flux aléatoires de la partie (graine de session)
+        # Labyrinthes des niveaux, en rotation (les 4 labyrinthes 21x21 par défaut, ou générés par generate_maze)
+        self.mazes = mazes if mazes is not None else COMPACT_MAZES
+        self.inventaire_items = inventaire_items if inventaire_items is not None else {}  # {slot_name: item_data}
+        self.capacite_items = capacite_items if capacite_items is not None else []  # Liste des items de capacité achetés
+        self.difficulty = difficulty  # Difficulté choisie ("facile", "moyen", "difficile", "hardcore")
+        self.is_adventure_mode = is_adventure_mode  # Mode aventure activé ou non
+        # Créer une copie du labyrinthe pour pouvoir modifier les points (niveau 1 = MAZE_1)
+        self.maze = self.mazes[0].copy()
+        self.pacman = Pacman(*self.maze.pacman_start)
+        # Créer des fantômes (niveau 1 : 1 fantôme bleu)
+        self.ghosts = [
+            Ghost(*self.maze.ghost_start, BLUE, rng=self.rng.ghosts),
+        ]
+        # Définir le chemin pour tous les fantômes bleus
+        for ghost in self.ghosts:
+            if ghost.color == BLUE:
+                ghost.set_path(self.maze)
+        self.score = 0
+        self.level = 1
+        # Initialiser les vies : base 2 + bonus d'armures (grosse armure et armure de fer)
+        self.lives = 2 + calculate_armor_lives_bonus(self.inventaire_items)
+        self.last_bonus_score = 0  # Dernier multiple de 2000 atteint
+        self.game_over = False
+        self.won = False
+        self.vulnerable_timer = 0
+        self.level_transition = False
+        self.level_transition_timer = 0
+        self.respawn_timer = 0  # Timer pour la réapparition après perte de vie
+        # 3 secondes d'invincibilité au spawn (30 frames à 10 FPS) + bonus de la capacité équipée
+        self.invincibility_timer = 30 + calculate_invincibilite_bonus(self.capacite_items, self.inventaire_items)
+        self.crown_timer = 0  # Timer pour la couronne après avoir mangé un fantôme (3 secondes)
+        self.crown_count = 0  # Compteur de couronnes gagnées pendant le jeu (temporaires)
+        self.grande_couronne_count = 0  # Compteur de grandes couronnes
+        self.jeton_count = 0  # Compteur de jetons gagnés pendant le jeu (temporaires)
+        self.last_ghost_time = 0  # Timer depuis le dernier fantôme mangé (en frames)
+        # Variables pour le système de maps 4x4 aux niveaux multiples de 10 en mode aventure
+        self.map_x = 0  # Coordonnée X dans la grille 4x4 (0-3)
+        self.map_y = 0  # Coordonnée Y dans la grille 4x4 (0-3)
+        self.is_multi_map_mode = False  # Si on est en mode multi-map (niveau multiple de 10 en aventure)
+        self.world = None  # Monde infini du mode aventure (ChunkWorld), ou None
+        self.indigestion_timer = 0  # Timer pour l'indigestion (1 minute = 600 frames à 10 FPS)
+        self.has_indigestion = False  # État d'indigestion
+        self.super_vie_active = False  # État de la super vie (invincibilité permanente sans clignotement)
+        self.rainbow_timer = 0  # Timer pour l'effet arc-en-ciel du coup critique (2 secondes = 20 frames à 10 FPS)
+        self.is_rainbow_critique = False  # État d'arc-en-ciel (coup critique)
+        self.timers = TimerService()  # Échéances de la glace, du feu et des pacgommes
+        self.ice_tiles = {}  # Dictionnaire pour stocker les cases de glace: {(x, y): timestamp}
+        self.pacman_last_pos = (self.pacman.x, self.pacman.y)  # Position précédente de Pacman pour créer la glace
+        self.fire_tiles = {}  # Dictionnaire pour stocker les cases de feu: {(x, y): timestamp}
+        self.fire_active = False  # État d'activation du feu (si True, créer du feu sur le chemin)
+        self.fire_timer = 0  # Timer pour la durée d'activation du feu (10 secondes)
+        self.pacgomme_timers = {}  # Dictionnaire pour stocker les timers de réapparition des pacgommes: {(x, y): timestamp}
+        self.ghost_timers = {}  # Dictionnaire pour stocker les timers de réapparition des fantômes en mode aventure: {(start_x, start_y, color): timer}
+        self.gadget_cooldown = 0  # Cooldown entre les utilisations de gadget (25 secondes = 250 frames à 10 FPS)
+        self.mort_cooldown = 0  # Cooldown spécifique pour le gadget "mort"
+        self.gadget_use_count = 0  # Compteur d'utilisations pour "double gadget" (alternance recharge instantanée/normale)
+        self.bombe_cooldown = 0  # Cooldown spécifique pour le gadget "bombe téléguidée"
+        self.bombe_active = False  # État d'activation de la bombe téléguidée
+        self.bombe_x = 0  # Position X de la bombe
+        self.bombe_y = 0  # Position Y de la bombe
+        self.bombe_timer = 0  # Timer avant l'explosion (10 secondes = 100 frames à 10 FPS)
+        self.pacman_frozen = False  # Indique si Pacman est gelé (pendant le contrôle de la bombe)
+        self.pieges = {}  # Dictionnaire pour stocker les pièges posés: {(x, y): True} (True = piège actif)
+        self.portal1_pos = None  # Position du premier portail (x, y) ou None
+        self.portal2_pos = None  # Position du deuxième portail (x, y) ou None
+        self.portal_use_count = 0  # Compteur d'utilisation du portail (0, 1, ou 2)
+        self.mur_pos = None  # Position du mur créé (x, y) ou None
+        self.mur_use_count = 0  # Compteur d'utilisation du mur (0 ou 1)
+        # Jetons et couronnes gagnés pour la poche du compte (versés par main() après chaque tick)
+        self.jeton_poche_gain = 0
+        self.crown_poche_gain = 0
+        # Événements du dernier tick pour l'interface ("premier_niveau", "fantome_mange")
+        self.events = []
+        self.refresh_equipment()
+
+    def snapshot(self):
+        """Sauvegarde la partie (labyrinthe, Pacman, fantômes, minuteurs, gadgets, pièges, portails...).
+
+        Le labyrinthe ne coûte que ses cases : la couche des murs est partagée. Les
+        fantômes gardent leur objet et leurs valeurs du registre. Du monde infini, on garde
+        le morceau central et le labyrinthe chargé ; les morceaux hors de ce labyrinthe
+        restent tels qu'ils sont enregistrés (le monde est persistant).
+        """
+        snapshot = GameSnapshot()
+        snapshot.fields = {name: copy_containers(value)
+                           for name, value in self.__dict__.items() if name not in self.SNAPSHOT_SPECIAL}
+        snapshot.maze = self.maze
+        snapshot.maze_cells = self.maze.snapshot()
+        snapshot.pacman = copy.copy(self.pacman)
+        save = GHOST_REGISTRY.save
+        snapshot.ghosts = [(ghost, save(ghost.slot), ghost.path) for ghost in self.ghosts]
+        snapshot.timers = self.timers.snapshot()
+        snapshot.rng = (self.rng, self.rng.getstate())
+        snapshot.world = (self.world, self.world.origin if self.world is not None else None)
+        return snapshot
+
+    def restore(self, snapshot):
+        """Revient à une sauvegarde de cette partie (la sauvegarde reste réutilisable)"""
+        for name, value in snapshot.fields.items():
+            setattr(self, name, copy_containers(value))
+        self.maze = snapshot.maze
+        self.maze.restore(snapshot.maze_cells)
+        self.pacman = copy.copy(snapshot.pacman)
+        # Les fantômes sortis depuis la sauvegarde rendent leur case avant que ceux de la sauvegarde la reprennent
+        self.ghosts = [ghost for ghost, saved, path in snapshot.ghosts]
+        registry = GHOST_REGISTRY
+        for ghost, saved, path in snapshot.ghosts:
+            registry.reclaim(ghost)
+            registry.load(ghost.slot, saved)
+            ghost.path = path
+        self.timers.restore(snapshot.timers)
+        self.rng, rng_state = snapshot.rng
+        self.rng.setstate(rng_state)
+        self.world, origin = snapshot.world
+        if self.world is not None:
+            # Revenir au labyrinthe chargé de la sauvegarde ; les labyrinthes préparés depuis sont ignorés
+            self.world.origin = origin
+            self.world.maze = self.maze
+            self.world.pending.clear()
+            self.world.saved = False
+        self.events = []
+
+    @property
+    def ghosts(self):
+        return self._ghosts
+
+    @ghosts.setter
+    def ghosts(self, ghosts):
+        # Les fantômes remplacés (nouveau niveau, nouvelle partie) rendent leur case au registre
+        old = self.__dict__.get('_ghosts')
+        if old is not None and old is not ghosts:
+            GHOST_REGISTRY.release_all(old, ghosts)
+        self._ghosts = ghosts
+
+    def release_ghosts(self):
+        """Rend les cases de tous les fantômes au registre (partie terminée)"""
+        self.ghosts = []
+
+    def refresh_equipment(self):
+        """Recalcule le profil d'équipement (à appeler quand l'inventaire ou les capacités changent)"""
+        self.equipment = EquipmentProfile.from_inventory(self.inventaire_items, self.capacite_items)
+
+    def expire_ice_tile(self, key):
+        """Fin d'une case de glace (minuteur ('glace', position))"""
+        self.ice_tiles.pop(key[1], None)
+
+    def expire_fire_tile(self, key):
+        """Fin d'une case de feu (minuteur ('feu', position))"""
+        self.fire_tiles.pop(key[1], None)
+
+    def respawn_pacgomme(self, key):
+        """Réapparition d'une pacgomme mangée (minuteur ('pacgomme', position), mode aventure)"""
+        x, y = key[1]
+        # Minuteur effacé entre-temps (nouveau niveau, nouvelle partie)
+        if self.pacgomme_timers.pop((x, y), None) is None or not self.is_adventure_mode:
+            return
+        # Vérifier que la case est toujours valide (pas un mur)
+        if 0 <= x < self.maze.width and 0 <= y < self.maze.height:
+            if self.maze[y][x] != 1:  # Pas un mur
+                self.maze.set_cell(x, y, 3)  # Faire réapparaître la pacgomme
+
+    def level_cleared(self):
+        """Vrai quand tous les points de la carte de Pacman sont mangés (jamais dans le monde infini)"""
+        return self.world is None and count_points(self.maze, (self.pacman.x, self.pacman.y)) == 0
+
+    def shift_origin(self, dx, dy, maze):
+        """Passe au labyrinthe maze, décalé de (dx, dy) cases, en déplaçant tout ce qui a une position.
+
+        Utilisé par le monde infini quand il se recentre sur Pacman. Ce qui sort du
+        nouveau labyrinthe disparaît (glace, feu, pièges, portails, minuteurs) ; les
+        murs posés y sont retirés et les fantômes sont renvoyés à leur base.
+        """
+        def move(x, y):
+            x += dx
+            y += dy
+            return (x, y) if 0 <= x < maze.width and 0 <= y < maze.height else None
+
+        def move_keys(positions):
+            return {move(*pos): value for pos, value in positions.items() if move(*pos) is not None}
+
+        def move_timer(key):
+            pos = move(*key[1])
+            return None if pos is None else (key[0], pos)
+
+        pacman = self.pacman
+        pacman.x += dx
+        pacman.y += dy
+        pacman.prev_x += dx
+        pacman.prev_y += dy
+        self.pacman_last_pos = (pacman.x, pacman.y)
+        for ghost in self.ghosts:
+            start = move(ghost.start_x, ghost.start_y) or maze.ghost_start
+            ghost.start_x, ghost.start_y = start
+            pos = move(ghost.x, ghost.y)
+            if pos is None:
+                ghost.x, ghost.y = start
+                ghost.prev_x, ghost.prev_y = start
+            else:
+                ghost.x, ghost.y = pos
+                ghost.prev_x += dx
+                ghost.prev_y += dy
+            ghost.path = None
+        ghost_timers = {}
+        for (start_x, start_y, color), value in self.ghost_timers.items():
+            start_x, start_y = move(start_x, start_y) or maze.ghost_start
+            ghost_timers[(start_x, start_y, color)] = value
+        self.ghost_timers = ghost_timers
+        self.ice_tiles = move_keys(self.ice_tiles)
+        self.fire_tiles = move_keys(self.fire_tiles)
+        self.pacgomme_timers = move_keys(self.pacgomme_timers)
+        self.pieges = move_keys(self.pieges)
+        self.timers.rename(move_timer)
+        self.portal1_pos = self.portal1_pos and move(*self.portal1_pos)
+        self.portal2_pos = self.portal2_pos and move(*self.portal2_pos)
+        if self.mur_pos is not None:
+            walls = []
+            for mur_x, mur_y in ([self.mur_pos] if isinstance(self.mur_pos, tuple) else self.mur_pos):
+                pos = move(mur_x, mur_y)
+                if pos is None:
+                    self.maze.set_cell(mur_x, mur_y, 0)  # Retiré avant que son morceau ne soit rendu
+                else:
+                    walls.append(pos)
+            if isinstance(self.mur_pos, list):
+                self.mur_pos = walls
+            elif walls:
+                self.mur_pos = walls[0]
+            else:
+                self.mur_pos = None
+                self.mur_use_count = 0
+        if self.bombe_active:
+            pos = move(self.bombe_x, self.bombe_y)
+            if pos is None:
+                self.bombe_active = False
+                self.pacman_frozen = False
+            else:
+                self.bombe_x, self.bombe_y = pos
+        self.maze = maze
+
+    def start_with_difficulty(self, difficulty, invincibilite_bonus=None, seed=None):
+        """Démarre une nouvelle partie normale selon la difficulté choisie (nouvelle graine de session)"""
+        self.difficulty = difficulty
+        self.rng = SessionRandom(seed)
+        self.refresh_equipment()
+        if invincibilite_bonus is None:
+            invincibilite_bonus = self.equipment.invincibilite_bonus
+        (self.maze, self.pacman, self.ghosts, self.score, self.lives, self.last_bonus_score, self.game_over, self.won,
+         self.ice_tiles, self.pacman_last_pos, self.vulnerable_timer, self.level_transition, self.level_transition_timer,
+         self.respawn_timer, self.invincibility_timer, self.crown_timer, self.crown_count, self.jeton_count, self.last_ghost_time,
+         self.fire_tiles, self.fire_active, self.fire_timer, self.gadget_cooldown, self.mort_cooldown, self.bombe_cooldown,
+         self.bombe_active, self.pieges, self.portal1_pos, self.portal2_pos, self.portal_use_count, self.mur_pos, self.mur_use_count,
+         self.gadget_use_count, self.has_indigestion, self.indigestion_timer) = start_game_with_difficulty(
+            difficulty, self.inventaire_items, self.capacite_items, invincibilite_bonus, self.ghosts, self.rng.ghosts, self.mazes)
+
+        self.is_adventure_mode = False  # Désactiver le mode aventure pour le jeu normal
+        # Oublier les échéances de la partie précédente (glace, feu, pacgommes et fantômes de l'aventure)
+        self.timers = TimerService()
+        self.pacgomme_timers = {}
+        self.ghost_timers = {}
+        if self.world is not None:
+            self.world.close()
+        self.world = None
+
+        if difficulty == "facile":
+            self.level = 1
+        elif difficulty == "moyen":
+            self.level = 3
+        elif difficulty == "difficile":
+            self.level = 1
+        elif difficulty == "hardcore":
+            self.level = 5
+        else:
+            self.level = 1
+
+
+def activate_gadget(state, target_cell=None):
+    """Active le gadget équipé dans le slot "gadget" (seulement si le temps de recharge est terminé)"""
+    profile = state.equipment
+    if get_equipped_gadget(state.inventaire_items):
+        gadget_type = profile.gadget_type
+        # Vérifier si "double gadget" est équipé
+        has_double_gadget = profile.has_double_gadget
+        # Vérifier le temps de recharge approprié selon le gadget
+        if gadget_type == 'mort':
+            can_activate = (state.mort_cooldown == 0)
+        elif gadget_type == 'bombe téléguidée':
+            can_activate = (state.bombe_cooldown == 0)
+        else:
+            can_activate = (state.gadget_cooldown == 0)
+
+        if can_activate:
+            if gadget_type == 'lave' and not state.fire_active:
+                # Activer la lave (durée calculée selon si "flamme" est équipé)
+                state.fire_active = True
+                state.fire_timer = profile.fire_duration
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.gadget_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                else:
+                    state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'feu' and not state.fire_active:
+                # Activer le feu (durée calculée selon si "flamme" est équipé)
+                state.fire_active = True
+                state.fire_timer = profile.fire_duration
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.gadget_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                else:
+                    state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'explosion':
+                # Activer l'explosion : tuer tous les fantômes (sans donner de couronnes)
+                for ghost in state.ghosts:
+                    # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux)
+                    if not ghost.harmless and not ghost.eyes:
+                        # Tuer le fantôme (le transformer en yeux)
+                        ghost.eyes = True
+                        ghost.vulnerable = False
+                        ghost.returning = False
+                        # Ajouter des points mais pas de couronnes
+                        state.score += 300
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.gadget_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                else:
+                    state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'tir':
+                # Activer le tir : tuer un fantôme dans le champ de vision (direction de Pacman)
+                # Déterminer la direction de Pacman
+                if state.pacman.direction != (0, 0):
+                    # Calculer les positions dans le champ de vision (ligne droite dans la direction de Pacman)
+                    target_positions = []
+                    dx, dy = state.pacman.direction
+                    # Chercher jusqu'à 5 cases dans la direction
+                    for i in range(1, 6):
+                        check_x = state.pacman.x + i * dx
+                        check_y = state.pacman.y + i * dy
+                        # Gérer la téléportation aux bords
+                        if check_x < 0:
+                            check_x = state.maze.width - 1
+                        elif check_x >= state.maze.width:
+                            check_x = 0
+                        if check_y < 0:
+                            check_y = state.maze.height - 1
+                        elif check_y >= state.maze.height:
+                            check_y = 0
+                        # Vérifier si c'est un mur, si oui arrêter
+                        if 0 <= check_y < state.maze.height and 0 <= check_x < state.maze.width:
+                            if state.maze[check_y][check_x] == 1:  # Mur
+                                break
+                            target_positions.append((check_x, check_y))
+
+                    # Trouver le fantôme le plus proche dans le champ de vision
+                    target_ghost = None
+                    min_distance = float('inf')
+                    for ghost in state.ghosts:
+                        # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux, pas orange, pas rose)
+                        ORANGE = (255, 165, 0)
+                        ROSE = (255, 192, 203)
+                        if not ghost.harmless and not ghost.eyes and ghost.color != ORANGE and ghost.color != ROSE:
+                            if (ghost.x, ghost.y) in target_positions:
+                                # Calculer la distance de Manhattan
+                                distance = abs(ghost.x - state.pacman.x) + abs(ghost.y - state.pacman.y)
+                                if distance < min_distance:
+                                    min_distance = distance
+                                    target_ghost = ghost
+
+                    # Tuer le fantôme ciblé
+                    if target_ghost is not None:
+                        target_ghost.eyes = True
+                        target_ghost.vulnerable = False
+                        target_ghost.returning = False
+                        # Ajouter des points mais pas de couronnes
+                        state.score += 300
+
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.gadget_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                else:
+                    state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'vision x':
+                # Vérifier si l'objet "Vision X" est équipé dans un slot objet
+                # Activer Vision X si l'objet Vision X est équipé (ou si c'est le gadget vision x directement)
+                if profile.has_vision_x_objet or gadget_type == 'vision x':
+                    # Activer Vision X : faire disparaître tous les fantômes d'indigestion
+                    remove_harmless_ghosts(state.ghosts)
+                    # Réduction de recharge de "bonne vue" (2.5 secondes par niveau) et "infra rouge" (5 secondes)
+                    cooldown_reduction = profile.vision_x_cooldown_reduction
+                    # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                    if has_double_gadget:
+                        state.gadget_use_count += 1
+                        if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                            state.gadget_cooldown = 0
+                        else:  # Utilisation paire (2, 4, 6...) : recharge normale avec réductions
+                            state.gadget_cooldown = max(0, GADGET_COOLDOWN_DURATION - cooldown_reduction)
+                    else:
+                        state.gadget_cooldown = max(0, GADGET_COOLDOWN_DURATION - cooldown_reduction)  # Cooldown réduit
+            elif gadget_type == 'mort':
+                # Activer Mort : tuer définitivement le fantôme le plus proche de Pacman (peu importe la direction)
+                # Trouver le fantôme le plus proche de Pacman
+                target_ghost = None
+                min_distance = float('inf')
+                distances = get_distance_table(state.maze)
+                for ghost in state.ghosts:
+                    # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux)
+                    if not ghost.harmless and not ghost.eyes:
+                        # Distance réelle dans le labyrinthe (Manhattan si aucun chemin) ; Pacman en cible :
+                        # une seule ligne de la table pour tous les fantômes
+                        distance = distances.distance((ghost.x, ghost.y), (state.pacman.x, state.pacman.y))
+                        if distance is None:
+                            distance = state.maze.width * state.maze.height + abs(ghost.x - state.pacman.x) + abs(ghost.y - state.pacman.y)
+                        if distance < min_distance:
+                            min_distance = distance
+                            target_ghost = ghost
+
+                # Tuer définitivement le fantôme ciblé (le retirer de la liste)
+                if target_ghost is not None:
+                    # En mode aventure, supprimer le fantôme définitivement (pas de réapparition)
+                    state.ghosts.remove(target_ghost)
+                    target_ghost.release()
+                    # Ajouter des points mais pas de couronnes
+                    state.score += 300
+
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.mort_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.mort_cooldown = MORT_COOLDOWN_DURATION
+                else:
+                    state.mort_cooldown = MORT_COOLDOWN_DURATION  # 1 minute de cooldown
+            elif gadget_type == 'bombe téléguidée' and not state.bombe_active:
+                # Activer la bombe téléguidée : arrêter Pacman et créer une bombe
+                state.bombe_active = True
+                state.bombe_x = state.pacman.x
+                state.bombe_y = state.pacman.y
+                state.bombe_timer = BOMBE_EXPLOSION_DELAY  # 10 secondes
+                state.pacman_frozen = True  # Geler Pacman
+                # Arrêter Pacman
+                state.pacman.direction = (0, 0)
+                state.pacman.next_direction = (0, 0)
+                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                if has_double_gadget:
+                    state.gadget_use_count += 1
+                    if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                        state.bombe_cooldown = 0
+                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                        state.bombe_cooldown = BOMBE_COOLDOWN_DURATION
+                else:
+                    state.bombe_cooldown = BOMBE_COOLDOWN_DURATION  # 1 minute de cooldown
+            elif gadget_type == 'piège':
+                # Activer le piège : poser un piège à la position de Pacman
+                # Vérifier que la position n'est pas un mur
+                if 0 <= state.pacman.y < state.maze.height and 0 <= state.pacman.x < state.maze.width:
+                    if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas un mur
+                        # Poser le piège à la position de Pacman
+                        state.pieges[(state.pacman.x, state.pacman.y)] = True
+                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                        if has_double_gadget:
+                            state.gadget_use_count += 1
+                            if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                                state.gadget_cooldown = 0
+                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                                state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                        else:
+                            state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'tp' and target_cell is not None:
+                # Activer TP : téléporter Pacman sur la case visée par la souris (sauf si c'est un mur)
+                grid_x, grid_y = target_cell
+
+                # Vérifier que la position est valide et que ce n'est pas un mur
+                if 0 <= grid_y < state.maze.height and 0 <= grid_x < state.maze.width:
+                    if state.maze[grid_y][grid_x] != 1:  # Pas un mur
+                        # Téléporter Pacman à cette position
+                        state.pacman.x = grid_x
+                        state.pacman.y = grid_y
+                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                        if has_double_gadget:
+                            state.gadget_use_count += 1
+                            if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                                state.gadget_cooldown = 0
+                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                                state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                        else:
+                            state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'portail':
+                # Activer Portail : cycle de 3 utilisations
+                # Vérifier que la position de Pacman n'est pas un mur
+                if 0 <= state.pacman.y < state.maze.height and 0 <= state.pacman.x < state.maze.width:
+                    if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas un mur
+                        if state.portal_use_count == 0:
+                            # 1ère utilisation : poser le premier portail
+                            state.portal1_pos = (state.pacman.x, state.pacman.y)
+                            state.portal_use_count = 1
+                        elif state.portal_use_count == 1:
+                            # 2ème utilisation : poser le deuxième portail
+                            state.portal2_pos = (state.pacman.x, state.pacman.y)
+                            state.portal_use_count = 2
+                        elif state.portal_use_count == 2:
+                            # 3ème utilisation : enlever les portails
+                            state.portal1_pos = None
+                            state.portal2_pos = None
+                            state.portal_use_count = 0
+                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                        if has_double_gadget:
+                            state.gadget_use_count += 1
+                            if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                                state.gadget_cooldown = 0
+                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                                state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                        else:
+                            state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+            elif gadget_type == 'mur':
+                # Vérifier si "bric" est équipé
+                has_bric = profile.has_bric
+
+                # Vérifier que la position de Pacman est valide
+                if 0 <= state.pacman.y < state.maze.height and 0 <= state.pacman.x < state.maze.width:
+                    if has_bric:
+                        # Cycle de 3 utilisations avec "bric"
+                        if state.mur_use_count == 0:
+                            # 1ère utilisation : créer un mur (si ce n'est pas déjà un mur)
+                            if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas déjà un mur
+                                state.maze.set_cell(state.pacman.x, state.pacman.y, 1)  # Créer le mur
+                                # Convertir mur_pos en liste si nécessaire
+                                if state.mur_pos is None:
+                                    state.mur_pos = []
+                                elif isinstance(state.mur_pos, tuple):
+                                    state.mur_pos = [state.mur_pos]
+                                state.mur_pos.append((state.pacman.x, state.pacman.y))
+                                state.mur_use_count = 1
+                        elif state.mur_use_count == 1:
+                            # 2ème utilisation : créer un deuxième mur (si ce n'est pas déjà un mur)
+                            if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas déjà un mur
+                                state.maze.set_cell(state.pacman.x, state.pacman.y, 1)  # Créer le mur
+                                if isinstance(state.mur_pos, tuple):
+                                    state.mur_pos = [state.mur_pos]
+                                elif state.mur_pos is None:
+                                    state.mur_pos = []
+                                state.mur_pos.append((state.pacman.x, state.pacman.y))
+                                state.mur_use_count = 2
+                        elif state.mur_use_count == 2:
+                            # 3ème utilisation : enlever tous les murs créés
+                            if isinstance(state.mur_pos, list):
+                                for mur_x, mur_y in state.mur_pos:
+                                    if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                                        state.maze.set_cell(mur_x, mur_y, 0)  # Enlever le mur (remettre en chemin)
+                            elif isinstance(state.mur_pos, tuple):
+                                mur_x, mur_y = state.mur_pos
+                                if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                                    state.maze.set_cell(mur_x, mur_y, 0)  # Enlever le mur (remettre en chemin)
+                            state.mur_pos = None
+                            state.mur_use_count = 0
+                    else:
+                        # Cycle de 2 utilisations sans "bric" (comportement original)
+                        if state.mur_use_count == 0:
+                            # 1ère utilisation : créer un mur (si ce n'est pas déjà un mur)
+                            if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas déjà un mur
+                                state.maze.set_cell(state.pacman.x, state.pacman.y, 1)  # Créer le mur
+                                state.mur_pos = (state.pacman.x, state.pacman.y)
+                                state.mur_use_count = 1
+                        elif state.mur_use_count == 1:
+                            # 2ème utilisation : enlever le mur créé
+                            if state.mur_pos is not None:
+                                if isinstance(state.mur_pos, list):
+                                    # Si c'est une liste (cas avec bric précédemment), enlever tous les murs
+                                    for mur_x, mur_y in state.mur_pos:
+                                        if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                                            state.maze.set_cell(mur_x, mur_y, 0)
+                                else:
+                                    # Si c'est un tuple (comportement normal)
+                                    mur_x, mur_y = state.mur_pos
+                                    if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                                        state.maze.set_cell(mur_x, mur_y, 0)  # Enlever le mur (remettre en chemin)
+                                state.mur_pos = None
+                                state.mur_use_count = 0
+                    # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
+                    if has_double_gadget:
+                        state.gadget_use_count += 1
+                        if state.gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
+                            state.gadget_cooldown = 0
+                        else:  # Utilisation paire (2, 4, 6...) : recharge normale
+                            state.gadget_cooldown = GADGET_COOLDOWN_DURATION
+                    else:
+                        state.gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+
+
+def schedule_fire_tile(state, pos):
+    """Programme la fin d'une case de feu et retourne son échéance"""
+    # Le feu est posé après le passage des minuteurs du tick : ce tick compte déjà dans sa durée
+    duration = state.equipment.fire_duration - 1
+    return state.timers.schedule(('feu', pos), duration, state.expire_fire_tile)
+
+def step(state, inputs=None):
+    """Fait avancer la partie d'un tick sans toucher à l'affichage, aux polices ni au son.
+
+    Les entrées du tick (GameInputs) sont appliquées avant la mise à jour. Retourne l'état.
+    """
+    # Flux aléatoires de la partie : IA des fantômes et tirages (critiques, indigestion, skins)
+    ghost_rng = state.rng.ghosts
+    loot_rng = state.rng.loot
+    state.events = []
+    # Mémoriser les positions pour que l'affichage puisse interpoler ce tick
+    state.pacman.remember_position()
+    GHOST_REGISTRY.remember_positions(state.ghosts)
+    if inputs is not None:
+        if inputs.skip_respawn and state.respawn_timer > 0:
+            # Continuer le jeu après perte de vie (réapparition immédiate)
+            state.respawn_timer = 0
+            state.pacman, state.invincibility_timer = respawn_player_and_ghosts(state.pacman, state.ghosts, rng=ghost_rng, start=state.maze.pacman_start)
+            state.vulnerable_timer = 0
+        # Les flèches contrôlent la bombe téléguidée si elle est active, sinon Pacman
+        for direction in inputs.directions:
+            if state.bombe_active:
+                # Contrôler la bombe au lieu de Pacman
+                # Déplacer la bombe dans la direction
+                if direction != (0, 0):
+                    new_bombe_x = state.bombe_x + direction[0]
+                    new_bombe_y = state.bombe_y + direction[1]
+
+                    # Gérer la téléportation aux bords
+                    if new_bombe_x < 0:
+                        new_bombe_x = state.maze.width - 1
+                    elif new_bombe_x >= state.maze.width:
+                        new_bombe_x = 0
+                    if new_bombe_y < 0:
+                        new_bombe_y = state.maze.height - 1
+                    elif new_bombe_y >= state.maze.height:
+                        new_bombe_y = 0
+
+                    # Vérifier si la nouvelle position est valide (pas un mur)
+                    if 0 <= new_bombe_y < state.maze.height and 0 <= new_bombe_x < state.maze.width:
+                        if state.maze[new_bombe_y][new_bombe_x] != 1:  # Pas un mur
+                            state.bombe_x = new_bombe_x
+                            state.bombe_y = new_bombe_y
+            else:
+                state.pacman.set_direction(direction)
+        if inputs.use_gadget:
+            activate_gadget(state, inputs.target_cell)
+
+    # Mode multi-map : le niveau se joue dans le monde 4x4 (niveaux multiples de 10 en mode aventure)
+    state.is_multi_map_mode = state.maze.map_size is not None and state.world is None
+
+    # Gérer la transition entre niveaux
+    if state.level_transition:
+        state.level_transition_timer -= 1
+        if state.level_transition_timer <= 0:
+            state.level_transition = False
+            # Déclencher l'invincibilité quand la transition se termine
+            # Calculer le bonus d'invincibilité selon le niveau de la capacité équipée
+            invincibilite_bonus = state.equipment.invincibilite_bonus
+            state.invincibility_timer = 30 + invincibilite_bonus  # 3 secondes d'invincibilité + bonus
+            # S'assurer que la glace est bien réinitialisée (au cas où)
+            state.ice_tiles = {}
+            state.pacman_last_pos = (state.pacman.x, state.pacman.y)
+
+    # Gérer la réapparition après perte de vie
+    if state.respawn_timer > 0:
+        state.respawn_timer -= 1
+        if state.respawn_timer == 0:
+            # Réinitialiser les positions (même code que quand on appuie sur R)
+            # Calculer le bonus d'invincibilité selon le niveau de la capacité équipée
+            invincibilite_bonus = state.equipment.invincibilite_bonus
+            state.pacman, state.invincibility_timer = respawn_player_and_ghosts(state.pacman, state.ghosts, invincibilite_bonus, ghost_rng, state.maze.pacman_start)
+            state.vulnerable_timer = 0
+            state.ice_tiles = {}  # Réinitialiser les cases de glace
+            state.fire_tiles = {}  # Réinitialiser les cases de feu
+            state.fire_active = False  # Réinitialiser l'activation du feu
+            state.fire_timer = 0  # Réinitialiser le timer du feu
+            state.gadget_cooldown = 0  # Réinitialiser le temps de recharge du gadget
+            state.mort_cooldown = 0  # Réinitialiser le temps de recharge de "mort"
+            state.bombe_cooldown = 0  # Réinitialiser le temps de recharge de "bombe téléguidée"
+            state.bombe_active = False  # Réinitialiser l'état de la bombe
+            state.pacman_frozen = False  # Réinitialiser l'état de gel de Pacman
+            state.bombe_timer = 0  # Réinitialiser le timer de la bombe
+            # Les pièges persistent entre les niveaux et les retours
+            state.portal1_pos = None  # Réinitialiser les portails
+            state.portal2_pos = None
+            state.portal_use_count = 0
+            # Enlever le mur créé du maze si nécessaire
+            if state.mur_pos is not None:
+                if isinstance(state.mur_pos, list):
+                    # Si c'est une liste (cas avec bric), enlever tous les murs
+                    for mur_x, mur_y in state.mur_pos:
+                        if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                            state.maze.set_cell(mur_x, mur_y, 0)  # Remettre en chemin
+                else:
+                    # Si c'est un tuple (comportement normal)
+                    mur_x, mur_y = state.mur_pos
+                    if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                        state.maze.set_cell(mur_x, mur_y, 0)  # Remettre en chemin
+            state.mur_pos = None  # Réinitialiser le mur
+            state.mur_use_count = 0
+            state.pacman_last_pos = (state.pacman.x, state.pacman.y)  # Réinitialiser la position précédente
+            # Réinitialiser les flee_timer et immobilized_timer des fantômes
+            for ghost in state.ghosts:
+                ghost.flee_timer = 0
+                ghost.immobilized_timer = 0
+
+    # Gérer l'invincibilité après spawn
+    if state.invincibility_timer > 0:
+        state.invincibility_timer -= 1
+
+    # Gérer la couronne après avoir mangé un fantôme
+    if state.crown_timer > 0:
+        state.crown_timer -= 1
+
+    # Gérer l'indigestion
+    if state.indigestion_timer > 0:
+        state.indigestion_timer -= 1
+        if state.indigestion_timer == 0:
+            state.has_indigestion = False
+            # Supprimer le fantôme d'indigestion s'il existe
+            remove_harmless_ghosts(state.ghosts)
+
+    # Gérer l'effet arc-en-ciel du coup critique
+    if state.rainbow_timer > 0:
+        state.rainbow_timer -= 1
+        if state.rainbow_timer == 0:
+            state.is_rainbow_critique = False
+
+    # Décrémenter le timer depuis le dernier fantôme mangé
+    if state.last_ghost_time > 0:
+        state.last_ghost_time -= 1
+
+    # Mettre à jour le jeu seulement si on est dans l'état GAME
+    if not state.game_over and not state.won and not state.level_transition and state.respawn_timer == 0:
+        # Profil d'équipement calculé quand l'inventaire a changé (pas à chaque tick)
+        profile = state.equipment
+        # Vérifier si "glace" est équipé avant de mettre à jour Pacman
+        has_glace = profile.has_glace
+
+        # Sauvegarder la position précédente de Pacman avant de le mettre à jour
+        old_pacman_pos = (state.pacman.x, state.pacman.y)
+
+        # Gérer la bombe téléguidée
+        if state.bombe_active:
+            # Décrémenter le timer de la bombe
+            state.bombe_timer -= 1
+
+            # Si le timer arrive à 0, faire exploser la bombe
+            if state.bombe_timer <= 0:
+                # Zone d'explosion : 3x3 cases autour de la bombe (base) + 1 case de rayon par niveau de "bonbe"
+                explosion_radius = profile.explosion_radius
+
+                # Tuer les fantômes dans la zone d'explosion
+                for ghost in state.ghosts[:]:  # Utiliser une copie de la liste pour éviter les problèmes lors de la modification
+                    # Vérifier si le fantôme est dans la zone d'explosion
+                    dx = abs(ghost.x - state.bombe_x)
+                    dy = abs(ghost.y - state.bombe_y)
+
+                    # Gérer la téléportation aux bords pour la distance
+                    if dx > state.maze.width // 2:
+                        dx = state.maze.width - dx
+                    if dy > state.maze.height // 2:
+                        dy = state.maze.height - dy
+
+                    if dx <= explosion_radius and dy <= explosion_radius:
+                        # Le fantôme est dans la zone d'explosion
+                        if not ghost.harmless and not ghost.eyes:
+                            # Tuer le fantôme (le transformer en yeux)
+                            ghost.eyes = True
+                            ghost.vulnerable = False
+                            ghost.returning = False
+                            state.score += 300
+
+                # Casser les murs dans la zone d'explosion
+                for dy in range(-explosion_radius, explosion_radius + 1):
+                    for dx in range(-explosion_radius, explosion_radius + 1):
+                        check_x = state.bombe_x + dx
+                        check_y = state.bombe_y + dy
+
+                        # Gérer la téléportation aux bords
+                        if check_x < 0:
+                            check_x = state.maze.width - 1
+                        elif check_x >= state.maze.width:
+                            check_x = 0
+                        if check_y < 0:
+                            check_y = state.maze.height - 1
+                        elif check_y >= state.maze.height:
+                            check_y = 0
+
+                        # Vérifier si c'est un mur et le casser
+                        if 0 <= check_y < state.maze.height and 0 <= check_x < state.maze.width:
+                            if state.maze[check_y][check_x] == 1:  # C'est un mur
+                                state.maze.set_cell(check_x, check_y, 0)  # Casser le mur
+
+                # Réinitialiser l'état de la bombe
+                state.bombe_active = False
+                state.pacman_frozen = False
+                state.bombe_timer = 0
+        else:
+            # Mettre à jour Pacman normalement seulement si la bombe n'est pas active
+            # En mode multi-map, les passages entre cartes font partie de la table des voisins du monde
+            state.pacman.update(state.maze)
+
+            # Vérifier si Pacman entre dans un portail et le téléporter
+            if state.portal1_pos is not None and state.portal2_pos is not None:
+                if (state.pacman.x, state.pacman.y) == state.portal1_pos:
+                    # Téléporter vers le portail 2
+                    state.pacman.x, state.pacman.y = state.portal2_pos
+                elif (state.pacman.x, state.pacman.y) == state.portal2_pos:
+                    # Téléporter vers le portail 1
+                    state.pacman.x, state.pacman.y = state.portal1_pos
+
+        # La longue vue ou double longue vue est équipée seulement si elle est dans le slot "pouvoir"
+        has_longue_vue = profile.has_longue_vue
+        is_double_longue_vue = profile.is_double_longue_vue
+        has_bon_repas = profile.has_bon_repas
+        has_bon_gout = profile.has_bon_gout
+        # Vérifier si "pièce mythique" est équipée dans un slot objet
+        has_piece_mythique = profile.has_piece_mythique
+        # Vérifier les armures équipées et le bonus de vie correspondant
+        armor_lives_bonus = profile.armor_lives_bonus
+        # Valeur théorique des vies max en tenant compte des armures
+        current_max_lives = MAX_LIVES + armor_lives_bonus
+        # Le bonus de vie ne s'applique qu'une seule fois au début du jeu, pas à chaque retour dans le jeu
+        # On ne fait rien ici, le bonus est appliqué lors de l'initialisation des vies
+        # Skins équipés dans le slot "pouvoir"
+        has_skin_bleu = profile.has_skin_bleu
+        has_skin_orange = profile.has_skin_orange
+        has_skin_rose = profile.has_skin_rose
+        has_skin_rouge = profile.has_skin_rouge
+
+        # Créer une case de glace derrière Pacman si "glace" est équipé et que Pacman s'est déplacé
+        if has_glace:
+            new_pacman_pos = (state.pacman.x, state.pacman.y)
+            # Si Pacman s'est déplacé, créer une case de glace à sa position précédente
+            if old_pacman_pos != new_pacman_pos:
+                # Vérifier que la position précédente n'est pas un mur
+                last_x, last_y = old_pacman_pos
+                if 0 <= last_y < state.maze.height and 0 <= last_x < state.maze.width:
+                    if state.maze[last_y][last_x] != 1:  # Pas un mur
+                        # Durée de la glace : ICE_DURATION + 1 seconde par niveau de "gel" équipé
+                        state.ice_tiles[old_pacman_pos] = state.timers.schedule(('glace', old_pacman_pos), profile.ice_duration,
+                                                                                state.expire_ice_tile)
+
+        # Mettre à jour la position précédente de Pacman
+        state.pacman_last_pos = (state.pacman.x, state.pacman.y)
+
+        # Avancer les minuteurs : seules les cases de glace, de feu et les pacgommes (mode aventure)
+        # arrivées à échéance sont traitées
+        state.timers.advance()
+
+        # Gérer le système de feu
+        # Vérifier si le gadget lave ou feu est équipé dans le slot gadget
+        has_feu_gadget = profile.has_feu_gadget
+        gadget_feu_type = profile.gadget_feu_type
+
+        # Décrémenter les cooldowns (1 seconde par niveau = 10 frames par niveau)
+        # Niveau 1 = 2 frames, niveau 2 = 3 frames, etc. (1 frame de base + niveau frames)
+        cooldown_reduction = profile.cooldown_reduction
+        if state.gadget_cooldown > 0:
+            state.gadget_cooldown = max(0, state.gadget_cooldown - cooldown_reduction)
+        if state.mort_cooldown > 0:
+            state.mort_cooldown = max(0, state.mort_cooldown - cooldown_reduction)
+        if state.bombe_cooldown > 0:
+            state.bombe_cooldown = max(0, state.bombe_cooldown - cooldown_reduction)
+
+        # Décrémenter le timer d'activation du feu
+        if state.fire_timer > 0:
+            state.fire_timer -= 1
+            if state.fire_timer <= 0:
+                state.fire_active = False
+
+
+        # Si le feu est actif, créer des cases de feu sur le chemin de Pacman
+        if state.fire_active and has_feu_gadget:
+            if gadget_feu_type == 'lave':
+                # Créer du feu à la position actuelle de Pacman si ce n'est pas un mur
+                if 0 <= state.pacman.y < state.maze.height and 0 <= state.pacman.x < state.maze.width:
+                    if state.maze[state.pacman.y][state.pacman.x] != 1:  # Pas un mur
+                        fire_pos = (state.pacman.x, state.pacman.y)
+                        state.fire_tiles[fire_pos] = schedule_fire_tile(state, fire_pos)
+            elif gadget_feu_type == 'feu':
+                # Créer du feu DERRIÈRE Pacman (à sa position précédente) si Pacman s'est déplacé
+                if old_pacman_pos != (state.pacman.x, state.pacman.y):
+                    last_x, last_y = old_pacman_pos
+                    if 0 <= last_y < state.maze.height and 0 <= last_x < state.maze.width:
+                        if state.maze[last_y][last_x] != 1:  # Pas un mur
+                            state.fire_tiles[(last_x, last_y)] = schedule_fire_tile(state, (last_x, last_y))
+
+        # Calculer la position devant Pacman selon sa direction
+        front_x = state.pacman.x
+        front_y = state.pacman.y
+        if state.pacman.direction != (0, 0):
+            front_x = state.pacman.x + state.pacman.direction[0]
+            front_y = state.pacman.y + state.pacman.direction[1]
+            # Gérer la téléportation aux bords
+            if front_x < 0:
+                front_x = state.maze.width - 1
+            elif front_x >= state.maze.width:
+                front_x = 0
+
+        # La distance de base est 1, augmentée de 1 par niveau de lunette si équipée avec longue vue
+        distance = profile.longue_vue_distance
+
+        # Pour la double longue vue, calculer les positions dans les 4 directions
+        directions = []
+        if is_double_longue_vue:
+            # Toutes les directions avec la distance augmentée par lunette
+            directions = []
+            for d in range(1, distance + 1):
+                directions.append((state.pacman.x + d, state.pacman.y))  # Droite
+                directions.append((state.pacman.x - d, state.pacman.y))  # Gauche
+                directions.append((state.pacman.x, state.pacman.y + d))  # Bas
+                directions.append((state.pacman.x, state.pacman.y - d))  # Haut
+            # Gérer la téléportation aux bords pour chaque direction
+            for i, (dx, dy) in enumerate(directions):
+                if dx < 0:
+                    directions[i] = (state.maze.width - 1, dy)
+                elif dx >= state.maze.width:
+                    directions[i] = (0, dy)
+        elif has_longue_vue and state.pacman.direction != (0, 0):
+            # Devant pour la longue vue simple avec distance augmentée par lunette
+            directions = []
+            for d in range(1, distance + 1):
+                dir_x = state.pacman.x + state.pacman.direction[0] * d
+                dir_y = state.pacman.y + state.pacman.direction[1] * d
+                # Gérer la téléportation aux bords
+                if dir_x < 0:
+                    dir_x = state.maze.width - 1
+                elif dir_x >= state.maze.width:
+                    dir_x = 0
+                directions.append((dir_x, dir_y))
+
+        # Vérifier si Pacman mange un point (à sa position ou devant si longue vue)
+        if state.maze[state.pacman.y][state.pacman.x] == 2:
+            state.maze.set_cell(state.pacman.x, state.pacman.y, 0)
+            state.score += 10
+            # Gagner un jeton pour chaque point mangé (2 si pièce mythique équipée) - sauf en mode aventure
+            if not state.is_adventure_mode:
+                if has_piece_mythique:
+                    state.jeton_count += 2
+                else:
+                    state.jeton_count += 1
+
+            # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
+            if has_bon_gout:
+                # "bon goût" seul : 1% de chance de coup critique
+                crit_chance = 0.01
+                if loot_rng.random() < crit_chance:
+                    # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                    state.is_rainbow_critique = True
+                    state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                    if has_piece_mythique:
+                        state.jeton_count += 20
+                    else:
+                        state.jeton_count += 10
+            elif has_bon_repas:
+                # "bon repas" seul : 0.5% de chance de coup critique
+                crit_chance = 0.005
+                if loot_rng.random() < crit_chance:
+                    # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                    state.is_rainbow_critique = True
+                    state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                    if has_piece_mythique:
+                        state.jeton_count += 20
+                    else:
+                        state.jeton_count += 10
+
+            # Chance d'indigestion selon "pas d'indigestion" et le niveau de la capacité "indigestion"
+            indigestion_chance = profile.indigestion_chance
+
+            if loot_rng.random() < indigestion_chance and not state.has_indigestion:
+                # Indigestion : perdre 10 jetons et devenir vert pendant 1 minute
+                state.jeton_count = max(0, state.jeton_count - 10)
+                state.has_indigestion = True
+                state.indigestion_timer = 600  # 1 minute (60 secondes = 600 frames à 10 FPS)
+                # Vérifier qu'il n'y a pas déjà un fantôme d'indigestion
+                if not any(ghost.harmless for ghost in state.ghosts):
+                    # Créer un fantôme d'indigestion inoffensif près de Pacman
+                    # Chercher une position valide (pas un mur) près de Pacman
+                    indigestion_ghost_x = None
+                    indigestion_ghost_y = None
+                    attempts = 0
+                    max_attempts = 50
+                    while indigestion_ghost_x is None and attempts < max_attempts:
+                        attempts += 1
+                        # Position aléatoire près de Pacman (à une distance de 2-5 cases)
+                        angle = loot_rng.random() * 2 * math.pi
+                        distance = loot_rng.randint(2, 5)
+                        test_x = int(state.pacman.x + distance * math.cos(angle))
+                        test_y = int(state.pacman.y + distance * math.sin(angle))
+                        # S'assurer que la position est dans les limites
+                        test_x = max(0, min(state.maze.width - 1, test_x))
+                        test_y = max(0, min(state.maze.height - 1, test_y))
+                        # Vérifier que la position n'est pas un mur
+                        if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                            if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                indigestion_ghost_x = test_x
+                                indigestion_ghost_y = test_y
+                    # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
+                    if indigestion_ghost_x is None:
+                        # Essayer les positions autour de Pacman
+                        for dx in range(-3, 4):
+                            for dy in range(-3, 4):
+                                test_x = state.pacman.x + dx
+                                test_y = state.pacman.y + dy
+                                if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                    if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                        indigestion_ghost_x = test_x
+                                        indigestion_ghost_y = test_y
+                                        break
+                            if indigestion_ghost_x is not None:
+                                break
+                    # Si on a trouvé une position valide, créer le fantôme
+                    if indigestion_ghost_x is not None:
+                        # Utiliser la couleur la plus courante dans le niveau
+                        indigestion_ghost_color = get_most_common_ghost_color(state.ghosts, state.level)
+                        indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True, rng=ghost_rng)
+                        state.ghosts.append(indigestion_ghost)
+            # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 2000 en hardcore, 200 sinon)
+            if state.difficulty == "facile":
+                jeton_threshold = 100
+            elif state.difficulty == "difficile":
+                jeton_threshold = 1000
+            elif state.difficulty == "hardcore":
+                jeton_threshold = 2000  # Pas de bonus de vie en hardcore (seuil très élevé)
+            else:
+                jeton_threshold = 200
+            if state.jeton_count >= jeton_threshold:
+                # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                if state.lives < current_max_lives and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                    state.lives += 1
+                # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
+                if not state.is_adventure_mode:
+                    state.jeton_poche_gain += state.jeton_count
+                state.crown_poche_gain += state.crown_count
+                state.jeton_count = 0  # Réinitialiser le compteur de jetons
+                state.crown_count = 0  # Réinitialiser le compteur de couronnes
+            if state.level_cleared():
+                # Passer au niveau suivant
+                state.level += 1
+                if state.level == 2:
+                    # Succès "Premier niveau" (débloqué par l'interface)
+                    state.events.append("premier_niveau")
+                # Vérifier si "coffre fort" est équipé
+                has_coffre_fort = profile.has_coffre_fort
+                # Récompense du coffre fort si équipé
+                if has_coffre_fort:
+                    state.jeton_poche_gain += 100  # Gagner 100 pacoins
+                # Vérifier si "coffre au trésor" est équipé
+                has_coffre_tresor = profile.has_coffre_tresor
+                # Récompense du coffre au trésor si équipé
+                if has_coffre_tresor:
+                    state.jeton_poche_gain += 200  # Gagner 200 pacoins
+                # Récompense au niveau 17 en mode facile
+                if state.difficulty == "facile" and state.level == 17:
+                    state.crown_poche_gain += 1  # Gagner 1 couronne
+                    state.jeton_poche_gain += 50  # Gagner 50 pacoins
+                # Récompense au niveau 25 en mode moyen
+                if state.difficulty == "moyen" and state.level == 25:
+                    state.crown_poche_gain += 55  # Gagner 55 couronnes
+                    state.jeton_poche_gain += 1000  # Gagner 1000 pacoins
+                # Récompense au niveau 30 en mode difficile
+                if state.difficulty == "difficile" and state.level == 30:
+                    state.crown_poche_gain += 60  # Gagner 60 couronnes
+                    state.jeton_poche_gain += 1500  # Gagner 1500 pacoins
+                # Récompense au niveau 50 en mode hardcore
+                if state.difficulty == "hardcore" and state.level == 50:
+                    state.crown_poche_gain += 1000  # Gagner 1000 couronnes
+                    state.jeton_poche_gain += 200000  # Gagner 200000 pacoins
+                # Vérifier si on a gagné au niveau 24 (en moyenne)
+                if state.level == 24:
+                    state.won = True
+                    state.crown_poche_gain += 10  # Gagner 10 couronnes
+                    state.jeton_poche_gain += 500  # Gagner 500 pacoins
+                # Vérifier si on a gagné (niveau 20 en mode facile)
+                if state.difficulty == "facile" and state.level >= 20:
+                    state.won = True
+                # Vérifier si on a gagné au niveau 20 sans difficulté choisie
+                if state.difficulty is None and state.level >= 20:
+                    state.won = True
+                    state.crown_poche_gain += 10  # Gagner 10 couronnes
+                    state.jeton_poche_gain += 500  # Gagner 500 pacoins
+                state.level_transition = True
+                state.level_transition_timer = 60  # 2 secondes de transition
+                # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
+                indigestion_active = state.has_indigestion and state.indigestion_timer > 0
+                saved_indigestion_timer = state.indigestion_timer
+                # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
+                remove_harmless_ghosts(state.ghosts)
+                state.maze, state.pacman, state.ghosts = start_next_level(state.level, rng=ghost_rng, mazes=state.mazes, multi_map=state.is_adventure_mode and state.level % 10 == 0, world=state.world)
+                add_difficulty_ghosts(state.ghosts, state.maze, state.difficulty, state.level, ghost_rng)
+                # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
+                if indigestion_active:
+                    state.has_indigestion = True
+                    state.indigestion_timer = saved_indigestion_timer
+                    # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
+                    # Chercher une position valide (pas un mur) près de Pacman
+                    indigestion_ghost_x = None
+                    indigestion_ghost_y = None
+                    attempts = 0
+                    max_attempts = 50
+                    while indigestion_ghost_x is None and attempts < max_attempts:
+                        attempts += 1
+                        # Position aléatoire près de Pacman (à une distance de 2-5 cases)
+                        angle = loot_rng.random() * 2 * math.pi
+                        distance = loot_rng.randint(2, 5)
+                        test_x = int(state.pacman.x + distance * math.cos(angle))
+                        test_y = int(state.pacman.y + distance * math.sin(angle))
+                        # S'assurer que la position est dans les limites
+                        test_x = max(0, min(state.maze.width - 1, test_x))
+                        test_y = max(0, min(state.maze.height - 1, test_y))
+                        # Vérifier que la position n'est pas un mur
+                        if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                            if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                indigestion_ghost_x = test_x
+                                indigestion_ghost_y = test_y
+                    # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
+                    if indigestion_ghost_x is None:
+                        # Essayer les positions autour de Pacman
+                        for dx in range(-3, 4):
+                            for dy in range(-3, 4):
+                                test_x = state.pacman.x + dx
+                                test_y = state.pacman.y + dy
+                                if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                    if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                        indigestion_ghost_x = test_x
+                                        indigestion_ghost_y = test_y
+                                        break
+                            if indigestion_ghost_x is not None:
+                                break
+                    # Si on a trouvé une position valide, créer le fantôme
+                    if indigestion_ghost_x is not None:
+                        # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
+                        indigestion_ghost_color = get_most_common_ghost_color(state.ghosts, state.level)
+                        indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True, rng=ghost_rng)
+                        state.ghosts.append(indigestion_ghost)
+                else:
+                    state.has_indigestion = False
+                    state.indigestion_timer = 0
+                state.vulnerable_timer = 0
+                state.ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
+                state.pacman_last_pos = (state.pacman.x, state.pacman.y)  # Réinitialiser la position précédente
+        # Vérifier si Pacman mange une pacgomme (à sa position ou devant si longue vue)
+        elif state.maze[state.pacman.y][state.pacman.x] == 3:
+            # Enregistrer la position de la pacgomme mangée pour la faire réapparaître (seulement en mode aventure)
+            if state.is_adventure_mode:
+                pacgomme_pos = (state.pacman.x, state.pacman.y)
+                state.pacgomme_timers[pacgomme_pos] = state.timers.schedule(('pacgomme', pacgomme_pos), PACGOMME_RESPAWN_TIME, state.respawn_pacgomme)
+            state.maze.set_cell(state.pacman.x, state.pacman.y, 0)
+            state.score += 50
+            # Gagner 5 jetons pour chaque pacgomme mangée (10 si pièce mythique équipée) - sauf en mode aventure
+            if not state.is_adventure_mode:
+                if has_piece_mythique:
+                    state.jeton_count += 10
+                else:
+                    state.jeton_count += 5
+
+            # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
+            if has_bon_gout:
+                # "bon goût" seul : 1% de chance de coup critique
+                crit_chance = 0.01
+                if loot_rng.random() < crit_chance:
+                    # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                    state.is_rainbow_critique = True
+                    state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                    if not state.is_adventure_mode:
+                        if has_piece_mythique:
+                            state.jeton_count += 20
+                        else:
+                            state.jeton_count += 10
+            elif has_bon_repas:
+                # "bon repas" seul : 0.5% de chance de coup critique
+                crit_chance = 0.005
+                if loot_rng.random() < crit_chance:
+                    # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                    state.is_rainbow_critique = True
+                    state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                    if not state.is_adventure_mode:
+                        if has_piece_mythique:
+                            state.jeton_count += 20
+                        else:
+                            state.jeton_count += 10
+            # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 2000 en hardcore, 200 sinon)
+            if state.difficulty == "facile":
+                jeton_threshold = 100
+            elif state.difficulty == "difficile":
+                jeton_threshold = 1000
+            elif state.difficulty == "hardcore":
+                jeton_threshold = 2000  # Pas de bonus de vie en hardcore (seuil très élevé)
+            else:
+                jeton_threshold = 200
+            if state.jeton_count >= jeton_threshold:
+                # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                if state.lives < current_max_lives and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                    state.lives += 1
+                # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
+                if not state.is_adventure_mode:
+                    state.jeton_poche_gain += state.jeton_count
+                state.crown_poche_gain += state.crown_count
+                state.jeton_count = 0  # Réinitialiser le compteur de jetons
+                state.crown_count = 0  # Réinitialiser le compteur de couronnes
+
+            # Mode difficile : bonus spécial à 4000 pacoins
+            if state.difficulty == "difficile" and state.jeton_count >= 4000:
+                # Transférer les pacoins et couronnes à la poche (sauf en mode aventure)
+                if not state.is_adventure_mode:
+                    state.jeton_poche_gain += state.jeton_count
+                state.crown_poche_gain += state.crown_count
+                # Gagner 1 cœur
+                if state.lives < current_max_lives:
+                    state.lives += 1
+                # Réinitialiser les compteurs
+                state.jeton_count = 0
+                state.crown_count = 0
+
+            # Durée de vulnérabilité : +1 seconde (10 frames) par niveau de "pacgum"
+            state.vulnerable_timer = profile.vulnerable_duration
+            # Rendre tous les fantômes vulnérables (sauf les fantômes roses qui ne sont pas affectés par le bonus de pacgomme)
+            ROSE = (255, 192, 203)
+            for ghost in state.ghosts:
+                if not ghost.returning and ghost.color != ROSE:
+                    ghost.vulnerable = True
+
+        # Si longue vue est équipée, récupérer les objets dans les directions appropriées
+        if has_longue_vue and len(directions) > 0:
+            for check_x, check_y in directions:
+                if 0 <= check_y < state.maze.height and 0 <= check_x < state.maze.width:
+                    if state.maze[check_y][check_x] == 2:  # Point
+                        state.maze.set_cell(check_x, check_y, 0)
+                        state.score += 10
+                        # Gagner un jeton pour chaque point mangé (2 si pièce mythique équipée) - sauf en mode aventure
+                        if not state.is_adventure_mode:
+                            if has_piece_mythique:
+                                state.jeton_count += 2
+                            else:
+                                state.jeton_count += 1
+
+                        # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
+                        if has_bon_gout:
+                            # "bon goût" seul : 1% de chance de coup critique
+                            crit_chance = 0.01
+                            if loot_rng.random() < crit_chance:
+                                # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                                state.is_rainbow_critique = True
+                                state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                                if not state.is_adventure_mode:
+                                    if has_piece_mythique:
+                                        state.jeton_count += 20
+                                    else:
+                                        state.jeton_count += 10
+                        elif has_bon_repas:
+                            # "bon repas" seul : 0.5% de chance de coup critique
+                            crit_chance = 0.005
+                            if loot_rng.random() < crit_chance:
+                                # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                                state.is_rainbow_critique = True
+                                state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                                if not state.is_adventure_mode:
+                                    if has_piece_mythique:
+                                        state.jeton_count += 20
+                                    else:
+                                        state.jeton_count += 10
+
+                        # Chance d'indigestion selon "pas d'indigestion" et le niveau de la capacité "indigestion"
+                        indigestion_chance = profile.indigestion_chance
+
+                        if loot_rng.random() < indigestion_chance and not state.has_indigestion:
+                            # Indigestion : perdre 10 jetons et devenir vert pendant 1 minute
+                            state.jeton_count = max(0, state.jeton_count - 10)
+                            state.has_indigestion = True
+                            state.indigestion_timer = 600  # 1 minute (60 secondes = 600 frames à 10 FPS)
+                            # Vérifier qu'il n'y a pas déjà un fantôme d'indigestion
+                            if not any(ghost.harmless for ghost in state.ghosts):
+                                # Créer un fantôme d'indigestion inoffensif près de Pacman
+                                # Chercher une position valide (pas un mur) près de Pacman
+                                indigestion_ghost_x = None
+                                indigestion_ghost_y = None
+                                attempts = 0
+                                max_attempts = 50
+                                while indigestion_ghost_x is None and attempts < max_attempts:
+                                    attempts += 1
+                                    # Position aléatoire près de Pacman (à une distance de 2-5 cases)
+                                    angle = loot_rng.random() * 2 * math.pi
+                                    distance = loot_rng.randint(2, 5)
+                                    test_x = int(state.pacman.x + distance * math.cos(angle))
+                                    test_y = int(state.pacman.y + distance * math.sin(angle))
+                                    # S'assurer que la position est dans les limites
+                                    test_x = max(0, min(state.maze.width - 1, test_x))
+                                    test_y = max(0, min(state.maze.height - 1, test_y))
+                                    # Vérifier que la position n'est pas un mur
+                                    if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                        if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                            indigestion_ghost_x = test_x
+                                            indigestion_ghost_y = test_y
+                                # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
+                                if indigestion_ghost_x is None:
+                                    # Essayer les positions autour de Pacman
+                                    for dx in range(-3, 4):
+                                        for dy in range(-3, 4):
+                                            test_x = state.pacman.x + dx
+                                            test_y = state.pacman.y + dy
+                                            if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                                if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                                    indigestion_ghost_x = test_x
+                                                    indigestion_ghost_y = test_y
+                                                    break
+                                        if indigestion_ghost_x is not None:
+                                            break
+                                # Si on a trouvé une position valide, créer le fantôme
+                                if indigestion_ghost_x is not None:
+                                    # Utiliser la couleur la plus courante dans le niveau
+                                    indigestion_ghost_color = get_most_common_ghost_color(state.ghosts, state.level)
+                                    indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True, rng=ghost_rng)
+                                    state.ghosts.append(indigestion_ghost)
+                        # Vérifier si on a atteint le seuil de jetons pour gagner une vie
+                        if state.difficulty == "facile":
+                            jeton_threshold = 100
+                        elif state.difficulty == "difficile":
+                            jeton_threshold = 1000
+                        else:
+                            jeton_threshold = 200
+                        if state.jeton_count >= jeton_threshold:
+                            # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                            if state.lives < MAX_LIVES and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                                state.lives += 1
+                            if not state.is_adventure_mode:
+                                state.jeton_poche_gain += state.jeton_count
+                            state.crown_poche_gain += state.crown_count
+                            state.jeton_count = 0
+                            state.crown_count = 0
+
+                        # Mode difficile : bonus spécial à 4000 pacoins
+                        if state.difficulty == "difficile" and state.jeton_count >= 4000:
+                            # Transférer les pacoins et couronnes à la poche (sauf en mode aventure)
+                            if not state.is_adventure_mode:
+                                state.jeton_poche_gain += state.jeton_count
+                            state.crown_poche_gain += state.crown_count
+                            # Gagner 1 cœur
+                            if state.lives < MAX_LIVES:
+                                state.lives += 1
+                            # Réinitialiser les compteurs
+                            state.jeton_count = 0
+                            state.crown_count = 0
+
+                        if state.level_cleared():
+                            state.level += 1
+                            # Récompense au niveau 17 en mode facile
+                            if state.difficulty == "facile" and state.level == 17:
+                                state.crown_poche_gain += 1  # Gagner 1 couronne
+                                state.jeton_poche_gain += 50  # Gagner 50 pacoins
+                            # Récompense au niveau 25 en mode moyen
+                            if state.difficulty == "moyen" and state.level == 25:
+                                state.crown_poche_gain += 55  # Gagner 55 couronnes
+                                state.jeton_poche_gain += 1000  # Gagner 1000 pacoins
+                            # Récompense au niveau 30 en mode difficile
+                            if state.difficulty == "difficile" and state.level == 30:
+                                state.crown_poche_gain += 60  # Gagner 60 couronnes
+                                state.jeton_poche_gain += 1500  # Gagner 1500 pacoins
+                            # Récompense au niveau 50 en mode hardcore
+                            if state.difficulty == "hardcore" and state.level == 50:
+                                state.crown_poche_gain += 1000  # Gagner 1000 couronnes
+                                state.jeton_poche_gain += 200000  # Gagner 200000 pacoins
+                            # Vérifier si on a gagné au niveau 24 (en moyenne)
+                            if state.level == 24:
+                                state.won = True
+                                state.crown_poche_gain += 10  # Gagner 10 couronnes
+                                state.jeton_poche_gain += 500  # Gagner 500 pacoins
+                            # Vérifier si on a gagné (niveau 20 en mode facile)
+                            if state.difficulty == "facile" and state.level >= 20:
+                                state.won = True
+                            # Vérifier si on a gagné au niveau 20 sans difficulté choisie
+                            if state.difficulty is None and state.level >= 20:
+                                state.won = True
+                                state.crown_poche_gain += 10  # Gagner 10 couronnes
+                                state.jeton_poche_gain += 500  # Gagner 500 pacoins
+                            state.level_transition = True
+                            state.level_transition_timer = 60
+                            # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
+                            indigestion_active = state.has_indigestion and state.indigestion_timer > 0
+                            saved_indigestion_timer = state.indigestion_timer
+                            # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
+                            remove_harmless_ghosts(state.ghosts)
+                            state.maze, state.pacman, state.ghosts = start_next_level(state.level, rng=ghost_rng, mazes=state.mazes, multi_map=state.is_adventure_mode and state.level % 10 == 0, world=state.world)
+                            add_difficulty_ghosts(state.ghosts, state.maze, state.difficulty, state.level, ghost_rng)
+                            # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
+                            if indigestion_active:
+                                state.has_indigestion = True
+                                state.indigestion_timer = saved_indigestion_timer
+                                # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
+                                # Chercher une position valide (pas un mur) près de Pacman
+                                indigestion_ghost_x = None
+                                indigestion_ghost_y = None
+                                attempts = 0
+                                max_attempts = 50
+                                while indigestion_ghost_x is None and attempts < max_attempts:
+                                    attempts += 1
+                                    # Position aléatoire près de Pacman (à une distance de 2-5 cases)
+                                    angle = loot_rng.random() * 2 * math.pi
+                                    distance = loot_rng.randint(2, 5)
+                                    test_x = int(state.pacman.x + distance * math.cos(angle))
+                                    test_y = int(state.pacman.y + distance * math.sin(angle))
+                                    # S'assurer que la position est dans les limites
+                                    test_x = max(0, min(state.maze.width - 1, test_x))
+                                    test_y = max(0, min(state.maze.height - 1, test_y))
+                                    # Vérifier que la position n'est pas un mur
+                                    if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                        if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                            indigestion_ghost_x = test_x
+                                            indigestion_ghost_y = test_y
+                                # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
+                                if indigestion_ghost_x is None:
+                                    # Essayer les positions autour de Pacman
+                                    for dx in range(-3, 4):
+                                        for dy in range(-3, 4):
+                                            test_x = state.pacman.x + dx
+                                            test_y = state.pacman.y + dy
+                                            if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                                if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                                    indigestion_ghost_x = test_x
+                                                    indigestion_ghost_y = test_y
+                                                    break
+                                        if indigestion_ghost_x is not None:
+                                            break
+                                # Si on a trouvé une position valide, créer le fantôme
+                                if indigestion_ghost_x is not None:
+                                    # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
+                                    indigestion_ghost_color = get_most_common_ghost_color(state.ghosts, state.level)
+                                    indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True, rng=ghost_rng)
+                                    state.ghosts.append(indigestion_ghost)
+                            else:
+                                state.has_indigestion = False
+                                state.indigestion_timer = 0
+                            state.vulnerable_timer = 0
+                            state.ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
+                            state.pacman_last_pos = (state.pacman.x, state.pacman.y)  # Réinitialiser la position précédente
+                    elif state.maze[check_y][check_x] == 3:  # Pacgomme
+                        # Enregistrer la position de la pacgomme mangée pour la faire réapparaître (seulement en mode aventure)
+                        if state.is_adventure_mode:
+                            state.pacgomme_timers[(check_x, check_y)] = state.timers.schedule(('pacgomme', (check_x, check_y)), PACGOMME_RESPAWN_TIME, state.respawn_pacgomme)
+                        state.maze.set_cell(check_x, check_y, 0)
+                        state.score += 50
+                        # Gagner 5 jetons pour chaque pacgomme mangée (10 si pièce mythique équipée) - sauf en mode aventure
+                        if not state.is_adventure_mode:
+                            if has_piece_mythique:
+                                state.jeton_count += 10
+                            else:
+                                state.jeton_count += 5
+
+                        # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
+                        if has_bon_gout:
+                            # "bon goût" seul : 1% de chance de coup critique
+                            crit_chance = 0.01
+                            if loot_rng.random() < crit_chance:
+                                # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                                state.is_rainbow_critique = True
+                                state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                                if not state.is_adventure_mode:
+                                    if has_piece_mythique:
+                                        state.jeton_count += 20
+                                    else:
+                                        state.jeton_count += 10
+                        elif has_bon_repas:
+                            # "bon repas" seul : 0.5% de chance de coup critique
+                            crit_chance = 0.005
+                            if loot_rng.random() < crit_chance:
+                                # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
+                                state.is_rainbow_critique = True
+                                state.rainbow_timer = 20  # 2 secondes à 10 FPS
+                                if not state.is_adventure_mode:
+                                    if has_piece_mythique:
+                                        state.jeton_count += 20
+                                    else:
+                                        state.jeton_count += 10
+                        # Vérifier si on a atteint le seuil de jetons pour gagner une vie
+                        if state.difficulty == "facile":
+                            jeton_threshold = 100
+                        elif state.difficulty == "difficile":
+                            jeton_threshold = 1000
+                        else:
+                            jeton_threshold = 200
+                        if state.jeton_count >= jeton_threshold:
+                            # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                            if state.lives < MAX_LIVES and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                                state.lives += 1
+                            if not state.is_adventure_mode:
+                                state.jeton_poche_gain += state.jeton_count
+                            state.crown_poche_gain += state.crown_count
+                            state.jeton_count = 0
+                            state.crown_count = 0
+                        # Durée de vulnérabilité : +1 seconde (10 frames) par niveau de "pacgum"
+                        state.vulnerable_timer = profile.vulnerable_duration
+                        # Rendre tous les fantômes vulnérables (sauf les fantômes roses qui ne sont pas affectés par le bonus de pacgomme)
+                        ROSE = (255, 192, 203)
+                        for ghost in state.ghosts:
+                            if not ghost.returning and ghost.color != ROSE:
+                                ghost.vulnerable = True
+
+        # Vérifier si tous les points sont collectés
+        if state.level_cleared():
+            # Passer au niveau suivant
+            state.level += 1
+            # Récompense au niveau 17 en mode facile
+            if state.difficulty == "facile" and state.level == 17:
+                state.crown_poche_gain += 1  # Gagner 1 couronne
+                state.jeton_poche_gain += 50  # Gagner 50 pacoins
+            # Récompense au niveau 25 en mode moyen
+            if state.difficulty == "moyen" and state.level == 25:
+                state.crown_poche_gain += 55  # Gagner 55 couronnes
+                state.jeton_poche_gain += 1000  # Gagner 1000 pacoins
+            # Récompense au niveau 30 en mode difficile
+            if state.difficulty == "difficile" and state.level == 30:
+                state.crown_poche_gain += 60  # Gagner 60 couronnes
+                state.jeton_poche_gain += 1500  # Gagner 1500 pacoins
+            # Récompense au niveau 50 en mode hardcore
+            if state.difficulty == "hardcore" and state.level == 50:
+                state.crown_poche_gain += 1000  # Gagner 1000 couronnes
+                state.jeton_poche_gain += 200000  # Gagner 200000 pacoins
+            # Vérifier si on a gagné au niveau 24 (en moyenne)
+            if state.level == 24:
+                state.won = True
+                state.crown_poche_gain += 10  # Gagner 10 couronnes
+                state.jeton_poche_gain += 500  # Gagner 500 pacoins
+            # Vérifier si on a gagné (niveau 20 en mode facile)
+            if state.difficulty == "facile" and state.level >= 20:
+                state.won = True
+            # Vérifier si on a gagné au niveau 20 sans difficulté choisie
+            if state.difficulty is None and state.level >= 20:
+                state.won = True
+                state.crown_poche_gain += 10  # Gagner 10 couronnes
+                state.jeton_poche_gain += 500  # Gagner 500 pacoins
+            state.level_transition = True
+            state.level_transition_timer = 60  # 2 secondes de transition
+            # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
+            indigestion_active = state.has_indigestion and state.indigestion_timer > 0
+            saved_indigestion_timer = state.indigestion_timer
+            # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
+            remove_harmless_ghosts(state.ghosts)
+            state.maze, state.pacman, state.ghosts = start_next_level(state.level, rng=ghost_rng, mazes=state.mazes, multi_map=state.is_adventure_mode and state.level % 10 == 0, world=state.world)
+            add_difficulty_ghosts(state.ghosts, state.maze, state.difficulty, state.level, ghost_rng)
+            # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
+            if indigestion_active:
+                state.has_indigestion = True
+                state.indigestion_timer = saved_indigestion_timer
+                # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
+                # Chercher une position valide (pas un mur) près de Pacman
+                indigestion_ghost_x = None
+                indigestion_ghost_y = None
+                attempts = 0
+                max_attempts = 50
+                while indigestion_ghost_x is None and attempts < max_attempts:
+                    attempts += 1
+                    # Position aléatoire près de Pacman (à une distance de 2-5 cases)
+                    angle = loot_rng.random() * 2 * math.pi
+                    distance = loot_rng.randint(2, 5)
+                    test_x = int(state.pacman.x + distance * math.cos(angle))
+                    test_y = int(state.pacman.y + distance * math.sin(angle))
+                    # S'assurer que la position est dans les limites
+                    test_x = max(0, min(state.maze.width - 1, test_x))
+                    test_y = max(0, min(state.maze.height - 1, test_y))
+                    # Vérifier que la position n'est pas un mur
+                    if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                        if state.maze[test_y][test_x] != 1:  # Pas un mur
+                            indigestion_ghost_x = test_x
+                            indigestion_ghost_y = test_y
+                # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
+                if indigestion_ghost_x is None:
+                    # Essayer les positions autour de Pacman
+                    for dx in range(-3, 4):
+                        for dy in range(-3, 4):
+                            test_x = state.pacman.x + dx
+                            test_y = state.pacman.y + dy
+                            if 0 <= test_y < state.maze.height and 0 <= test_x < state.maze.width:
+                                if state.maze[test_y][test_x] != 1:  # Pas un mur
+                                    indigestion_ghost_x = test_x
+                                    indigestion_ghost_y = test_y
+                                    break
+                        if indigestion_ghost_x is not None:
+                            break
+                # Si on a trouvé une position valide, créer le fantôme
+                if indigestion_ghost_x is not None:
+                    # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
+                    indigestion_ghost_color = get_most_common_ghost_color(state.ghosts, state.level)
+                    indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True, rng=ghost_rng)
+                    state.ghosts.append(indigestion_ghost)
+            else:
+                state.has_indigestion = False
+                state.indigestion_timer = 0
+            state.vulnerable_timer = 0
+            state.ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
+            state.fire_tiles = {}  # Réinitialiser les cases de feu au nouveau niveau
+            state.fire_active = False  # Réinitialiser l'activation du feu
+            state.fire_timer = 0  # Réinitialiser le timer du feu
+            state.gadget_cooldown = 0  # Réinitialiser le temps de recharge du gadget
+            state.mort_cooldown = 0  # Réinitialiser le temps de recharge de "mort"
+            state.bombe_cooldown = 0  # Réinitialiser le temps de recharge de "bombe téléguidée"
+            state.bombe_active = False  # Réinitialiser l'état de la bombe
+            state.pacman_frozen = False  # Réinitialiser l'état de gel de Pacman
+            state.bombe_timer = 0  # Réinitialiser le timer de la bombe
+            # Les pièges persistent entre les niveaux et les retours
+            state.portal1_pos = None  # Réinitialiser les portails
+            state.portal2_pos = None
+            state.portal_use_count = 0
+            # Enlever le mur créé du maze si nécessaire
+            if state.mur_pos is not None:
+                if isinstance(state.mur_pos, list):
+                    # Si c'est une liste (cas avec bric), enlever tous les murs
+                    for mur_x, mur_y in state.mur_pos:
+                        if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                            state.maze.set_cell(mur_x, mur_y, 0)  # Remettre en chemin
+                else:
+                    # Si c'est un tuple (comportement normal)
+                    mur_x, mur_y = state.mur_pos
+                    if 0 <= mur_y < state.maze.height and 0 <= mur_x < state.maze.width:
+                        state.maze.set_cell(mur_x, mur_y, 0)  # Remettre en chemin
+            state.mur_pos = None  # Réinitialiser le mur
+            state.mur_use_count = 0
+            state.pacman_last_pos = (state.pacman.x, state.pacman.y)  # Réinitialiser la position précédente
+            # Réinitialiser les flee_timer et immobilized_timer des fantômes
+            for ghost in state.ghosts:
+                ghost.flee_timer = 0
+                ghost.immobilized_timer = 0
+
+        # Mettre à jour le timer de vulnérabilité
+        end_vulnerability = False
+        if state.vulnerable_timer > 0:
+            state.vulnerable_timer -= 1
+            end_vulnerability = state.vulnerable_timer == 0
+
+        # Une seule passe sur les tableaux des fantômes : fin de vulnérabilité et flee_timer
+        GHOST_REGISTRY.tick_timers(state.ghosts, end_vulnerability)
+
+        # Équipements qui ne changent pas pendant la boucle des fantômes
+        # Si "givre" est équipé avec "glace", ralentissement plus fort (5 frames au lieu de 3)
+        ice_slowdown_threshold = profile.ice_slowdown_threshold
+
+        # La distance de base est 1, augmentée de 1 par niveau de lunette si équipée avec longue vue
+        distance = profile.longue_vue_distance
+
+        # Calculer les directions pour manger les fantômes (les mêmes pour tous les fantômes)
+        directions = []
+        if is_double_longue_vue:
+            # Toutes les directions avec la distance augmentée par lunette
+            for d in range(1, distance + 1):
+                directions.append((state.pacman.x + d, state.pacman.y))  # Droite
+                directions.append((state.pacman.x - d, state.pacman.y))  # Gauche
+                directions.append((state.pacman.x, state.pacman.y + d))  # Bas
+                directions.append((state.pacman.x, state.pacman.y - d))  # Haut
+            # Gérer la téléportation aux bords pour chaque direction
+            for i, (dx, dy) in enumerate(directions):
+                if dx < 0:
+                    directions[i] = (state.maze.width - 1, dy)
+                elif dx >= state.maze.width:
+                    directions[i] = (0, dy)
+        elif has_longue_vue and state.pacman.direction != (0, 0):
+            # Devant pour la longue vue simple avec distance augmentée par lunette
+            for d in range(1, distance + 1):
+                dir_x = state.pacman.x + state.pacman.direction[0] * d
+                dir_y = state.pacman.y + state.pacman.direction[1] * d
+                # Gérer la téléportation aux bords
+                if dir_x < 0:
+                    dir_x = state.maze.width - 1
+                elif dir_x >= state.maze.width:
+                    dir_x = 0
+                directions.append((dir_x, dir_y))
+
+        # Index des cases occupées avant le déplacement : seuls le feu et la glace réellement
+        # occupés par un fantôme sont examinés
+        occupancy = OccupancyIndex(state.ghosts if state.fire_tiles or state.ice_tiles else ())
+        ghosts_on_fire = occupancy.entities_in(state.fire_tiles)
+        ghosts_on_ice = occupancy.entities_in(state.ice_tiles)
+        # Cases de rencontre avec Pacman (collisions, longue vue), calculées une fois pour le tick
+        hot_cells = collision_cells(state.pacman, directions if has_longue_vue else (),
+                                    state.invincibility_timer == 0 and not state.super_vie_active)
+
+        # Mettre à jour les fantômes
+        ghosts_to_remove = []  # Liste des fantômes à supprimer en mode aventure
+        ORANGE = (255, 165, 0)
+        ROSE = (255, 192, 203)
+        for ghost in state.ghosts:
+            # Vérifier si le fantôme marche sur un piège
+            if state.pieges:
+                ghost_pos = (ghost.x, ghost.y)
+                if ghost_pos in state.pieges and not ghost.eyes and not ghost.harmless and ghost.color != ORANGE and ghost.color != ROSE:
+                    # Le fantôme marche sur un piège, l'immobiliser
+                    if ghost.immobilized_timer == 0:  # Ne pas réinitialiser si déjà immobilisé
+                        # 10 secondes + 1 seconde par niveau de "piquant" équipé
+                        ghost.immobilized_timer = profile.piege_duration
+                        # Retirer le piège après activation (un piège ne peut être utilisé qu'une fois)
+                        del state.pieges[ghost_pos]
+
+            # Décrémenter le timer d'immobilisation
+            if ghost.immobilized_timer > 0:
+                ghost.immobilized_timer -= 1
+
+            # Vérifier si le fantôme est sur une case de feu
+            if ghost in ghosts_on_fire and not ghost.eyes and not ghost.harmless:
+                # Le fantôme touche le feu, le faire fuir (durée calculée selon si "flamme" est équipé)
+                ghost.flee_timer = profile.fire_duration
+
+            # Si le fantôme est immobilisé, ne pas le mettre à jour
+            if ghost.immobilized_timer > 0:
+                # Le fantôme est immobilisé, ne pas le déplacer
+                continue
+
+            # Vérifier si le fantôme est sur une case de glace
+            if ghost in ghosts_on_ice:
+                # Ralentissement selon si "givre" est équipé avec "glace"
+                ghost.ice_slowdown += 1
+                if ghost.ice_slowdown >= ice_slowdown_threshold:
+                    ghost.update(state.maze, (state.pacman.x, state.pacman.y), ghost_rng, state.pacman.direction)
+                    ghost.ice_slowdown = 0
+            else:
+                # Déplacement normal
+                ghost.ice_slowdown = 0
+                ghost.update(state.maze, (state.pacman.x, state.pacman.y), ghost_rng, state.pacman.direction)
+
+            # Collisions de ce fantôme juste après son déplacement (une seule recherche dans hot_cells) :
+            # une collision mortelle arrête la boucle, les fantômes suivants ne bougent pas pendant ce tick
+            ghost_cell = (ghost.x, ghost.y)
+            if ghost_cell not in hot_cells:
+                continue
+            rule = hot_cells[ghost_cell]
+            # Si longue vue est équipée et le fantôme est dans une direction valide ET vulnérable, on peut le manger
+            # Pour manger un fantôme, il faut toujours qu'il soit vulnérable (après avoir mangé une pacgomme)
+            # Les fantômes roses ne peuvent pas être mangés par la longue vue
+            if rule == LONGUE_VUE_CELL:
+                if not ghost.eyes and ghost.vulnerable and ghost.color != ROSE:
+                    # En mode aventure, supprimer le fantôme définitivement (pas de réapparition)
+                    if state.is_adventure_mode:
+                        # Supprimer le fantôme immédiatement en mode aventure
+                        state.ghosts.remove(ghost)
+                        ghost.release()
+                        continue  # Passer au fantôme suivant
+                    # Manger le fantôme vulnérable avec longue vue (mode normal)
+                    state.score += 300
+                    if state.difficulty == "facile":
+                        jeton_threshold = 100
+                    elif state.difficulty == "difficile":
+                        jeton_threshold = 1000
+                    elif state.difficulty == "hardcore":
+                        jeton_threshold = 2000
+                    else:
+                        jeton_threshold = 200
+                    if state.jeton_count >= jeton_threshold:
+                        # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                            if state.lives < MAX_LIVES and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                                state.lives += 1
+                            if not state.is_adventure_mode:
+                                state.jeton_poche_gain += state.jeton_count
+                            state.crown_poche_gain += state.crown_count
+                            state.jeton_count = 0
+                            state.crown_count = 0
+                    # En mode aventure, marquer le fantôme pour suppression définitive (pas de réapparition)
+                    if state.is_adventure_mode:
+                        # Marquer le fantôme pour suppression (on le supprimera après la boucle)
+                        ghosts_to_remove.append(ghost)
+                        continue  # Passer au fantôme suivant
+                    state.crown_timer = 30
+                    state.crown_count += 1
+                    if state.last_ghost_time > 0:
+                        state.grande_couronne_count += 1
+                    state.last_ghost_time = 100
+                    ghost.eyes = True
+                    ghost.vulnerable = False
+                    ghost.returning = False
+                    continue  # Passer au fantôme suivant
+                # Sinon le fantôme est dans une direction couverte : on est protégé, pas de collision
+                # (pour la double longue vue, dans les 4 directions même sans pacgomme)
+                continue
+
+            # Collision sur la même case (rule None) ou sur la case voisine si les deux se dirigent
+            # l'un vers l'autre (rule : direction du fantôme vers Pacman) ; Pacman invincible : aucune case
+            if rule is None or ghost.direction == rule:
+                # Si le fantôme est en mode yeux, pas de collision
+                if ghost.eyes:
+                    continue
+                # Si le fantôme est vulnérable, Pacman le mange
+                if ghost.vulnerable:
+                    # En mode aventure, gérer les fantômes spéciaux qui nécessitent plusieurs coups
+                    if state.is_adventure_mode:
+                        # Incrémenter le compteur de coups reçus
+                        ghost.hits_taken += 1
+                        # Si le fantôme a reçu assez de coups, le tuer définitivement (pas de réapparition)
+                        if ghost.hits_taken >= ghost.hits_required:
+                            # Marquer le fantôme pour suppression (on le supprimera après la boucle)
+                            # Ne pas enregistrer dans ghost_timers pour qu'il ne réapparaisse pas
+                            ghosts_to_remove.append(ghost)
+                        else:
+                            # Le fantôme n'est pas encore mort, juste rendre non-vulnérable temporairement
+                            ghost.vulnerable = False
+                            # Réinitialiser la position du fantôme à sa position de départ
+                            ghost.x = ghost.start_x
+                            ghost.y = ghost.start_y
+                        continue  # Passer au fantôme suivant
+                    # Pacman mange le fantôme - transformer en yeux (mode normal)
+                    state.score += 300  # 200 points de base + 100 points bonus
+                    # Gagner de l'XP pour le passe de combat (traité par l'interface)
+                    state.events.append("fantome_mange")
+                    # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 200 sinon)
+                    if state.difficulty == "facile":
+                        jeton_threshold = 100
+                    elif state.difficulty == "difficile":
+                        jeton_threshold = 1000
+                    else:
+                        jeton_threshold = 200
+                    if state.jeton_count >= jeton_threshold:
+                        # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
+                        if state.lives < MAX_LIVES and state.difficulty != "difficile" and state.difficulty != "hardcore":
+                            state.lives += 1
+                        # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
+                        if not state.is_adventure_mode:
+                            state.jeton_poche_gain += state.jeton_count
+                        state.crown_poche_gain += state.crown_count
+                        state.jeton_count = 0  # Réinitialiser le compteur de jetons
+                        state.crown_count = 0  # Réinitialiser le compteur de couronnes
+                    # Activer la couronne pendant 3 secondes
+                    state.crown_timer = 30  # 3 secondes (30 frames à 10 FPS)
+                    state.crown_count += 1  # Incrémenter le compteur de couronnes
+                    # Gagner une grande couronne si on mange deux fantômes avec moins de 10 secondes d'écart
+                    if state.last_ghost_time > 0:  # Si on a mangé un fantôme récemment
+                        state.grande_couronne_count += 1  # Gagner une grande couronne
+                    state.last_ghost_time = 100  # Réinitialiser le timer à 10 secondes (100 frames à 10 FPS)
+                    ghost.eyes = True
+                    ghost.vulnerable = False
+                    ghost.returning = False
+                # Sinon, Pacman est touché par un fantôme normal
+                else:
+                    # Si le fantôme est inoffensif (fantôme d'indigestion), ne pas tuer Pacman
+                    if ghost.harmless:
+                        continue  # Passer au fantôme suivant sans perdre de vie
+                    # Vérifier si "skin bleu" est équipé et si le fantôme est bleu
+                    if has_skin_bleu and ghost.color == BLUE:
+                        # Avec "skin bleu" équipé, Pacman traverse les fantômes bleus sans mourir
+                        continue  # Passer au fantôme suivant sans perdre de vie
+                    # Vérifier si "skin orange" est équipé et si le fantôme est orange
+                    if has_skin_orange and ghost.color == (255, 165, 0):  # ORANGE
+                        # Avec "skin orange" équipé, Pacman a 85% de chance de ne pas mourir
+                        if loot_rng.random() < 0.85:
+                            # Pacman survit (85% de chance)
+                            continue  # Passer au fantôme suivant sans perdre de vie
+                        # Sinon, Pacman meurt (15% de chance)
+                    # Vérifier si "skin rose" est équipé et si le fantôme est rose
+                    if has_skin_rose and ghost.color == (255, 192, 203):  # ROSE
+                        # Avec "skin rose" équipé, Pacman a 75% de chance de ne pas mourir
+                        if loot_rng.random() < 0.75:
+                            # Pacman survit (75% de chance)
+                            continue  # Passer au fantôme suivant sans perdre de vie
+                        # Sinon, Pacman meurt (25% de chance)
+                    # Vérifier si "skin rouge" est équipé et si le fantôme est rouge
+                    if has_skin_rouge and ghost.color == RED:  # ROUGE
+                        # Avec "skin rouge" équipé, Pacman a 50% de chance de ne pas mourir
+                        if loot_rng.random() < 0.50:
+                            # Pacman survit (50% de chance)
+                            continue  # Passer au fantôme suivant sans perdre de vie
+                        # Sinon, Pacman meurt (50% de chance)
+                    # Pacman est touché par un fantôme normal
+                    state.lives -= 1
+                    state.last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
+                    if state.lives <= 0:
+                        state.game_over = True
+                    else:
+                        # Perdre une vie et réapparaître
+                        state.respawn_timer = 60  # 2 secondes de pause
+                        # Réinitialiser les positions temporairement
+                        state.pacman.x, state.pacman.y = state.maze.pacman_start
+                        state.pacman.direction = (0, 0)
+                        state.pacman.next_direction = (0, 0)
+                    # Sortir de la boucle pour éviter plusieurs collisions dans la même frame
+                    break
+
+        # Supprimer les fantômes marqués pour suppression en mode aventure
+        for ghost_to_remove in ghosts_to_remove:
+            if ghost_to_remove in state.ghosts:
+                state.ghosts.remove(ghost_to_remove)
+                ghost_to_remove.release()
+
+        # En mode aventure, vérifier si tous les fantômes vrais (non-harmless) ont été éliminés
+        if state.is_adventure_mode and not state.game_over and not state.won and not state.level_transition:
+            # Compter uniquement les fantômes vrais (non-harmless, pas en mode yeux)
+            real_ghosts_count = sum(1 for ghost in state.ghosts if not ghost.harmless and not ghost.eyes)
+            # Si plus de fantômes vrais, passer au niveau suivant immédiatement
+            if real_ghosts_count == 0:
+                state.level += 1
+                state.maze, state.pacman, state.ghosts = start_next_level(state.level, is_adventure_mode=True, rng=ghost_rng, mazes=state.mazes, world=state.world)
+                state.ghost_timers = {}  # Réinitialiser les timers de réapparition
+                state.level_transition = True
+                state.level_transition_timer = 60  # 2 secondes de transition
+
+    # Monde infini : préparer le labyrinthe suivant, recentrer quand Pacman change de morceau
+    if state.world is not None:
+        state.world.update(state)
+        state.map_x, state.map_y = state.world.center_chunk()
+    # Carte du monde 4x4 où se trouve Pacman (affichée par l'interface)
+    elif state.maze.map_size is not None:
+        state.map_x, state.map_y = state.maze.map_of(state.pacman.x, state.pacman.y)
+
+    return state
+
+
+SIMULATION_DIFFICULTIES = ("facile", "moyen", "difficile", "hardcore")
+SIMULATION_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+def choose_simulated_direction(state, policy, rng):
+    """Direction choisie par un joueur scripté ("gourmand" ou "aleatoire"), ou None"""
+    pacman = state.pacman
+    open_dirs = state.maze.legal_moves(pacman.x, pacman.y)
+    if not open_dirs:
+        return None
+    if policy == "gourmand":
+        # Aller vers une case voisine qui contient un point ou une pacgomme
+        food_dirs = []
+        for dx, dy in open_dirs:
+            x = (pacman.x + dx) % state.maze.width
+            y = pacman.y + dy
+            if 0 <= y < state.maze.height and state.maze[y][x] in (2, 3):
+                food_dirs.append((dx, dy))
+        if food_dirs:
+            return rng.choice(food_dirs)
+        if not pacman.can_move(pacman.direction, state.maze) or rng.random() < 0.1:
+            return rng.choice(open_dirs)
+        return None
+    # Politique aléatoire : changer de direction de temps en temps
+    if rng.random() < 0.1:
+        return rng.choice(SIMULATION_DIRECTIONS)
+    return None
+
+def simulate_games(task):
+    """Joue des parties sans affichage avec step() et retourne leurs résultats (exécuté dans un processus du pool)"""
+    difficulty, first_seed, game_count, policy, max_ticks, maze_size = task
+    # Labyrinthes générés (tests de charge) ou les 4 labyrinthes de base
+    mazes = get_generated_mazes(maze_size, maze_size) if maze_size else None
+    results = []
+    for seed in range(first_seed, first_seed + game_count):
+        rng = random.Random(seed)  # Choix du joueur simulé
+        state = GameState(mazes=mazes)
+        # Même graine = même partie, sans toucher au module random global
+        state.start_with_difficulty(difficulty, seed=seed)
+        lives_lost = 0
+        jetons = 0
+        crowns = 0
+        for _ in range(max_ticks):
+            if state.game_over or state.won:
+                break
+            direction = choose_simulated_direction(state, policy, rng)
+            lives_before = state.lives
+            step(state, GameInputs(directions=[direction] if direction else []))
+            if state.lives < lives_before:
+                lives_lost += lives_before - state.lives
+            jetons += state.jeton_poche_gain
+            crowns += state.crown_poche_gain
+            state.jeton_poche_gain = 0
+            state.crown_poche_gain = 0
+        results.append({
+            "difficulty": difficulty,
+            "level": state.level,
+            "lives_lost": lives_lost,
+            "jeton_count": jetons + state.jeton_count,
+            "crown_count": crowns + state.crown_count,
+            "won": state.won,
+        })
+        state.release_ghosts()
+    return results
+
+def run_simulation(games, workers=None, difficulties=SIMULATION_DIFFICULTIES, policy="gourmand", max_ticks=6000, seed=0,
+                   maze_size=None):
+    """Répartit les parties sur un pool de processus et agrège les résultats par difficulté (maze_size : labyrinthes générés N x N)"""
+    workers = workers or os.cpu_count() or 1
+    # Découper en petits paquets pour bien répartir la charge entre les processus
+    chunk = max(1, min(50, games // (workers * 4)))
+    tasks = []
+    for difficulty in difficulties:
+        for start in range(0, games, chunk):
+            tasks.append((difficulty, seed + start, min(chunk, games - start), policy, max_ticks, maze_size))
+    totals = {difficulty: {"games": 0, "level": 0, "max_level": 0, "lives_lost": 0,
+                           "jeton_count": 0, "crown_count": 0, "won": 0} for difficulty in difficulties}
+    with multiprocessing.Pool(workers) as pool:
+        for results in pool.imap_unordered(simulate_games, tasks):
+            for result in results:
+                total = totals[result["difficulty"]]
+                total["games"] += 1
+                total["level"] += result["level"]
+                total["max_level"] = max(total["max_level"], result["level"])
+                total["lives_lost"] += result["lives_lost"]
+                total["jeton_count"] += result["jeton_count"]
+                total["crown_count"] += result["crown_count"]
+                total["won"] += 1 if result["won"] else 0
+    return totals
+
+def simulate_main(argv):
+    """Point d'entrée de `python pacman.py simulate`"""
+    parser = argparse.ArgumentParser(prog="pacman.py simulate", description="Simule des parties sans affichage pour équilibrer les difficultés")
+    parser.add_argument("--games", type=int, default=1000, help="nombre de parties par difficulté")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (par défaut : tous les cœurs)")
+    parser.add_argument("--difficulty", action="append", choices=SIMULATION_DIFFICULTIES, help="difficulté à simuler (répétable, par défaut : toutes)")
+    parser.add_argument("--policy", choices=("gourmand", "aleatoire"), default="gourmand", help="joueur scripté")
+    parser.add_argument("--max-ticks", type=int, default=6000, help="durée maximale d'une partie en ticks")
+    parser.add_argument("--seed", type=int, default=0, help="graine de la première partie")
+    parser.add_argument("--maze-size", type=int, default=None, help="jouer sur des labyrinthes générés N x N (tests de charge)")
+    args = parser.parse_args(argv)
+    totals = run_simulation(args.games, args.workers, args.difficulty or SIMULATION_DIFFICULTIES,
+                            args.policy, args.max_ticks, args.seed, args.maze_size)
+    print(f"{'difficulté':<10} {'parties':>8} {'niveau moy':>10} {'niveau max':>10} {'vies perdues':>12} {'jetons':>8} {'couronnes':>9} {'victoires':>9}")
+    for difficulty, total in totals.items():
+        count = max(1, total["games"])
+        print(f"{difficulty:<10} {total['games']:>8} {total['level'] / count:>10.2f} {total['max_level']:>10} "
+              f"{total['lives_lost'] / count:>12.2f} {total['jeton_count'] / count:>8.1f} "
+              f"{total['crown_count'] / count:>9.2f} {total['won'] / count:>9.1%}")
+
+REPLAY_DIR = 'pacman_replays'  # Un sous-dossier par compte
+REPLAY_SEEK_TICKS = 100  # Saut avant/arrière du lecteur de replay (10 secondes)
+REPLAY_KEYFRAME_TICKS = 100  # Une sauvegarde (GameState.snapshot) toutes les 10 secondes de replay
+
+class ReplayPlayer:
+    """Rejoue une partie enregistrée (replay.Replay) avec step(), sans affichage.
+
+    Une sauvegarde est gardée toutes les REPLAY_KEYFRAME_TICKS ticks : seek() vers un
+    tick déjà passé repart de la sauvegarde la plus proche au lieu du début.
+    """
+    def __init__(self, replay):
+        self.replay = replay
+        setup = replay.setup
+        self.state = GameState(setup['inventaire_items'], setup['capacite_items'])
+        # Les anciens replays n'ont pas de bonus d'invincibilité : celui de l'équipement
+        self.state.start_with_difficulty(setup['difficulty'], setup.get('invincibilite_bonus'), seed=replay.seed)
+        self.tick = 0
+        self.next_event = 0  # Index du prochain événement à appliquer
+        self.keyframes = {0: (0, self.state.snapshot())}  # tick -> (next_event, sauvegarde)
+
+    def restart(self):
+        self.seek(0)
+
+    @property
+    def finished(self):
+        return self.tick >= self.replay.ticks
+
+    def advance(self, ticks=1):
+        """Joue jusqu'à ticks ticks (moins si le replay se termine avant)"""
+        events = self.replay.events
+        state = self.state
+        for _ in range(min(ticks, self.replay.ticks - self.tick)):
+            inputs = None
+            if self.next_event < len(events) and events[self.next_event].tick == self.tick:
+                event = events[self.next_event]
+                self.next_event += 1
+                inputs = GameInputs(list(event.directions), event.use_gadget, event.target_cell, event.skip_respawn)
+            step(state, inputs)
+            self.tick += 1
+            if self.tick % REPLAY_KEYFRAME_TICKS == 0 and self.tick not in self.keyframes:
+                self.keyframes[self.tick] = (self.next_event, state.snapshot())
+
+    def seek(self, tick):
+        tick = max(0, min(tick, self.replay.ticks))
+        if tick < self.tick:
+            keyframe = tick - tick % REPLAY_KEYFRAME_TICKS
+            self.next_event, snapshot = self.keyframes[keyframe]
+            self.state.restore(snapshot)
+            self.tick = keyframe
+        self.advance(tick - self.tick)
+
+def save_account_replay(account_index, recorder):
+    """Écrit le replay d'une partie dans le dossier du compte et retourne son chemin"""
+    folder = os.path.join(REPLAY_DIR, f"compte_{account_index}" if account_index is not None else "invite")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{int(time.time() * 1000)}.pmr")
+        save_replay(path, recorder.replay)
+        return path
+    except OSError as e:
+        print(f"Erreur lors de la sauvegarde du replay: {e}")
+        return None
+
+def draw_replay_frame(screen, player, speed, paused, alpha):
+    """Dessine la partie rejouée et la barre d'état du lecteur"""
+    state = player.state
+    profile = state.equipment
+    pacman = state.pacman
+    camera = Camera()
+    if state.maze.map_size is not None:
+        camera.show_map(state.maze, state.map_x, state.map_y)
+    else:
+        camera.follow(state.maze, *interpolate_cell_center(pacman.prev_x, pacman.prev_y, pacman.x, pacman.y, alpha))
+    screen.fill(BLACK)
+    draw_maze(screen, state.maze, state.ice_tiles, state.fire_tiles, state.is_adventure_mode, camera)
+    state.pacman.draw(screen, invincible=(state.invincibility_timer > 0 or state.super_vie_active), has_crown=(state.crown_timer > 0),
+                      has_longue_vue=profile.has_longue_vue, has_indigestion=state.has_indigestion,
+                      is_double_longue_vue=profile.is_double_longue_vue, is_rainbow_critique=state.is_rainbow_critique,
+                      has_skin_bleu=profile.has_skin_bleu, has_skin_orange=profile.has_skin_orange,
+                      has_skin_rose=profile.has_skin_rose, has_skin_rouge=profile.has_skin_rouge,
+                      super_vie_active=state.super_vie_active, alpha=alpha, camera=camera)
+    for ghost in state.ghosts:
+        ghost.draw(screen, alpha=alpha, camera=camera)
+    font = pygame.font.Font(None, 24)
+    status = "pause" if paused else f"x{speed:g}"
+    text = f"{player.tick / 10:.0f}s / {player.replay.ticks / 10:.0f}s  {status}  niveau {state.level}  score {state.score}"
+    screen.blit(font.render(text, True, WHITE), (10, 10))
+    pygame.display.flip()
 
-def auto_save_account_data(account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards=None, gemme_poche=0, used_stars=None, accounts_list=None, battle_pass_plus_claimed_rewards=None, used_stars_plus=None, pass_plus_purchased=False):
-    """Sauvegarde automatiquement les données du compte actuel"""
-    if account_index is not None:
-        if battle_pass_claimed_rewards is None:
-            battle_pass_claimed_rewards = []
-        if used_stars is None:
-            used_stars = []
-        if battle_pass_plus_claimed_rewards is None:
-            battle_pass_plus_claimed_rewards = []
-        if used_stars_plus is None:
-            used_stars_plus = []
-        save_game_data_for_account(account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, accounts_list, battle_pass_plus_claimed_rewards, used_stars_plus, pass_plus_purchased)
+def replay_main(argv):
+    """Point d'entrée de `python pacman.py replay`"""
+    parser = argparse.ArgumentParser(prog="pacman.py replay", description="Rejoue une partie enregistrée")
+    parser.add_argument("file", help="fichier .pmr")
+    parser.add_argument("--headless", action="store_true", help="rejouer sans affichage, à pleine vitesse")
+    parser.add_argument("--speed", type=float, default=1.0, help="vitesse de lecture (1 = temps réel)")
+    args = parser.parse_args(argv)
+    player = ReplayPlayer(load_replay(args.file))
+    if args.headless:
+        started = time.perf_counter()
+        player.advance(player.replay.ticks)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        state = player.state
+        print(f"{player.tick} ticks en {elapsed:.2f} s ({player.tick / elapsed:.0f} ticks/s) : "
+              f"niveau {state.level}, score {state.score}, vies {state.lives}, "
+              f"{'victoire' if state.won else 'perdu' if state.game_over else 'en cours'}")
+        return
+    # Lecteur : Espace = pause, flèches gauche/droite = reculer/avancer, haut/bas = vitesse
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Pacman - replay")
+    clock = pygame.time.Clock()
+    speed = args.speed
+    paused = False
+    tick_accumulator = 0.0
+    running = True
+    while running:
+        frame_time = clock.tick(RENDER_FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.tick - REPLAY_SEEK_TICKS)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.tick + REPLAY_SEEK_TICKS)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64.0)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 0.125)
+        tick_duration = 1000 / (get_tick_rate(player.state.level) * speed)
+        if paused or player.finished:
+            tick_accumulator = 0.0
+        else:
+            tick_accumulator = min(tick_accumulator + frame_time, tick_duration * MAX_TICKS_PER_FRAME * max(1, int(speed)))
+            while tick_accumulator >= tick_duration and not player.finished:
+                tick_accumulator -= tick_duration
+                player.advance()
+        draw_replay_frame(screen, player, speed, paused, min(1.0, tick_accumulator / tick_duration))
+    pygame.quit()
 
 def main():
+    # Initialisation de Pygame (uniquement pour l'interface, step() n'en a pas besoin)
+    pygame.init()
+    pygame.mixer.init()
+
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Pacman")
     clock = pygame.time.Clock()
@@ -6980,45 +10863,9 @@ def main():
     
     current_state = START_MENU  # Commencer par le menu de démarrage
     
-    # Créer une copie du labyrinthe pour pouvoir modifier les points (niveau 1 = MAZE_1)
-    maze = [row[:] for row in MAZES[0]]
-    
-    # Position initiale de Pacman
-    pacman = Pacman(10, 15)
-    
-    # Créer des fantômes (niveau 1 : 1 fantôme bleu)
-    ghosts = [
-        Ghost(10, 9, BLUE),
-    ]
-    # Définir le chemin pour tous les fantômes bleus
-    for ghost in ghosts:
-        if ghost.color == BLUE:
-            ghost.set_path(maze)
-    
-    score = 0
-    level = 1
-    MAX_LIVES = 5  # Nombre maximum de vies
-    last_bonus_score = 0  # Dernier multiple de 2000 atteint
-    game_over = False
-    won = False
-    vulnerable_timer = 0
-    VULNERABLE_DURATION = 50  # Durée de vulnérabilité en frames (5 secondes à 10 FPS)
-    level_transition = False
-    level_transition_timer = 0
-    respawn_timer = 0  # Timer pour la réapparition après perte de vie
-    crown_timer = 0  # Timer pour la couronne après avoir mangé un fantôme (3 secondes)
-    crown_count = 0  # Compteur de couronnes gagnées pendant le jeu (temporaires)
-    grande_couronne_count = 0  # Compteur de grandes couronnes
-    last_ghost_time = 0  # Timer depuis le dernier fantôme mangé (en frames)
-    difficulty = None  # Difficulté choisie ("facile", "moyen", "difficile")
     first_level_success_unlocked = False  # Succès "Premier niveau" déjà débloqué
     success_notification_text = ""  # Texte du dernier succès débloqué
     success_notification_timer = 0  # Timer d'affichage du succès (1 s = 60 frames)
-    is_adventure_mode = False  # Mode aventure activé ou non
-    # Variables pour le système de maps 4x4 aux niveaux multiples de 10 en mode aventure
-    map_x = 0  # Coordonnée X dans la grille 4x4 (0-3)
-    map_y = 0  # Coordonnée Y dans la grille 4x4 (0-3)
-    is_multi_map_mode = False  # Si on est en mode multi-map (niveau multiple de 10 en aventure)
     
     # Initialiser les données de jeu (seront chargées quand un compte est sélectionné)
     pouvoir_items = []  # Liste des items de pouvoir achetés
@@ -7046,53 +10893,15 @@ def main():
     passe_scroll_offset = 0  # Décalage de défilement pour le menu du battle pass
     
     inventaire_items = inventaire_items_loaded.copy() if inventaire_items_loaded else {}  # Dictionnaire des items dans l'inventaire {slot_name: item_data}
-    jeton_count = 0  # Compteur de jetons gagnés pendant le jeu (temporaires)
     # Calculer le bonus d'invincibilité selon le niveau de la capacité équipée
     invincibilite_bonus = calculate_invincibilite_bonus(capacite_items, inventaire_items)
-    invincibility_timer = 30 + invincibilite_bonus  # 3 secondes d'invincibilité au spawn (30 frames à 10 FPS) + bonus
     game_initialized = False  # Variable pour suivre si le jeu a été initialisé (pour éviter de réinitialiser les vies à chaque retour)
     game_needs_reset = False  # Variable pour suivre si la partie doit être réinitialisée au retour
-    # Initialiser les vies : base 2 + bonus d'armures (grosse armure et armure de fer)
-    armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
-    lives = 2 + armor_lives_bonus_init  # Chaque armure équipée donne +1 coeur (jusqu'à +2 si les deux sont équipées)
     selected_item = None  # Item sélectionné pour le drag and drop (slot_name, item_data)
-    indigestion_timer = 0  # Timer pour l'indigestion (1 minute = 600 frames à 10 FPS)
-    super_vie_active = False  # État de la super vie (invincibilité permanente sans clignotement)
-    has_indigestion = False  # État d'indigestion
     item_description = None  # Description de l'item à afficher (None ou texte)
-    rainbow_timer = 0  # Timer pour l'effet arc-en-ciel du coup critique (2 secondes = 20 frames à 10 FPS)
-    is_rainbow_critique = False  # État d'arc-en-ciel (coup critique)
-    ice_tiles = {}  # Dictionnaire pour stocker les cases de glace: {(x, y): timestamp}
-    ICE_DURATION = 30  # Durée de la glace en frames (3 secondes à 10 FPS)
-    pacman_last_pos = (pacman.x, pacman.y)  # Position précédente de Pacman pour créer la glace
-    fire_tiles = {}  # Dictionnaire pour stocker les cases de feu: {(x, y): timestamp}
-    FIRE_DURATION = 100  # Durée du feu en frames (10 secondes à 10 FPS)
-    fire_active = False  # État d'activation du feu (si True, créer du feu sur le chemin)
-    fire_timer = 0  # Timer pour la durée d'activation du feu (10 secondes)
-    pacgomme_timers = {}  # Dictionnaire pour stocker les timers de réapparition des pacgommes: {(x, y): timer}
-    PACGOMME_RESPAWN_TIME = 20  # Temps de réapparition des pacgommes en frames (2 secondes à 10 FPS)
-    ghost_timers = {}  # Dictionnaire pour stocker les timers de réapparition des fantômes en mode aventure: {(start_x, start_y, color): timer}
-    GHOST_RESPAWN_TIME = 50  # Temps de réapparition des fantômes en frames (5 secondes à 10 FPS)
-    gadget_cooldown = 0  # Cooldown entre les utilisations de gadget (25 secondes = 250 frames à 10 FPS)
-    GADGET_COOLDOWN_DURATION = 250  # Durée du cooldown en frames (25 secondes à 10 FPS)
-    MORT_COOLDOWN_DURATION = 600  # Durée du cooldown pour "mort" en frames (1 minute = 60 secondes = 600 frames à 10 FPS)
-    mort_cooldown = 0  # Cooldown spécifique pour le gadget "mort"
-    gadget_use_count = 0  # Compteur d'utilisations pour "double gadget" (alternance recharge instantanée/normale)
-    BOMBE_COOLDOWN_DURATION = 600  # Durée du cooldown pour "bombe téléguidée" en frames (1 minute = 60 secondes = 600 frames à 10 FPS)
-    bombe_cooldown = 0  # Cooldown spécifique pour le gadget "bombe téléguidée"
-    bombe_active = False  # État d'activation de la bombe téléguidée
-    bombe_x = 0  # Position X de la bombe
-    bombe_y = 0  # Position Y de la bombe
-    bombe_timer = 0  # Timer avant l'explosion (10 secondes = 100 frames à 10 FPS)
-    BOMBE_EXPLOSION_DELAY = 100  # Délai avant explosion en frames (10 secondes à 10 FPS)
-    pacman_frozen = False  # Indique si Pacman est gelé (pendant le contrôle de la bombe)
-    pieges = {}  # Dictionnaire pour stocker les pièges posés: {(x, y): True} (True = piège actif)
-    PIEGE_IMMOBILISATION_DURATION = 100  # Durée d'immobilisation en frames (10 secondes à 10 FPS)
-    portal1_pos = None  # Position du premier portail (x, y) ou None
-    portal2_pos = None  # Position du deuxième portail (x, y) ou None
-    portal_use_count = 0  # Compteur d'utilisation du portail (0, 1, ou 2)
-    mur_pos = None  # Position du mur créé (x, y) ou None
-    mur_use_count = 0  # Compteur d'utilisation du mur (0 ou 1)
+    
+    # État de la partie (labyrinthe, Pacman, fantômes, timers, gadgets), avancé d'un tick par step()
+    state = GameState(inventaire_items, capacite_items)
     
     # Variables pour les boutons de difficulté
     retour_button = None
@@ -7160,6 +10969,14 @@ def main():
     tutorial_page = 0  # Page actuelle du tutoriel
     
     running = True
+    # Entrées du joueur en attente, consommées par le prochain step()
+    game_inputs = GameInputs()
+    # Temps (ms) écoulé depuis la frame précédente et temps de jeu pas encore simulé
+    frame_time = 0
+    tick_accumulator = 0.0
+    equipment_stale = False  # Inventaire ou capacités peut-être modifiés hors du jeu (menus, boutique)
+    replay_recorder = None  # Enregistrement de la partie en cours (de son début à la fin ou à la sortie du jeu)
+    camera = Camera()  # Partie du labyrinthe affichée (défile sur les labyrinthes plus grands que la fenêtre)
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -7342,6 +11159,7 @@ def main():
                             selected_font = account.get('selected_font')
                             # Charger les données de jeu de ce compte
                             pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items_loaded, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, battle_pass_plus_claimed_rewards, used_stars_plus, pass_plus_purchased = load_game_data_for_account(current_account_index)
+                            state.capacite_items = capacite_items  # La partie utilise les capacités du compte chargé
                             # Lancer le jeu
                             current_state = MENU
                         # Réinitialiser le timer
@@ -7350,87 +11168,95 @@ def main():
                     elif current_state == AVENTURE_MENU:
                         aventure_retour_button = pygame.Rect(10, 10, 100, 40)
                         aventure_carte1_button = pygame.Rect(WINDOW_WIDTH//2 - 125, WINDOW_HEIGHT//2 - 30, 250, 60)
+                        aventure_monde_button = pygame.Rect(WINDOW_WIDTH//2 - 125, WINDOW_HEIGHT//2 + 120, 250, 60)
                         if aventure_retour_button.collidepoint(mouse_pos):
                             current_state = MENU
-                        elif aventure_carte1_button.collidepoint(mouse_pos):
+                        elif aventure_carte1_button.collidepoint(mouse_pos) or aventure_monde_button.collidepoint(mouse_pos):
                             # Démarrer l'aventure : carte 1 avec 3 vies, 0 couronnes, 0 pacoins
                             # Réinitialiser les valeurs pour l'aventure
                             jeton_poche = 0
                             crown_poche = 0
+                            # Monde infini : un monde par graine de session, repris là où on l'a laissé
+                            if state.world is not None:
+                                state.world.close()
+                            state.world = ChunkWorld(state.rng.seed) if aventure_monde_button.collidepoint(mouse_pos) else None
                             # Démarrer le jeu avec la carte 1 (niveau 1)
-                            maze, pacman, ghosts = start_next_level(1, is_adventure_mode=True)
+                            state.maze, state.pacman, state.ghosts = start_next_level(1, is_adventure_mode=True, rng=state.rng.ghosts, world=state.world)
                             # Ajouter 4 pacgommes aux mêmes positions que dans le jeu normal
                             # Les pacgommes sont généralement aux 4 coins du labyrinthe
                             # Positions standard : (1,1), (19,1), (1,19), (19,19)
                             # Mais on vérifie d'abord si ces positions sont valides (pas des murs)
-                            corner_positions = [
-                                (1, 1),   # Coin haut-gauche
-                                (GRID_WIDTH - 2, 1),  # Coin haut-droite (19, 1)
-                                (1, GRID_HEIGHT - 2),  # Coin bas-gauche (1, 19)
-                                (GRID_WIDTH - 2, GRID_HEIGHT - 2)  # Coin bas-droite (19, 19)
-                            ]
+                            # Les morceaux du monde infini ont déjà leurs pacgommes
+                            if state.world is None:
+                                corner_positions = [
+                                    (1, 1),   # Coin haut-gauche
+                                    (state.maze.width - 2, 1),  # Coin haut-droite (19, 1)
+                                    (1, state.maze.height - 2),  # Coin bas-gauche (1, 19)
+                                    (state.maze.width - 2, state.maze.height - 2)  # Coin bas-droite (19, 19)
+                                ]
                             
-                            # Placer les pacgommes aux positions des coins si elles sont valides
-                            for x, y in corner_positions:
-                                if 0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT:
-                                    if maze[y][x] != 1:  # Si ce n'est pas un mur
-                                        maze[y][x] = 3  # Placer une pacgomme
-                                    else:
-                                        # Si c'est un mur, chercher la case valide la plus proche
-                                        found = False
-                                        for dy in range(-2, 3):
-                                            for dx in range(-2, 3):
-                                                new_x = x + dx
-                                                new_y = y + dy
-                                                if 0 <= new_x < GRID_WIDTH and 0 <= y < GRID_HEIGHT:
-                                                    if maze[new_y][new_x] != 1 and maze[new_y][new_x] != 3:
-                                                        maze[new_y][new_x] = 3
-                                                        found = True
-                                                        break
-                                            if found:
-                                                break
+                                # Placer les pacgommes aux positions des coins si elles sont valides
+                                for x, y in corner_positions:
+                                    if 0 <= x < state.maze.width and 0 <= y < state.maze.height:
+                                        if state.maze[y][x] != 1:  # Si ce n'est pas un mur
+                                            state.maze.set_cell(x, y, 3)  # Placer une pacgomme
+                                        else:
+                                            # Si c'est un mur, chercher la case valide la plus proche
+                                            found = False
+                                            for dy in range(-2, 3):
+                                                for dx in range(-2, 3):
+                                                    new_x = x + dx
+                                                    new_y = y + dy
+                                                    if 0 <= new_x < state.maze.width and 0 <= y < state.maze.height:
+                                                        if state.maze[new_y][new_x] != 1 and state.maze[new_y][new_x] != 3:
+                                                            state.maze.set_cell(new_x, new_y, 3)
+                                                            found = True
+                                                            break
+                                                if found:
+                                                    break
                             # Initialiser les variables du jeu
-                            score = 0
-                            last_bonus_score = 0
-                            game_over = False
-                            won = False
-                            ice_tiles = {}
-                            pacgomme_timers = {}  # Réinitialiser les timers de pacgommes pour l'aventure
-                            ghost_timers = {}  # Réinitialiser les timers de fantômes pour l'aventure
-                            pacman_last_pos = (pacman.x, pacman.y)
-                            vulnerable_timer = 0
-                            level_transition = False
-                            level_transition_timer = 0
-                            respawn_timer = 0
-                            lives = 3  # 3 vies pour l'aventure
-                            invincibility_timer = 30
-                            crown_timer = 0
-                            level = 1
+                            state.score = 0
+                            state.last_bonus_score = 0
+                            state.game_over = False
+                            state.won = False
+                            state.ice_tiles = {}
+                            state.timers = TimerService()  # Oublier les échéances de la partie précédente
+                            state.pacgomme_timers = {}  # Réinitialiser les timers de pacgommes pour l'aventure
+                            state.ghost_timers = {}  # Réinitialiser les timers de fantômes pour l'aventure
+                            state.pacman_last_pos = (state.pacman.x, state.pacman.y)
+                            state.vulnerable_timer = 0
+                            state.level_transition = False
+                            state.level_transition_timer = 0
+                            state.respawn_timer = 0
+                            state.lives = 3  # 3 vies pour l'aventure
+                            state.invincibility_timer = 30
+                            state.crown_timer = 0
+                            state.level = 1
                             invincibilite_bonus = 0
-                            has_indigestion = False
-                            indigestion_timer = 0
-                            gadget_cooldown = 0
-                            gadget_use_count = 0
-                            portal_use_count = 0
-                            portal1_pos = None
-                            portal2_pos = None
+                            state.has_indigestion = False
+                            state.indigestion_timer = 0
+                            state.gadget_cooldown = 0
+                            state.gadget_use_count = 0
+                            state.portal_use_count = 0
+                            state.portal1_pos = None
+                            state.portal2_pos = None
                             vulnerable_ghosts_eaten_this_game = 0
-                            crown_count = 0
-                            jeton_count = 0
-                            last_ghost_time = 0
-                            fire_tiles = {}
-                            fire_active = False
-                            fire_timer = 0
-                            mort_cooldown = 0
-                            bombe_cooldown = 0
-                            bombe_active = False
-                            pieges = {}
-                            mur_pos = None
-                            mur_use_count = 0
-                            rainbow_timer = 0
-                            is_rainbow_critique = False
+                            state.crown_count = 0
+                            state.jeton_count = 0
+                            state.last_ghost_time = 0
+                            state.fire_tiles = {}
+                            state.fire_active = False
+                            state.fire_timer = 0
+                            state.mort_cooldown = 0
+                            state.bombe_cooldown = 0
+                            state.bombe_active = False
+                            state.pieges = {}
+                            state.mur_pos = None
+                            state.mur_use_count = 0
+                            state.rainbow_timer = 0
+                            state.is_rainbow_critique = False
                             game_initialized = True
-                            is_adventure_mode = True  # Activer le mode aventure
+                            state.is_adventure_mode = True  # Activer le mode aventure
                             # Passer à l'état GAME
                             current_state = GAME
                     elif current_state == SKILL_TREE_MENU:
@@ -7500,6 +11326,7 @@ def main():
                             current_account_index = len(accounts) - 1
                             # Charger les données de jeu du nouveau compte
                             pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items_loaded, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, battle_pass_plus_claimed_rewards, used_stars_plus, pass_plus_purchased = load_game_data_for_account(current_account_index)
+                            state.capacite_items = capacite_items  # La partie utilise les capacités du compte chargé
                             # Sauvegarder les comptes
                             save_accounts_data(accounts)
                             # Réinitialiser pour un nouveau compte si nécessaire
@@ -7678,45 +11505,45 @@ def main():
                                 # Si on revient du menu après avoir cliqué sur retour, réinitialiser la partie
                                 if game_needs_reset:
                                     # Réinitialiser la partie complètement
-                                    maze = [row[:] for row in MAZES[0]]
-                                    pacman = Pacman(10, 15)
-                                    ghosts = [
-                                        Ghost(10, 9, BLUE),
+                                    state.maze = state.mazes[0].copy()
+                                    state.pacman = Pacman(*state.maze.pacman_start)
+                                    state.ghosts = [
+                                        Ghost(*state.maze.ghost_start, BLUE, rng=state.rng.ghosts),
                                     ]
                                     # Définir le chemin pour tous les fantômes bleus
-                                    for ghost in ghosts:
+                                    for ghost in state.ghosts:
                                         if ghost.color == BLUE:
-                                            ghost.set_path(maze)
-                                    score = 0
-                                    level = 1
-                                    last_bonus_score = 0
-                                    game_over = False
-                                    won = False
-                                    vulnerable_timer = 0
-                                    ice_tiles = {}  # Réinitialiser les cases de glace
-                                    fire_tiles = {}  # Réinitialiser les cases de feu
-                                    fire_active = False
-                                    fire_timer = 0
-                                    gadget_cooldown = 0
-                                    mort_cooldown = 0
-                                    bombe_cooldown = 0
-                                    bombe_active = False
-                                    pieges = {}
-                                    portal1_pos = None
-                                    portal2_pos = None
-                                    portal_use_count = 0
-                                    mur_pos = None
-                                    mur_use_count = 0
-                                    gadget_use_count = 0
-                                    invincibility_timer = 30 + invincibilite_bonus  # Réinitialiser le timer d'invincibilité
-                                    level_transition = False
-                                    level_transition_timer = 0
-                                    respawn_timer = 0
-                                    crown_count = 0  # Réinitialiser le compteur de couronnes temporaires
-                                    jeton_count = 0  # Réinitialiser le compteur de jetons temporaires
-                                    last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
-                                    has_indigestion = False
-                                    indigestion_timer = 0
+                                            ghost.set_path(state.maze)
+                                    state.score = 0
+                                    state.level = 1
+                                    state.last_bonus_score = 0
+                                    state.game_over = False
+                                    state.won = False
+                                    state.vulnerable_timer = 0
+                                    state.ice_tiles = {}  # Réinitialiser les cases de glace
+                                    state.fire_tiles = {}  # Réinitialiser les cases de feu
+                                    state.fire_active = False
+                                    state.fire_timer = 0
+                                    state.gadget_cooldown = 0
+                                    state.mort_cooldown = 0
+                                    state.bombe_cooldown = 0
+                                    state.bombe_active = False
+                                    state.pieges = {}
+                                    state.portal1_pos = None
+                                    state.portal2_pos = None
+                                    state.portal_use_count = 0
+                                    state.mur_pos = None
+                                    state.mur_use_count = 0
+                                    state.gadget_use_count = 0
+                                    state.invincibility_timer = 30 + invincibilite_bonus  # Réinitialiser le timer d'invincibilité
+                                    state.level_transition = False
+                                    state.level_transition_timer = 0
+                                    state.respawn_timer = 0
+                                    state.crown_count = 0  # Réinitialiser le compteur de couronnes temporaires
+                                    state.jeton_count = 0  # Réinitialiser le compteur de jetons temporaires
+                                    state.last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
+                                    state.has_indigestion = False
+                                    state.indigestion_timer = 0
                                     game_needs_reset = False
                                     # Ouvrir l'inventaire pour permettre de changer l'équipement avant de commencer
                                     current_state = INVENTAIRE
@@ -7725,45 +11552,45 @@ def main():
                                     # Initialiser le jeu pour la première fois
                                     if not game_initialized:
                                         # Initialiser le labyrinthe et les entités
-                                        maze = [row[:] for row in MAZES[0]]
-                                        pacman = Pacman(10, 15)
-                                        ghosts = [
-                                            Ghost(10, 9, BLUE),
+                                        state.maze = state.mazes[0].copy()
+                                        state.pacman = Pacman(*state.maze.pacman_start)
+                                        state.ghosts = [
+                                            Ghost(*state.maze.ghost_start, BLUE, rng=state.rng.ghosts),
                                         ]
                                         # Définir le chemin pour tous les fantômes bleus
-                                        for ghost in ghosts:
+                                        for ghost in state.ghosts:
                                             if ghost.color == BLUE:
-                                                ghost.set_path(maze)
-                                        score = 0
-                                        level = 1
-                                        last_bonus_score = 0
-                                        game_over = False
-                                        won = False
-                                        vulnerable_timer = 0
-                                        ice_tiles = {}
-                                        fire_tiles = {}
-                                        fire_active = False
-                                        fire_timer = 0
-                                        gadget_cooldown = 0
-                                        mort_cooldown = 0
-                                        bombe_cooldown = 0
-                                        bombe_active = False
-                                        pieges = {}
-                                        portal1_pos = None
-                                        portal2_pos = None
-                                        portal_use_count = 0
-                                        mur_pos = None
-                                        mur_use_count = 0
-                                        gadget_use_count = 0
-                                        invincibility_timer = 30 + invincibilite_bonus
-                                        level_transition = False
-                                        level_transition_timer = 0
-                                        respawn_timer = 0
-                                        crown_count = 0
-                                        jeton_count = 0
-                                        last_ghost_time = 0
-                                        has_indigestion = False
-                                        indigestion_timer = 0
+                                                ghost.set_path(state.maze)
+                                        state.score = 0
+                                        state.level = 1
+                                        state.last_bonus_score = 0
+                                        state.game_over = False
+                                        state.won = False
+                                        state.vulnerable_timer = 0
+                                        state.ice_tiles = {}
+                                        state.fire_tiles = {}
+                                        state.fire_active = False
+                                        state.fire_timer = 0
+                                        state.gadget_cooldown = 0
+                                        state.mort_cooldown = 0
+                                        state.bombe_cooldown = 0
+                                        state.bombe_active = False
+                                        state.pieges = {}
+                                        state.portal1_pos = None
+                                        state.portal2_pos = None
+                                        state.portal_use_count = 0
+                                        state.mur_pos = None
+                                        state.mur_use_count = 0
+                                        state.gadget_use_count = 0
+                                        state.invincibility_timer = 30 + invincibilite_bonus
+                                        state.level_transition = False
+                                        state.level_transition_timer = 0
+                                        state.respawn_timer = 0
+                                        state.crown_count = 0
+                                        state.jeton_count = 0
+                                        state.last_ghost_time = 0
+                                        state.has_indigestion = False
+                                        state.indigestion_timer = 0
                                         game_initialized = True
                                     # Ouvrir l'inventaire pour permettre de changer l'équipement avant de commencer
                                     current_state = INVENTAIRE
@@ -9699,19 +13526,19 @@ def main():
                             current_state = MENU
                         elif button1.collidepoint(mouse_pos):
                             # Bouton FACILE - sauvegarder la difficulté et revenir au menu
-                            difficulty = "facile"
+                            state.difficulty = "facile"
                             current_state = MENU
                         elif button2.collidepoint(mouse_pos):
                             # Bouton MOYEN - sauvegarder la difficulté et revenir au menu
-                            difficulty = "moyen"
+                            state.difficulty = "moyen"
                             current_state = MENU
                         elif button3.collidepoint(mouse_pos):
                             # Bouton DIFFICILE - sauvegarder la difficulté et revenir au menu
-                            difficulty = "difficile"
+                            state.difficulty = "difficile"
                             current_state = MENU
                         elif button4.collidepoint(mouse_pos):
                             # Bouton HARDCORE - sauvegarder la difficulté et revenir au menu
-                            difficulty = "hardcore"
+                            state.difficulty = "hardcore"
                             current_state = MENU
                     elif current_state == POCHE:
                         retour_button = pygame.Rect(10, 10, 100, 40)
@@ -9869,29 +13696,11 @@ def main():
                         # Vérifier si on clique sur le bouton commencer
                         if inventaire_before_game and inventaire_start_button is not None and inventaire_start_button.collidepoint(mouse_pos):
                             # Démarrer la partie avec la difficulté choisie (ou facile par défaut)
-                            if difficulty is None:
-                                difficulty = "facile"  # Par défaut facile si aucune difficulté choisie
-                            
-                            (maze, pacman, ghosts, score, lives, last_bonus_score, game_over, won,
-                             ice_tiles, pacman_last_pos, vulnerable_timer, level_transition, level_transition_timer,
-                             respawn_timer, invincibility_timer, crown_timer, crown_count, jeton_count, last_ghost_time,
-                             fire_tiles, fire_active, fire_timer, gadget_cooldown, mort_cooldown, bombe_cooldown,
-                             bombe_active, pieges, portal1_pos, portal2_pos, portal_use_count, mur_pos, mur_use_count,
-                             gadget_use_count, has_indigestion, indigestion_timer) = start_game_with_difficulty(
-                                difficulty, inventaire_items, capacite_items, invincibilite_bonus, ghosts)
+                            if state.difficulty is None:
+                                state.difficulty = "facile"  # Par défaut facile si aucune difficulté choisie
                             
-                            is_adventure_mode = False  # Désactiver le mode aventure pour le jeu normal
-                            
-                            if difficulty == "facile":
-                                level = 1
-                            elif difficulty == "moyen":
-                                level = 3
-                            elif difficulty == "difficile":
-                                level = 1
-                            elif difficulty == "hardcore":
-                                level = 5
-                            else:
-                                level = 1
+                            state.start_with_difficulty(state.difficulty, invincibilite_bonus)
+                            replay_recorder = ReplayRecorder.from_state(state, invincibilite_bonus)
                             
                             game_needs_reset = False
                             if not game_initialized:
@@ -10092,348 +13901,13 @@ def main():
                                 pygame.mixer.music.stop()
                                 music_playing = False
                         else:
-                            # Activer le gadget équipé dans le slot "gadget" avec le clic gauche (seulement si le temps de recharge est terminé)
-                            equipped_gadget = get_equipped_gadget(inventaire_items)
-                            if equipped_gadget:
-                                gadget_type = equipped_gadget.get('type')
-                                # Vérifier si "double gadget" est équipé
-                                has_double_gadget = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'double gadget') or
-                                                    ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'double gadget') or
-                                                    ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'double gadget'))
-                                # Vérifier le temps de recharge approprié selon le gadget
-                                if gadget_type == 'mort':
-                                    can_activate = (mort_cooldown == 0)
-                                elif gadget_type == 'bombe téléguidée':
-                                    can_activate = (bombe_cooldown == 0)
-                                else:
-                                    can_activate = (gadget_cooldown == 0)
-                                
-                                if can_activate:
-                                    if gadget_type == 'lave' and not fire_active:
-                                        # Activer la lave (durée calculée selon si "flamme" est équipé)
-                                        fire_active = True
-                                        fire_timer = calculate_fire_duration(inventaire_items, FIRE_DURATION)
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                gadget_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                        else:
-                                            gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'feu' and not fire_active:
-                                        # Activer le feu (durée calculée selon si "flamme" est équipé)
-                                        fire_active = True
-                                        fire_timer = calculate_fire_duration(inventaire_items, FIRE_DURATION)
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                gadget_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                        else:
-                                            gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'explosion':
-                                        # Activer l'explosion : tuer tous les fantômes (sans donner de couronnes)
-                                        for ghost in ghosts:
-                                            # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux)
-                                            if not ghost.harmless and not ghost.eyes:
-                                                # Tuer le fantôme (le transformer en yeux)
-                                                ghost.eyes = True
-                                                ghost.vulnerable = False
-                                                ghost.returning = False
-                                                # Ajouter des points mais pas de couronnes
-                                                score += 300
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                gadget_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                        else:
-                                            gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'tir':
-                                        # Activer le tir : tuer un fantôme dans le champ de vision (direction de Pacman)
-                                        # Déterminer la direction de Pacman
-                                        if pacman.direction != (0, 0):
-                                            # Calculer les positions dans le champ de vision (ligne droite dans la direction de Pacman)
-                                            target_positions = []
-                                            dx, dy = pacman.direction
-                                            # Chercher jusqu'à 5 cases dans la direction
-                                            for i in range(1, 6):
-                                                check_x = pacman.x + i * dx
-                                                check_y = pacman.y + i * dy
-                                                # Gérer la téléportation aux bords
-                                                if check_x < 0:
-                                                    check_x = GRID_WIDTH - 1
-                                                elif check_x >= GRID_WIDTH:
-                                                    check_x = 0
-                                                if check_y < 0:
-                                                    check_y = GRID_HEIGHT - 1
-                                                elif check_y >= GRID_HEIGHT:
-                                                    check_y = 0
-                                                # Vérifier si c'est un mur, si oui arrêter
-                                                if 0 <= check_y < GRID_HEIGHT and 0 <= check_x < GRID_WIDTH:
-                                                    if maze[check_y][check_x] == 1:  # Mur
-                                                        break
-                                                    target_positions.append((check_x, check_y))
-                                            
-                                            # Trouver le fantôme le plus proche dans le champ de vision
-                                            target_ghost = None
-                                            min_distance = float('inf')
-                                            for ghost in ghosts:
-                                                # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux, pas orange, pas rose)
-                                                ORANGE = (255, 165, 0)
-                                                ROSE = (255, 192, 203)
-                                                if not ghost.harmless and not ghost.eyes and ghost.color != ORANGE and ghost.color != ROSE:
-                                                    if (ghost.x, ghost.y) in target_positions:
-                                                        # Calculer la distance de Manhattan
-                                                        distance = abs(ghost.x - pacman.x) + abs(ghost.y - pacman.y)
-                                                        if distance < min_distance:
-                                                            min_distance = distance
-                                                            target_ghost = ghost
-                                            
-                                            # Tuer le fantôme ciblé
-                                            if target_ghost is not None:
-                                                target_ghost.eyes = True
-                                                target_ghost.vulnerable = False
-                                                target_ghost.returning = False
-                                                # Ajouter des points mais pas de couronnes
-                                                score += 300
-                                        
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                gadget_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                        else:
-                                            gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'vision x':
-                                        # Vérifier si l'objet "Vision X" est équipé dans un slot objet
-                                        has_vision_x_objet = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'vision x') or
-                                                             ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'vision x') or
-                                                             ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'vision x'))
-                                        # Activer Vision X si l'objet Vision X est équipé (ou si c'est le gadget vision x directement)
-                                        if has_vision_x_objet or gadget_type == 'vision x':
-                                            # Activer Vision X : faire disparaître tous les fantômes d'indigestion
-                                            ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
-                                            # Calculer le bonus de "bonne vue" si équipé
-                                            has_bon_vue_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'bonne vue') or
-                                                                   ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'bonne vue'))
-                                            bon_vue_level = capacite_items.count("bonne vue") if capacite_items else 0
-                                            cooldown_reduction = bon_vue_level * 25 if has_bon_vue_capacity else 0  # Réduction de 2.5 secondes par niveau (25 frames à 10 FPS)
-                                            # Calculer le bonus de "infra rouge" si équipé
-                                            has_infra_rouge = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'infra rouge') or
-                                                               ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'infra rouge') or
-                                                               ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'infra rouge'))
-                                            if has_infra_rouge:
-                                                cooldown_reduction += 50  # Réduction supplémentaire de 5 secondes (50 frames à 10 FPS)
-                                            # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                            if has_double_gadget:
-                                                gadget_use_count += 1
-                                                if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                    gadget_cooldown = 0
-                                                else:  # Utilisation paire (2, 4, 6...) : recharge normale avec réductions
-                                                    gadget_cooldown = max(0, GADGET_COOLDOWN_DURATION - cooldown_reduction)
-                                            else:
-                                                gadget_cooldown = max(0, GADGET_COOLDOWN_DURATION - cooldown_reduction)  # Cooldown réduit
-                                    elif gadget_type == 'mort':
-                                        # Activer Mort : tuer définitivement le fantôme le plus proche de Pacman (peu importe la direction)
-                                        # Trouver le fantôme le plus proche de Pacman
-                                        target_ghost = None
-                                        min_distance = float('inf')
-                                        for ghost in ghosts:
-                                            # Ne tuer que les fantômes normaux (pas inoffensifs, pas déjà en mode yeux)
-                                            if not ghost.harmless and not ghost.eyes:
-                                                # Calculer la distance de Manhattan entre Pacman et le fantôme
-                                                distance = abs(ghost.x - pacman.x) + abs(ghost.y - pacman.y)
-                                                if distance < min_distance:
-                                                    min_distance = distance
-                                                    target_ghost = ghost
-                                        
-                                        # Tuer définitivement le fantôme ciblé (le retirer de la liste)
-                                        if target_ghost is not None:
-                                            # En mode aventure, supprimer le fantôme définitivement (pas de réapparition)
-                                            ghosts.remove(target_ghost)
-                                            # Ajouter des points mais pas de couronnes
-                                            score += 300
-                                        
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                mort_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                mort_cooldown = MORT_COOLDOWN_DURATION
-                                        else:
-                                            mort_cooldown = MORT_COOLDOWN_DURATION  # 1 minute de cooldown
-                                    elif gadget_type == 'bombe téléguidée' and not bombe_active:
-                                        # Activer la bombe téléguidée : arrêter Pacman et créer une bombe
-                                        bombe_active = True
-                                        bombe_x = pacman.x
-                                        bombe_y = pacman.y
-                                        bombe_timer = BOMBE_EXPLOSION_DELAY  # 10 secondes
-                                        pacman_frozen = True  # Geler Pacman
-                                        # Arrêter Pacman
-                                        pacman.direction = (0, 0)
-                                        pacman.next_direction = (0, 0)
-                                        # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                        if has_double_gadget:
-                                            gadget_use_count += 1
-                                            if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                bombe_cooldown = 0
-                                            else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                bombe_cooldown = BOMBE_COOLDOWN_DURATION
-                                        else:
-                                            bombe_cooldown = BOMBE_COOLDOWN_DURATION  # 1 minute de cooldown
-                                    elif gadget_type == 'piège':
-                                        # Activer le piège : poser un piège à la position de Pacman
-                                        # Vérifier que la position n'est pas un mur
-                                        if 0 <= pacman.y < GRID_HEIGHT and 0 <= pacman.x < GRID_WIDTH:
-                                            if maze[pacman.y][pacman.x] != 1:  # Pas un mur
-                                                # Poser le piège à la position de Pacman
-                                                pieges[(pacman.x, pacman.y)] = True
-                                                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                                if has_double_gadget:
-                                                    gadget_use_count += 1
-                                                    if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                        gadget_cooldown = 0
-                                                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                        gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                                else:
-                                                    gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'tp':
-                                        # Activer TP : téléporter Pacman à la position de la souris (sauf si c'est un mur)
-                                        # Convertir la position de la souris en coordonnées de grille
-                                        grid_x = mouse_pos[0] // CELL_SIZE
-                                        grid_y = mouse_pos[1] // CELL_SIZE
-                                        
-                                        # Vérifier que la position est valide et que ce n'est pas un mur
-                                        if 0 <= grid_y < GRID_HEIGHT and 0 <= grid_x < GRID_WIDTH:
-                                            if maze[grid_y][grid_x] != 1:  # Pas un mur
-                                                # Téléporter Pacman à cette position
-                                                pacman.x = grid_x
-                                                pacman.y = grid_y
-                                                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                                if has_double_gadget:
-                                                    gadget_use_count += 1
-                                                    if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                        gadget_cooldown = 0
-                                                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                        gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                                else:
-                                                    gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'portail':
-                                        # Activer Portail : cycle de 3 utilisations
-                                        # Vérifier que la position de Pacman n'est pas un mur
-                                        if 0 <= pacman.y < GRID_HEIGHT and 0 <= pacman.x < GRID_WIDTH:
-                                            if maze[pacman.y][pacman.x] != 1:  # Pas un mur
-                                                if portal_use_count == 0:
-                                                    # 1ère utilisation : poser le premier portail
-                                                    portal1_pos = (pacman.x, pacman.y)
-                                                    portal_use_count = 1
-                                                elif portal_use_count == 1:
-                                                    # 2ème utilisation : poser le deuxième portail
-                                                    portal2_pos = (pacman.x, pacman.y)
-                                                    portal_use_count = 2
-                                                elif portal_use_count == 2:
-                                                    # 3ème utilisation : enlever les portails
-                                                    portal1_pos = None
-                                                    portal2_pos = None
-                                                    portal_use_count = 0
-                                                # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                                if has_double_gadget:
-                                                    gadget_use_count += 1
-                                                    if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                        gadget_cooldown = 0
-                                                    else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                        gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                                else:
-                                                    gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
-                                    elif gadget_type == 'mur':
-                                        # Vérifier si "bric" est équipé
-                                        has_bric = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'bric') or
-                                                   ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'bric') or
-                                                   ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'bric'))
-                                        
-                                        # Vérifier que la position de Pacman est valide
-                                        if 0 <= pacman.y < GRID_HEIGHT and 0 <= pacman.x < GRID_WIDTH:
-                                            if has_bric:
-                                                # Cycle de 3 utilisations avec "bric"
-                                                if mur_use_count == 0:
-                                                    # 1ère utilisation : créer un mur (si ce n'est pas déjà un mur)
-                                                    if maze[pacman.y][pacman.x] != 1:  # Pas déjà un mur
-                                                        maze[pacman.y][pacman.x] = 1  # Créer le mur
-                                                        # Convertir mur_pos en liste si nécessaire
-                                                        if mur_pos is None:
-                                                            mur_pos = []
-                                                        elif isinstance(mur_pos, tuple):
-                                                            mur_pos = [mur_pos]
-                                                        mur_pos.append((pacman.x, pacman.y))
-                                                        mur_use_count = 1
-                                                elif mur_use_count == 1:
-                                                    # 2ème utilisation : créer un deuxième mur (si ce n'est pas déjà un mur)
-                                                    if maze[pacman.y][pacman.x] != 1:  # Pas déjà un mur
-                                                        maze[pacman.y][pacman.x] = 1  # Créer le mur
-                                                        if isinstance(mur_pos, tuple):
-                                                            mur_pos = [mur_pos]
-                                                        elif mur_pos is None:
-                                                            mur_pos = []
-                                                        mur_pos.append((pacman.x, pacman.y))
-                                                        mur_use_count = 2
-                                                elif mur_use_count == 2:
-                                                    # 3ème utilisation : enlever tous les murs créés
-                                                    if isinstance(mur_pos, list):
-                                                        for mur_x, mur_y in mur_pos:
-                                                            if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                                                maze[mur_y][mur_x] = 0  # Enlever le mur (remettre en chemin)
-                                                    elif isinstance(mur_pos, tuple):
-                                                        mur_x, mur_y = mur_pos
-                                                        if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                                            maze[mur_y][mur_x] = 0  # Enlever le mur (remettre en chemin)
-                                                    mur_pos = None
-                                                    mur_use_count = 0
-                                            else:
-                                                # Cycle de 2 utilisations sans "bric" (comportement original)
-                                                if mur_use_count == 0:
-                                                    # 1ère utilisation : créer un mur (si ce n'est pas déjà un mur)
-                                                    if maze[pacman.y][pacman.x] != 1:  # Pas déjà un mur
-                                                        maze[pacman.y][pacman.x] = 1  # Créer le mur
-                                                        mur_pos = (pacman.x, pacman.y)
-                                                        mur_use_count = 1
-                                                elif mur_use_count == 1:
-                                                    # 2ème utilisation : enlever le mur créé
-                                                    if mur_pos is not None:
-                                                        if isinstance(mur_pos, list):
-                                                            # Si c'est une liste (cas avec bric précédemment), enlever tous les murs
-                                                            for mur_x, mur_y in mur_pos:
-                                                                if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                                                    maze[mur_y][mur_x] = 0
-                                                        else:
-                                                            # Si c'est un tuple (comportement normal)
-                                                            mur_x, mur_y = mur_pos
-                                                            if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                                                maze[mur_y][mur_x] = 0  # Enlever le mur (remettre en chemin)
-                                                        mur_pos = None
-                                                        mur_use_count = 0
-                                            # Gérer le temps de recharge avec "double gadget" (alternance recharge instantanée/normale)
-                                            if has_double_gadget:
-                                                gadget_use_count += 1
-                                                if gadget_use_count % 2 == 1:  # Utilisation impaire (1, 3, 5...) : recharge instantanée
-                                                    gadget_cooldown = 0
-                                                else:  # Utilisation paire (2, 4, 6...) : recharge normale
-                                                    gadget_cooldown = GADGET_COOLDOWN_DURATION
-                                            else:
-                                                gadget_cooldown = GADGET_COOLDOWN_DURATION  # 25 secondes de cooldown
+                            # Activer le gadget équipé dans le slot "gadget" (appliqué par step() à ce tick)
+                            game_inputs.use_gadget = True
+                            game_inputs.target_cell = camera.cell_at(*mouse_pos)
                 elif event.button == 3:  # Clic droit
                     if current_state == GAME:
                         # Redémarrer le jeu ou continuer après perte de vie avec le clic droit
-                        if game_over or won:
+                        if state.game_over or state.won:
                             # Donner 10 XP minimum si aucun fantôme n'a été tué
                             if vulnerable_ghosts_eaten_this_game == 0:
                                 xp_gained = 10
@@ -10468,45 +13942,43 @@ def main():
                             vulnerable_ghosts_eaten_this_game = 0  # Réinitialiser le compteur
                             
                             # Redémarrer le jeu complètement
-                            maze = [row[:] for row in MAZES[0]]
-                            pacman = Pacman(10, 15)
-                            ghosts = [
-                                Ghost(10, 9, BLUE),
+                            state.maze = state.mazes[0].copy()
+                            state.pacman = Pacman(*state.maze.pacman_start)
+                            state.ghosts = [
+                                Ghost(*state.maze.ghost_start, BLUE, rng=state.rng.ghosts),
                             ]
                             # Définir le chemin pour tous les fantômes bleus
-                            for ghost in ghosts:
+                            for ghost in state.ghosts:
                                 if ghost.color == BLUE:
-                                    ghost.set_path(maze)
-                            score = 0
-                            level = 1
+                                    ghost.set_path(state.maze)
+                            state.score = 0
+                            state.level = 1
                             # Initialiser les vies : base 2 + bonus d'armures (grosse armure et armure de fer)
                             armor_lives_bonus_init = calculate_armor_lives_bonus(inventaire_items)
-                            lives = 2 + armor_lives_bonus_init
-                            last_bonus_score = 0
-                            game_over = False
-                            won = False
-                            crown_count = 0  # Réinitialiser le compteur de couronnes temporaires
+                            state.lives = 2 + armor_lives_bonus_init
+                            state.last_bonus_score = 0
+                            state.game_over = False
+                            state.won = False
+                            state.crown_count = 0  # Réinitialiser le compteur de couronnes temporaires
                             # Ne pas réinitialiser crown_poche, jeton_poche et grande_couronne_count pour garder la sauvegarde
-                            jeton_count = 0  # Réinitialiser le compteur de jetons temporaires
+                            state.jeton_count = 0  # Réinitialiser le compteur de jetons temporaires
                             game_initialized = True  # Marquer le jeu comme initialisé
-                            last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
-                            vulnerable_timer = 0
-                            level_transition = False
-                            level_transition_timer = 0
-                            respawn_timer = 0
+                            state.last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
+                            state.vulnerable_timer = 0
+                            state.level_transition = False
+                            state.level_transition_timer = 0
+                            state.respawn_timer = 0
                             invincibilite_bonus = calculate_invincibilite_bonus(capacite_items, inventaire_items)
-                            invincibility_timer = 30 + invincibilite_bonus  # Réinitialiser l'invincibilité au redémarrage
-                            crown_timer = 0  # Réinitialiser la couronne au redémarrage
-                            indigestion_timer = 0  # Réinitialiser l'indigestion au redémarrage
+                            state.invincibility_timer = 30 + invincibilite_bonus  # Réinitialiser l'invincibilité au redémarrage
+                            state.crown_timer = 0  # Réinitialiser la couronne au redémarrage
+                            state.indigestion_timer = 0  # Réinitialiser l'indigestion au redémarrage
                             # Ne pas réinitialiser super_vie_active - elle reste active jusqu'à ce qu'on reclique sur le bouton
-                            has_indigestion = False  # Réinitialiser l'état d'indigestion
-                            rainbow_timer = 0  # Réinitialiser le timer arc-en-ciel au redémarrage
-                            is_rainbow_critique = False  # Réinitialiser l'état arc-en-ciel
-                        elif respawn_timer > 0:
-                            # Continuer le jeu après perte de vie (réapparition immédiate)
-                            respawn_timer = 0
-                            pacman, invincibility_timer = respawn_player_and_ghosts(pacman, ghosts)
-                            vulnerable_timer = 0
+                            state.has_indigestion = False  # Réinitialiser l'état d'indigestion
+                            state.rainbow_timer = 0  # Réinitialiser le timer arc-en-ciel au redémarrage
+                            state.is_rainbow_critique = False  # Réinitialiser l'état arc-en-ciel
+                        elif state.respawn_timer > 0:
+                            # Continuer le jeu après perte de vie (réapparition immédiate, appliquée par step())
+                            game_inputs.skip_respawn = True
                     elif current_state == INVENTAIRE:
                         # Vérifier si on fait un clic droit sur un slot contenant un item
                         if inventaire_slots is not None:
@@ -10756,1762 +14228,108 @@ def main():
                         # Ajouter le caractère saisi
                         player_name += event.unicode
                 elif current_state == GAME:
-                    if bombe_active:
-                        # Contrôler la bombe au lieu de Pacman
-                        bombe_direction = (0, 0)
-                        if event.key == pygame.K_UP:
-                            bombe_direction = (0, -1)
-                        elif event.key == pygame.K_DOWN:
-                            bombe_direction = (0, 1)
-                        elif event.key == pygame.K_LEFT:
-                            bombe_direction = (-1, 0)
-                        elif event.key == pygame.K_RIGHT:
-                            bombe_direction = (1, 0)
-                        
-                        # Déplacer la bombe dans la direction
-                        if bombe_direction != (0, 0):
-                            new_bombe_x = bombe_x + bombe_direction[0]
-                            new_bombe_y = bombe_y + bombe_direction[1]
-                            
-                            # Gérer la téléportation aux bords
-                            if new_bombe_x < 0:
-                                new_bombe_x = GRID_WIDTH - 1
-                            elif new_bombe_x >= GRID_WIDTH:
-                                new_bombe_x = 0
-                            if new_bombe_y < 0:
-                                new_bombe_y = GRID_HEIGHT - 1
-                            elif new_bombe_y >= GRID_HEIGHT:
-                                new_bombe_y = 0
-                            
-                            # Vérifier si la nouvelle position est valide (pas un mur)
-                            if 0 <= new_bombe_y < GRID_HEIGHT and 0 <= new_bombe_x < GRID_WIDTH:
-                                if maze[new_bombe_y][new_bombe_x] != 1:  # Pas un mur
-                                    bombe_x = new_bombe_x
-                                    bombe_y = new_bombe_y
-                    else:
-                        # Contrôler Pacman normalement
-                        if event.key == pygame.K_UP:
-                            pacman.set_direction((0, -1))
-                        elif event.key == pygame.K_DOWN:
-                            pacman.set_direction((0, 1))
-                        elif event.key == pygame.K_LEFT:
-                            pacman.set_direction((-1, 0))
-                        elif event.key == pygame.K_RIGHT:
-                            pacman.set_direction((1, 0))
+                    # Les flèches sont transmises à step() (contrôle de Pacman ou de la bombe téléguidée)
+                    if event.key == pygame.K_UP:
+                        game_inputs.directions.append((0, -1))
+                    elif event.key == pygame.K_DOWN:
+                        game_inputs.directions.append((0, 1))
+                    elif event.key == pygame.K_LEFT:
+                        game_inputs.directions.append((-1, 0))
+                    elif event.key == pygame.K_RIGHT:
+                        game_inputs.directions.append((1, 0))
         
         # Gérer la logique du jeu seulement si on est dans l'état GAME
         if current_state == GAME:
-            # Vérifier si on est en mode multi-map (niveau multiple de 10 en mode aventure)
-            is_multi_map_mode = is_adventure_mode and level % 10 == 0 and level > 0
-            
+            # Retour en jeu : recalculer le profil d'équipement une seule fois
+            if equipment_stale:
+                state.refresh_equipment()
+                equipment_stale = False
+                # Le replay ne contient que l'équipement de départ : un changement arrête l'enregistrement
+                if replay_recorder is not None and not replay_recorder.matches(state):
+                    save_account_replay(current_account_index, replay_recorder)
+                    replay_recorder = None
+            # Minuteur d'affichage : compté en images, pas en ticks de jeu
             if success_notification_timer > 0:
                 success_notification_timer -= 1
-            # Gérer la transition entre niveaux
-            if level_transition:
-                level_transition_timer -= 1
-                if level_transition_timer <= 0:
-                    level_transition = False
-                    # Déclencher l'invincibilité quand la transition se termine
-                    # Calculer le bonus d'invincibilité selon le niveau de la capacité équipée
-                    invincibilite_bonus = calculate_invincibilite_bonus(capacite_items, inventaire_items)
-                    invincibility_timer = 30 + invincibilite_bonus  # 3 secondes d'invincibilité + bonus
-                    # S'assurer que la glace est bien réinitialisée (au cas où)
-                    ice_tiles = {}
-                    pacman_last_pos = (pacman.x, pacman.y)
-            
-            # Gérer la réapparition après perte de vie
-            if respawn_timer > 0:
-                respawn_timer -= 1
-                if respawn_timer == 0:
-                    # Réinitialiser les positions (même code que quand on appuie sur R)
-                    # Calculer le bonus d'invincibilité selon le niveau de la capacité équipée
-                    invincibilite_bonus = calculate_invincibilite_bonus(capacite_items, inventaire_items)
-                    pacman, invincibility_timer = respawn_player_and_ghosts(pacman, ghosts, invincibilite_bonus)
-                    vulnerable_timer = 0
-                    ice_tiles = {}  # Réinitialiser les cases de glace
-                    fire_tiles = {}  # Réinitialiser les cases de feu
-                    fire_active = False  # Réinitialiser l'activation du feu
-                    fire_timer = 0  # Réinitialiser le timer du feu
-                    gadget_cooldown = 0  # Réinitialiser le temps de recharge du gadget
-                    mort_cooldown = 0  # Réinitialiser le temps de recharge de "mort"
-                    bombe_cooldown = 0  # Réinitialiser le temps de recharge de "bombe téléguidée"
-                    bombe_active = False  # Réinitialiser l'état de la bombe
-                    pacman_frozen = False  # Réinitialiser l'état de gel de Pacman
-                    bombe_timer = 0  # Réinitialiser le timer de la bombe
-                    # Les pièges persistent entre les niveaux et les retours
-                    portal1_pos = None  # Réinitialiser les portails
-                    portal2_pos = None
-                    portal_use_count = 0
-                    # Enlever le mur créé du maze si nécessaire
-                    if mur_pos is not None:
-                        if isinstance(mur_pos, list):
-                            # Si c'est une liste (cas avec bric), enlever tous les murs
-                            for mur_x, mur_y in mur_pos:
-                                if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                    maze[mur_y][mur_x] = 0  # Remettre en chemin
-                        else:
-                            # Si c'est un tuple (comportement normal)
-                            mur_x, mur_y = mur_pos
-                            if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                maze[mur_y][mur_x] = 0  # Remettre en chemin
-                    mur_pos = None  # Réinitialiser le mur
-                    mur_use_count = 0
-                    pacman_last_pos = (pacman.x, pacman.y)  # Réinitialiser la position précédente
-                    # Réinitialiser les flee_timer et immobilized_timer des fantômes
-                    for ghost in ghosts:
-                        ghost.flee_timer = 0
-                        ghost.immobilized_timer = 0
-            
-            # Gérer l'invincibilité après spawn
-            if invincibility_timer > 0:
-                invincibility_timer -= 1
-            
-            # Gérer la couronne après avoir mangé un fantôme
-            if crown_timer > 0:
-                crown_timer -= 1
-            
-            # Gérer l'indigestion
-            if indigestion_timer > 0:
-                indigestion_timer -= 1
-                if indigestion_timer == 0:
-                    has_indigestion = False
-                    # Supprimer le fantôme d'indigestion s'il existe
-                    ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
-            
-            # Gérer l'effet arc-en-ciel du coup critique
-            if rainbow_timer > 0:
-                rainbow_timer -= 1
-                if rainbow_timer == 0:
-                    is_rainbow_critique = False
-            
-            # Décrémenter le timer depuis le dernier fantôme mangé
-            if last_ghost_time > 0:
-                last_ghost_time -= 1
-            
-            # Mettre à jour le jeu seulement si on est dans l'état GAME
-            if not game_over and not won and not level_transition and respawn_timer == 0:
-                # Vérifier si "glace" est équipé avant de mettre à jour Pacman
-                has_glace = ('pouvoir' in inventaire_items and 
-                            inventaire_items['pouvoir'].get('type') == 'glace')
-                
-                # Sauvegarder la position précédente de Pacman avant de le mettre à jour
-                old_pacman_pos = (pacman.x, pacman.y)
-                
-                # Gérer la bombe téléguidée
-                if bombe_active:
-                    # Décrémenter le timer de la bombe
-                    bombe_timer -= 1
-                    
-                    # Si le timer arrive à 0, faire exploser la bombe
-                    if bombe_timer <= 0:
-                        # Calculer le bonus de "bonbe" si équipé
-                        has_bonbe_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'bonbe') or
-                                            ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'bonbe'))
-                        bonbe_level = capacite_items.count("bonbe") if capacite_items else 0
-                        explosion_radius_bonus = bonbe_level if has_bonbe_capacity else 0  # +1 case de rayon par niveau
-                        # Zone d'explosion : 3x3 cases autour de la bombe (base) + bonus de "bonbe"
-                        explosion_radius = 1 + explosion_radius_bonus  # 1 case de base + bonus
-                        
-                        # Tuer les fantômes dans la zone d'explosion
-                        for ghost in ghosts[:]:  # Utiliser une copie de la liste pour éviter les problèmes lors de la modification
-                            # Vérifier si le fantôme est dans la zone d'explosion
-                            dx = abs(ghost.x - bombe_x)
-                            dy = abs(ghost.y - bombe_y)
-                            
-                            # Gérer la téléportation aux bords pour la distance
-                            if dx > GRID_WIDTH // 2:
-                                dx = GRID_WIDTH - dx
-                            if dy > GRID_HEIGHT // 2:
-                                dy = GRID_HEIGHT - dy
-                            
-                            if dx <= explosion_radius and dy <= explosion_radius:
-                                # Le fantôme est dans la zone d'explosion
-                                if not ghost.harmless and not ghost.eyes:
-                                    # Tuer le fantôme (le transformer en yeux)
-                                    ghost.eyes = True
-                                    ghost.vulnerable = False
-                                    ghost.returning = False
-                                    score += 300
-                        
-                        # Casser les murs dans la zone d'explosion
-                        for dy in range(-explosion_radius, explosion_radius + 1):
-                            for dx in range(-explosion_radius, explosion_radius + 1):
-                                check_x = bombe_x + dx
-                                check_y = bombe_y + dy
-                                
-                                # Gérer la téléportation aux bords
-                                if check_x < 0:
-                                    check_x = GRID_WIDTH - 1
-                                elif check_x >= GRID_WIDTH:
-                                    check_x = 0
-                                if check_y < 0:
-                                    check_y = GRID_HEIGHT - 1
-                                elif check_y >= GRID_HEIGHT:
-                                    check_y = 0
-                                
-                                # Vérifier si c'est un mur et le casser
-                                if 0 <= check_y < GRID_HEIGHT and 0 <= check_x < GRID_WIDTH:
-                                    if maze[check_y][check_x] == 1:  # C'est un mur
-                                        maze[check_y][check_x] = 0  # Casser le mur
-                        
-                        # Réinitialiser l'état de la bombe
-                        bombe_active = False
-                        pacman_frozen = False
-                        bombe_timer = 0
-                else:
-                    # Mettre à jour Pacman normalement seulement si la bombe n'est pas active
-                    # En mode multi-map, gérer le changement de map au lieu de la téléportation
-                    if is_multi_map_mode:
-                        # Sauvegarder la position avant le déplacement
-                        old_x, old_y = pacman.x, pacman.y
-                        # Essayer de changer de direction
-                        if pacman.can_move(pacman.next_direction, maze):
-                            pacman.direction = pacman.next_direction
-                        
-                        # Se déplacer dans la direction actuelle
-                        if pacman.can_move(pacman.direction, maze):
-                            pacman.x += pacman.direction[0]
-                            pacman.y += pacman.direction[1]
-                            
-                            # Gérer le changement de map aux bords
-                            map_changed = False
-                            if pacman.x < 0:
-                                # Sortir par la gauche, aller à la map de gauche
-                                if map_x > 0:
-                                    map_x -= 1
-                                    pacman.x = GRID_WIDTH - 1
-                                    map_changed = True
-                                else:
-                                    pacman.x = 0  # Bloquer au bord si on est déjà à gauche
-                            elif pacman.x >= GRID_WIDTH:
-                                # Sortir par la droite, aller à la map de droite
-                                if map_x < 3:
-                                    map_x += 1
-                                    pacman.x = 0
-                                    map_changed = True
-                                else:
-                                    pacman.x = GRID_WIDTH - 1  # Bloquer au bord si on est déjà à droite
-                            
-                            if pacman.y < 0:
-                                # Sortir par le haut, aller à la map du haut
-                                if map_y > 0:
-                                    map_y -= 1
-                                    pacman.y = GRID_HEIGHT - 1
-                                    map_changed = True
-                                else:
-                                    pacman.y = 0  # Bloquer au bord si on est déjà en haut
-                            elif pacman.y >= GRID_HEIGHT:
-                                # Sortir par le bas, aller à la map du bas
-                                if map_y < 3:
-                                    map_y += 1
-                                    pacman.y = 0
-                                    map_changed = True
-                                else:
-                                    pacman.y = GRID_HEIGHT - 1  # Bloquer au bord si on est déjà en bas
-                            
-                            # Si on a changé de map, charger la nouvelle map
-                            if map_changed:
-                                # Calculer l'index de la map dans la grille 4x4 (0-15)
-                                map_index = map_y * 4 + map_x
-                                # Utiliser cet index pour choisir une map parmi les MAZES disponibles
-                                maze_index = map_index % len(MAZES)
-                                maze = [row[:] for row in MAZES[maze_index]]
-                                # Réinitialiser les points et pacgommes sur la nouvelle map
-                                for y in range(GRID_HEIGHT):
-                                    for x in range(GRID_WIDTH):
-                                        if maze[y][x] == 0:
-                                            maze[y][x] = 2  # Remettre les points
-                            
-                            # Animation de la bouche
-                            pacman.mouth_angle += 5
-                            if pacman.mouth_angle >= 360:
-                                pacman.mouth_angle = 0
-                            pacman.mouth_open = (pacman.mouth_angle // 30) % 2 == 0
-                        else:
-                            # Animation de la bouche même si on ne peut pas bouger
-                            pacman.mouth_angle += 5
-                            if pacman.mouth_angle >= 360:
-                                pacman.mouth_angle = 0
-                            pacman.mouth_open = (pacman.mouth_angle // 30) % 2 == 0
-                    else:
-                        pacman.update(maze)
-                    
-                    # Vérifier si Pacman entre dans un portail et le téléporter
-                    if portal1_pos is not None and portal2_pos is not None:
-                        if (pacman.x, pacman.y) == portal1_pos:
-                            # Téléporter vers le portail 2
-                            pacman.x, pacman.y = portal2_pos
-                        elif (pacman.x, pacman.y) == portal2_pos:
-                            # Téléporter vers le portail 1
-                            pacman.x, pacman.y = portal1_pos
-                
-                # La longue vue ou double longue vue est équipée seulement si elle est dans le slot "pouvoir"
-                has_longue_vue = ('pouvoir' in inventaire_items and 
-                                 (inventaire_items['pouvoir'].get('type') == 'longue vue' or 
-                                  inventaire_items['pouvoir'].get('type') == 'double longue vue'))
-                is_double_longue_vue = ('pouvoir' in inventaire_items and 
-                                       inventaire_items['pouvoir'].get('type') == 'double longue vue')
-                # Vérifier si "bon repas" est équipé dans le slot "pouvoir"
-                has_bon_repas = ('pouvoir' in inventaire_items and 
-                                inventaire_items['pouvoir'].get('type') == 'bon repas')
-                # Vérifier si "bon goût" est équipé dans le slot "pouvoir"
-                has_bon_gout = ('pouvoir' in inventaire_items and 
-                               inventaire_items['pouvoir'].get('type') == 'bon goût')
-                # Vérifier si "pas d'indigestion" est équipé dans le slot "pouvoir"
-                has_pas_indigestion = ('pouvoir' in inventaire_items and 
-                                      inventaire_items['pouvoir'].get('type') == 'pas d\'indigestion')
-                # Vérifier si "pièce mythique" est équipée dans un slot objet
-                has_piece_mythique = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'pièce mythique') or
-                                     ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'pièce mythique') or
-                                     ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'pièce mythique'))
-                # Vérifier les armures équipées et le bonus de vie correspondant
-                armor_lives_bonus = calculate_armor_lives_bonus(inventaire_items)
-                # Valeur théorique des vies max en tenant compte des armures
-                current_max_lives = MAX_LIVES + armor_lives_bonus
-                # Le bonus de vie ne s'applique qu'une seule fois au début du jeu, pas à chaque retour dans le jeu
-                # On ne fait rien ici, le bonus est appliqué lors de l'initialisation des vies
-                # Vérifier si "skin bleu" est équipé dans le slot "pouvoir"
-                has_skin_bleu = ('pouvoir' in inventaire_items and 
-                                 inventaire_items['pouvoir'].get('type') == 'skin bleu')
-                
-                # Vérifier si "skin orange" est équipé dans le slot "pouvoir"
-                has_skin_orange = ('pouvoir' in inventaire_items and 
-                                   inventaire_items['pouvoir'].get('type') == 'skin orange')
-                
-                # Vérifier si "skin rose" est équipé dans le slot "pouvoir"
-                has_skin_rose = ('pouvoir' in inventaire_items and 
-                                 inventaire_items['pouvoir'].get('type') == 'skin rose')
-                
-                # Vérifier si "skin rouge" est équipé dans le slot "pouvoir"
-                has_skin_rouge = ('pouvoir' in inventaire_items and 
-                                  inventaire_items['pouvoir'].get('type') == 'skin rouge')
-                
-                # Créer une case de glace derrière Pacman si "glace" est équipé et que Pacman s'est déplacé
-                if has_glace:
-                    new_pacman_pos = (pacman.x, pacman.y)
-                    # Si Pacman s'est déplacé, créer une case de glace à sa position précédente
-                    if old_pacman_pos != new_pacman_pos:
-                        # Vérifier que la position précédente n'est pas un mur
-                        last_x, last_y = old_pacman_pos
-                        if 0 <= last_y < GRID_HEIGHT and 0 <= last_x < GRID_WIDTH:
-                            if maze[last_y][last_x] != 1:  # Pas un mur
-                                # Calculer la durée de la glace : ICE_DURATION + bonus si "gel" est équipé
-                                gel_level = capacite_items.count("gel") if capacite_items else 0
-                                # Vérifier si "gel" est équipé dans un slot capacité
-                                has_gel_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'gel') or
-                                                   ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'gel'))
-                                # Si le pouvoir glace est équipé ET la capacité gel est équipée, ajouter 1 seconde (10 frames) par niveau
-                                ice_duration = ICE_DURATION
-                                if has_glace and has_gel_capacity:
-                                    ice_duration += gel_level * 10  # 1 seconde = 10 frames à 10 FPS
-                                ice_tiles[old_pacman_pos] = ice_duration
-                
-                # Mettre à jour la position précédente de Pacman
-                pacman_last_pos = (pacman.x, pacman.y)
-                
-                # Mettre à jour les cases de glace (décrémenter le timer et supprimer celles expirées)
-                expired_tiles = []
-                for tile_pos, timer in ice_tiles.items():
-                    ice_tiles[tile_pos] = timer - 1
-                    if ice_tiles[tile_pos] <= 0:
-                        expired_tiles.append(tile_pos)
-                for tile_pos in expired_tiles:
-                    del ice_tiles[tile_pos]
-                
-                # Gérer la réapparition des pacgommes (seulement en mode aventure)
-                if is_adventure_mode:
-                    pacgomme_positions_to_remove = []
-                    for pos, timer in pacgomme_timers.items():
-                        pacgomme_timers[pos] = timer - 1
-                        if pacgomme_timers[pos] <= 0:
-                            x, y = pos
-                            # Vérifier que la case est toujours valide (pas un mur) et qu'elle n'est pas occupée
-                            if 0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT:
-                                if maze[y][x] != 1:  # Pas un mur
-                                    maze[y][x] = 3  # Faire réapparaître la pacgomme
-                            pacgomme_positions_to_remove.append(pos)
-                    # Supprimer les timers terminés
-                    for pos in pacgomme_positions_to_remove:
-                        del pacgomme_timers[pos]
-                    
-                    # En mode aventure, les fantômes ne réapparaissent pas après avoir été mangés
-                    # (La logique de réapparition a été supprimée)
-                
-                # Gérer le système de feu
-                # Vérifier si le gadget lave ou feu est équipé dans le slot gadget
-                equipped_gadget_feu = get_equipped_gadget(inventaire_items)
-                has_feu_gadget = (equipped_gadget_feu is not None and 
-                                 (equipped_gadget_feu.get('type') == 'lave' or 
-                                  equipped_gadget_feu.get('type') == 'feu'))
-                gadget_feu_type = None
-                if equipped_gadget_feu:
-                    gadget_type_feu = equipped_gadget_feu.get('type')
-                    if gadget_type_feu == 'lave' or gadget_type_feu == 'feu':
-                        gadget_feu_type = gadget_type_feu
-                
-                # Calculer le niveau de "gadget" équipé dans les slots capacité
-                gadget_level = 0
-                if 'capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'gadget':
-                    gadget_level += 1
-                if 'capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'gadget':
-                    gadget_level += 1
-                # Ajouter aussi le niveau de "gadget" dans la grille et dans capacite_items
-                gadget_level_total = capacite_items.count("gadget") if capacite_items else 0
-                gadget_level = gadget_level_total
-                
-                # Décrémenter les cooldowns (1 seconde par niveau = 10 frames par niveau)
-                # Niveau 1 = 2 frames, niveau 2 = 3 frames, etc. (1 frame de base + niveau frames)
-                cooldown_reduction = 1 + gadget_level
-                if gadget_cooldown > 0:
-                    gadget_cooldown = max(0, gadget_cooldown - cooldown_reduction)
-                if mort_cooldown > 0:
-                    mort_cooldown = max(0, mort_cooldown - cooldown_reduction)
-                if bombe_cooldown > 0:
-                    bombe_cooldown = max(0, bombe_cooldown - cooldown_reduction)
-                
-                # Décrémenter le timer d'activation du feu
-                if fire_timer > 0:
-                    fire_timer -= 1
-                    if fire_timer <= 0:
-                        fire_active = False
-                
-                
-                # Si le feu est actif, créer des cases de feu sur le chemin de Pacman
-                if fire_active and has_feu_gadget:
-                    if gadget_feu_type == 'lave':
-                        # Créer du feu à la position actuelle de Pacman si ce n'est pas un mur
-                        if 0 <= pacman.y < GRID_HEIGHT and 0 <= pacman.x < GRID_WIDTH:
-                            if maze[pacman.y][pacman.x] != 1:  # Pas un mur
-                                fire_tiles[(pacman.x, pacman.y)] = calculate_fire_duration(inventaire_items, FIRE_DURATION)
-                    elif gadget_feu_type == 'feu':
-                        # Créer du feu DERRIÈRE Pacman (à sa position précédente) si Pacman s'est déplacé
-                        if old_pacman_pos != (pacman.x, pacman.y):
-                            last_x, last_y = old_pacman_pos
-                            if 0 <= last_y < GRID_HEIGHT and 0 <= last_x < GRID_WIDTH:
-                                if maze[last_y][last_x] != 1:  # Pas un mur
-                                    fire_tiles[(last_x, last_y)] = calculate_fire_duration(inventaire_items, FIRE_DURATION)
-                
-                # Mettre à jour les cases de feu (décrémenter le timer et supprimer celles expirées)
-                expired_fire_tiles = []
-                for tile_pos, timer in fire_tiles.items():
-                    fire_tiles[tile_pos] = timer - 1
-                    if fire_tiles[tile_pos] <= 0:
-                        expired_fire_tiles.append(tile_pos)
-                for tile_pos in expired_fire_tiles:
-                    del fire_tiles[tile_pos]
-                
-                # Calculer la position devant Pacman selon sa direction
-                front_x = pacman.x
-                front_y = pacman.y
-                if pacman.direction != (0, 0):
-                    front_x = pacman.x + pacman.direction[0]
-                    front_y = pacman.y + pacman.direction[1]
-                    # Gérer la téléportation aux bords
-                    if front_x < 0:
-                        front_x = GRID_WIDTH - 1
-                    elif front_x >= GRID_WIDTH:
-                        front_x = 0
-                
-                # Vérifier si "lunette" est équipée dans un slot capacité
-                has_lunette_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'lunette') or
-                                       ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'lunette'))
-                lunette_level = capacite_items.count("lunette") if capacite_items else 0
-                # La distance de base est 1, augmentée de 1 par niveau de lunette si équipée avec longue vue
-                distance = 1
-                if has_longue_vue and has_lunette_capacity:
-                    distance = 1 + lunette_level  # Distance = 1 + niveau de lunette
-                
-                # Pour la double longue vue, calculer les positions dans les 4 directions
-                directions = []
-                if is_double_longue_vue:
-                    # Toutes les directions avec la distance augmentée par lunette
-                    directions = []
-                    for d in range(1, distance + 1):
-                        directions.append((pacman.x + d, pacman.y))  # Droite
-                        directions.append((pacman.x - d, pacman.y))  # Gauche
-                        directions.append((pacman.x, pacman.y + d))  # Bas
-                        directions.append((pacman.x, pacman.y - d))  # Haut
-                    # Gérer la téléportation aux bords pour chaque direction
-                    for i, (dx, dy) in enumerate(directions):
-                        if dx < 0:
-                            directions[i] = (GRID_WIDTH - 1, dy)
-                        elif dx >= GRID_WIDTH:
-                            directions[i] = (0, dy)
-                elif has_longue_vue and pacman.direction != (0, 0):
-                    # Devant pour la longue vue simple avec distance augmentée par lunette
-                    directions = []
-                    for d in range(1, distance + 1):
-                        dir_x = pacman.x + pacman.direction[0] * d
-                        dir_y = pacman.y + pacman.direction[1] * d
-                        # Gérer la téléportation aux bords
-                        if dir_x < 0:
-                            dir_x = GRID_WIDTH - 1
-                        elif dir_x >= GRID_WIDTH:
-                            dir_x = 0
-                        directions.append((dir_x, dir_y))
-                
-                # Vérifier si Pacman mange un point (à sa position ou devant si longue vue)
-                if maze[pacman.y][pacman.x] == 2:
-                    maze[pacman.y][pacman.x] = 0
-                    score += 10
-                    # Gagner un jeton pour chaque point mangé (2 si pièce mythique équipée) - sauf en mode aventure
-                    if not is_adventure_mode:
-                        if has_piece_mythique:
-                            jeton_count += 2
-                        else:
-                            jeton_count += 1
-                    
-                    # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
-                    if has_bon_gout:
-                        # "bon goût" seul : 1% de chance de coup critique
-                        crit_chance = 0.01
-                        if random.random() < crit_chance:
-                            # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                            is_rainbow_critique = True
-                            rainbow_timer = 20  # 2 secondes à 10 FPS
-                            if has_piece_mythique:
-                                jeton_count += 20
-                            else:
-                                jeton_count += 10
-                    elif has_bon_repas:
-                        # "bon repas" seul : 0.5% de chance de coup critique
-                        crit_chance = 0.005
-                        if random.random() < crit_chance:
-                            # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                            is_rainbow_critique = True
-                            rainbow_timer = 20  # 2 secondes à 10 FPS
-                            if has_piece_mythique:
-                                jeton_count += 20
-                            else:
-                                jeton_count += 10
-                    
-                    # Calculer la chance d'indigestion en fonction de "pas d'indigestion" et de la capacité "indigestion"
-                    base_indigestion_chance = 0.005  # 0.5% de base
-                    if has_pas_indigestion:
-                        base_indigestion_chance = 0.0025  # Divisée par 2 si "pas d'indigestion" équipé
-                    
-                    # Réduire la chance selon le niveau de la capacité "indigestion" (10% de réduction par niveau)
-                    indigestion_capacity_level = capacite_items.count("indigestion") if capacite_items else 0
-                    reduction_factor = 1.0 - (indigestion_capacity_level * 0.1)  # Réduction de 10% par niveau
-                    reduction_factor = max(0.0, reduction_factor)  # Ne peut pas être négatif
-                    indigestion_chance = base_indigestion_chance * reduction_factor
-                    
-                    if random.random() < indigestion_chance and not has_indigestion:
-                        # Indigestion : perdre 10 jetons et devenir vert pendant 1 minute
-                        jeton_count = max(0, jeton_count - 10)
-                        has_indigestion = True
-                        indigestion_timer = 600  # 1 minute (60 secondes = 600 frames à 10 FPS)
-                        # Vérifier qu'il n'y a pas déjà un fantôme d'indigestion
-                        if not any(ghost.harmless for ghost in ghosts):
-                            # Créer un fantôme d'indigestion inoffensif près de Pacman
-                            # Chercher une position valide (pas un mur) près de Pacman
-                            indigestion_ghost_x = None
-                            indigestion_ghost_y = None
-                            attempts = 0
-                            max_attempts = 50
-                            while indigestion_ghost_x is None and attempts < max_attempts:
-                                attempts += 1
-                                # Position aléatoire près de Pacman (à une distance de 2-5 cases)
-                                angle = random.random() * 2 * math.pi
-                                distance = random.randint(2, 5)
-                                test_x = int(pacman.x + distance * math.cos(angle))
-                                test_y = int(pacman.y + distance * math.sin(angle))
-                                # S'assurer que la position est dans les limites
-                                test_x = max(0, min(GRID_WIDTH - 1, test_x))
-                                test_y = max(0, min(GRID_HEIGHT - 1, test_y))
-                                # Vérifier que la position n'est pas un mur
-                                if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                    if maze[test_y][test_x] != 1:  # Pas un mur
-                                        indigestion_ghost_x = test_x
-                                        indigestion_ghost_y = test_y
-                            # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
-                            if indigestion_ghost_x is None:
-                                # Essayer les positions autour de Pacman
-                                for dx in range(-3, 4):
-                                    for dy in range(-3, 4):
-                                        test_x = pacman.x + dx
-                                        test_y = pacman.y + dy
-                                        if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                            if maze[test_y][test_x] != 1:  # Pas un mur
-                                                indigestion_ghost_x = test_x
-                                                indigestion_ghost_y = test_y
-                                                break
-                                    if indigestion_ghost_x is not None:
-                                        break
-                            # Si on a trouvé une position valide, créer le fantôme
-                            if indigestion_ghost_x is not None:
-                                # Utiliser la couleur la plus courante dans le niveau
-                                indigestion_ghost_color = get_most_common_ghost_color(ghosts, level)
-                                indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True)
-                                ghosts.append(indigestion_ghost)
-                    # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 2000 en hardcore, 200 sinon)
-                    if difficulty == "facile":
-                        jeton_threshold = 100
-                    elif difficulty == "difficile":
-                        jeton_threshold = 1000
-                    elif difficulty == "hardcore":
-                        jeton_threshold = 2000  # Pas de bonus de vie en hardcore (seuil très élevé)
-                    else:
-                        jeton_threshold = 200
-                    if jeton_count >= jeton_threshold:
-                        # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                        if lives < current_max_lives and difficulty != "difficile" and difficulty != "hardcore":
-                            lives += 1
-                        # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
-                        if not is_adventure_mode:
-                            jeton_poche += jeton_count
-                        crown_poche += crown_count
-                        jeton_count = 0  # Réinitialiser le compteur de jetons
-                        crown_count = 0  # Réinitialiser le compteur de couronnes
-                    if count_points(maze) == 0:
-                        # Passer au niveau suivant
-                        level += 1
-                        if level == 2 and not first_level_success_unlocked:
-                            first_level_success_unlocked = True
-                            # Vérifier si ce trophée a déjà été gagné par n'importe quel compte
-                            trophy_already_earned = False
-                            for account in accounts:
-                                if TROPHY_FIRST_LEVEL in account.get('trophies', []):
-                                    trophy_already_earned = True
-                                    break
-                            
-                            if not trophy_already_earned:
-                                success_notification_text = "Nouveau succès débloqué !"
-                                success_notification_timer = 60  # Afficher le succès pendant 1 seconde
-                                if current_account_index is not None and 0 <= current_account_index < len(accounts):
-                                    trophies = accounts[current_account_index].setdefault('trophies', [])
-                                    if TROPHY_FIRST_LEVEL not in trophies:
-                                        trophies.append(TROPHY_FIRST_LEVEL)
-                                        save_accounts_data(accounts)
-                        # Vérifier si "coffre fort" est équipé
-                        has_coffre_fort = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'coffre fort') or
-                                          ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'coffre fort') or
-                                          ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'coffre fort'))
-                        # Récompense du coffre fort si équipé
-                        if has_coffre_fort:
-                            jeton_poche += 100  # Gagner 100 pacoins
-                        # Vérifier si "coffre au trésor" est équipé
-                        has_coffre_tresor = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'coffre au trésor') or
-                                            ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'coffre au trésor') or
-                                            ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'coffre au trésor'))
-                        # Récompense du coffre au trésor si équipé
-                        if has_coffre_tresor:
-                            jeton_poche += 200  # Gagner 200 pacoins
-                        # Récompense au niveau 17 en mode facile
-                        if difficulty == "facile" and level == 17:
-                            crown_poche += 1  # Gagner 1 couronne
-                            jeton_poche += 50  # Gagner 50 pacoins
-                        # Récompense au niveau 25 en mode moyen
-                        if difficulty == "moyen" and level == 25:
-                            crown_poche += 55  # Gagner 55 couronnes
-                            jeton_poche += 1000  # Gagner 1000 pacoins
-                        # Récompense au niveau 30 en mode difficile
-                        if difficulty == "difficile" and level == 30:
-                            crown_poche += 60  # Gagner 60 couronnes
-                            jeton_poche += 1500  # Gagner 1500 pacoins
-                        # Récompense au niveau 50 en mode hardcore
-                        if difficulty == "hardcore" and level == 50:
-                            crown_poche += 1000  # Gagner 1000 couronnes
-                            jeton_poche += 200000  # Gagner 200000 pacoins
-                        # Vérifier si on a gagné au niveau 24 (en moyenne)
-                        if level == 24:
-                            won = True
-                            crown_poche += 10  # Gagner 10 couronnes
-                            jeton_poche += 500  # Gagner 500 pacoins
-                            # Arrêter la musique si elle est en cours
-                            if music_playing:
-                                pygame.mixer.music.stop()
-                                music_playing = False
-                        # Vérifier si on a gagné (niveau 20 en mode facile)
-                        if difficulty == "facile" and level >= 20:
-                            won = True
-                            # Arrêter la musique si elle est en cours
-                            if music_playing:
-                                pygame.mixer.music.stop()
-                                music_playing = False
-                        # Vérifier si on a gagné au niveau 20 sans difficulté choisie
-                        if difficulty is None and level >= 20:
-                            won = True
-                            # Arrêter la musique si elle est en cours
-                            if music_playing:
-                                pygame.mixer.music.stop()
-                                music_playing = False
-                            crown_poche += 10  # Gagner 10 couronnes
-                            jeton_poche += 500  # Gagner 500 pacoins
-                        level_transition = True
-                        level_transition_timer = 60  # 2 secondes de transition
-                        # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
-                        indigestion_active = has_indigestion and indigestion_timer > 0
-                        saved_indigestion_timer = indigestion_timer
-                        # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
-                        ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
-                        maze, pacman, ghosts = start_next_level(level)
-                        # Initialiser les coordonnées de la map pour le système 4x4 aux niveaux multiples de 10 en mode aventure
-                        if is_adventure_mode and level % 10 == 0 and level > 0:
-                            map_x = 0
-                            map_y = 0
-                            # Charger la première map de la grille 4x4
-                            map_index = map_y * 4 + map_x
-                            maze_index = map_index % len(MAZES)
-                            maze = [row[:] for row in MAZES[maze_index]]
-                        # Ajouter un fantôme bleu supplémentaire pour le mode moyen (niveau 3+)
-                        if difficulty == "moyen" and level >= 3:
-                            new_ghost = Ghost(12, 9, BLUE)
-                            ghosts.append(new_ghost)
-                            new_ghost.set_path(maze)
-                        # Ajouter 2 fantômes orange supplémentaires pour le mode difficile (niveau 3+)
-                        if difficulty == "difficile" and level >= 3:
-                            ORANGE = (255, 165, 0)
-                            # Trouver une position libre pour les nouveaux fantômes
-                            existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                            new_x = 12
-                            new_y = 9
-                            # Chercher une position libre
-                            while (new_x, new_y) in existing_positions:
-                                new_x += 1
-                                if new_x >= GRID_WIDTH:
-                                    new_x = 0
-                                    new_y += 1
-                            new_ghost1 = Ghost(new_x, new_y, ORANGE)
-                            ghosts.append(new_ghost1)
-                            # Chercher une autre position libre pour le deuxième fantôme
-                            existing_positions.append((new_x, new_y))
-                            new_x2 = new_x + 1
-                            new_y2 = new_y
-                            while (new_x2, new_y2) in existing_positions:
-                                new_x2 += 1
-                                if new_x2 >= GRID_WIDTH:
-                                    new_x2 = 0
-                                    new_y2 += 1
-                            new_ghost2 = Ghost(new_x2, new_y2, ORANGE)
-                            ghosts.append(new_ghost2)
-                            new_ghost2.set_path(maze)
-                        # Ajouter 3 fantômes orange supplémentaires pour le mode hardcore (niveau 3+)
-                        if difficulty == "hardcore" and level >= 3:
-                            ORANGE = (255, 165, 0)
-                            # Trouver une position libre pour les nouveaux fantômes
-                            existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                            # Ajouter 3 fantômes orange
-                            for i in range(3):
-                                new_x = 12 + i
-                                new_y = 9
-                                # Chercher une position libre
-                                while (new_x, new_y) in existing_positions:
-                                    new_x += 1
-                                    if new_x >= GRID_WIDTH:
-                                        new_x = 0
-                                        new_y += 1
-                                        if new_y >= GRID_HEIGHT:
-                                            new_y = 0
-                                # Ajouter le fantôme orange
-                                new_ghost = Ghost(new_x, new_y, ORANGE)
-                                ghosts.append(new_ghost)
-                                new_ghost.set_path(maze)
-                                existing_positions.append((new_x, new_y))
-                        # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
-                        if indigestion_active:
-                            has_indigestion = True
-                            indigestion_timer = saved_indigestion_timer
-                            # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
-                            # Chercher une position valide (pas un mur) près de Pacman
-                            indigestion_ghost_x = None
-                            indigestion_ghost_y = None
-                            attempts = 0
-                            max_attempts = 50
-                            while indigestion_ghost_x is None and attempts < max_attempts:
-                                attempts += 1
-                                # Position aléatoire près de Pacman (à une distance de 2-5 cases)
-                                angle = random.random() * 2 * math.pi
-                                distance = random.randint(2, 5)
-                                test_x = int(pacman.x + distance * math.cos(angle))
-                                test_y = int(pacman.y + distance * math.sin(angle))
-                                # S'assurer que la position est dans les limites
-                                test_x = max(0, min(GRID_WIDTH - 1, test_x))
-                                test_y = max(0, min(GRID_HEIGHT - 1, test_y))
-                                # Vérifier que la position n'est pas un mur
-                                if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                    if maze[test_y][test_x] != 1:  # Pas un mur
-                                        indigestion_ghost_x = test_x
-                                        indigestion_ghost_y = test_y
-                            # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
-                            if indigestion_ghost_x is None:
-                                # Essayer les positions autour de Pacman
-                                for dx in range(-3, 4):
-                                    for dy in range(-3, 4):
-                                        test_x = pacman.x + dx
-                                        test_y = pacman.y + dy
-                                        if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                            if maze[test_y][test_x] != 1:  # Pas un mur
-                                                indigestion_ghost_x = test_x
-                                                indigestion_ghost_y = test_y
-                                                break
-                                    if indigestion_ghost_x is not None:
-                                        break
-                            # Si on a trouvé une position valide, créer le fantôme
-                            if indigestion_ghost_x is not None:
-                                # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
-                                indigestion_ghost_color = get_most_common_ghost_color(ghosts, level)
-                                indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True)
-                                ghosts.append(indigestion_ghost)
-                        else:
-                            has_indigestion = False
-                            indigestion_timer = 0
-                        vulnerable_timer = 0
-                        ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
-                        pacman_last_pos = (pacman.x, pacman.y)  # Réinitialiser la position précédente
-                # Vérifier si Pacman mange une pacgomme (à sa position ou devant si longue vue)
-                elif maze[pacman.y][pacman.x] == 3:
-                    # Enregistrer la position de la pacgomme mangée pour la faire réapparaître (seulement en mode aventure)
-                    if is_adventure_mode:
-                        pacgomme_timers[(pacman.x, pacman.y)] = PACGOMME_RESPAWN_TIME
-                    maze[pacman.y][pacman.x] = 0
-                    score += 50
-                    # Gagner 5 jetons pour chaque pacgomme mangée (10 si pièce mythique équipée) - sauf en mode aventure
-                    if not is_adventure_mode:
-                        if has_piece_mythique:
-                            jeton_count += 10
-                        else:
-                            jeton_count += 5
-                    
-                    # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
-                    if has_bon_gout:
-                        # "bon goût" seul : 1% de chance de coup critique
-                        crit_chance = 0.01
-                        if random.random() < crit_chance:
-                            # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                            is_rainbow_critique = True
-                            rainbow_timer = 20  # 2 secondes à 10 FPS
-                            if not is_adventure_mode:
-                                if has_piece_mythique:
-                                    jeton_count += 20
-                                else:
-                                    jeton_count += 10
-                    elif has_bon_repas:
-                        # "bon repas" seul : 0.5% de chance de coup critique
-                        crit_chance = 0.005
-                        if random.random() < crit_chance:
-                            # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                            is_rainbow_critique = True
-                            rainbow_timer = 20  # 2 secondes à 10 FPS
-                            if not is_adventure_mode:
-                                if has_piece_mythique:
-                                    jeton_count += 20
-                                else:
-                                    jeton_count += 10
-                    # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 2000 en hardcore, 200 sinon)
-                    if difficulty == "facile":
-                        jeton_threshold = 100
-                    elif difficulty == "difficile":
-                        jeton_threshold = 1000
-                    elif difficulty == "hardcore":
-                        jeton_threshold = 2000  # Pas de bonus de vie en hardcore (seuil très élevé)
-                    else:
-                        jeton_threshold = 200
-                    if jeton_count >= jeton_threshold:
-                        # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                        if lives < current_max_lives and difficulty != "difficile" and difficulty != "hardcore":
-                            lives += 1
-                        # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
-                        if not is_adventure_mode:
-                            jeton_poche += jeton_count
-                        crown_poche += crown_count
-                        jeton_count = 0  # Réinitialiser le compteur de jetons
-                        crown_count = 0  # Réinitialiser le compteur de couronnes
-                    
-                    # Mode difficile : bonus spécial à 4000 pacoins
-                    if difficulty == "difficile" and jeton_count >= 4000:
-                        # Transférer les pacoins et couronnes à la poche (sauf en mode aventure)
-                        if not is_adventure_mode:
-                            jeton_poche += jeton_count
-                        crown_poche += crown_count
-                        # Gagner 1 cœur
-                        if lives < current_max_lives:
-                            lives += 1
-                        # Réinitialiser les compteurs
-                        jeton_count = 0
-                        crown_count = 0
-                    
-                    # Calculer la durée de vulnérabilité en fonction du niveau de "pacgum"
-                    pacgum_level = capacite_items.count("pacgum") if capacite_items else 0
-                    vulnerable_duration = VULNERABLE_DURATION + (pacgum_level * 10)  # +1 seconde (10 frames) par niveau
-                    vulnerable_timer = vulnerable_duration
-                    # Rendre tous les fantômes vulnérables (sauf les fantômes roses qui ne sont pas affectés par le bonus de pacgomme)
-                    ROSE = (255, 192, 203)
-                    for ghost in ghosts:
-                        if not ghost.returning and ghost.color != ROSE:
-                            ghost.vulnerable = True
-                
-                # Si longue vue est équipée, récupérer les objets dans les directions appropriées
-                if has_longue_vue and len(directions) > 0:
-                    for check_x, check_y in directions:
-                        if 0 <= check_y < GRID_HEIGHT and 0 <= check_x < GRID_WIDTH:
-                            if maze[check_y][check_x] == 2:  # Point
-                                maze[check_y][check_x] = 0
-                                score += 10
-                                # Gagner un jeton pour chaque point mangé (2 si pièce mythique équipée) - sauf en mode aventure
-                                if not is_adventure_mode:
-                                    if has_piece_mythique:
-                                        jeton_count += 2
-                                    else:
-                                        jeton_count += 1
-                                
-                                # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
-                                if has_bon_gout:
-                                    # "bon goût" seul : 1% de chance de coup critique
-                                    crit_chance = 0.01
-                                    if random.random() < crit_chance:
-                                        # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                                        is_rainbow_critique = True
-                                        rainbow_timer = 20  # 2 secondes à 10 FPS
-                                        if not is_adventure_mode:
-                                            if has_piece_mythique:
-                                                jeton_count += 20
-                                            else:
-                                                jeton_count += 10
-                                elif has_bon_repas:
-                                    # "bon repas" seul : 0.5% de chance de coup critique
-                                    crit_chance = 0.005
-                                    if random.random() < crit_chance:
-                                        # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                                        is_rainbow_critique = True
-                                        rainbow_timer = 20  # 2 secondes à 10 FPS
-                                        if not is_adventure_mode:
-                                            if has_piece_mythique:
-                                                jeton_count += 20
-                                            else:
-                                                jeton_count += 10
-                                
-                                # Calculer la chance d'indigestion en fonction de "pas d'indigestion" et de la capacité "indigestion"
-                                base_indigestion_chance = 0.005  # 0.5% de base
-                                if has_pas_indigestion:
-                                    base_indigestion_chance = 0.0025  # Divisée par 2 si "pas d'indigestion" équipé
-                                
-                                # Réduire la chance selon le niveau de la capacité "indigestion" (10% de réduction par niveau)
-                                indigestion_capacity_level = capacite_items.count("indigestion") if capacite_items else 0
-                                reduction_factor = 1.0 - (indigestion_capacity_level * 0.1)  # Réduction de 10% par niveau
-                                reduction_factor = max(0.0, reduction_factor)  # Ne peut pas être négatif
-                                indigestion_chance = base_indigestion_chance * reduction_factor
-                                
-                                if random.random() < indigestion_chance and not has_indigestion:
-                                    # Indigestion : perdre 10 jetons et devenir vert pendant 1 minute
-                                    jeton_count = max(0, jeton_count - 10)
-                                    has_indigestion = True
-                                    indigestion_timer = 600  # 1 minute (60 secondes = 600 frames à 10 FPS)
-                                    # Vérifier qu'il n'y a pas déjà un fantôme d'indigestion
-                                    if not any(ghost.harmless for ghost in ghosts):
-                                        # Créer un fantôme d'indigestion inoffensif près de Pacman
-                                        # Chercher une position valide (pas un mur) près de Pacman
-                                        indigestion_ghost_x = None
-                                        indigestion_ghost_y = None
-                                        attempts = 0
-                                        max_attempts = 50
-                                        while indigestion_ghost_x is None and attempts < max_attempts:
-                                            attempts += 1
-                                            # Position aléatoire près de Pacman (à une distance de 2-5 cases)
-                                            angle = random.random() * 2 * math.pi
-                                            distance = random.randint(2, 5)
-                                            test_x = int(pacman.x + distance * math.cos(angle))
-                                            test_y = int(pacman.y + distance * math.sin(angle))
-                                            # S'assurer que la position est dans les limites
-                                            test_x = max(0, min(GRID_WIDTH - 1, test_x))
-                                            test_y = max(0, min(GRID_HEIGHT - 1, test_y))
-                                            # Vérifier que la position n'est pas un mur
-                                            if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                                if maze[test_y][test_x] != 1:  # Pas un mur
-                                                    indigestion_ghost_x = test_x
-                                                    indigestion_ghost_y = test_y
-                                        # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
-                                        if indigestion_ghost_x is None:
-                                            # Essayer les positions autour de Pacman
-                                            for dx in range(-3, 4):
-                                                for dy in range(-3, 4):
-                                                    test_x = pacman.x + dx
-                                                    test_y = pacman.y + dy
-                                                    if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                                        if maze[test_y][test_x] != 1:  # Pas un mur
-                                                            indigestion_ghost_x = test_x
-                                                            indigestion_ghost_y = test_y
-                                                            break
-                                                if indigestion_ghost_x is not None:
-                                                    break
-                                        # Si on a trouvé une position valide, créer le fantôme
-                                        if indigestion_ghost_x is not None:
-                                            # Utiliser la couleur la plus courante dans le niveau
-                                            indigestion_ghost_color = get_most_common_ghost_color(ghosts, level)
-                                            indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True)
-                                            ghosts.append(indigestion_ghost)
-                                # Vérifier si on a atteint le seuil de jetons pour gagner une vie
-                                if difficulty == "facile":
-                                    jeton_threshold = 100
-                                elif difficulty == "difficile":
-                                    jeton_threshold = 1000
-                                else:
-                                    jeton_threshold = 200
-                                if jeton_count >= jeton_threshold:
-                                    # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                                    if lives < MAX_LIVES and difficulty != "difficile" and difficulty != "hardcore":
-                                        lives += 1
-                                    if not is_adventure_mode:
-                                        jeton_poche += jeton_count
-                                    crown_poche += crown_count
-                                    jeton_count = 0
-                                    crown_count = 0
-                                
-                                # Mode difficile : bonus spécial à 4000 pacoins
-                                if difficulty == "difficile" and jeton_count >= 4000:
-                                    # Transférer les pacoins et couronnes à la poche (sauf en mode aventure)
-                                    if not is_adventure_mode:
-                                        jeton_poche += jeton_count
-                                    crown_poche += crown_count
-                                    # Gagner 1 cœur
-                                    if lives < MAX_LIVES:
-                                        lives += 1
-                                    # Réinitialiser les compteurs
-                                    jeton_count = 0
-                                    crown_count = 0
-                                
-                                if count_points(maze) == 0:
-                                    level += 1
-                                    # Récompense au niveau 17 en mode facile
-                                    if difficulty == "facile" and level == 17:
-                                        crown_poche += 1  # Gagner 1 couronne
-                                        jeton_poche += 50  # Gagner 50 pacoins
-                                    # Récompense au niveau 25 en mode moyen
-                                    if difficulty == "moyen" and level == 25:
-                                        crown_poche += 55  # Gagner 55 couronnes
-                                        jeton_poche += 1000  # Gagner 1000 pacoins
-                                    # Récompense au niveau 30 en mode difficile
-                                    if difficulty == "difficile" and level == 30:
-                                        crown_poche += 60  # Gagner 60 couronnes
-                                        jeton_poche += 1500  # Gagner 1500 pacoins
-                                    # Récompense au niveau 50 en mode hardcore
-                                    if difficulty == "hardcore" and level == 50:
-                                        crown_poche += 1000  # Gagner 1000 couronnes
-                                        jeton_poche += 200000  # Gagner 200000 pacoins
-                                    # Vérifier si on a gagné au niveau 24 (en moyenne)
-                                    if level == 24:
-                                        won = True
-                                        crown_poche += 10  # Gagner 10 couronnes
-                                        jeton_poche += 500  # Gagner 500 pacoins
-                                        # Arrêter la musique si elle est en cours
-                                        if music_playing:
-                                            pygame.mixer.music.stop()
-                                            music_playing = False
-                                    # Vérifier si on a gagné (niveau 20 en mode facile)
-                                    if difficulty == "facile" and level >= 20:
-                                        won = True
-                                        # Arrêter la musique si elle est en cours
-                                        if music_playing:
-                                            pygame.mixer.music.stop()
-                                            music_playing = False
-                                    # Vérifier si on a gagné au niveau 20 sans difficulté choisie
-                                    if difficulty is None and level >= 20:
-                                        won = True
-                                        # Arrêter la musique si elle est en cours
-                                        if music_playing:
-                                            pygame.mixer.music.stop()
-                                            music_playing = False
-                                        crown_poche += 10  # Gagner 10 couronnes
-                                        jeton_poche += 500  # Gagner 500 pacoins
-                                    level_transition = True
-                                    level_transition_timer = 60
-                                    # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
-                                    indigestion_active = has_indigestion and indigestion_timer > 0
-                                    saved_indigestion_timer = indigestion_timer
-                                    # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
-                                    ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
-                                    maze, pacman, ghosts = start_next_level(level)
-                                    # Ajouter un fantôme bleu supplémentaire pour le mode moyen (niveau 3+)
-                                    if difficulty == "moyen" and level >= 3:
-                                        new_ghost = Ghost(12, 9, BLUE)
-                                        ghosts.append(new_ghost)
-                                        new_ghost.set_path(maze)
-                                    # Ajouter 2 fantômes orange supplémentaires pour le mode difficile (niveau 3+)
-                                    if difficulty == "difficile" and level >= 3:
-                                        ORANGE = (255, 165, 0)
-                                        # Trouver une position libre pour les nouveaux fantômes
-                                        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                                        new_x = 12
-                                        new_y = 9
-                                        # Chercher une position libre
-                                        while (new_x, new_y) in existing_positions:
-                                            new_x += 1
-                                            if new_x >= GRID_WIDTH:
-                                                new_x = 0
-                                                new_y += 1
-                                        new_ghost1 = Ghost(new_x, new_y, ORANGE)
-                                        ghosts.append(new_ghost1)
-                                        # Chercher une autre position libre pour le deuxième fantôme
-                                        existing_positions.append((new_x, new_y))
-                                        new_x2 = new_x + 1
-                                        new_y2 = new_y
-                                        while (new_x2, new_y2) in existing_positions:
-                                            new_x2 += 1
-                                            if new_x2 >= GRID_WIDTH:
-                                                new_x2 = 0
-                                                new_y2 += 1
-                                        new_ghost2 = Ghost(new_x2, new_y2, ORANGE)
-                                        ghosts.append(new_ghost2)
-                                        new_ghost2.set_path(maze)
-                                    # Ajouter 3 fantômes orange supplémentaires pour le mode hardcore (niveau 3+)
-                                    if difficulty == "hardcore" and level >= 3:
-                                        ORANGE = (255, 165, 0)
-                                        # Trouver une position libre pour les nouveaux fantômes
-                                        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                                        # Ajouter 3 fantômes orange
-                                        for i in range(3):
-                                            new_x = 12 + i
-                                            new_y = 9
-                                            # Chercher une position libre
-                                            while (new_x, new_y) in existing_positions:
-                                                new_x += 1
-                                                if new_x >= GRID_WIDTH:
-                                                    new_x = 0
-                                                    new_y += 1
-                                                    if new_y >= GRID_HEIGHT:
-                                                        new_y = 0
-                                            # Ajouter le fantôme orange
-                                            new_ghost = Ghost(new_x, new_y, ORANGE)
-                                            ghosts.append(new_ghost)
-                                            new_ghost.set_path(maze)
-                                            existing_positions.append((new_x, new_y))
-                                    # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
-                                    if indigestion_active:
-                                        has_indigestion = True
-                                        indigestion_timer = saved_indigestion_timer
-                                        # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
-                                        # Chercher une position valide (pas un mur) près de Pacman
-                                        indigestion_ghost_x = None
-                                        indigestion_ghost_y = None
-                                        attempts = 0
-                                        max_attempts = 50
-                                        while indigestion_ghost_x is None and attempts < max_attempts:
-                                            attempts += 1
-                                            # Position aléatoire près de Pacman (à une distance de 2-5 cases)
-                                            angle = random.random() * 2 * math.pi
-                                            distance = random.randint(2, 5)
-                                            test_x = int(pacman.x + distance * math.cos(angle))
-                                            test_y = int(pacman.y + distance * math.sin(angle))
-                                            # S'assurer que la position est dans les limites
-                                            test_x = max(0, min(GRID_WIDTH - 1, test_x))
-                                            test_y = max(0, min(GRID_HEIGHT - 1, test_y))
-                                            # Vérifier que la position n'est pas un mur
-                                            if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                                if maze[test_y][test_x] != 1:  # Pas un mur
-                                                    indigestion_ghost_x = test_x
-                                                    indigestion_ghost_y = test_y
-                                        # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
-                                        if indigestion_ghost_x is None:
-                                            # Essayer les positions autour de Pacman
-                                            for dx in range(-3, 4):
-                                                for dy in range(-3, 4):
-                                                    test_x = pacman.x + dx
-                                                    test_y = pacman.y + dy
-                                                    if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                                        if maze[test_y][test_x] != 1:  # Pas un mur
-                                                            indigestion_ghost_x = test_x
-                                                            indigestion_ghost_y = test_y
-                                                            break
-                                                if indigestion_ghost_x is not None:
-                                                    break
-                                        # Si on a trouvé une position valide, créer le fantôme
-                                        if indigestion_ghost_x is not None:
-                                            # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
-                                            indigestion_ghost_color = get_most_common_ghost_color(ghosts, level)
-                                            indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True)
-                                            ghosts.append(indigestion_ghost)
-                                    else:
-                                        has_indigestion = False
-                                        indigestion_timer = 0
-                                    vulnerable_timer = 0
-                                    ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
-                                    pacman_last_pos = (pacman.x, pacman.y)  # Réinitialiser la position précédente
-                            elif maze[check_y][check_x] == 3:  # Pacgomme
-                                # Enregistrer la position de la pacgomme mangée pour la faire réapparaître (seulement en mode aventure)
-                                if is_adventure_mode:
-                                    pacgomme_timers[(check_x, check_y)] = PACGOMME_RESPAWN_TIME
-                                maze[check_y][check_x] = 0
-                                score += 50
-                                # Gagner 5 jetons pour chaque pacgomme mangée (10 si pièce mythique équipée) - sauf en mode aventure
-                                if not is_adventure_mode:
-                                    if has_piece_mythique:
-                                        jeton_count += 10
-                                    else:
-                                        jeton_count += 5
-                                
-                                # Coup critique : "bon goût" seul donne 1%, "bon repas" seul donne 0.5%
-                                if has_bon_gout:
-                                    # "bon goût" seul : 1% de chance de coup critique
-                                    crit_chance = 0.01
-                                    if random.random() < crit_chance:
-                                        # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                                        is_rainbow_critique = True
-                                        rainbow_timer = 20  # 2 secondes à 10 FPS
-                                        if not is_adventure_mode:
-                                            if has_piece_mythique:
-                                                jeton_count += 20
-                                            else:
-                                                jeton_count += 10
-                                elif has_bon_repas:
-                                    # "bon repas" seul : 0.5% de chance de coup critique
-                                    crit_chance = 0.005
-                                    if random.random() < crit_chance:
-                                        # Coup critique : arc-en-ciel pendant 2 secondes et +10 jetons (20 si pièce mythique équipée)
-                                        is_rainbow_critique = True
-                                        rainbow_timer = 20  # 2 secondes à 10 FPS
-                                        if not is_adventure_mode:
-                                            if has_piece_mythique:
-                                                jeton_count += 20
-                                            else:
-                                                jeton_count += 10
-                                # Vérifier si on a atteint le seuil de jetons pour gagner une vie
-                                if difficulty == "facile":
-                                    jeton_threshold = 100
-                                elif difficulty == "difficile":
-                                    jeton_threshold = 1000
-                                else:
-                                    jeton_threshold = 200
-                                if jeton_count >= jeton_threshold:
-                                    # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                                    if lives < MAX_LIVES and difficulty != "difficile" and difficulty != "hardcore":
-                                        lives += 1
-                                    if not is_adventure_mode:
-                                        jeton_poche += jeton_count
-                                    crown_poche += crown_count
-                                    jeton_count = 0
-                                    crown_count = 0
-                                # Calculer la durée de vulnérabilité en fonction du niveau de "pacgum"
-                                pacgum_level = capacite_items.count("pacgum") if capacite_items else 0
-                                vulnerable_duration = VULNERABLE_DURATION + (pacgum_level * 10)  # +1 seconde (10 frames) par niveau
-                                vulnerable_timer = vulnerable_duration
-                                # Rendre tous les fantômes vulnérables (sauf les fantômes roses qui ne sont pas affectés par le bonus de pacgomme)
-                                ROSE = (255, 192, 203)
-                                for ghost in ghosts:
-                                    if not ghost.returning and ghost.color != ROSE:
-                                        ghost.vulnerable = True
-                
-                # Vérifier si tous les points sont collectés
-                if count_points(maze) == 0:
-                    # Passer au niveau suivant
-                    level += 1
-                    # Récompense au niveau 17 en mode facile
-                    if difficulty == "facile" and level == 17:
-                        crown_poche += 1  # Gagner 1 couronne
-                        jeton_poche += 50  # Gagner 50 pacoins
-                    # Récompense au niveau 25 en mode moyen
-                    if difficulty == "moyen" and level == 25:
-                        crown_poche += 55  # Gagner 55 couronnes
-                        jeton_poche += 1000  # Gagner 1000 pacoins
-                    # Récompense au niveau 30 en mode difficile
-                    if difficulty == "difficile" and level == 30:
-                        crown_poche += 60  # Gagner 60 couronnes
-                        jeton_poche += 1500  # Gagner 1500 pacoins
-                    # Récompense au niveau 50 en mode hardcore
-                    if difficulty == "hardcore" and level == 50:
-                        crown_poche += 1000  # Gagner 1000 couronnes
-                        jeton_poche += 200000  # Gagner 200000 pacoins
-                    # Vérifier si on a gagné au niveau 24 (en moyenne)
-                    if level == 24:
-                        won = True
-                        crown_poche += 10  # Gagner 10 couronnes
-                        jeton_poche += 500  # Gagner 500 pacoins
-                        # Arrêter la musique si elle est en cours
-                        if music_playing:
-                            pygame.mixer.music.stop()
-                            music_playing = False
-                    # Vérifier si on a gagné (niveau 20 en mode facile)
-                    if difficulty == "facile" and level >= 20:
-                        won = True
-                        # Arrêter la musique si elle est en cours
-                        if music_playing:
-                            pygame.mixer.music.stop()
-                            music_playing = False
-                    # Vérifier si on a gagné au niveau 20 sans difficulté choisie
-                    if difficulty is None and level >= 20:
-                        won = True
-                        # Arrêter la musique si elle est en cours
-                        if music_playing:
-                            pygame.mixer.music.stop()
-                            music_playing = False
-                        crown_poche += 10  # Gagner 10 couronnes
-                        jeton_poche += 500  # Gagner 500 pacoins
-                    level_transition = True
-                    level_transition_timer = 60  # 2 secondes de transition
-                    # Sauvegarder l'état de l'indigestion avant de passer au niveau suivant
-                    indigestion_active = has_indigestion and indigestion_timer > 0
-                    saved_indigestion_timer = indigestion_timer
-                    # Supprimer le fantôme d'indigestion s'il existe avant de passer au niveau suivant
-                    ghosts[:] = [ghost for ghost in ghosts if not ghost.harmless]
-                    maze, pacman, ghosts = start_next_level(level)
-                    # Ajouter un fantôme bleu supplémentaire pour le mode moyen (niveau 3+)
-                    if difficulty == "moyen" and level >= 3:
-                        new_ghost = Ghost(12, 9, BLUE)
-                        ghosts.append(new_ghost)
-                        new_ghost.set_path(maze)
-                    # Ajouter 2 fantômes orange supplémentaires pour le mode difficile (niveau 3+)
-                    if difficulty == "difficile" and level >= 3:
-                        ORANGE = (255, 165, 0)
-                        # Trouver une position libre pour les nouveaux fantômes
-                        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                        new_x = 12
-                        new_y = 9
-                        # Chercher une position libre
-                        while (new_x, new_y) in existing_positions:
-                            new_x += 1
-                            if new_x >= GRID_WIDTH:
-                                new_x = 0
-                                new_y += 1
-                        new_ghost1 = Ghost(new_x, new_y, ORANGE)
-                        ghosts.append(new_ghost1)
-                        new_ghost1.set_path(maze)
-                        # Chercher une autre position libre pour le deuxième fantôme
-                        existing_positions.append((new_x, new_y))
-                        new_x2 = new_x + 1
-                        new_y2 = new_y
-                        while (new_x2, new_y2) in existing_positions:
-                            new_x2 += 1
-                            if new_x2 >= GRID_WIDTH:
-                                new_x2 = 0
-                                new_y2 += 1
-                        new_ghost2 = Ghost(new_x2, new_y2, ORANGE)
-                        ghosts.append(new_ghost2)
-                        new_ghost2.set_path(maze)
-                    # Ajouter 3 fantômes orange supplémentaires pour le mode hardcore (niveau 3+)
-                    if difficulty == "hardcore" and level >= 3:
-                        ORANGE = (255, 165, 0)
-                        # Trouver une position libre pour les nouveaux fantômes
-                        existing_positions = [(ghost.x, ghost.y) for ghost in ghosts]
-                        # Ajouter 3 fantômes orange
-                        for i in range(3):
-                            new_x = 12 + i
-                            new_y = 9
-                            # Chercher une position libre
-                            while (new_x, new_y) in existing_positions:
-                                new_x += 1
-                                if new_x >= GRID_WIDTH:
-                                    new_x = 0
-                                    new_y += 1
-                                    if new_y >= GRID_HEIGHT:
-                                        new_y = 0
-                            # Ajouter le fantôme orange
-                            new_ghost = Ghost(new_x, new_y, ORANGE)
-                            ghosts.append(new_ghost)
-                            new_ghost.set_path(maze)
-                            existing_positions.append((new_x, new_y))
-                    # Si l'indigestion était active, la recréer dans le nouveau niveau (après l'ajout des fantômes supplémentaires)
-                    if indigestion_active:
-                        has_indigestion = True
-                        indigestion_timer = saved_indigestion_timer
-                        # Créer un fantôme d'indigestion inoffensif près de Pacman dans le nouveau niveau
-                        # Chercher une position valide (pas un mur) près de Pacman
-                        indigestion_ghost_x = None
-                        indigestion_ghost_y = None
-                        attempts = 0
-                        max_attempts = 50
-                        while indigestion_ghost_x is None and attempts < max_attempts:
-                            attempts += 1
-                            # Position aléatoire près de Pacman (à une distance de 2-5 cases)
-                            angle = random.random() * 2 * math.pi
-                            distance = random.randint(2, 5)
-                            test_x = int(pacman.x + distance * math.cos(angle))
-                            test_y = int(pacman.y + distance * math.sin(angle))
-                            # S'assurer que la position est dans les limites
-                            test_x = max(0, min(GRID_WIDTH - 1, test_x))
-                            test_y = max(0, min(GRID_HEIGHT - 1, test_y))
-                            # Vérifier que la position n'est pas un mur
-                            if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                if maze[test_y][test_x] != 1:  # Pas un mur
-                                    indigestion_ghost_x = test_x
-                                    indigestion_ghost_y = test_y
-                        # Si on n'a pas trouvé de position valide après plusieurs tentatives, utiliser une position proche de Pacman
-                        if indigestion_ghost_x is None:
-                            # Essayer les positions autour de Pacman
-                            for dx in range(-3, 4):
-                                for dy in range(-3, 4):
-                                    test_x = pacman.x + dx
-                                    test_y = pacman.y + dy
-                                    if 0 <= test_y < GRID_HEIGHT and 0 <= test_x < GRID_WIDTH:
-                                        if maze[test_y][test_x] != 1:  # Pas un mur
-                                            indigestion_ghost_x = test_x
-                                            indigestion_ghost_y = test_y
-                                            break
-                                if indigestion_ghost_x is not None:
-                                    break
-                        # Si on a trouvé une position valide, créer le fantôme
-                        if indigestion_ghost_x is not None:
-                            # Utiliser la couleur la plus courante dans le niveau (après l'ajout des fantômes supplémentaires)
-                            indigestion_ghost_color = get_most_common_ghost_color(ghosts, level)
-                            indigestion_ghost = Ghost(indigestion_ghost_x, indigestion_ghost_y, indigestion_ghost_color, harmless=True)
-                            ghosts.append(indigestion_ghost)
-                    else:
-                        has_indigestion = False
-                        indigestion_timer = 0
-                    vulnerable_timer = 0
-                    ice_tiles = {}  # Réinitialiser les cases de glace au nouveau niveau
-                    fire_tiles = {}  # Réinitialiser les cases de feu au nouveau niveau
-                    fire_active = False  # Réinitialiser l'activation du feu
-                    fire_timer = 0  # Réinitialiser le timer du feu
-                    gadget_cooldown = 0  # Réinitialiser le temps de recharge du gadget
-                    mort_cooldown = 0  # Réinitialiser le temps de recharge de "mort"
-                    bombe_cooldown = 0  # Réinitialiser le temps de recharge de "bombe téléguidée"
-                    bombe_active = False  # Réinitialiser l'état de la bombe
-                    pacman_frozen = False  # Réinitialiser l'état de gel de Pacman
-                    bombe_timer = 0  # Réinitialiser le timer de la bombe
-                    # Les pièges persistent entre les niveaux et les retours
-                    portal1_pos = None  # Réinitialiser les portails
-                    portal2_pos = None
-                    portal_use_count = 0
-                    # Enlever le mur créé du maze si nécessaire
-                    if mur_pos is not None:
-                        if isinstance(mur_pos, list):
-                            # Si c'est une liste (cas avec bric), enlever tous les murs
-                            for mur_x, mur_y in mur_pos:
-                                if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                    maze[mur_y][mur_x] = 0  # Remettre en chemin
-                        else:
-                            # Si c'est un tuple (comportement normal)
-                            mur_x, mur_y = mur_pos
-                            if 0 <= mur_y < GRID_HEIGHT and 0 <= mur_x < GRID_WIDTH:
-                                maze[mur_y][mur_x] = 0  # Remettre en chemin
-                    mur_pos = None  # Réinitialiser le mur
-                    mur_use_count = 0
-                    pacman_last_pos = (pacman.x, pacman.y)  # Réinitialiser la position précédente
-                    # Réinitialiser les flee_timer et immobilized_timer des fantômes
-                    for ghost in ghosts:
-                        ghost.flee_timer = 0
-                        ghost.immobilized_timer = 0
-                
-                # Mettre à jour le timer de vulnérabilité
-                if vulnerable_timer > 0:
-                    vulnerable_timer -= 1
-                    if vulnerable_timer == 0:
-                        # Les fantômes redeviennent normaux
-                        for ghost in ghosts:
-                            if not ghost.returning:
-                                ghost.vulnerable = False
-                
-                # Décrémenter le flee_timer de tous les fantômes
-                for ghost in ghosts:
-                    if ghost.flee_timer > 0:
-                        ghost.flee_timer -= 1
-                
-                # Mettre à jour les fantômes
-                ghosts_to_remove = []  # Liste des fantômes à supprimer en mode aventure
-                for ghost in ghosts:
-                    # Vérifier si le fantôme marche sur un piège
-                    ghost_pos = (ghost.x, ghost.y)
-                    ORANGE = (255, 165, 0)
-                    ROSE = (255, 192, 203)
-                    if ghost_pos in pieges and not ghost.eyes and not ghost.harmless and ghost.color != ORANGE and ghost.color != ROSE:
-                        # Le fantôme marche sur un piège, l'immobiliser
-                        if ghost.immobilized_timer == 0:  # Ne pas réinitialiser si déjà immobilisé
-                            # Calculer le bonus de "piquant" si équipé
-                            has_piquant_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'piquant') or
-                                                   ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'piquant'))
-                            piquant_level = capacite_items.count("piquant") if capacite_items else 0
-                            piquant_bonus = piquant_level * 10 if has_piquant_capacity else 0  # 1 seconde = 10 frames par niveau
-                            ghost.immobilized_timer = PIEGE_IMMOBILISATION_DURATION + piquant_bonus  # 10 secondes + bonus
-                            # Retirer le piège après activation (un piège ne peut être utilisé qu'une fois)
-                            del pieges[ghost_pos]
-                    
-                    # Décrémenter le timer d'immobilisation
-                    if ghost.immobilized_timer > 0:
-                        ghost.immobilized_timer -= 1
-                    
-                    # Vérifier si le fantôme est sur une case de feu
-                    is_on_fire = ghost_pos in fire_tiles
-                    
-                    if is_on_fire and not ghost.eyes and not ghost.harmless:
-                        # Le fantôme touche le feu, le faire fuir (durée calculée selon si "flamme" est équipé)
-                        ghost.flee_timer = calculate_fire_duration(inventaire_items, FIRE_DURATION)
-                    
-                    # Si le fantôme est immobilisé, ne pas le mettre à jour
-                    if ghost.immobilized_timer > 0:
-                        # Le fantôme est immobilisé, ne pas le déplacer
-                        continue
-                    
-                    # Vérifier si le fantôme est sur une case de glace
-                    is_on_ice = ghost_pos in ice_tiles
-                    
-                    # Vérifier si "givre" est équipé avec "glace"
-                    has_glace = ('pouvoir' in inventaire_items and 
-                                inventaire_items['pouvoir'].get('type') == 'glace')
-                    has_givre = (('objet0' in inventaire_items and inventaire_items['objet0'].get('type') == 'givre') or
-                                ('objet1' in inventaire_items and inventaire_items['objet1'].get('type') == 'givre') or
-                                ('objet2' in inventaire_items and inventaire_items['objet2'].get('type') == 'givre'))
-                    # Si "givre" est équipé avec "glace", ralentissement plus fort (5 frames au lieu de 3)
-                    ice_slowdown_threshold = 5 if (has_glace and has_givre) else 3
-                    
-                    if is_on_ice:
-                        # Ralentissement selon si "givre" est équipé avec "glace"
-                        ghost.ice_slowdown += 1
-                        if ghost.ice_slowdown >= ice_slowdown_threshold:
-                            ghost.update(maze, (pacman.x, pacman.y))
-                            ghost.ice_slowdown = 0
-                    else:
-                        # Déplacement normal
-                        ghost.ice_slowdown = 0
-                        ghost.update(maze, (pacman.x, pacman.y))
-                    
-                    # Vérifier si "lunette" est équipée dans un slot capacité
-                    has_lunette_capacity = (('capacite1' in inventaire_items and inventaire_items['capacite1'].get('type') == 'lunette') or
-                                           ('capacite2' in inventaire_items and inventaire_items['capacite2'].get('type') == 'lunette'))
-                    lunette_level = capacite_items.count("lunette") if capacite_items else 0
-                    # La distance de base est 1, augmentée de 1 par niveau de lunette si équipée avec longue vue
-                    distance = 1
-                    if has_longue_vue and has_lunette_capacity:
-                        distance = 1 + lunette_level  # Distance = 1 + niveau de lunette
-                    
-                    # Calculer les directions pour manger les fantômes
-                    directions = []
-                    if is_double_longue_vue:
-                        # Toutes les directions avec la distance augmentée par lunette
-                        for d in range(1, distance + 1):
-                            directions.append((pacman.x + d, pacman.y))  # Droite
-                            directions.append((pacman.x - d, pacman.y))  # Gauche
-                            directions.append((pacman.x, pacman.y + d))  # Bas
-                            directions.append((pacman.x, pacman.y - d))  # Haut
-                        # Gérer la téléportation aux bords pour chaque direction
-                        for i, (dx, dy) in enumerate(directions):
-                            if dx < 0:
-                                directions[i] = (GRID_WIDTH - 1, dy)
-                            elif dx >= GRID_WIDTH:
-                                directions[i] = (0, dy)
-                    elif has_longue_vue and pacman.direction != (0, 0):
-                        # Devant pour la longue vue simple avec distance augmentée par lunette
-                        for d in range(1, distance + 1):
-                            dir_x = pacman.x + pacman.direction[0] * d
-                            dir_y = pacman.y + pacman.direction[1] * d
-                            # Gérer la téléportation aux bords
-                            if dir_x < 0:
-                                dir_x = GRID_WIDTH - 1
-                            elif dir_x >= GRID_WIDTH:
-                                dir_x = 0
-                            directions.append((dir_x, dir_y))
-                    
-                    # Si longue vue est équipée et le fantôme est dans une direction valide ET vulnérable, on peut le manger
-                    # Pour manger un fantôme, il faut toujours qu'il soit vulnérable (après avoir mangé une pacgomme)
-                    # Les fantômes roses ne peuvent pas être mangés par la longue vue
-                    ROSE = (255, 192, 203)
-                    if has_longue_vue and len(directions) > 0:
-                        ghost_in_range = (ghost.x, ghost.y) in directions
-                        if ghost_in_range and not ghost.eyes and ghost.vulnerable and ghost.color != ROSE:
-                            # En mode aventure, supprimer le fantôme définitivement (pas de réapparition)
-                            if is_adventure_mode:
-                                # Supprimer le fantôme immédiatement en mode aventure
-                                ghosts.remove(ghost)
-                                continue  # Passer au fantôme suivant
-                            # Manger le fantôme vulnérable avec longue vue (mode normal)
-                            score += 300
-                            if difficulty == "facile":
-                                jeton_threshold = 100
-                            elif difficulty == "difficile":
-                                jeton_threshold = 1000
-                            elif difficulty == "hardcore":
-                                jeton_threshold = 2000
-                            else:
-                                jeton_threshold = 200
-                            if jeton_count >= jeton_threshold:
-                                # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                                    if lives < MAX_LIVES and difficulty != "difficile" and difficulty != "hardcore":
-                                        lives += 1
-                                    if not is_adventure_mode:
-                                        jeton_poche += jeton_count
-                                    crown_poche += crown_count
-                                    jeton_count = 0
-                                    crown_count = 0
-                            # En mode aventure, marquer le fantôme pour suppression définitive (pas de réapparition)
-                            if is_adventure_mode:
-                                # Marquer le fantôme pour suppression (on le supprimera après la boucle)
-                                ghosts_to_remove.append(ghost)
-                                continue  # Passer au fantôme suivant
-                            crown_timer = 30
-                            crown_count += 1
-                            if last_ghost_time > 0:
-                                grande_couronne_count += 1
-                            last_ghost_time = 100
-                            ghost.eyes = True
-                            ghost.vulnerable = False
-                            ghost.returning = False
-                            continue  # Passer au fantôme suivant
-                    
-                    # Vérifier collision avec Pacman (ignorer si invincible)
-                    # Si longue vue est équipée et le fantôme est dans une direction adjacente (pas sur la même case), on est protégé
-                    # Pour la double longue vue, protection dans les 4 directions adjacentes même sans pacgomme
-                    # Mais si le fantôme arrive directement sur la case de Pacman, on perd une vie
-                    if has_longue_vue and len(directions) > 0:
-                        ghost_in_range = (ghost.x, ghost.y) in directions
-                        if ghost_in_range:
-                            # Le fantôme est dans une direction adjacente couverte, on est protégé, pas de collision
-                            continue
-                    
-                    # Vérifier collision : même case OU cases adjacentes avec directions opposées
-                    collision = False
-                    # Collision sur la même case
-                    if ghost.x == pacman.x and ghost.y == pacman.y:
-                        collision = True
-                    # Collision sur cases adjacentes si les deux se dirigent l'un vers l'autre
-                    elif invincibility_timer == 0 and not super_vie_active:
-                        # Calculer la direction du fantôme vers Pacman
-                        dx = pacman.x - ghost.x
-                        dy = pacman.y - ghost.y
-                        # Vérifier si le fantôme est adjacent à Pacman (distance de 1 case)
-                        if abs(dx) + abs(dy) == 1:
-                            # Normaliser la direction (dx et dy doivent être -1, 0, ou 1)
-                            if dx != 0:
-                                dx = 1 if dx > 0 else -1
-                            if dy != 0:
-                                dy = 1 if dy > 0 else -1
-                            # Vérifier si le fantôme se dirige vers Pacman (direction du fantôme = direction vers Pacman)
-                            ghost_going_to_pacman = (ghost.direction[0] == dx and ghost.direction[1] == dy)
-                            # Vérifier si Pacman se dirige vers le fantôme (direction de Pacman = direction opposée vers le fantôme)
-                            pacman_going_to_ghost = (pacman.direction[0] == -dx and pacman.direction[1] == -dy)
-                            # Collision si les deux se dirigent l'un vers l'autre
-                            if ghost_going_to_pacman and pacman_going_to_ghost:
-                                collision = True
+            # Boucle à pas de temps fixe : le jeu avance à sa propre vitesse, quel que soit le rythme d'affichage
+            tick_duration = 1000 / get_tick_rate(state.level)
+            tick_accumulator = min(tick_accumulator + frame_time, tick_duration * MAX_TICKS_PER_FRAME)
+            while tick_accumulator >= tick_duration:
+                tick_accumulator -= tick_duration
+                if replay_recorder is not None:
+                    replay_recorder.record(game_inputs)
+                step(state, game_inputs)
+                # Verser dans la poche les jetons et couronnes gagnés pendant le tick
+                jeton_poche += state.jeton_poche_gain
+                crown_poche += state.crown_poche_gain
+                state.jeton_poche_gain = 0
+                state.crown_poche_gain = 0
+                for game_event in state.events:
+                    if game_event == "premier_niveau" and not first_level_success_unlocked:
+                        first_level_success_unlocked = True
+                        # Vérifier si ce trophée a déjà été gagné par n'importe quel compte
+                        trophy_already_earned = False
+                        for account in accounts:
+                            if TROPHY_FIRST_LEVEL in account.get('trophies', []):
+                                trophy_already_earned = True
+                                break
                     
-                    if collision and invincibility_timer == 0 and not super_vie_active:
-                        # Si le fantôme est en mode yeux, pas de collision
-                        if ghost.eyes:
-                            continue
-                        # Si le fantôme est vulnérable, Pacman le mange
-                        if ghost.vulnerable:
-                            # En mode aventure, gérer les fantômes spéciaux qui nécessitent plusieurs coups
-                            if is_adventure_mode:
-                                # Incrémenter le compteur de coups reçus
-                                ghost.hits_taken += 1
-                                # Si le fantôme a reçu assez de coups, le tuer définitivement (pas de réapparition)
-                                if ghost.hits_taken >= ghost.hits_required:
-                                    # Marquer le fantôme pour suppression (on le supprimera après la boucle)
-                                    # Ne pas enregistrer dans ghost_timers pour qu'il ne réapparaisse pas
-                                    ghosts_to_remove.append(ghost)
-                                else:
-                                    # Le fantôme n'est pas encore mort, juste rendre non-vulnérable temporairement
-                                    ghost.vulnerable = False
-                                    # Réinitialiser la position du fantôme à sa position de départ
-                                    ghost.x = ghost.start_x
-                                    ghost.y = ghost.start_y
-                                continue  # Passer au fantôme suivant
-                            # Pacman mange le fantôme - transformer en yeux (mode normal)
-                            score += 300  # 200 points de base + 100 points bonus
-                            # Gagner 30 XP pour le passe de combat
-                            # S'assurer que battle_pass_xp est un entier
-                            if not isinstance(battle_pass_xp, (int, float)):
-                                battle_pass_xp = 0
-                            xp_gained = 30
-                            # Si le doubleur d'XP est actif, doubler l'XP
-                            if xp_doubler_active:
-                                xp_gained *= 2
-                            # Calculer le nouveau XP
-                            new_xp = int(battle_pass_xp) + xp_gained
-                            # Limiter l'XP au niveau 30 si toutes les récompenses ne sont pas récupérées
-                            MAX_BATTLE_PASS_LEVEL = 30
-                            XP_PER_LEVEL = 100
-                            MAX_BATTLE_PASS_XP = MAX_BATTLE_PASS_LEVEL * XP_PER_LEVEL
-                            if new_xp >= MAX_BATTLE_PASS_XP:
-                                # Vérifier si toutes les récompenses ont été récupérées
-                                if not all_battle_pass_rewards_claimed(battle_pass_claimed_rewards, used_stars, MAX_BATTLE_PASS_LEVEL):
-                                    # Bloquer l'XP au maximum du niveau 30
-                                    new_xp = MAX_BATTLE_PASS_XP
-                            battle_pass_xp = new_xp
-                            vulnerable_ghosts_eaten_this_game += 1  # Compter le fantôme mangé
-                            # Sauvegarder l'XP gagné
-                            if current_account_index is not None:
-                                auto_save_account_data(current_account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, accounts, battle_pass_plus_claimed_rewards, used_stars_plus)
-                            # Vérifier si on a atteint le seuil de jetons pour gagner une vie (100 en facile, 1000 en difficile, 200 sinon)
-                            if difficulty == "facile":
-                                jeton_threshold = 100
-                            elif difficulty == "difficile":
-                                jeton_threshold = 1000
-                            else:
-                                jeton_threshold = 200
-                            if jeton_count >= jeton_threshold:
-                                # En mode difficile et hardcore, on ne peut pas gagner de vies avec les jetons
-                                if lives < MAX_LIVES and difficulty != "difficile" and difficulty != "hardcore":
-                                    lives += 1
-                                # Mettre les jetons et couronnes dans la poche (sauf en mode aventure)
-                                if not is_adventure_mode:
-                                    jeton_poche += jeton_count
-                                crown_poche += crown_count
-                                jeton_count = 0  # Réinitialiser le compteur de jetons
-                                crown_count = 0  # Réinitialiser le compteur de couronnes
-                            # Activer la couronne pendant 3 secondes
-                            crown_timer = 30  # 3 secondes (30 frames à 10 FPS)
-                            crown_count += 1  # Incrémenter le compteur de couronnes
-                            # Gagner une grande couronne si on mange deux fantômes avec moins de 10 secondes d'écart
-                            if last_ghost_time > 0:  # Si on a mangé un fantôme récemment
-                                grande_couronne_count += 1  # Gagner une grande couronne
-                            last_ghost_time = 100  # Réinitialiser le timer à 10 secondes (100 frames à 10 FPS)
-                            ghost.eyes = True
-                            ghost.vulnerable = False
-                            ghost.returning = False
-                        # Sinon, Pacman est touché par un fantôme normal
-                        else:
-                            # Si le fantôme est inoffensif (fantôme d'indigestion), ne pas tuer Pacman
-                            if ghost.harmless:
-                                continue  # Passer au fantôme suivant sans perdre de vie
-                            # Vérifier si "skin bleu" est équipé et si le fantôme est bleu
-                            if has_skin_bleu and ghost.color == BLUE:
-                                # Avec "skin bleu" équipé, Pacman traverse les fantômes bleus sans mourir
-                                continue  # Passer au fantôme suivant sans perdre de vie
-                            # Vérifier si "skin orange" est équipé et si le fantôme est orange
-                            if has_skin_orange and ghost.color == (255, 165, 0):  # ORANGE
-                                # Avec "skin orange" équipé, Pacman a 85% de chance de ne pas mourir
-                                if random.random() < 0.85:
-                                    # Pacman survit (85% de chance)
-                                    continue  # Passer au fantôme suivant sans perdre de vie
-                                # Sinon, Pacman meurt (15% de chance)
-                            # Vérifier si "skin rose" est équipé et si le fantôme est rose
-                            if has_skin_rose and ghost.color == (255, 192, 203):  # ROSE
-                                # Avec "skin rose" équipé, Pacman a 75% de chance de ne pas mourir
-                                if random.random() < 0.75:
-                                    # Pacman survit (75% de chance)
-                                    continue  # Passer au fantôme suivant sans perdre de vie
-                                # Sinon, Pacman meurt (25% de chance)
-                            # Vérifier si "skin rouge" est équipé et si le fantôme est rouge
-                            if has_skin_rouge and ghost.color == RED:  # ROUGE
-                                # Avec "skin rouge" équipé, Pacman a 50% de chance de ne pas mourir
-                                if random.random() < 0.50:
-                                    # Pacman survit (50% de chance)
-                                    continue  # Passer au fantôme suivant sans perdre de vie
-                                # Sinon, Pacman meurt (50% de chance)
-                            # Pacman est touché par un fantôme normal
-                            lives -= 1
-                            last_ghost_time = 0  # Réinitialiser le timer depuis le dernier fantôme mangé
-                            if lives <= 0:
-                                game_over = True
-                                # Arrêter la musique si elle est en cours
-                                if music_playing:
-                                    pygame.mixer.music.stop()
-                                    music_playing = False
-                            else:
-                                # Perdre une vie et réapparaître
-                                respawn_timer = 60  # 2 secondes de pause
-                                # Réinitialiser les positions temporairement
-                                pacman.x = 10
-                                pacman.y = 15
-                                pacman.direction = (0, 0)
-                                pacman.next_direction = (0, 0)
-                            # Sortir de la boucle pour éviter plusieurs collisions dans la même frame
-                            break
-                
-                # Supprimer les fantômes marqués pour suppression en mode aventure
-                for ghost_to_remove in ghosts_to_remove:
-                    if ghost_to_remove in ghosts:
-                        ghosts.remove(ghost_to_remove)
-                
-                # En mode aventure, vérifier si tous les fantômes vrais (non-harmless) ont été éliminés
-                if is_adventure_mode and not game_over and not won and not level_transition:
-                    # Compter uniquement les fantômes vrais (non-harmless, pas en mode yeux)
-                    real_ghosts_count = sum(1 for ghost in ghosts if not ghost.harmless and not ghost.eyes)
-                    # Si plus de fantômes vrais, passer au niveau suivant immédiatement
-                    if real_ghosts_count == 0:
-                        level += 1
-                        maze, pacman, ghosts = start_next_level(level, is_adventure_mode=True)
-                        ghost_timers = {}  # Réinitialiser les timers de réapparition
-                        level_transition = True
-                        level_transition_timer = 60  # 2 secondes de transition
-        
+                        if not trophy_already_earned:
+                            success_notification_text = "Nouveau succès débloqué !"
+                            success_notification_timer = 60  # Afficher le succès pendant 1 seconde
+                            if current_account_index is not None and 0 <= current_account_index < len(accounts):
+                                trophies = accounts[current_account_index].setdefault('trophies', [])
+                                if TROPHY_FIRST_LEVEL not in trophies:
+                                    trophies.append(TROPHY_FIRST_LEVEL)
+                                    save_accounts_data(accounts)
+                    elif game_event == "fantome_mange":
+                        # Gagner 30 XP pour le passe de combat
+                        # S'assurer que battle_pass_xp est un entier
+                        if not isinstance(battle_pass_xp, (int, float)):
+                            battle_pass_xp = 0
+                        xp_gained = 30
+                        # Si le doubleur d'XP est actif, doubler l'XP
+                        if xp_doubler_active:
+                            xp_gained *= 2
+                        # Calculer le nouveau XP
+                        new_xp = int(battle_pass_xp) + xp_gained
+                        # Limiter l'XP au niveau 30 si toutes les récompenses ne sont pas récupérées
+                        MAX_BATTLE_PASS_LEVEL = 30
+                        XP_PER_LEVEL = 100
+                        MAX_BATTLE_PASS_XP = MAX_BATTLE_PASS_LEVEL * XP_PER_LEVEL
+                        if new_xp >= MAX_BATTLE_PASS_XP:
+                            # Vérifier si toutes les récompenses ont été récupérées
+                            if not all_battle_pass_rewards_claimed(battle_pass_claimed_rewards, used_stars, MAX_BATTLE_PASS_LEVEL):
+                                # Bloquer l'XP au maximum du niveau 30
+                                new_xp = MAX_BATTLE_PASS_XP
+                        battle_pass_xp = new_xp
+                        vulnerable_ghosts_eaten_this_game += 1  # Compter le fantôme mangé
+                        # Sauvegarder l'XP gagné
+                        if current_account_index is not None:
+                            auto_save_account_data(current_account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, battle_pass_xp, battle_pass_claimed_rewards, gemme_poche, used_stars, accounts, battle_pass_plus_claimed_rewards, used_stars_plus)
+                # Les entrées ne sont appliquées qu'une fois, au premier tick qui suit
+                game_inputs = GameInputs()
+            # Arrêter la musique si la partie est terminée
+            if (state.game_over or state.won) and music_playing:
+                pygame.mixer.music.stop()
+                music_playing = False
+            # Partie terminée : garder son replay dans le dossier du compte
+            if (state.game_over or state.won) and replay_recorder is not None:
+                save_account_replay(current_account_index, replay_recorder)
+                replay_recorder = None
+            if (state.game_over or state.won) and state.world is not None:
+                state.world.flush()
+        else:
+            game_inputs = GameInputs()
+            tick_accumulator = 0.0
+            equipment_stale = True
+            # Sortie du jeu (menus, inventaire) : le replay s'arrête ici
+            if replay_recorder is not None:
+                save_account_replay(current_account_index, replay_recorder)
+                replay_recorder = None
+            # Et les morceaux modifiés du monde infini sont enregistrés
+            if state.world is not None:
+                state.world.flush()
         # Dessiner selon l'état actuel
         if current_state == START_MENU:
             start_plus_button, start_profile_rects, start_menu_total_height = draw_start_menu(screen, accounts, current_account_index, start_menu_scroll_offset)
@@ -12539,7 +14357,7 @@ def main():
         elif current_state == EQUIPEMENT_SKILL_TREE_MENU:
             equipement_skill_tree_retour_button = draw_equipement_skill_tree_menu(screen)
         elif current_state == AVENTURE_MENU:
-            aventure_retour_button, aventure_carte1_button = draw_aventure_menu(screen)
+            aventure_retour_button, aventure_carte1_button, aventure_monde_button = draw_aventure_menu(screen)
         elif current_state == CUSTOMIZATION_MENU:
             current_trophy_count = 0
             if current_account_index is not None and 0 <= current_account_index < len(accounts):
@@ -12614,7 +14432,7 @@ def main():
             # Dessiner les animations de récompenses par-dessus le menu
             draw_reward_animation(screen, reward_animations)
         elif current_state == MENU:
-            jeu_button, magasin_button, difficulte_button, poche_button, inventaire_button, vente_button, changer_compte_button, aventure_button, boutique_button, passe_combat_button, skill_tree_button, tutoriel_button = draw_menu(screen, difficulty=difficulty)
+            jeu_button, magasin_button, difficulte_button, poche_button, inventaire_button, vente_button, changer_compte_button, aventure_button, boutique_button, passe_combat_button, skill_tree_button, tutoriel_button = draw_menu(screen, difficulty=state.difficulty)
             
             # Afficher la boîte de dialogue de confirmation si nécessaire
             if delete_confirmation_step > 0 and account_to_delete is not None and account_to_delete < len(accounts):
@@ -12622,13 +14440,13 @@ def main():
         elif current_state == SHOP:
             shop_retour_button, shop_gadget_button, shop_pouvoir_button, shop_objet_button, shop_capacite_button = draw_shop(screen)
         elif current_state == SHOP_GADGET:
-            shop_gadget_retour_button, shop_explosion_button, shop_vision_x_button, shop_feu_button, shop_tir_button, shop_mort_button, shop_bombe_button, shop_piege_button, shop_tp_button, shop_portail_button, shop_mur_button = draw_shop_gadget(screen, jeton_poche, gadget_items, crown_poche, item_description, level, inventaire_items, bon_marche_ameliore, capacite_items)
+            shop_gadget_retour_button, shop_explosion_button, shop_vision_x_button, shop_feu_button, shop_tir_button, shop_mort_button, shop_bombe_button, shop_piege_button, shop_tp_button, shop_portail_button, shop_mur_button = draw_shop_gadget(screen, jeton_poche, gadget_items, crown_poche, item_description, state.level, inventaire_items, bon_marche_ameliore, capacite_items)
         elif current_state == SHOP_POUVOIR:
-            shop_pouvoir_retour_button, shop_longue_vue_button, shop_double_longue_vue_button, shop_bon_repas_button, shop_bon_gout_button, shop_pas_indigestion_button, shop_glace_button, shop_skin_bleu_button, shop_skin_orange_button, shop_skin_rose_button, shop_skin_rouge_button = draw_shop_pouvoir(screen, jeton_poche, pouvoir_items, crown_poche, item_description, level, inventaire_items, bon_marche_ameliore, capacite_items)
+            shop_pouvoir_retour_button, shop_longue_vue_button, shop_double_longue_vue_button, shop_bon_repas_button, shop_bon_gout_button, shop_pas_indigestion_button, shop_glace_button, shop_skin_bleu_button, shop_skin_orange_button, shop_skin_rose_button, shop_skin_rouge_button = draw_shop_pouvoir(screen, jeton_poche, pouvoir_items, crown_poche, item_description, state.level, inventaire_items, bon_marche_ameliore, capacite_items)
         elif current_state == SHOP_CAPACITE:
             shop_capacite_retour_button, shop_bon_marche_button, shop_gadget_button, shop_piquant_button, shop_pacgum_button, shop_bonbe_button, shop_indigestion_button, shop_bon_vue_button, shop_gel_button, shop_lunette_button, shop_invincibilite_button, shop_ameliorer_button = draw_shop_capacite(screen, jeton_poche, capacite_items, crown_poche, item_description, bon_marche_ameliore)
         elif current_state == SHOP_OBJET:
-            shop_objet_retour_button, shop_piece_mythique_button, shop_grosse_armure_button, shop_armure_fer_button, shop_flamme_button, shop_givre_button, shop_infra_rouge_button, shop_bric_button, shop_coffre_fort_button, shop_coffre_tresor_button, shop_double_gadget_button = draw_shop_objet(screen, jeton_poche, objet_items, crown_poche, item_description, level, inventaire_items, bon_marche_ameliore, capacite_items)
+            shop_objet_retour_button, shop_piece_mythique_button, shop_grosse_armure_button, shop_armure_fer_button, shop_flamme_button, shop_givre_button, shop_infra_rouge_button, shop_bric_button, shop_coffre_fort_button, shop_coffre_tresor_button, shop_double_gadget_button = draw_shop_objet(screen, jeton_poche, objet_items, crown_poche, item_description, state.level, inventaire_items, bon_marche_ameliore, capacite_items)
         elif current_state == DIFFICULTY:
             retour_button, button1, button2, button3, button4 = draw_difficulty(screen)
         elif current_state == POCHE:
@@ -12656,9 +14474,20 @@ def main():
                 preview_text_rect = preview_text.get_rect(center=preview_rect.center)
                 screen.blit(preview_text, preview_text_rect)
         elif current_state == GAME:
+            # Fraction du tick en cours, pour interpoler les déplacements entre deux cases
+            render_alpha = tick_accumulator / (1000 / get_tick_rate(state.level))
+            # La vue montre la carte de Pacman dans le monde 4x4, ou suit Pacman (ou la bombe téléguidée)
+            # sur les labyrinthes plus grands que la fenêtre
+            if state.is_multi_map_mode:
+                camera.show_map(state.maze, state.map_x, state.map_y)
+            elif state.bombe_active:
+                camera.follow(state.maze, state.bombe_x * CELL_SIZE + CELL_SIZE // 2, state.bombe_y * CELL_SIZE + CELL_SIZE // 2)
+            else:
+                camera.follow(state.maze, *interpolate_cell_center(state.pacman.prev_x, state.pacman.prev_y,
+                                                                   state.pacman.x, state.pacman.y, render_alpha))
             # Dessiner le jeu
             screen.fill(BLACK)
-            draw_maze(screen, maze, ice_tiles, fire_tiles, is_adventure_mode)
+            draw_maze(screen, state.maze, state.ice_tiles, state.fire_tiles, state.is_adventure_mode, camera)
             
             # Bouton pour revenir au menu de sélection des comptes (en haut à droite)
             retour_menu_button = pygame.Rect(WINDOW_WIDTH - 120, 10, 110, 40)
@@ -12670,10 +14499,9 @@ def main():
             screen.blit(retour_menu_text, retour_menu_text_rect)
             
             # Dessiner les pièges posés
-            for piege_pos in pieges:
+            for piege_pos in state.pieges:
                 piege_x, piege_y = piege_pos
-                piege_screen_x = piege_x * CELL_SIZE + CELL_SIZE // 2
-                piege_screen_y = piege_y * CELL_SIZE + CELL_SIZE // 2
+                piege_screen_x, piege_screen_y = camera.cell_center(piege_x, piege_y)
                 
                 # Dessiner le piège (cercle brun avec dents)
                 piege_radius = 6
@@ -12699,10 +14527,9 @@ def main():
                     pygame.draw.polygon(screen, (80, 40, 10), tooth_points)  # Brun très foncé
             
             # Dessiner les portails
-            if portal1_pos is not None:
-                portal1_x, portal1_y = portal1_pos
-                portal1_screen_x = portal1_x * CELL_SIZE + CELL_SIZE // 2
-                portal1_screen_y = portal1_y * CELL_SIZE + CELL_SIZE // 2
+            if state.portal1_pos is not None:
+                portal1_x, portal1_y = state.portal1_pos
+                portal1_screen_x, portal1_screen_y = camera.cell_center(portal1_x, portal1_y)
                 
                 # Dessiner le portail 1 (cercle bleu avec effet de vortex)
                 portal_radius = 10
@@ -12724,10 +14551,9 @@ def main():
                     end_y = portal1_screen_y + (portal_radius + 2) * math.sin(angle)
                     pygame.draw.line(screen, (150, 220, 255), (start_x, start_y), (end_x, end_y), 1)
             
-            if portal2_pos is not None:
-                portal2_x, portal2_y = portal2_pos
-                portal2_screen_x = portal2_x * CELL_SIZE + CELL_SIZE // 2
-                portal2_screen_y = portal2_y * CELL_SIZE + CELL_SIZE // 2
+            if state.portal2_pos is not None:
+                portal2_x, portal2_y = state.portal2_pos
+                portal2_screen_x, portal2_screen_y = camera.cell_center(portal2_x, portal2_y)
                 
                 # Dessiner le portail 2 (cercle bleu avec effet de vortex)
                 portal_radius = 10
@@ -12749,12 +14575,11 @@ def main():
                     end_y = portal2_screen_y + (portal_radius + 2) * math.sin(angle)
                     pygame.draw.line(screen, (150, 220, 255), (start_x, start_y), (end_x, end_y), 1)
             
-            if not game_over and not won and not level_transition and respawn_timer == 0:
+            if not state.game_over and not state.won and not state.level_transition and state.respawn_timer == 0:
                 # Dessiner la bombe téléguidée si elle est active
-                if bombe_active:
+                if state.bombe_active:
                     # Calculer la position à l'écran de la bombe
-                    bombe_screen_x = bombe_x * CELL_SIZE + CELL_SIZE // 2
-                    bombe_screen_y = bombe_y * CELL_SIZE + CELL_SIZE // 2
+                    bombe_screen_x, bombe_screen_y = camera.cell_center(state.bombe_x, state.bombe_y)
                     
                     # Dessiner la bombe (cercle noir avec mèche)
                     bombe_radius = 8
@@ -12778,51 +14603,44 @@ def main():
                     
                     # Afficher le temps restant (en secondes)
                     font_bombe = pygame.font.Font(None, 20)
-                    time_left = max(0, (bombe_timer + 9) // 10)  # Arrondir vers le haut et afficher en secondes
+                    time_left = max(0, (state.bombe_timer + 9) // 10)  # Arrondir vers le haut et afficher en secondes
                     time_text = font_bombe.render(str(time_left), True, WHITE)
                     time_text_rect = time_text.get_rect(center=(bombe_screen_x, bombe_screen_y + bombe_radius + 10))
                     screen.blit(time_text, time_text_rect)
                 
                 # Dessiner Pacman avec effet de clignotement si invincible et couronne si on en a une
                 # La longue vue ou double longue vue est équipée seulement si elle est dans le slot "pouvoir"
-                has_longue_vue = ('pouvoir' in inventaire_items and 
-                                 (inventaire_items['pouvoir'].get('type') == 'longue vue' or 
-                                  inventaire_items['pouvoir'].get('type') == 'double longue vue'))
-                is_double_longue_vue = ('pouvoir' in inventaire_items and 
-                                       inventaire_items['pouvoir'].get('type') == 'double longue vue')
+                has_longue_vue = state.equipment.has_longue_vue
+                is_double_longue_vue = state.equipment.is_double_longue_vue
                 # Vérifier si les skins sont équipés dans le slot "pouvoir"
-                has_skin_bleu_draw = ('pouvoir' in inventaire_items and 
-                                      inventaire_items['pouvoir'].get('type') == 'skin bleu')
-                has_skin_orange_draw = ('pouvoir' in inventaire_items and 
-                                        inventaire_items['pouvoir'].get('type') == 'skin orange')
-                has_skin_rose_draw = ('pouvoir' in inventaire_items and 
-                                      inventaire_items['pouvoir'].get('type') == 'skin rose')
-                has_skin_rouge_draw = ('pouvoir' in inventaire_items and 
-                                       inventaire_items['pouvoir'].get('type') == 'skin rouge')
+                has_skin_bleu_draw = state.equipment.has_skin_bleu
+                has_skin_orange_draw = state.equipment.has_skin_orange
+                has_skin_rose_draw = state.equipment.has_skin_rose
+                has_skin_rouge_draw = state.equipment.has_skin_rouge
                 # Dessiner Pacman seulement si la bombe n'est pas active (ou toujours le dessiner mais peut-être grisé)
-                if not bombe_active:
-                    pacman.draw(screen, invincible=(invincibility_timer > 0 or super_vie_active), has_crown=(crown_timer > 0), has_longue_vue=has_longue_vue, has_indigestion=has_indigestion, is_double_longue_vue=is_double_longue_vue, is_rainbow_critique=is_rainbow_critique, has_skin_bleu=has_skin_bleu_draw, has_skin_orange=has_skin_orange_draw, has_skin_rose=has_skin_rose_draw, has_skin_rouge=has_skin_rouge_draw, super_vie_active=super_vie_active)
+                if not state.bombe_active:
+                    state.pacman.draw(screen, invincible=(state.invincibility_timer > 0 or state.super_vie_active), has_crown=(state.crown_timer > 0), has_longue_vue=has_longue_vue, has_indigestion=state.has_indigestion, is_double_longue_vue=is_double_longue_vue, is_rainbow_critique=state.is_rainbow_critique, has_skin_bleu=has_skin_bleu_draw, has_skin_orange=has_skin_orange_draw, has_skin_rose=has_skin_rose_draw, has_skin_rouge=has_skin_rouge_draw, super_vie_active=state.super_vie_active, alpha=render_alpha, camera=camera)
                 else:
                     # Dessiner Pacman mais grisé/frozen quand la bombe est active
-                    pacman.draw(screen, invincible=(invincibility_timer > 0 or super_vie_active), has_crown=(crown_timer > 0), has_longue_vue=has_longue_vue, has_indigestion=has_indigestion, is_double_longue_vue=is_double_longue_vue, is_rainbow_critique=is_rainbow_critique, has_skin_bleu=has_skin_bleu_draw, has_skin_orange=has_skin_orange_draw, has_skin_rose=has_skin_rose_draw, has_skin_rouge=has_skin_rouge_draw, super_vie_active=super_vie_active)
-                for ghost in ghosts:
-                    ghost.draw(screen)
+                    state.pacman.draw(screen, invincible=(state.invincibility_timer > 0 or state.super_vie_active), has_crown=(state.crown_timer > 0), has_longue_vue=has_longue_vue, has_indigestion=state.has_indigestion, is_double_longue_vue=is_double_longue_vue, is_rainbow_critique=state.is_rainbow_critique, has_skin_bleu=has_skin_bleu_draw, has_skin_orange=has_skin_orange_draw, has_skin_rose=has_skin_rose_draw, has_skin_rouge=has_skin_rouge_draw, super_vie_active=state.super_vie_active, alpha=render_alpha, camera=camera)
+                for ghost in state.ghosts:
+                    ghost.draw(screen, alpha=render_alpha, camera=camera)
             
             # Afficher les jetons, le niveau et les vies
             font = pygame.font.Font(None, 36)
-            jeton_text = font.render(f"Jetons: {jeton_count}", True, (255, 192, 203))  # Rose
+            jeton_text = font.render(f"Jetons: {state.jeton_count}", True, (255, 192, 203))  # Rose
             screen.blit(jeton_text, (10, 10))
             
-            level_text = font.render(f"Niveau: {level}", True, WHITE)
+            level_text = font.render(f"Niveau: {state.level}", True, WHITE)
             screen.blit(level_text, (10, 50))
             
             # Afficher le compteur de couronnes
-            crown_count_text = font.render(f"Couronnes: {crown_count}", True, (255, 215, 0))  # Or
+            crown_count_text = font.render(f"Couronnes: {state.crown_count}", True, (255, 215, 0))  # Or
             screen.blit(crown_count_text, (10, 90))
             
             # Afficher les vies sous forme de cœurs
             heart_symbol = "♥"
-            lives_display = heart_symbol * lives
+            lives_display = heart_symbol * state.lives
             lives_text = font.render(lives_display, True, RED)
             screen.blit(lives_text, (10, 130))
             
@@ -12836,23 +14654,28 @@ def main():
             screen.blit(retour_text, retour_text_rect)
             
             # Message de transition entre niveaux
-            if level_transition:
-                if is_multi_map_mode:
-                    transition_text = font.render(f"NIVEAU {level} - MAP {map_x + 1},{map_y + 1}/4x4", True, YELLOW)
+            if state.level_transition:
+                if state.is_multi_map_mode:
+                    transition_text = font.render(f"NIVEAU {state.level} - MAP {state.map_x + 1},{state.map_y + 1}/4x4", True, YELLOW)
+                elif state.world is not None:
+                    transition_text = font.render(f"NIVEAU {state.level} - MONDE INFINI", True, YELLOW)
                 else:
-                    maze_index = (level - 1) % len(MAZES)
-                    transition_text = font.render(f"NIVEAU {level} - CARTE {maze_index + 1}!", True, YELLOW)
+                    maze_index = (state.level - 1) % len(state.mazes)
+                    transition_text = font.render(f"NIVEAU {state.level} - CARTE {maze_index + 1}!", True, YELLOW)
                 text_rect = transition_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
                 screen.blit(transition_text, text_rect)
             
             # Afficher les coordonnées de la map en mode multi-map
-            if is_multi_map_mode:
-                map_info_text = font.render(f"Map: {map_x + 1},{map_y + 1}/4x4", True, YELLOW)
+            if state.is_multi_map_mode:
+                map_info_text = font.render(f"Map: {state.map_x + 1},{state.map_y + 1}/4x4", True, YELLOW)
+                screen.blit(map_info_text, (10, 170))
+            elif state.world is not None:
+                map_info_text = font.render(f"Morceau: {state.map_x},{state.map_y}", True, YELLOW)
                 screen.blit(map_info_text, (10, 170))
             
             # Message de perte de vie
-            if respawn_timer > 0:
-                lives_lost_text = font.render(f"Vie perdue! Vies restantes: {lives}", True, RED)
+            if state.respawn_timer > 0:
+                lives_lost_text = font.render(f"Vie perdue! Vies restantes: {state.lives}", True, RED)
                 text_rect = lives_lost_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 20))
                 screen.blit(lives_lost_text, text_rect)
                 restart_text = font.render("Clic droit pour relancer", True, WHITE)
@@ -12864,12 +14687,12 @@ def main():
                 restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 + 20))
                 screen.blit(restart_text, restart_rect)
             
-            if game_over:
+            if state.game_over:
                 game_over_text = font.render("GAME OVER - Clic droit", True, RED)
                 text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
                 screen.blit(game_over_text, text_rect)
             
-            if won:
+            if state.won:
                 won_text = font.render("vous avez gagné", True, YELLOW)
                 text_rect = won_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
                 screen.blit(won_text, text_rect)
@@ -12897,13 +14720,13 @@ def main():
                 current_cooldown = 0
                 max_cooldown = GADGET_COOLDOWN_DURATION
                 if gadget_type_cooldown == 'mort':
-                    current_cooldown = mort_cooldown
+                    current_cooldown = state.mort_cooldown
                     max_cooldown = MORT_COOLDOWN_DURATION
                 elif gadget_type_cooldown == 'bombe téléguidée':
-                    current_cooldown = bombe_cooldown
+                    current_cooldown = state.bombe_cooldown
                     max_cooldown = BOMBE_COOLDOWN_DURATION
                 else:
-                    current_cooldown = gadget_cooldown
+                    current_cooldown = state.gadget_cooldown
                     max_cooldown = GADGET_COOLDOWN_DURATION
                 
                 # Calculer le pourcentage de cooldown restant
@@ -12943,19 +14766,26 @@ def main():
                     pygame.draw.circle(screen, (0, 200, 0), (circle_x, circle_y), circle_radius, 2)  # Bordure vert foncé
         
         pygame.display.flip()
-        # Augmenter la vitesse avec les niveaux (plus lentement pour plus de facilité)
+        # La vitesse du jeu dépend du niveau (voir get_tick_rate), pas de la fréquence d'affichage
         if current_state == GAME:
-            current_fps = BASE_FPS + (level - 1)  # +1 FPS par niveau au lieu de +2
-            clock.tick(min(current_fps, 15))  # Max 15 FPS au lieu de 20
+            frame_time = clock.tick(RENDER_FPS)
         else:
-            clock.tick(30)  # FPS constant pour le menu
+            frame_time = clock.tick(30)  # FPS constant pour le menu
     
     # Sauvegarder toutes les données avant de quitter
     if current_account_index is not None:
         save_game_data_for_account(current_account_index, pouvoir_items, gadget_items, objet_items, capacite_items, inventaire_items, jeton_poche, crown_poche, bon_marche_ameliore, accounts)
+    # Monde infini : morceaux modifiés enregistrés, thread de préparation arrêté
+    if state.world is not None:
+        state.world.close()
     
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()                                  
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        simulate_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "replay":
+        replay_main(sys.argv[2:])
+    else:
+        main()                                  
\ No newline at end of file
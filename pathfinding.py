@@ -0,0 +1,444 @@
+"""Recherche de chemins dans le labyrinthe (BFS et A*).
+
+Fonctionne avec un labyrinthe compact (classe Maze de pacman.py, qui fournit la
+table des voisins et un numéro de version) ou avec une simple liste de listes.
+Les chemins sont retrouvés avec des pointeurs vers le parent, sans recopier le
+chemin à chaque case, et les résultats sont mémorisés par
+(version du labyrinthe, départ, arrivée) : une même requête pendant un niveau
+ne coûte plus rien.
+
+Les grands labyrinthes compacts (monde assemblé, monde infini) sont découpés en
+blocs, comme dans HPA* : un graphe des entrées entre blocs, avec les distances
+à l'intérieur de chaque bloc gardées par disposition de ses murs, puis un
+chemin affiné bloc par bloc seulement là où on le demande.
+"""
+import heapq
+from array import array
+from collections import OrderedDict, deque
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+PATH_CACHE_SIZE = 4096  # Nombre de chemins gardés en mémoire
+NO_PATH = 0xFFFF  # Distance d'une case hors d'atteinte (comme dans pacman.py)
+HIERARCHY_MIN_CELLS = 1600  # À partir de 40x40 cases, recherche par blocs (labyrinthes compacts seulement)
+CLUSTER_SIZE = 21  # Côté d'un bloc quand le labyrinthe ne donne pas la taille de ses cartes (map_size)
+ENTRANCE_SPLIT = 6  # Un passage d'au moins 6 cases entre deux blocs a une entrée à chaque bout
+HIERARCHIES_KEPT = 4  # Graphes de blocs gardés (un par version de labyrinthe)
+TARGET_FIELDS_KEPT = 16  # Cibles dont les distances depuis les entrées sont gardées, par graphe
+CLUSTER_LINKS_KEPT = 512  # Blocs (par disposition de leurs murs) dont les distances entre entrées sont gardées
+WALL_BYTES = bytes(1 if value == 1 else 0 for value in range(256))  # Cases -> 1 pour un mur, 0 sinon
+
+# Cache des chemins : (version, départ, arrivée, tunnels, a_star) -> tuple de cases (ou None)
+_path_cache = OrderedDict()
+# Graphes de blocs : (version, tunnels) -> HierarchicalGraph
+_hierarchies = OrderedDict()
+# Distances entre les entrées d'un bloc, partagées par tous les blocs qui ont les mêmes murs et
+# les mêmes entrées (un même morceau du monde infini, d'une fenêtre à la suivante)
+_cluster_links = OrderedDict()
+
+
+def clear_path_cache():
+    """Vide le cache des chemins"""
+    _path_cache.clear()
+    _hierarchies.clear()
+
+
+def cell_neighbors(maze, x, y, tunnels=True):
+    """Cases non murées atteignables en un pas depuis (x, y), dans l'ordre droite, gauche, bas, haut.
+
+    Avec tunnels=True, sortir par un bord gauche/droite ramène de l'autre côté (comme Pacman).
+    """
+    height = len(maze)
+    width = len(maze[0])
+    table = getattr(maze, 'neighbors', None)
+    if table is not None:
+        # Labyrinthe compact : la table des voisins contient déjà les tunnels
+        result = []
+        for new_x, new_y in table[y * width + x]:
+            if not tunnels and abs(new_x - x) > 1:
+                continue
+            if maze[new_y][new_x] != 1:
+                result.append((new_x, new_y))
+        return result
+    result = []
+    for dx, dy in DIRECTIONS:
+        new_x = x + dx
+        new_y = y + dy
+        if not 0 <= new_y < height:
+            continue
+        if tunnels:
+            new_x %= width
+        elif not 0 <= new_x < width:
+            continue
+        if maze[new_y][new_x] != 1:  # Pas un mur
+            result.append((new_x, new_y))
+    return result
+
+
+def _rebuild_path(parents, target):
+    """Remonte les pointeurs vers le parent depuis l'arrivée"""
+    path = [target]
+    cell = parents[target]
+    while cell is not None:
+        path.append(cell)
+        cell = parents[cell]
+    path.reverse()
+    return path
+
+
+def bfs_path(maze, start, target, tunnels=True):
+    """Plus court chemin par parcours en largeur (file deque, O(cases))"""
+    if start == target:
+        return [start]
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for neighbor in cell_neighbors(maze, x, y, tunnels):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (x, y)
+            if neighbor == target:
+                return _rebuild_path(parents, target)
+            queue.append(neighbor)
+    return None  # Pas de chemin trouvé
+
+
+def astar_path(maze, start, target, tunnels=True):
+    """Plus court chemin par A* (distance de Manhattan, tunnels compris)"""
+    if start == target:
+        return [start]
+    width = len(maze[0])
+    target_x, target_y = target
+
+    def heuristic(cell):
+        dx = abs(cell[0] - target_x)
+        if tunnels:
+            dx = min(dx, width - dx)
+        return dx + abs(cell[1] - target_y)
+
+    parents = {start: None}
+    costs = {start: 0}
+    order = 0  # Départage les égalités dans l'ordre d'insertion
+    heap = [(heuristic(start), order, start)]
+    while heap:
+        _, _, current = heapq.heappop(heap)
+        if current == target:
+            return _rebuild_path(parents, target)
+        cost = costs[current] + 1
+        for neighbor in cell_neighbors(maze, current[0], current[1], tunnels):
+            if cost < costs.get(neighbor, cost + 1):
+                costs[neighbor] = cost
+                parents[neighbor] = current
+                order += 1
+                heapq.heappush(heap, (cost + heuristic(neighbor), order, neighbor))
+    return None
+
+
+class HierarchicalGraph:
+    """Labyrinthe compact découpé en blocs (les cartes d'un monde assemblé) pour une recherche HPA*.
+
+    Les entrées sont les cases de part et d'autre d'un passage entre deux blocs voisins
+    (une par passage, deux pour un passage large). Pour chaque bloc traversé, on garde
+    les distances de ses entrées à toutes ses cases. Une cible demande un seul parcours
+    de son bloc puis un Dijkstra sur les entrées, partagés par tous les départs et
+    poussés seulement jusqu'aux entrées dont ils ont besoin : un pas vers la cible ne
+    coûte ensuite qu'une comparaison par entrée du bloc de départ.
+    Les chemins sont presque les plus courts (quelques pas de plus qu'un BFS au pire,
+    à cause du choix des entrées).
+    """
+    __slots__ = ('width', 'height', 'cells', 'tunnels', 'wrap', 'cluster_width', 'cluster_height',
+                 'clusters_per_row', 'inner', 'entrances', 'links', 'intra', 'targets')
+
+    def __init__(self, maze, tunnels=True):
+        self.width = maze.width
+        self.height = maze.height
+        self.cells = bytes(maze.cells)
+        self.tunnels = tunnels
+        self.wrap = getattr(maze, 'wrap', True)
+        self.cluster_width, self.cluster_height = getattr(maze, 'map_size', None) or (CLUSTER_SIZE, CLUSTER_SIZE)
+        self.clusters_per_row = -(-self.width // self.cluster_width)
+        self.inner = [()] * len(self.cells)  # Case -> cases ouvertes voisines dans le même bloc
+        self.entrances = {}  # Bloc -> cases d'entrée (indices y * largeur + x)
+        self.links = {}  # Case d'entrée -> entrées des blocs voisins, à un pas
+        self.intra = {}  # Bloc -> (distances entre entrées, distances de chaque entrée aux cases du bloc)
+        # Cible -> (distances dans son bloc, coût des entrées déjà fixées, entrée suivante, tas du Dijkstra en cours)
+        self.targets = OrderedDict()
+        self._find_entrances(maze.neighbors)
+
+    def _cluster(self, index):
+        return (index // self.width // self.cluster_height) * self.clusters_per_row \
+            + index % self.width // self.cluster_width
+
+    def _origin(self, cluster):
+        """Case en haut à gauche du bloc"""
+        return (cluster % self.clusters_per_row * self.cluster_width,
+                cluster // self.clusters_per_row * self.cluster_height)
+
+    def _local(self, index, cluster):
+        """Indice de la case dans son bloc (ligne par ligne)"""
+        left, top = self._origin(cluster)
+        return (index // self.width - top) * self.cluster_width + index % self.width - left
+
+    def _find_entrances(self, neighbors):
+        width = self.width
+        cells = self.cells
+        inner = self.inner
+        # Passages entre deux blocs, regroupés par ligne de séparation
+        crossings = {}
+        for index, cell in enumerate(cells):
+            if cell == 1:
+                continue
+            cluster = self._cluster(index)
+            x, y = index % width, index // width
+            same_cluster = []
+            for neighbor_x, neighbor_y in neighbors[index]:
+                neighbor = neighbor_y * width + neighbor_x
+                if cells[neighbor] == 1 or (not self.tunnels and abs(neighbor_x - x) > 1):
+                    continue
+                other = self._cluster(neighbor)
+                if other == cluster:
+                    same_cluster.append(neighbor)
+                elif other > cluster:  # Chaque passage une seule fois, depuis le bloc de plus petit numéro
+                    if neighbor_y == y:
+                        crossings.setdefault((cluster, other, x, neighbor_x, None), []).append((y, index, neighbor))
+                    else:
+                        crossings.setdefault((cluster, other, None, y, neighbor_y), []).append((x, index, neighbor))
+            inner[index] = tuple(same_cluster)
+        for line in crossings.values():
+            line.sort()
+            run = [line[0]]
+            for crossing in line[1:]:
+                if crossing[0] != run[-1][0] + 1:
+                    self._add_entrances(run)
+                    run = []
+                run.append(crossing)
+            self._add_entrances(run)
+
+    def _add_entrances(self, run):
+        chosen = (run[0], run[-1]) if len(run) >= ENTRANCE_SPLIT else (run[len(run) // 2],)
+        for _, index, neighbor in chosen:
+            for entrance, other in ((index, neighbor), (neighbor, index)):
+                if entrance not in self.links:
+                    self.links[entrance] = []
+                    self.entrances.setdefault(self._cluster(entrance), []).append(entrance)
+                self.links[entrance].append(other)
+
+    def _cluster_distances(self, source, cluster):
+        """Distances depuis source sans sortir du bloc, une par case du bloc (NO_PATH si hors d'atteinte)"""
+        width = self.width
+        left, top = self._origin(cluster)
+        cluster_width = self.cluster_width
+        inner = self.inner
+        distances = array('H', [NO_PATH]) * (cluster_width * self.cluster_height)
+        distances[(source // width - top) * cluster_width + source % width - left] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for current in frontier:
+                for neighbor in inner[current]:
+                    local = (neighbor // width - top) * cluster_width + neighbor % width - left
+                    if distances[local] == NO_PATH:
+                        distances[local] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    def _links_inside(self, cluster):
+        """(entrée -> [(autre entrée, distance)], entrée -> distances aux cases du bloc) pour ce bloc.
+
+        Partagé entre les blocs qui ont les mêmes murs et les mêmes entrées (_cluster_links) :
+        un morceau du monde infini n'est parcouru qu'une fois d'une fenêtre à la suivante.
+        """
+        intra = self.intra.get(cluster)
+        if intra is not None:
+            return intra
+        width = self.width
+        left, top = self._origin(cluster)
+        right = min(left + self.cluster_width, width)
+        bottom = min(top + self.cluster_height, self.height)
+        entrances = self.entrances.get(cluster, [])
+        walls = b''.join(self.cells[y * width + left:y * width + right] for y in range(top, bottom)).translate(WALL_BYTES)
+        # Les tunnels ne restent dans le bloc que s'il fait toute la largeur du labyrinthe
+        inner_tunnels = self.tunnels and self.wrap and left == 0 and right == width
+        key = (walls, right - left, inner_tunnels,
+               tuple((entrance % width - left, entrance // width - top) for entrance in entrances))
+        rows = _cluster_links.get(key)
+        if rows is not None:
+            _cluster_links.move_to_end(key)
+        else:
+            rows = [self._cluster_distances(entrance, cluster) for entrance in entrances]
+            _cluster_links[key] = rows
+            if len(_cluster_links) > CLUSTER_LINKS_KEPT:
+                _cluster_links.popitem(last=False)
+        links = {}
+        for entrance, row in zip(entrances, rows):
+            links[entrance] = [(other, row[self._local(other, cluster)]) for other in entrances
+                               if other != entrance and row[self._local(other, cluster)] != NO_PATH]
+        intra = self.intra[cluster] = (links, dict(zip(entrances, rows)))
+        return intra
+
+    def _target_field(self, target):
+        """Distances vers target : dans son bloc, puis depuis chaque entrée (Dijkstra sur les entrées)"""
+        field = self.targets.get(target)
+        if field is not None:
+            self.targets.move_to_end(target)
+            return field
+        cluster = self._cluster(target)
+        local = self._cluster_distances(target, cluster)
+        costs = {}
+        toward = {}  # Entrée -> entrée suivante vers la cible
+        # (coût, entrée, entrée suivante) ; -1 : la cible est dans le bloc de l'entrée
+        heap = [(local[self._local(entrance, cluster)], entrance, -1) for entrance in self.entrances.get(cluster, ())]
+        heap = [item for item in heap if item[0] != NO_PATH]
+        heapq.heapify(heap)
+        field = self.targets[target] = (local, costs, toward, heap)
+        if len(self.targets) > TARGET_FIELDS_KEPT:
+            self.targets.popitem(last=False)
+        return field
+
+    def _settle(self, field, until):
+        """Poursuit le Dijkstra de la cible jusqu'aux entrées de coût until compris.
+
+        Toujours dans le même ordre : le résultat ne dépend pas des recherches faites avant.
+        """
+        _, costs, toward, heap = field
+        while heap and heap[0][0] <= until:
+            cost, entrance, following = heapq.heappop(heap)
+            if entrance in costs:
+                continue
+            costs[entrance] = cost
+            toward[entrance] = following
+            for other in self.links[entrance]:
+                if other not in costs:
+                    heapq.heappush(heap, (cost + 1, other, entrance))
+            for other, distance in self._links_inside(self._cluster(entrance))[0][entrance]:
+                if other not in costs:
+                    heapq.heappush(heap, (cost + distance, other, entrance))
+
+    def _index(self, cell):
+        x, y = cell
+        index = y * self.width + x
+        if 0 <= x < self.width and 0 <= y < self.height and self.cells[index] != 1:
+            return index
+        return None
+
+    def _step(self, start, target):
+        """Case suivante (indice) de start vers target, ou None s'il n'y a pas de chemin"""
+        field = self._target_field(target)
+        local, costs, toward, heap = field
+        cluster = self._cluster(start)
+        start_local = self._local(start, cluster)
+        links, rows = self._links_inside(cluster)
+        exits = [(row[start_local], entrance, row) for entrance, row in rows.items() if row[start_local] != NO_PATH]
+        while True:
+            # Meilleure étape : la cible si elle est dans le bloc, sinon une entrée du bloc
+            goal = None
+            best = NO_PATH
+            if cluster == self._cluster(target):
+                goal = target
+                best = local[start_local]
+                goal_row = local
+            waiting = NO_PATH  # Plus petite distance à une entrée dont le coût n'est pas encore fixé
+            for distance, entrance, row in exits:
+                if entrance not in costs:
+                    waiting = min(waiting, distance)
+                elif distance + costs[entrance] < best:
+                    goal = entrance
+                    best = distance + costs[entrance]
+                    goal_row = row
+            # Une entrée pas encore fixée coûtera au moins heap[0][0] : continuer seulement si elle peut faire mieux
+            if waiting == NO_PATH or not heap or heap[0][0] + waiting > best:
+                break
+            self._settle(field, best - waiting)
+        if best == NO_PATH:
+            return None
+        if goal == start:
+            # Déjà sur la meilleure entrée : l'étape suivante est celle du graphe des entrées
+            goal = toward[start]
+            if goal == -1:
+                goal = target
+                goal_row = local
+            elif self._cluster(goal) != cluster:
+                return goal  # Entrée du bloc voisin, à un pas
+            else:
+                goal_row = rows[goal]
+        # Premier voisin (même ordre que la table des voisins) qui rapproche de l'étape
+        closer = goal_row[start_local] - 1
+        for neighbor in self.inner[start]:
+            if goal_row[self._local(neighbor, cluster)] == closer:
+                return neighbor
+        return None
+
+    def next_step(self, start, target):
+        """Case suivante (x, y) sur un chemin de start vers target, ou None (pas de chemin, déjà arrivé)"""
+        start_index = self._index(start)
+        target_index = self._index(target)
+        if start_index is None or target_index is None or start_index == target_index:
+            return None
+        step = self._step(start_index, target_index)
+        return None if step is None else (step % self.width, step // self.width)
+
+    def path(self, start, target):
+        """Chemin (liste de cases) de start vers target, affiné pas à pas dans chaque bloc, ou None"""
+        start_index = self._index(start)
+        target_index = self._index(target)
+        if start_index is None or target_index is None:
+            return None
+        path = [start_index]
+        while path[-1] != target_index:
+            step = self._step(path[-1], target_index)
+            if step is None:
+                return None
+            path.append(step)
+        return [(index % self.width, index // self.width) for index in path]
+
+def get_hierarchy(maze, tunnels=True):
+    """Graphe de blocs du labyrinthe compact, construit une fois par version"""
+    key = (maze.version, tunnels)
+    graph = _hierarchies.get(key)
+    if graph is None:
+        graph = _hierarchies[key] = HierarchicalGraph(maze, tunnels)
+        if len(_hierarchies) > HIERARCHIES_KEPT:
+            _hierarchies.popitem(last=False)
+    else:
+        _hierarchies.move_to_end(key)
+    return graph
+
+def hierarchical_path(maze, start, target, tunnels=True):
+    """Chemin presque le plus court par blocs (HPA*), pour les grands labyrinthes compacts"""
+    if start == target:
+        return [start]
+    return get_hierarchy(maze, tunnels).path(start, target)
+
+
+def find_path_between(maze, start, target, tunnels=True, use_astar=False):
+    """Trouve un chemin accessible entre deux points (liste de cases, ou None).
+
+    Le résultat est mémorisé tant que les murs du labyrinthe ne changent pas
+    (numéro de version de Maze) ; les listes de listes ne sont pas mises en cache.
+    Un labyrinthe compact d'au moins HIERARCHY_MIN_CELLS cases passe par ses blocs
+    (hierarchical_path) au lieu d'un parcours complet.
+    """
+    version = getattr(maze, 'version', None)
+    if version is None:
+        finder = astar_path if use_astar else bfs_path
+        return finder(maze, start, target, tunnels)
+    key = (version, start, target, tunnels, use_astar)
+    if key in _path_cache:
+        _path_cache.move_to_end(key)
+        path = _path_cache[key]
+    else:
+        if len(maze.cells) >= HIERARCHY_MIN_CELLS:
+            finder = hierarchical_path
+        else:
+            finder = astar_path if use_astar else bfs_path
+        path = finder(maze, start, target, tunnels)
+        if path is not None:
+            path = tuple(path)
+        _path_cache[key] = path
+        if len(_path_cache) > PATH_CACHE_SIZE:
+            _path_cache.popitem(last=False)
+    # Copie pour que l'appelant puisse modifier la liste sans toucher au cache
+    return list(path) if path is not None else None
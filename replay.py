@@ -0,0 +1,189 @@
+"""Enregistrement compact des parties (graine de session + entrées du joueur).
+
+Une partie est entièrement déterminée par sa graine (SessionRandom de pacman.py),
+l'équipement et la difficulté de départ, puis les entrées de chaque tick. Seuls les
+ticks où le joueur a fait quelque chose sont gardés, avec l'écart depuis le
+précédent codé en varint : une partie de dix minutes tient en quelques centaines
+d'octets.
+
+Format (version 1) :
+    b"PMRP" + version
+    varint graine
+    varint taille + JSON de départ (difficulté, inventaire, capacités, bonus d'invincibilité)
+    varint nombre total de ticks
+    varint nombre d'événements, puis pour chacun :
+        varint écart de ticks avec l'événement précédent
+        varint code = nb_flèches << 3 | réapparition << 2 | gadget << 1 | case visée
+        flèches : index 0-3, quatre par octet (2 bits chacun)
+        case visée : varint x, varint y
+"""
+import json
+
+MAGIC = b"PMRP"
+VERSION = 1
+# Même ordre que pathfinding.DIRECTIONS : droite, gauche, bas, haut
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIRECTION_INDEX = {direction: index for index, direction in enumerate(DIRECTIONS)}
+
+
+class ReplayError(ValueError):
+    """Fichier de replay illisible (mauvais format, version inconnue ou tronqué)"""
+
+
+def write_varint(out, value):
+    """Ajoute un entier positif à out (bytearray), 7 bits par octet"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """Lit un varint à la position pos et retourne (valeur, position suivante)"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("replay tronqué")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayEvent:
+    """Entrées d'un tick où le joueur a agi"""
+    __slots__ = ('tick', 'directions', 'use_gadget', 'target_cell', 'skip_respawn')
+
+    def __init__(self, tick, directions=(), use_gadget=False, target_cell=None, skip_respawn=False):
+        self.tick = tick
+        self.directions = tuple(directions)
+        self.use_gadget = use_gadget
+        self.target_cell = target_cell
+        self.skip_respawn = skip_respawn
+
+
+class Replay:
+    """Partie enregistrée : graine, conditions de départ et événements triés par tick"""
+    __slots__ = ('seed', 'setup', 'ticks', 'events')
+
+    def __init__(self, seed, setup, ticks=0, events=None):
+        self.seed = seed
+        self.setup = setup  # {"difficulty", "inventaire_items", "capacite_items", "invincibilite_bonus"}
+        self.ticks = ticks  # Durée de la partie en ticks
+        self.events = events if events is not None else []
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        write_varint(out, self.seed)
+        setup = json.dumps(self.setup, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        write_varint(out, len(setup))
+        out += setup
+        write_varint(out, self.ticks)
+        write_varint(out, len(self.events))
+        previous_tick = 0
+        for event in self.events:
+            write_varint(out, event.tick - previous_tick)
+            previous_tick = event.tick
+            has_target = event.target_cell is not None
+            write_varint(out, (len(event.directions) << 3) | (event.skip_respawn << 2)
+                         | (event.use_gadget << 1) | has_target)
+            packed = 0
+            for i, direction in enumerate(event.directions):
+                packed |= DIRECTION_INDEX[direction] << (2 * (i % 4))
+                if i % 4 == 3:
+                    out.append(packed)
+                    packed = 0
+            if len(event.directions) % 4:
+                out.append(packed)
+            if has_target:
+                write_varint(out, event.target_cell[0])
+                write_varint(out, event.target_cell[1])
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ReplayError("ce n'est pas un replay Pacman")
+        pos = len(MAGIC)
+        if pos >= len(data) or data[pos] != VERSION:
+            raise ReplayError("version de replay inconnue")
+        pos += 1
+        seed, pos = read_varint(data, pos)
+        size, pos = read_varint(data, pos)
+        setup = json.loads(bytes(data[pos:pos + size]).decode('utf-8'))
+        pos += size
+        ticks, pos = read_varint(data, pos)
+        count, pos = read_varint(data, pos)
+        events = []
+        tick = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            tick += delta
+            code, pos = read_varint(data, pos)
+            directions = []
+            for i in range(code >> 3):
+                if i % 4 == 0:
+                    if pos >= len(data):
+                        raise ReplayError("replay tronqué")
+                    packed = data[pos]
+                    pos += 1
+                directions.append(DIRECTIONS[(packed >> (2 * (i % 4))) & 3])
+            target_cell = None
+            if code & 1:
+                target_x, pos = read_varint(data, pos)
+                target_y, pos = read_varint(data, pos)
+                target_cell = (target_x, target_y)
+            events.append(ReplayEvent(tick, directions, bool(code & 2), target_cell, bool(code & 4)))
+        return cls(seed, setup, ticks, events)
+
+
+class ReplayRecorder:
+    """Enregistre les entrées passées à step(), tick après tick"""
+    __slots__ = ('replay',)
+
+    def __init__(self, seed, setup):
+        self.replay = Replay(seed, setup)
+
+    @classmethod
+    def from_state(cls, state, invincibilite_bonus=None):
+        """Commence l'enregistrement d'une partie qui vient de démarrer (GameState de pacman.py)
+
+        invincibilite_bonus : la valeur passée à start_with_difficulty (None : celle de l'équipement).
+        """
+        setup = {
+            'difficulty': state.difficulty,
+            'inventaire_items': state.inventaire_items,
+            'capacite_items': list(state.capacite_items),
+            'invincibilite_bonus': invincibilite_bonus,
+        }
+        # Copie figée par JSON : l'inventaire peut changer après le début de la partie
+        return cls(state.rng.seed, json.loads(json.dumps(setup)))
+
+    def matches(self, state):
+        """Vrai si l'équipement de state est toujours celui du début de l'enregistrement"""
+        setup = self.replay.setup
+        return (json.loads(json.dumps(state.inventaire_items)) == setup['inventaire_items']
+                and list(state.capacite_items) == setup['capacite_items'])
+
+    def record(self, inputs):
+        """À appeler juste avant step(state, inputs), y compris pour les ticks sans entrée"""
+        replay = self.replay
+        if inputs.directions or inputs.use_gadget or inputs.skip_respawn:
+            replay.events.append(ReplayEvent(replay.ticks, inputs.directions, inputs.use_gadget,
+                                             inputs.target_cell if inputs.use_gadget else None,
+                                             inputs.skip_respawn))
+        replay.ticks += 1
+
+
+def save_replay(path, replay):
+    with open(path, 'wb') as f:
+        f.write(replay.to_bytes())
+
+
+def load_replay(path):
+    with open(path, 'rb') as f:
+        return Replay.from_bytes(f.read())
@@ -0,0 +1,65 @@
+"""Outils communs aux tests : parties sans écran, entrées tirées d'une graine, empreinte d'une partie."""
+import copy
+import hashlib
+import os
+import random
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pacman  # noqa: E402
+
+# Équipement "mur" avec "bric" : mur_pos devient une liste modifiée sur place
+MUR_BRIC_INVENTORY = {'gadget': {'type': 'mur'}, 'objet0': {'type': 'bric'}}
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_files(tmp_path, monkeypatch):
+    """Les caches sur disque (distances, tournées, monde infini) sont écrits dans un dossier temporaire"""
+    monkeypatch.chdir(tmp_path)
+
+
+def random_inputs(seed, count, gadget_chance=0.05, size=21):
+    """Entrées du joueur pour count ticks, toujours les mêmes pour une graine donnée"""
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        direction = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1), None, None])
+        inputs.append(pacman.GameInputs(directions=[direction] if direction else [],
+                                        use_gadget=rng.random() < gadget_chance,
+                                        target_cell=(rng.randrange(size), rng.randrange(size))))
+    return inputs
+
+
+def new_game(inventory=None, difficulty='moyen', seed=1):
+    # Copie : la partie garde l'inventaire reçu tel quel, les tests peuvent le modifier
+    state = pacman.GameState(copy.deepcopy(inventory or {}), [])
+    state.start_with_difficulty(difficulty, seed=seed)
+    return state
+
+
+def digest(state):
+    """Empreinte de tout ce que step() fait évoluer"""
+    fields = (state.score, state.level, state.lives, state.pacman.x, state.pacman.y, state.pacman.direction,
+              bytes(state.maze.cells),
+              tuple((g.x, g.y, g.direction, g.vulnerable, g.eyes, g.flee_timer, g.path_index) for g in state.ghosts),
+              tuple(sorted(state.ice_tiles.items())), tuple(sorted(state.fire_tiles.items())),
+              tuple(sorted(state.pieges)), state.portal1_pos, state.portal2_pos, state.mur_pos,
+              state.mur_use_count, state.gadget_cooldown, state.timers.tick, state.vulnerable_timer, state.invincibility_timer,
+              state.game_over, state.won)
+    return hashlib.sha1(repr(fields).encode()).hexdigest()
+
+
+def play(state, inputs):
+    """Joue les entrées (arrêt à la fin de la partie) et retourne l'empreinte après chaque tick"""
+    digests = []
+    for game_inputs in inputs:
+        if state.game_over or state.won:
+            break
+        pacman.step(state, game_inputs)
+        digests.append(digest(state))
+    return digests
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+from conftest import new_game
+
+import pacman
+from batch_sim import DIRECTIONS, BatchSimulator, _ghost_kind
+
+PERSONALITY_COLORS = list(pacman.GHOST_PERSONALITIES)
+
+
+def expected_direction(maze, color, ghost, direction, pacman_pos, pacman_direction, home):
+    """Choix de Ghost.update pour un fantôme à personnalité (None : au hasard)"""
+    legal = maze.legal_moves(*ghost)
+    forward = [move for move in legal if move != (-direction[0], -direction[1])]
+    if pacman.get_junctions(maze)[ghost[1] * maze.width + ghost[0]]:
+        target = pacman.ghost_target(pacman.GHOST_PERSONALITIES[color], maze, pacman_pos, pacman_direction, ghost, home)
+        return pacman.target_direction(maze, target, *ghost)
+    if direction not in legal:
+        return (forward or list(legal) or [direction])[0]
+    return direction
+
+
+def test_personalities_match_ghost_update():
+    simulator = BatchSimulator(300, 'facile', seed=1)
+    rng = random.Random(0)
+    n = simulator.n
+    simulator.galive[:] = False
+    simulator.galive[:, 0] = True
+    simulator.geyes[:] = False
+    simulator.gvulnerable[:] = False
+    expected = []
+    for i in range(n):
+        maze_index = i % len(pacman.COMPACT_MAZES)
+        maze = pacman.COMPACT_MAZES[maze_index]
+        color = PERSONALITY_COLORS[i % len(PERSONALITY_COLORS)]
+        open_cells = [cell for cell, value in enumerate(maze.cells) if value != 1]
+        ghost = divmod(rng.choice(open_cells), maze.width)[::-1]
+        pacman_pos = divmod(rng.choice(open_cells), maze.width)[::-1]
+        simulator.maze_index[i] = maze_index
+        simulator.gkind[i, 0] = _ghost_kind(color)
+        simulator.gx[i, 0], simulator.gy[i, 0] = ghost
+        simulator.gstart_x[i, 0], simulator.gstart_y[i, 0] = maze.ghost_start
+        simulator.gdir[i, 0] = rng.randint(1, 4)
+        simulator.px[i], simulator.py[i] = pacman_pos
+        simulator.pdir[i] = rng.randint(0, 4)
+        expected.append(expected_direction(maze, color, ghost, tuple(DIRECTIONS[simulator.gdir[i, 0]].tolist()),
+                                           pacman_pos, tuple(DIRECTIONS[simulator.pdir[i]].tolist()), maze.ghost_start))
+    simulator._step_ghosts(np.ones(n, dtype=bool))
+    for i, direction in enumerate(expected):
+        if direction is not None:
+            assert tuple(DIRECTIONS[simulator.gdir[i, 0]].tolist()) == direction
+
+
+def ghost_layout(state):
+    return [(ghost.start_x, ghost.start_y, _ghost_kind(ghost.color)) for ghost in state.ghosts if not ghost.harmless]
+
+
+def simulated_layout(simulator):
+    return [(int(simulator.gstart_x[0, slot]), int(simulator.gstart_y[0, slot]), int(simulator.gkind[0, slot]))
+            for slot in np.nonzero(simulator.galive[0])[0]]
+
+
+def test_level_ghosts_match_game_for_every_difficulty():
+    for difficulty in ('facile', 'moyen', 'difficile', 'hardcore'):
+        state = new_game(difficulty=difficulty, seed=0)
+        simulator = BatchSimulator(1, difficulty, seed=0)
+        assert simulated_layout(simulator) == ghost_layout(state)
+        while not state.won:
+            level = state.level
+            # Fin de la transition et tous les points mangés : step() passe au niveau suivant
+            state.level_transition, state.level_transition_timer = False, 0
+            for cell, value in enumerate(state.maze.cells):
+                if value in (2, 3):
+                    state.maze.set_cell(cell % state.maze.width, cell // state.maze.width, 0)
+            pacman.step(state, pacman.GameInputs())
+            assert state.level == level + 1
+            simulator._next_level(np.ones(1, dtype=bool))
+            assert int(simulator.level[0]) == state.level and bool(simulator.won[0]) == state.won
+            if not state.won:  # Partie gagnée : le simulateur ne charge pas le niveau suivant
+                assert simulated_layout(simulator) == ghost_layout(state), (difficulty, state.level)
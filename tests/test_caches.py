@@ -0,0 +1,31 @@
+import json
+import os
+
+import pacman
+
+
+def test_write_json_file_replaces_whole_file(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    pacman.write_json_file(path, {'a': [1, 2]})
+    pacman.write_json_file(path, {'b': 3})
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'b': 3}
+    assert os.listdir(tmp_path) == ['cache.json']  # Pas de fichier temporaire oublié
+
+
+def test_distance_cache_round_trip():
+    maze = pacman.COMPACT_MAZES[0].copy()
+    table = pacman.get_distance_table(maze)
+    pacman.save_distance_cache()
+    key = maze.layout_key()
+    with open(pacman.DISTANCE_CACHE_FILE, encoding='utf-8') as f:
+        loaded = pacman.DistanceTable.from_json(json.load(f)[key])
+    assert loaded.distances == table.distances
+
+
+def test_patrol_cache_round_trip():
+    maze = pacman.COMPACT_MAZES[0]
+    tour = pacman.get_patrol_tour(maze)
+    pacman.save_patrol_cache()
+    with open(pacman.PATROL_CACHE_FILE, encoding='utf-8') as f:
+        assert tuple((x, y) for x, y in json.load(f)[maze.layout_key()]) == tour
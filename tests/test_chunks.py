@@ -0,0 +1,59 @@
+import pytest
+
+import pacman
+from chunks import ChunkCache, ChunkStore, generate_chunk
+
+
+def test_chunk_store_round_trip(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    chunks = {(0, 0): generate_chunk(5, 0, 0), (-3, 17): generate_chunk(5, -3, 17), (40, -2): generate_chunk(5, 40, -2)}
+    for (cx, cy), cells in chunks.items():
+        cells[cells.index(2)] = 0  # Un point mangé
+        store.save(cx, cy, cells)
+    store.close()
+
+    store = ChunkStore(str(tmp_path))
+    for (cx, cy), cells in chunks.items():
+        assert store.load(cx, cy) == cells
+    assert store.load(1, 0) is None  # Jamais modifié : pas enregistré
+    store.close()
+
+
+def test_chunk_cache_writes_modified_chunks(tmp_path):
+    cache = ChunkCache(5, ChunkStore(str(tmp_path)), capacity=2)
+    cells = bytearray(cache.get(2, 3))
+    cells[cells.index(2)] = 0
+    cache.put(2, 3, cells)
+    for cx in range(4):  # Le morceau modifié sort du cache
+        cache.get(cx, 10)
+    cache.flush()
+    assert ChunkCache(5, ChunkStore(str(tmp_path))).get(2, 3) == cells
+
+
+def test_new_game_closes_the_infinite_world(tmp_path):
+    state = pacman.GameState({}, [])
+    world = state.world = pacman.ChunkWorld(5, directory=str(tmp_path))
+    state.start_with_difficulty('facile', seed=1)
+    assert state.world is None
+    with pytest.raises(RuntimeError):  # Thread de préparation arrêté
+        world.executor.submit(int)
+
+
+def test_snapshot_restores_the_loaded_world_window(tmp_path):
+    state = pacman.GameState({}, [], is_adventure_mode=True, seed=3)
+    world = state.world = pacman.ChunkWorld(5, directory=str(tmp_path))
+    state.maze, state.pacman, state.ghosts = pacman.start_next_level(1, is_adventure_mode=True, rng=state.rng.ghosts,
+                                                                     world=world)
+    snapshot = state.snapshot()
+    origin, position = world.origin, (state.pacman.x, state.pacman.y)
+    world.recenter(state, 1, 0)
+    shifted = (world.origin, (state.pacman.x, state.pacman.y), bytes(state.maze.cells))
+
+    state.restore(snapshot)
+    assert state.maze is world.maze
+    assert (world.origin, (state.pacman.x, state.pacman.y)) == (origin, position)
+    assert not world.pending
+    # Le même recentrage redonne le même labyrinthe
+    world.recenter(state, 1, 0)
+    assert (world.origin, (state.pacman.x, state.pacman.y), bytes(state.maze.cells)) == shifted
+    world.close()
@@ -0,0 +1,42 @@
+import random
+
+import pacman
+import pathfinding
+
+
+def fresh_next_direction(table, start, target):
+    direction = table.next_direction(start, target)
+    return pacman.NO_DIRECTION if direction is None else pacman.DIRECTION_LIST.index(direction)
+
+
+def test_repaired_distances_match_bfs_after_wall_edits():
+    rng = random.Random(0)
+    for base in pacman.COMPACT_MAZES:
+        maze = base.copy()
+        home = maze.ghost_start
+        inner = [(x, y) for y in range(1, maze.height - 1) for x in range(1, maze.width - 1) if (x, y) != home]
+        open_cells = [(x, y) for y in range(maze.height) for x in range(maze.width) if maze[y][x] != 1]
+        targets = rng.sample(open_cells, 6) + [home]
+        pacman.get_home_route(maze, home)
+        for target in targets:
+            pacman.get_distance_table(maze).distance(home, target)
+        for _ in range(8):
+            # Un mur posé sur une case ouverte ou une case murée rouverte (gadgets "mur", bombe)
+            x, y = rng.choice(inner)
+            maze.set_cell(x, y, 0 if maze[y][x] == 1 else 1)
+            table = pacman.get_distance_table(maze)
+            assert isinstance(table, pacman.LazyDistanceTable) and table.parent is not None
+            fresh = pacman.DistanceTable.build(maze)
+            open_cells = [(x, y) for y in range(maze.height) for x in range(maze.width) if maze[y][x] != 1]
+            for target in targets:
+                if maze[target[1]][target[0]] == 1:
+                    continue
+                for start in rng.sample(open_cells, 40):
+                    path = pathfinding.bfs_path(maze, start, target)
+                    assert table.distance(start, target) == (None if path is None else len(path) - 1)
+                    assert table.next_direction(start, target) == fresh.next_direction(start, target)
+            # Chemin de retour des yeux réparé : même choix qu'une table neuve
+            route = pacman.get_home_route(maze, home)
+            assert list(route) == [fresh_next_direction(fresh, (cell % maze.width, cell // maze.width), home)
+                                   if maze.cells[cell] != 1 else pacman.NO_DIRECTION
+                                   for cell in range(len(maze.cells))]
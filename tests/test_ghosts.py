@@ -0,0 +1,103 @@
+import random
+
+from conftest import new_game
+
+import pacman
+
+
+def test_corner_target_on_a_single_maze():
+    maze = pacman.COMPACT_MAZES[0]
+    home = maze.ghost_start
+    pacman_pos = home  # Trop près : retour dans le coin
+    target = pacman.ghost_target('coin', maze, pacman_pos, (0, 0), home, home)
+    assert target == maze.nearest_open_cell(0, maze.height - 1)
+
+
+def test_corner_target_stays_in_the_ghost_map():
+    world = pacman.build_world_maze(pacman.COMPACT_MAZES)
+    map_width, map_height = world.map_size
+    for map_x, map_y in ((0, 0), (2, 1), (3, 3)):
+        home = (map_x * map_width + 10, map_y * map_height + 9)
+        target = pacman.ghost_target('coin', world, home, (0, 0), home, home)
+        assert world.map_of(*target) == (map_x, map_y)
+        assert world.cells[target[1] * world.width + target[0]] != 1
+
+
+def test_far_corner_ghost_chases_pacman():
+    maze = pacman.COMPACT_MAZES[0]
+    pacman_pos = maze.pacman_start
+    ghost_pos = (pacman_pos[0], pacman_pos[1] - pacman.SCATTER_DISTANCE - 1)
+    assert pacman.ghost_target('coin', maze, pacman_pos, (1, 0), ghost_pos, maze.ghost_start) == pacman_pos
+
+
+def test_fatal_collision_stops_later_ghosts():
+    state = new_game(difficulty='hardcore', seed=1)
+    maze = state.maze
+    # Une case de couloir sans pacgomme et sa voisine, reliées dans les deux sens
+    pacman_x, pacman_y, direction = next(
+        (x, y, move) for y in range(maze.height) for x in range(1, maze.width - 1)
+        for move in maze.legal_moves(x, y) if maze.cells[y * maze.width + x] in (0, 2)
+        and (-move[0], -move[1]) in maze.legal_moves(x + move[0], y + move[1]))
+    state.pacman.x, state.pacman.y = pacman_x, pacman_y
+    # Le rouge, juste à côté de Pacman, ne bouge qu'un tick sur deux : il l'attrape au second
+    red = pacman.Ghost(pacman_x + direction[0], pacman_y + direction[1], pacman.RED, rng=state.rng.ghosts)
+    orange = pacman.Ghost(*maze.ghost_start, (255, 165, 0), rng=state.rng.ghosts)
+    state.ghosts = [red, orange]
+    state.invincibility_timer = 0
+    pacman.step(state)
+    assert not state.game_over
+    orange_cell = (orange.x, orange.y)
+    pacman.step(state)
+    assert state.game_over
+    assert (orange.x, orange.y) == orange_cell  # Le fantôme d'après ne s'est pas déplacé
+
+
+def test_new_games_reuse_registry_slots():
+    state = new_game(difficulty='hardcore', seed=2)
+    # Les anciens fantômes rendent leur case une fois les nouveaux créés : une partie de plus au maximum
+    state.start_with_difficulty('hardcore', seed=3)
+    slots = len(pacman.GHOST_REGISTRY.owners)
+    for seed in range(20):
+        state.start_with_difficulty('hardcore', seed=seed)
+    assert len(pacman.GHOST_REGISTRY.owners) == slots
+    assert all(pacman.GHOST_REGISTRY.owners[ghost.slot] is ghost for ghost in state.ghosts)
+
+
+def test_restore_after_ghosts_were_replaced():
+    state = new_game(difficulty='moyen', seed=4)
+    snapshot = state.snapshot()
+    positions = [(ghost.x, ghost.y, ghost.color) for ghost in state.ghosts]
+    state.start_with_difficulty('hardcore', seed=9)  # Les fantômes sauvegardés ont rendu leur case
+    others = list(state.ghosts)
+    state.restore(snapshot)
+    assert [(ghost.x, ghost.y, ghost.color) for ghost in state.ghosts] == positions
+    assert all(pacman.GHOST_REGISTRY.owners[ghost.slot] is ghost for ghost in state.ghosts)
+    assert all(pacman.GHOST_REGISTRY.owners[ghost.slot] is not ghost for ghost in others)
+
+
+def test_collision_cells():
+    player = pacman.Pacman(5, 5)
+    player.direction = (1, 0)
+    assert pacman.collision_cells(player, (), True) == {(5, 5): None, (6, 5): (-1, 0)}
+    # La longue vue passe avant le croisement sur la case devant Pacman
+    assert pacman.collision_cells(player, [(6, 5), (7, 5)], True) == {
+        (5, 5): None, (6, 5): pacman.LONGUE_VUE_CELL, (7, 5): pacman.LONGUE_VUE_CELL}
+    # Pacman invincible : seules les cases de la longue vue comptent
+    assert pacman.collision_cells(player, [(6, 5)], False) == {(6, 5): pacman.LONGUE_VUE_CELL}
+
+
+def test_personality_ghost_only_routes_at_junctions():
+    maze = pacman.COMPACT_MAZES[0]
+    junctions = pacman.get_junctions(maze)
+    # Virage (deux directions ouvertes, pas en ligne droite) : un fantôme à l'arrêt suit le couloir
+    x, y = next((x, y) for y in range(maze.height) for x in range(maze.width)
+                if maze.cells[y * maze.width + x] != 1 and not junctions[y * maze.width + x]
+                and len(maze.legal_moves(x, y)) == 2
+                and maze.legal_moves(x, y)[0] != tuple(-d for d in maze.legal_moves(x, y)[1]))
+    first, second = maze.legal_moves(x, y)
+    for pacman_pos in ((x + 3 * second[0], y + 3 * second[1]), (x + 3 * first[0], y + 3 * first[1])):
+        ghost = pacman.Ghost(x, y, (255, 192, 203))
+        ghost.direction = (0, 0)
+        ghost.update(maze, pacman_pos, random.Random(0), (0, 0))
+        assert ghost.direction == first
+        ghost.release()
@@ -0,0 +1,24 @@
+import random
+
+import pacman
+import pathfinding
+
+
+def test_hierarchical_path_matches_bfs_on_world_maze():
+    world = pacman.build_world_maze(pacman.COMPACT_MAZES)
+    graph = pathfinding.HierarchicalGraph(world)
+    open_cells = [(x, y) for y in range(world.height) for x in range(world.width)
+                  if world.cells[y * world.width + x] != 1]
+    rng = random.Random(0)
+    for _ in range(300):
+        start, target = rng.sample(open_cells, 2)
+        shortest = pathfinding.bfs_path(world, start, target)
+        path = graph.path(start, target)
+        if shortest is None:
+            assert path is None
+            continue
+        assert path[0] == start and path[-1] == target
+        for cell, following in zip(path, path[1:]):
+            assert following in pathfinding.cell_neighbors(world, *cell)
+        # Presque le plus court : quelques pas de plus au pire, à cause du choix des entrées
+        assert len(shortest) <= len(path) <= len(shortest) + 4
@@ -0,0 +1,61 @@
+import copy
+
+from conftest import MUR_BRIC_INVENTORY, digest, new_game, random_inputs
+
+import pacman
+from replay import Replay, ReplayRecorder
+
+
+def record_game(inventory, difficulty, seed, inputs, invincibilite_bonus=None, capacite_items=()):
+    """Joue une partie en l'enregistrant ; retourne le replay et l'empreinte après chaque tick"""
+    state = pacman.GameState(copy.deepcopy(inventory), list(capacite_items))
+    state.start_with_difficulty(difficulty, invincibilite_bonus, seed=seed)
+    recorder = ReplayRecorder.from_state(state, invincibilite_bonus)
+    digests = []
+    for game_inputs in inputs:
+        if state.game_over or state.won:
+            break
+        recorder.record(game_inputs)
+        pacman.step(state, game_inputs)
+        digests.append(digest(state))
+    return recorder.replay, digests
+
+
+def test_encode_decode():
+    replay, _ = record_game(MUR_BRIC_INVENTORY, 'moyen', 5, random_inputs(5, 300, gadget_chance=0.2))
+    decoded = Replay.from_bytes(replay.to_bytes())
+    assert (decoded.seed, decoded.setup, decoded.ticks) == (replay.seed, replay.setup, replay.ticks)
+    assert [(e.tick, e.directions, e.use_gadget, e.target_cell, e.skip_respawn) for e in decoded.events] == \
+           [(e.tick, e.directions, e.use_gadget, e.target_cell, e.skip_respawn) for e in replay.events]
+
+
+def test_playback_matches_recording():
+    # Bonus d'invincibilité à 0 comme au départ d'une aventure, différent de celui de l'équipement
+    replay, digests = record_game({'capacite1': {'type': 'invincibilité'}}, 'facile', 2, random_inputs(2, 400), 0,
+                                  ['invincibilité'])
+    assert replay.setup['invincibilite_bonus'] == 0
+    player = pacman.ReplayPlayer(Replay.from_bytes(replay.to_bytes()))
+    played = []
+    while not player.finished:
+        player.advance()
+        played.append(digest(player.state))
+    assert played == digests
+
+
+def test_seek_backwards_with_mur_bric():
+    ticks = 3 * pacman.REPLAY_KEYFRAME_TICKS + 50
+    replay, digests = record_game(MUR_BRIC_INVENTORY, 'facile', 3, random_inputs(3, ticks, gadget_chance=0.3))
+    player = pacman.ReplayPlayer(replay)
+    player.seek(replay.ticks)
+    assert digest(player.state) == digests[-1]
+    for tick in (replay.ticks - 10, pacman.REPLAY_KEYFRAME_TICKS + 7, 1, replay.ticks // 2):
+        player.seek(tick)
+        assert digest(player.state) == digests[tick - 1]
+
+
+def test_recorder_detects_equipment_change():
+    state = new_game(MUR_BRIC_INVENTORY)
+    recorder = ReplayRecorder.from_state(state)
+    assert recorder.matches(state)
+    state.inventaire_items['objet0'] = {'type': 'glace'}
+    assert not recorder.matches(state)
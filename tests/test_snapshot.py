@@ -0,0 +1,36 @@
+from conftest import MUR_BRIC_INVENTORY, digest, new_game, play, random_inputs
+
+
+def test_restore_after_mur_bric_use():
+    state = new_game(MUR_BRIC_INVENTORY, 'facile', seed=3)
+    snapshot = state.snapshot()
+    before = digest(state)
+    inputs = random_inputs(3, 400, gadget_chance=0.3)
+    first_run = play(state, inputs)
+    assert isinstance(state.mur_pos, list) or state.mur_use_count  # Le gadget a bien servi
+
+    state.restore(snapshot)
+    assert digest(state) == before
+    assert play(state, inputs) == first_run
+
+
+def test_restore_round_trip_every_difficulty():
+    for seed, difficulty in enumerate(['facile', 'moyen', 'difficile', 'hardcore']):
+        state = new_game(MUR_BRIC_INVENTORY, difficulty, seed=seed)
+        inputs = random_inputs(seed, 600, gadget_chance=0.1)
+        play(state, inputs[:200])
+        snapshot = state.snapshot()
+        middle = digest(state)
+        rest = play(state, inputs[200:])
+        state.restore(snapshot)
+        assert digest(state) == middle
+        assert play(state, inputs[200:]) == rest
+        # La sauvegarde reste utilisable après une restauration
+        state.restore(snapshot)
+        assert digest(state) == middle
+
+
+def test_same_seed_same_digests():
+    inputs = random_inputs(7, 500)
+    runs = [play(new_game({'gadget': {'type': 'bombe téléguidée'}}, 'moyen', seed=7), inputs) for _ in range(2)]
+    assert runs[0] == runs[1]
@@ -0,0 +1,12 @@
+from conftest import new_game
+
+
+def test_new_game_forgets_pending_timers():
+    state = new_game(difficulty='moyen', seed=1)
+    state.ice_tiles[(1, 1)] = 0
+    state.timers.schedule(('glace', (1, 1)), 50, state.expire_ice_tile)
+    state.pacgomme_timers[(1, 1)] = state.timers.schedule(('pacgomme', (1, 1)), 50, state.respawn_pacgomme)
+    state.start_with_difficulty('facile', seed=2)
+    assert state.timers.heap == [] and state.timers.deadlines == {}
+    assert state.pacgomme_timers == {}
+    assert state.timers.remaining(('pacgomme', (1, 1))) is None